@@ -6,10 +6,10 @@
 """
 Contains handlers for the Mito API
 """
-from queue import Queue
+from queue import Empty, Queue
 from threading import Thread
 from time import perf_counter
-from typing import Any, Callable, Dict, List, NoReturn, Union
+from typing import Any, Callable, Dict, List, NoReturn, Optional, Union
 from mitosheet.api.get_csv_files_metadata import get_csv_files_metadata
 from mitosheet.api.get_params import get_params
 from mitosheet.api.get_column_describe import get_column_describe
@@ -18,6 +18,9 @@ from mitosheet.api.get_dataframe_as_excel import get_dataframe_as_excel
 from mitosheet.api.get_excel_file_metadata import get_excel_file_metadata
 from mitosheet.api.get_path_contents import get_path_contents
 from mitosheet.api.get_path_join import get_path_join
+from mitosheet.api.get_sheet_window import (get_binary_sheet_window,
+                                             get_sheet_window,
+                                             prefetch_adjacent_sheet_windows)
 from mitosheet.api.get_unique_value_counts import get_unique_value_counts
 from mitosheet.api.get_split_text_to_columns_preview import get_split_text_to_columns_preview
 from mitosheet.api.get_column_summary_graph import get_column_summary_graph
@@ -27,6 +30,11 @@ from mitosheet.steps_manager import StepsManager
 # As the column summary statistics tab does three calls, we defaulted to this max
 MAX_QUEUED_API_CALLS = 3
 
+# After the frontend gets a window of the rows of a sheet, we prefetch the windows 
+# before and after it. We only keep the latest few, as the user scrolled past the others
+SHEET_WINDOW_API_CALLS = {'get_sheet_window', 'get_binary_sheet_window'}
+MAX_QUEUED_PREFETCHES = 2
+
 # NOTE: BE CAREFUL WITH THIS. When in development mode, you can set it to False
 # so the API calls are handled in the main thread, to make printing easy
 THREADED = True
@@ -43,6 +51,10 @@ class API:
         about most concurrency issues
     -   Note that printing inside of a thread does not work properly! Use sys.stdout.flush() after the print statement.
         See here: https://stackoverflow.com/questions/18234469/python-multithreaded-print-statements-delayed-until-all-threads-complete-executi
+    -   API calls with priority are never dropped, and are handled by their own thread, so 
+        they do not wait behind other API calls, and do not block the main thread.
+    -   When the frontend gets a window of the rows of a sheet, another thread caches the windows
+        before and after it, so they are fast to get when the user scrolls.
     """
 
     def __init__(self, steps_manager: StepsManager, send: Callable):
@@ -56,6 +68,22 @@ class API:
         )
         self.thread.start()
 
+        self.priority_api_queue: Queue = Queue()
+        self.priority_thread = Thread(
+            target=handle_api_event_thread,
+            args=(self.priority_api_queue, steps_manager, send),
+            daemon=True,
+        )
+        self.priority_thread.start()
+
+        self.prefetch_queue: Queue = Queue(MAX_QUEUED_PREFETCHES)
+        self.prefetch_thread = Thread(
+            target=handle_prefetch_thread,
+            args=(self.prefetch_queue, steps_manager),
+            daemon=True,
+        )
+        self.prefetch_thread.start()
+
         # Save some variables for ease
         self.steps_manager = steps_manager
         self.send = send
@@ -68,11 +96,13 @@ class API:
         Because we are using a queue, only events that have not been started
         being processed will get removed.
 
-        If the key 'priority' is in the event, then we handle it in the main
-        thread, as we don't want to drop the event. For example, lazy loading
-        data has priority!
+        If the key 'priority' is in the event, then we put it in the priority
+        queue, which is never full, as we don't want to drop the event. For 
+        example, lazy loading data has priority!
         """
-        if THREADED and "priority" not in event:
+        if THREADED and "priority" in event:
+            self.priority_api_queue.put(event)
+        elif THREADED:
             if self.api_queue.full():
                 # If the queue is full, we drop the first event, and just return a None
                 lost_event = self.api_queue.get()
@@ -83,6 +113,23 @@ class API:
         else:
             handle_api_event(self.send, event, self.steps_manager)
 
+        if THREADED and event['type'] in SHEET_WINDOW_API_CALLS:
+            self.prefetch_adjacent_sheet_windows(event)
+
+    def prefetch_adjacent_sheet_windows(self, event: Dict[str, Any]) -> None:
+        """
+        Queues prefetching the windows before and after the window this event gets.
+        If the queue is full, we drop the oldest prefetch, as the user has scrolled on.
+        """
+        while self.prefetch_queue.full():
+            try:
+                self.prefetch_queue.get_nowait()
+                self.prefetch_queue.task_done()
+            except Empty:
+                break
+
+        self.prefetch_queue.put(event)
+
 
 def handle_api_event_thread(
     queue: Queue, steps_manager: StepsManager, send: Callable
@@ -107,6 +154,25 @@ def handle_api_event_thread(
         except:
             # Log in error if it occurs
             log_event_processed(event, steps_manager, failed=True)
+        finally:
+            queue.task_done()
+
+
+def handle_prefetch_thread(queue: Queue, steps_manager: StepsManager) -> NoReturn:
+    """
+    This is the worker thread function that prefetches the windows before and after
+    the windows that the frontend gets.
+    """
+    while True:
+        event = queue.get()
+        try:
+            prefetch_adjacent_sheet_windows(event['type'], event['params'], steps_manager)
+        except:
+            # Prefetching is just an optimization, so we ignore any errors, as the
+            # frontend gets the window itself if it needs it
+            pass
+        finally:
+            queue.task_done()
 
 
 def handle_api_event(
@@ -118,6 +184,8 @@ def handle_api_event(
     so that the frontend knows how to match the responses.
     """
     result: Union[str, List[str]] = ''
+    # Binary data that is sent along with the result, as buffers
+    buffers: Optional[List[bytes]] = None
     params = event['params']
     start_time = perf_counter()
     failed = False
@@ -145,6 +213,10 @@ def handle_api_event(
             result = get_split_text_to_columns_preview(params, steps_manager)
         elif event["type"] == "get_dataframe_as_excel":
             result = get_dataframe_as_excel(params, steps_manager)
+        elif event["type"] == "get_sheet_window":
+            result = get_sheet_window(params, steps_manager)
+        elif event["type"] == "get_binary_sheet_window":
+            result, buffers = get_binary_sheet_window(params, steps_manager)
         else:
             raise Exception(f"Event: {event} is not a valid API call")
 
@@ -154,4 +226,7 @@ def handle_api_event(
     # Log processing this event (with potential failure)
     log_event_processed(event, steps_manager, failed=failed, start_time=start_time)
 
-    send({"event": "api_response", "id": event["id"], "data": result})
+    if buffers is not None:
+        send({"event": "api_response", "id": event["id"], "data": result}, buffers=buffers)
+    else:
+        send({"event": "api_response", "id": event["id"], "data": result})
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from weakref import ReferenceType, WeakKeyDictionary, ref
+
+from mitosheet.state import State
+from mitosheet.types import ColumnHeader, ColumnID, StepsManagerType
+from mitosheet.utils import (MAX_COLUMNS, NpEncoder, df_window_to_binary,
+                             df_window_to_json_dumpsable)
+
+# The number of windows we cache for each sheet of each steps manager
+MAX_CACHED_SHEET_WINDOWS = 50
+
+# As the data in a state never changes, we cache the windows of the current state 
+# of each steps manager, and throw them away once the current state changes. Each 
+# sheet has its own LRU of windows, so scrolling one sheet does not evict the windows 
+# of the others. We use weak references so that the windows are removed along with the state
+sheet_window_cache: 'WeakKeyDictionary[StepsManagerType, Tuple[ReferenceType[State], Dict[int, OrderedDict[Hashable, Any]]]]' = WeakKeyDictionary()
+sheet_window_cache_lock = Lock()
+
+
+def get_state_sheet_windows(steps_manager: StepsManagerType, state: State) -> 'Optional[Dict[int, OrderedDict[Hashable, Any]]]':
+    """
+    Returns the cached windows of each sheet of the steps manager, if they are 
+    windows of this state.
+    """
+    if steps_manager not in sheet_window_cache:
+        return None
+    cached_state_ref, state_sheet_windows = sheet_window_cache[steps_manager]
+    return state_sheet_windows if cached_state_ref() is state else None
+
+
+def get_cached_sheet_window(steps_manager: StepsManagerType, state: State, sheet_index: int, key: Hashable) -> Optional[Any]:
+    with sheet_window_cache_lock:
+        state_sheet_windows = get_state_sheet_windows(steps_manager, state)
+        if state_sheet_windows is None or key not in state_sheet_windows.get(sheet_index, {}):
+            return None
+        state_sheet_windows[sheet_index].move_to_end(key)
+        return state_sheet_windows[sheet_index][key]
+
+
+def set_cached_sheet_window(steps_manager: StepsManagerType, state: State, sheet_index: int, key: Hashable, sheet_window: Any) -> None:
+    with sheet_window_cache_lock:
+        state_sheet_windows = get_state_sheet_windows(steps_manager, state)
+        if state_sheet_windows is None:
+            state_sheet_windows = {}
+            sheet_window_cache[steps_manager] = (ref(state), state_sheet_windows)
+
+        sheet_windows = state_sheet_windows.setdefault(sheet_index, OrderedDict())
+        sheet_windows[key] = sheet_window
+        while len(sheet_windows) > MAX_CACHED_SHEET_WINDOWS:
+            sheet_windows.popitem(last=False)
+
+
+def get_sheet_window(params: Dict[str, Any], steps_manager: StepsManagerType) -> str:
+    """
+    Sends back a string that can be parsed to a JSON object that contains the
+    rows from row_start up to row_end of the df at sheet_index, for the columns
+    with column_ids. If column_ids is not given, contains the first MAX_COLUMNS
+    columns, like the sheet data does.
+
+    The windows are cached for each step, so scrolling back and forth is fast.
+    """
+    sheet_index: int = params['sheet_index']
+    row_start: int = params['row_start']
+    row_end: int = params['row_end']
+    column_ids = params.get('column_ids')
+
+    state: State = steps_manager.curr_step.final_defined_state
+    key = (row_start, row_end, tuple(column_ids) if column_ids is not None else None)
+    sheet_window = get_cached_sheet_window(steps_manager, state, sheet_index, key)
+    if sheet_window is not None:
+        return sheet_window
+
+    sheet_window = json.dumps(
+        df_window_to_json_dumpsable(
+            state.dfs[sheet_index],
+            state.column_ids.column_header_to_column_id[sheet_index],
+            row_start,
+            row_end,
+            get_sheet_window_column_headers(state, sheet_index, column_ids)
+        ),
+        cls=NpEncoder
+    )
+
+    set_cached_sheet_window(steps_manager, state, sheet_index, key, sheet_window)
+    return sheet_window
+
+
+def get_binary_sheet_window(params: Dict[str, Any], steps_manager: StepsManagerType) -> Tuple[str, List[bytes]]:
+    """
+    Takes the same params as get_sheet_window, but sends back the data of the columns 
+    as a binary buffer, along with a string that can be parsed to a JSON object that 
+    describes where each column is in the buffer. See df_window_to_binary.
+
+    This is only used if binary_sheet_windows is passed to the mitosheet.sheet call.
+    """
+    sheet_index: int = params['sheet_index']
+    row_start: int = params['row_start']
+    row_end: int = params['row_end']
+    column_ids = params.get('column_ids')
+
+    state: State = steps_manager.curr_step.final_defined_state
+    key = ('binary', row_start, row_end, tuple(column_ids) if column_ids is not None else None)
+    binary_sheet_window = get_cached_sheet_window(steps_manager, state, sheet_index, key)
+    if binary_sheet_window is not None:
+        return binary_sheet_window
+
+    schema, buffer = df_window_to_binary(
+        state.dfs[sheet_index],
+        state.column_ids.column_header_to_column_id[sheet_index],
+        row_start,
+        row_end,
+        get_sheet_window_column_headers(state, sheet_index, column_ids)
+    )
+    binary_sheet_window = (json.dumps(schema, cls=NpEncoder), [buffer])
+
+    set_cached_sheet_window(steps_manager, state, sheet_index, key, binary_sheet_window)
+    return binary_sheet_window
+
+
+def prefetch_adjacent_sheet_windows(api_call_type: str, params: Dict[str, Any], steps_manager: StepsManagerType) -> None:
+    """
+    Gets the windows just before and just after the window with params, so that 
+    they are cached when the frontend requests them as the user scrolls. 
+    """
+    state: State = steps_manager.curr_step.final_defined_state
+    sheet_index: int = params['sheet_index']
+    if sheet_index >= len(state.dfs):
+        return
+
+    for adjacent_params in get_adjacent_sheet_window_params(params, state.dfs[sheet_index].shape[0]):
+        # If the step changed, the frontend will request windows of the new step instead
+        if steps_manager.curr_step.final_defined_state is not state:
+            return
+
+        if api_call_type == 'get_binary_sheet_window':
+            get_binary_sheet_window(adjacent_params, steps_manager)
+        else:
+            get_sheet_window(adjacent_params, steps_manager)
+
+
+def get_adjacent_sheet_window_params(params: Dict[str, Any], num_rows: int) -> List[Dict[str, Any]]:
+    """
+    Returns the params for the windows of the same size just before and just after 
+    the window with params, if they contain any rows.
+    """
+    row_start: int = params['row_start']
+    row_end: int = params['row_end']
+    num_window_rows = row_end - row_start
+    if num_window_rows <= 0:
+        return []
+
+    adjacent_params = []
+    if row_end < num_rows:
+        adjacent_params.append({**params, 'row_start': row_end, 'row_end': row_end + num_window_rows})
+    if row_start > 0:
+        adjacent_params.append({**params, 'row_start': max(row_start - num_window_rows, 0), 'row_end': row_start})
+    return adjacent_params
+
+
+def get_sheet_window_column_headers(state: State, sheet_index: int, column_ids: Optional[List[ColumnID]]) -> List[ColumnHeader]:
+    """
+    Returns the column headers of the columns with column_ids, or the first 
+    MAX_COLUMNS columns, like the sheet data has, if column_ids is None.
+    """
+    if column_ids is None:
+        return list(state.dfs[sheet_index].columns[:MAX_COLUMNS])
+    return state.column_ids.get_column_headers_by_ids(sheet_index, column_ids)
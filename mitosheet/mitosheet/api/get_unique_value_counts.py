@@ -4,7 +4,7 @@
 # Copyright (c) Saga Inc.
 # Distributed under the terms of the GPL License.
 import json
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import pandas as pd
 from mitosheet.types import StepsManagerType
@@ -14,6 +14,48 @@ from mitosheet.utils import get_row_data_array
 # See comments in function description below.
 MAX_UNIQUE_VALUES = 1_000
 
+# We count the values of large columns in chunks of this many rows, as pandas allocates
+# memory for the number of values it counts, rather than the number of unique values
+VALUE_COUNTS_CHUNK_SIZE = 16_384
+
+def get_value_counts(series: pd.Series) -> pd.Series:
+    """
+    Returns the same counts as series.value_counts(dropna=False), but for large 
+    series only uses memory proportional to the number of unique values. 
+    """
+    if len(series) <= VALUE_COUNTS_CHUNK_SIZE:
+        return series.value_counts(dropna=False)
+
+    def combine_value_counts(all_value_counts: List[pd.Series]) -> pd.Series:
+        # NOTE: groupby only keeps NaN values with dropna=False, which needs pandas 1.1, 
+        # so we add up the counts of the NaN values on their own
+        value_counts = pd.concat(all_value_counts)
+        is_nan = value_counts.index.isna()
+        combined_value_counts = value_counts[~is_nan].groupby(level=0, sort=False).sum()
+        if not is_nan.any():
+            return combined_value_counts
+
+        nan_value_counts = value_counts[is_nan].iloc[:1].copy()
+        nan_value_counts.iloc[0] = value_counts[is_nan].sum()
+        return pd.concat([combined_value_counts, nan_value_counts])
+
+    value_counts = series.iloc[:0].value_counts(dropna=False)
+    chunk_value_counts: List[pd.Series] = []
+    num_chunk_value_counts = 0
+    for chunk_start in range(0, len(series), VALUE_COUNTS_CHUNK_SIZE):
+        chunk_value_counts.append(series.iloc[chunk_start:chunk_start + VALUE_COUNTS_CHUNK_SIZE].value_counts(dropna=False))
+        num_chunk_value_counts += len(chunk_value_counts[-1])
+
+        # We combine the counts of the chunks once there are more of them than there are 
+        # unique values so far, so we never keep much more than the counts we return
+        if num_chunk_value_counts >= max(len(value_counts), 4 * MAX_UNIQUE_VALUES):
+            value_counts = combine_value_counts([value_counts] + chunk_value_counts)
+            chunk_value_counts = []
+            num_chunk_value_counts = 0
+
+    # We sort with a stable sort, so values with the same count stay in the order they were counted in
+    return combine_value_counts([value_counts] + chunk_value_counts).sort_values(ascending=False, kind='mergesort')
+
 def get_unique_value_counts(params: Dict[str, Any], steps_manager: StepsManagerType) -> str:
     """
     Sends back a string that can be parsed to a JSON object that
@@ -37,8 +79,9 @@ def get_unique_value_counts(params: Dict[str, Any], steps_manager: StepsManagerT
     
     series: pd.Series = steps_manager.dfs[sheet_index][column_header]
 
-    unique_value_counts_percents_series = series.value_counts(normalize=True, dropna=False)
-    unique_value_counts_series = series.value_counts(dropna=False)
+    unique_value_counts_series = get_value_counts(series)
+    # NOTE: this is the same as series.value_counts(normalize=True, dropna=False)
+    unique_value_counts_percents_series = unique_value_counts_series / len(series)
     
     unique_value_counts_df = pd.DataFrame({
         'values': unique_value_counts_percents_series.index,
@@ -6,7 +6,7 @@
 
 
 from copy import copy
-from typing import TYPE_CHECKING, List, Optional, Any, Type
+from typing import TYPE_CHECKING, List, Optional, Any, Set, Tuple, Type
 
 from mitosheet.code_chunks.code_chunk import CodeChunk
 from mitosheet.code_chunks.step_performers.column_steps.delete_column_code_chunk import DeleteColumnsCodeChunk
@@ -20,29 +20,77 @@ else:
     Step = Any
     
 
-def get_code_chunks(all_steps: List[Step], optimize: bool=True) -> List[CodeChunk]:
+class OptimizedCodeChunksCache:
+    """
+    Stores the optimized code chunks for the last list of steps that was transpiled, 
+    so that transpiling the same steps again does not optimize them again.
+
+    NOTE: we cannot just optimize the code chunks of new steps onto the end of the
+    optimized code chunks of the previous steps, as the order code chunks are combined
+    in changes the result. For example, a concat followed by deleting all the dataframes
+    it uses only optimizes to just the deletes if they are all optimized together. 
+    """
+
+    def __init__(self) -> None:
+        # The code chunks of each step that were optimized, in order
+        self.step_code_chunks: List[Tuple[CodeChunk, ...]] = []
+        self.optimized_code_chunks: List[CodeChunk] = []
+
+    def get_optimized_code_chunks(self, step_code_chunks: List[Tuple[CodeChunk, ...]]) -> List[CodeChunk]:
+        """
+        Returns the optimized code chunks for the code chunks of the given steps,
+        only optimizing them if they are different than the last call.
+        """
+        is_cached = len(self.step_code_chunks) == len(step_code_chunks) and all(
+            cached_code_chunks is code_chunks 
+            for cached_code_chunks, code_chunks in zip(self.step_code_chunks, step_code_chunks)
+        )
+
+        if not is_cached:
+            all_code_chunks: List[CodeChunk] = []
+            for code_chunks in step_code_chunks:
+                all_code_chunks.extend(code_chunks)
+
+            self.step_code_chunks = copy(step_code_chunks)
+            self.optimized_code_chunks = optimize_code_chunks(all_code_chunks)
+
+        return copy(self.optimized_code_chunks)
+
+
+def get_code_chunks(
+        all_steps: List[Step], 
+        optimize: bool=True, 
+        step_indexes_to_skip: Optional[Set[int]]=None,
+        optimized_code_chunks_cache: Optional[OptimizedCodeChunksCache]=None
+    ) -> List[CodeChunk]:
     """
     A utility for taking all the steps in the steps manager, and returning a list
     of CodeChunks that correspond to these steps. 
 
     optimize is by default True, which results in these CodeChunks being optimized
     down to the smallest possible list of CodeChunks that implements the same ops.
+
+    If step_indexes_to_skip is not passed, they are computed from all_steps. If an
+    optimized_code_chunks_cache is passed, the code chunks are only optimized if the
+    steps changed since the last time it was used.
     """
-    from mitosheet.steps_manager import get_step_indexes_to_skip
-    step_indexes_to_skip = get_step_indexes_to_skip(all_steps)
+    if step_indexes_to_skip is None:
+        from mitosheet.steps_manager import get_step_indexes_to_skip
+        step_indexes_to_skip = get_step_indexes_to_skip(all_steps)
+
+    # Skip the initalize step, or any step we should skip. The code chunks of each
+    # step are cached on the step, so we only transpile the steps that are new
+    step_code_chunks: List[Tuple[CodeChunk, ...]] = [
+        step.code_chunks for step_index, step in enumerate(all_steps)
+        if step.step_type != 'initialize' and step_index not in step_indexes_to_skip
+    ]
+
+    if optimize and optimized_code_chunks_cache is not None:
+        return optimized_code_chunks_cache.get_optimized_code_chunks(step_code_chunks)
 
     all_code_chunks: List[CodeChunk] = []
-    for step_index, step in enumerate(all_steps):
-        # Skip the initalize step, or any step we should skip
-        if step.step_type == 'initialize' or step_index in step_indexes_to_skip:
-            continue
-
-        all_code_chunks.extend(step.step_performer.transpile(
-            step.prev_state, # type: ignore
-            step.post_state, # type: ignore
-            step.params,
-            step.execution_data,
-        ))
+    for code_chunks in step_code_chunks:
+        all_code_chunks.extend(code_chunks)
 
     if optimize:
         code_chunks_list = optimize_code_chunks(all_code_chunks)
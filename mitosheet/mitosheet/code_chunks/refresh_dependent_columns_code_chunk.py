@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from mitosheet.code_chunks.code_chunk import CodeChunk
+from mitosheet.parser import parse_formula
+
+if TYPE_CHECKING:
+    from mitosheet.state import State
+else:
+    State = Any
+
+
+class RefreshDependentColumnsCodeChunk(CodeChunk):
+
+    def get_display_name(self) -> str:
+        return 'Refreshed dependent columns'
+    
+    def get_description_comment(self) -> str:
+        sheet_index = self.get_param('sheet_index')
+        column_ids = self.get_param('column_ids')
+        column_headers = self.post_state.column_ids.get_column_headers_by_ids(sheet_index, column_ids)
+        return f'Recalculated the formulas in {", ".join(map(str, column_headers))}'
+
+    def get_code(self) -> List[str]:
+        sheet_index = self.get_param('sheet_index')
+        column_ids = self.get_param('column_ids')
+
+        code = []
+        for column_id in column_ids:
+            column_header = self.post_state.column_ids.get_column_header_by_id(sheet_index, column_id)
+            python_code, _, _ = parse_formula(
+                self.post_state.column_spreadsheet_code[sheet_index][column_id], 
+                column_header,
+                self.post_state.dfs[sheet_index].keys(),
+                df_name=self.post_state.df_names[sheet_index]
+            )
+            code.append(python_code)
+
+        return code
+
+    def get_edited_sheet_indexes(self) -> List[int]:
+        return [self.get_param('sheet_index')]
+
+
+def get_refresh_dependent_columns_code_chunks(
+        prev_state: State, 
+        post_state: State, 
+        sheet_index: int, 
+        execution_data: Optional[Dict[str, Any]]
+    ) -> List[CodeChunk]:
+    """
+    Steps that modify columns recalculate the formulas that depend on these columns, 
+    and save the ids of the recalculated columns in their execution data. This returns 
+    the code chunks that recalculate them, if there are any.
+    """
+    refreshed_column_ids = execution_data.get('refreshed_column_ids') if execution_data is not None else None
+    if not refreshed_column_ids:
+        return []
+
+    return [
+        RefreshDependentColumnsCodeChunk(
+            prev_state, 
+            post_state, 
+            {'sheet_index': sheet_index, 'column_ids': refreshed_column_ids}, 
+            execution_data
+        )
+    ]
@@ -26,7 +26,8 @@ class DataframeDeleteCodeChunk(CodeChunk):
 
     def _combine_right_dataframe_delete(self, other_code_chunk: "DataframeDeleteCodeChunk") -> CodeChunk:
         first_sheet_indexes = self.get_param('sheet_indexes')
-        second_sheet_indexes = other_code_chunk.get_param('sheet_indexes')
+        # NOTE: we copy these, as the code chunks of a step are cached, so we cannot change their params
+        second_sheet_indexes = copy(other_code_chunk.get_param('sheet_indexes'))
 
         # Because we don't have sheet ids, we need to bump any deleted dataframes
         # that are greater than those deleted first, so that they have the correct
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains the ColumnDependencyGraph, which tracks which formula columns in
+a sheet reference which other columns, so that when a column is modified,
+we can recalculate only the formula columns that depend on it.
+"""
+from typing import Collection, Dict, List, Mapping, Set
+
+from mitosheet.column_headers import ColumnIDMap
+from mitosheet.errors import MitoError, make_circular_reference_error
+from mitosheet.parser import get_parsed_formula
+from mitosheet.types import ColumnHeader, ColumnID
+
+
+class ColumnDependencyGraph():
+    """
+    A graph with an edge from each column to each formula column that
+    references it, built from the column_spreadsheet_code of a sheet.
+
+    Formulas that reference their own column (e.g. setting A to =A + 1)
+    transform the column once, rather than calculating it from other columns,
+    and so they are not recalculated and are not in the graph. Formulas that
+    no longer parse, or that reference columns that no longer exist, cannot be
+    recalculated, and so they are not in the graph either.
+    """
+
+    def __init__(
+            self,
+            column_spreadsheet_code: Mapping[ColumnID, str],
+            column_ids: ColumnIDMap,
+            sheet_index: int,
+            column_headers: Collection[ColumnHeader]
+        ):
+        # The position of each column in the sheet, which we use to order columns that
+        # do not depend on eachother, so that they are always recalculated in the same order
+        self.column_positions: Dict[ColumnID, int] = {}
+        self.dependencies: Dict[ColumnID, Set[ColumnID]] = {}
+        self.dependents: Dict[ColumnID, Set[ColumnID]] = {}
+
+        for column_position, (column_id, spreadsheet_code) in enumerate(column_spreadsheet_code.items()):
+            self.column_positions[column_id] = column_position
+            if spreadsheet_code == '':
+                continue
+
+            try:
+                column_header = column_ids.get_column_header_by_id(sheet_index, column_id)
+                parsed_formula = get_parsed_formula(spreadsheet_code, column_header, column_headers)
+                dependencies = set(column_ids.get_column_ids(sheet_index, parsed_formula.column_header_dependencies))
+                if len(parsed_formula.unresolved_names) > 0:
+                    continue
+            except (MitoError, SyntaxError):
+                continue
+
+            if column_id in dependencies or len(dependencies) == 0:
+                continue
+
+            self.dependencies[column_id] = dependencies
+            for dependency in dependencies:
+                self.dependents.setdefault(dependency, set()).add(column_id)
+
+    def get_column_ids_to_recalculate(self, column_ids: Collection[ColumnID]) -> List[ColumnID]:
+        """
+        Returns the ids of the formula columns that depend on the columns with the
+        given column_ids, directly or through other formula columns, ordered so that
+        each column comes after all of the columns it depends on.
+
+        The columns with the given column_ids are not recalculated themselves, as they
+        were just modified. Raises a circular_reference_error if there is a cycle
+        in the columns that would be recalculated.
+        """
+        return [
+            column_id
+            for column_id_level in self.get_column_id_levels_to_recalculate(column_ids)
+            for column_id in column_id_level
+        ]
+
+    def get_column_id_levels_to_recalculate(self, column_ids: Collection[ColumnID]) -> List[List[ColumnID]]:
+        """
+        Returns the same columns as get_column_ids_to_recalculate, split into levels,
+        where each column only depends on columns in earlier levels. As the columns 
+        in a level do not depend on eachother, they can be recalculated at the same time.
+
+        The columns in each level are ordered by their position in the sheet.
+        """
+        # First, find all the columns that depend on the modified columns
+        reachable_column_ids = set(column_ids)
+        column_ids_to_visit = list(column_ids)
+        while len(column_ids_to_visit) > 0:
+            for dependent in self.dependents.get(column_ids_to_visit.pop(), set()):
+                if dependent not in reachable_column_ids:
+                    reachable_column_ids.add(dependent)
+                    column_ids_to_visit.append(dependent)
+
+        if len(reachable_column_ids) == len(column_ids):
+            return []
+
+        # Then, we sort these columns topologically, only counting the dependencies that
+        # are recalculated, as the other dependencies are already up to date
+        num_dependencies = {
+            column_id: len(self.dependencies.get(column_id, set()) & reachable_column_ids)
+            for column_id in reachable_column_ids
+        }
+        level = [column_id for column_id, num_column_dependencies in num_dependencies.items() if num_column_dependencies == 0]
+
+        column_id_levels = []
+        num_sorted_column_ids = 0
+        while len(level) > 0:
+            level.sort(key=lambda column_id: self.column_positions.get(column_id, -1))
+            column_id_levels.append(level)
+            num_sorted_column_ids += len(level)
+
+            next_level = []
+            for column_id in level:
+                for dependent in self.dependents.get(column_id, set()):
+                    num_dependencies[dependent] -= 1
+                    if num_dependencies[dependent] == 0:
+                        next_level.append(dependent)
+            level = next_level
+
+        # If some columns never had all their dependencies calculated, they are in a cycle
+        if num_sorted_column_ids < len(reachable_column_ids):
+            raise make_circular_reference_error()
+
+        column_id_levels = [
+            [column_id for column_id in column_id_level if column_id not in column_ids]
+            for column_id_level in column_id_levels
+        ]
+        return [column_id_level for column_id_level in column_id_levels if len(column_id_level) > 0]
@@ -18,11 +18,12 @@ of the column header. For string column headers, they are just
 themselves.
 """
 import random
-from typing import Any, Collection, Dict, List
+from typing import Any, Collection, Dict, List, MutableMapping
 
 import pandas as pd
 
 from mitosheet.errors import make_no_column_error
+from mitosheet.persistent_dict import copy_persistent_dict
 from mitosheet.types import ColumnHeader, ColumnID, MultiLevelColumnHeader
 
 
@@ -120,8 +121,8 @@ class ColumnIDMap():
     """
 
     def __init__(self, dfs: Collection[pd.DataFrame]):
-        self.column_id_to_column_header: List[Dict[ColumnID, ColumnHeader]] = [dict() for _ in range(len(dfs))]
-        self.column_header_to_column_id: List[Dict[ColumnHeader, ColumnID]] = [dict() for _ in range(len(dfs))]
+        self.column_id_to_column_header: List[MutableMapping[ColumnID, ColumnHeader]] = [dict() for _ in range(len(dfs))]
+        self.column_header_to_column_id: List[MutableMapping[ColumnHeader, ColumnID]] = [dict() for _ in range(len(dfs))]
 
         for sheet_index, df in enumerate(dfs):
             for column_header in df.keys():
@@ -129,6 +130,16 @@ class ColumnIDMap():
                 self.column_id_to_column_header[sheet_index][column_id] = column_header
                 self.column_header_to_column_id[sheet_index][column_header] = column_id
 
+    def copy(self) -> "ColumnIDMap":
+        """
+        Returns a copy of this ColumnIDMap, which shares all of the mappings
+        that are not changed after the copy with this ColumnIDMap.
+        """
+        new_column_ids = ColumnIDMap([])
+        new_column_ids.column_id_to_column_header = [copy_persistent_dict(d) for d in self.column_id_to_column_header]
+        new_column_ids.column_header_to_column_id = [copy_persistent_dict(d) for d in self.column_header_to_column_id]
+        return new_column_ids
+
     def set_column_header(self, sheet_index: int, column_id: ColumnID, column_header: ColumnHeader) -> None:
         """
         Sets a column id and column header to match to eachother. 
@@ -151,7 +162,7 @@ class ColumnIDMap():
         self.column_id_to_column_header[sheet_index][column_id] = column_header
         self.column_header_to_column_id[sheet_index][column_header] = column_id
 
-    def add_df(self, df: pd.DataFrame, sheet_index: int=None, use_deprecated_id_algorithm: bool=False) -> Dict[str, ColumnHeader]:
+    def add_df(self, df: pd.DataFrame, sheet_index: int=None, use_deprecated_id_algorithm: bool=False) -> MutableMapping[str, ColumnHeader]:
         """
         Adds all of the keys for the new dataframe to the column id 
         mappings.
@@ -175,6 +186,21 @@ class ColumnIDMap():
         
         return self.column_id_to_column_header[sheet_index]
 
+    def set_sheet_from_column_ids(self, column_ids: "ColumnIDMap", sheet_index: int) -> None:
+        """
+        Sets the mappings for the sheet at sheet_index to be a copy of the mappings
+        for the same sheet in the other column_ids. If sheet_index is one past the
+        last sheet, then the sheet is appended.
+        """
+        column_id_to_column_header = copy_persistent_dict(column_ids.column_id_to_column_header[sheet_index])
+        column_header_to_column_id = copy_persistent_dict(column_ids.column_header_to_column_id[sheet_index])
+        if sheet_index == len(self.column_id_to_column_header):
+            self.column_id_to_column_header.append(column_id_to_column_header)
+            self.column_header_to_column_id.append(column_header_to_column_id)
+        else:
+            self.column_id_to_column_header[sheet_index] = column_id_to_column_header
+            self.column_header_to_column_id[sheet_index] = column_header_to_column_id
+
     def remove_df(self, sheet_index: int) -> None:
         """
         Deletes the tracking of this dataframe from the column
@@ -221,7 +247,7 @@ class ColumnIDMap():
     def get_column_headers(self, sheet_index: int) -> List[ColumnHeader]:
         return list(self.column_id_to_column_header[sheet_index].values())
 
-    def get_column_ids_map(self, sheet_index: int) -> Dict[str, ColumnHeader]:
+    def get_column_ids_map(self, sheet_index: int) -> MutableMapping[str, ColumnHeader]:
         return self.column_id_to_column_header[sheet_index]
 
     def get_column_id_by_header(self, sheet_index: int, column_header: ColumnHeader) -> str:
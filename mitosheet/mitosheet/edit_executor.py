@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains the EditExecutor, which executes edit events in a worker thread,
+so that long running edits do not block the comm, and can be cancelled.
+
+Cancelling is cooperative: pandas cannot be interrupted in the middle of
+an operation, so the executing edit checks if it was cancelled between
+steps, and right before it updates the StepsManager. Once an edit is
+cancelled it can never update the StepsManager, so the frontend is told
+that it was cancelled right away, even though the worker thread may keep
+running until it reaches one of these checks.
+
+Any other event that changes the steps is queued behind the edit in flight,
+in its own worker thread that waits for the edit to finish, so they never run
+at the same time. The comm is never blocked on an edit in flight for longer 
+than SECONDS_BEFORE_BACKGROUND_EXECUTION, so it can always read a cancel_edit.
+"""
+import time
+from contextlib import contextmanager
+from threading import Event, Lock, Thread, local
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from mitosheet.errors import make_edit_cancelled_error
+
+# How long we wait for an edit to finish before we let it execute in the
+# background, and start sending progress events to the frontend
+SECONDS_BEFORE_BACKGROUND_EXECUTION = 0.5
+
+# The edit that is being executed on the current thread, if there is one
+_current_edit_execution = local()
+
+
+class EditExecution:
+    """
+    An edit that is being executed, which can be cancelled until it
+    commits its result to the StepsManager.
+    """
+
+    def __init__(self, edit_id: str, send: Callable):
+        self.edit_id = edit_id
+        self.send = send
+        self.start_time = time.perf_counter()
+
+        # Cancelling and committing are done under the lock, so that exactly
+        # one of them happens once the edit is in flight
+        self.lock = Lock()
+        self.cancelled = Event()
+        self.committed = False
+
+        # We only send progress events once the edit runs in the background
+        self.in_background = False
+
+        self.result: Optional[bool] = None
+
+    def cancel(self) -> bool:
+        """
+        Cancels the edit, returning True if it has not committed
+        its result, and so was cancelled.
+        """
+        with self.lock:
+            if self.committed:
+                return False
+            self.cancelled.set()
+            return True
+
+    def check_cancelled(self) -> None:
+        if self.cancelled.is_set():
+            raise make_edit_cancelled_error()
+
+    def report_progress(self, num_steps_executed: int, num_steps: int) -> None:
+        if not self.in_background:
+            return
+
+        self.send({
+            'event': 'edit_progress',
+            'edit_id': self.edit_id,
+            'data': {
+                'num_steps_executed': num_steps_executed,
+                'num_steps': num_steps,
+                'elapsed_seconds': round(time.perf_counter() - self.start_time, 1)
+            }
+        })
+
+
+def get_current_edit_execution() -> Optional[EditExecution]:
+    return getattr(_current_edit_execution, 'edit_execution', None)
+
+
+def check_edit_cancelled() -> None:
+    """
+    Raises an edit_cancelled_error if the edit being executed on this
+    thread was cancelled. Does nothing if no edit is being executed.
+    """
+    edit_execution = get_current_edit_execution()
+    if edit_execution is not None:
+        edit_execution.check_cancelled()
+
+
+def report_edit_progress(num_steps_executed: int, num_steps: int) -> None:
+    """
+    Sends a progress event for the edit being executed on this thread,
+    if it is executing in the background.
+    """
+    edit_execution = get_current_edit_execution()
+    if edit_execution is not None:
+        edit_execution.report_progress(num_steps_executed, num_steps)
+
+
+@contextmanager
+def commit_edit() -> Iterator[None]:
+    """
+    A context manager to wrap any update to the StepsManager in. If the
+    edit being executed on this thread was cancelled, this raises an
+    edit_cancelled_error instead, and otherwise it stops the edit from
+    being cancelled.
+    """
+    edit_execution = get_current_edit_execution()
+    if edit_execution is None:
+        yield
+        return
+
+    with edit_execution.lock:
+        edit_execution.check_cancelled()
+        edit_execution.committed = True
+        yield
+
+
+class EditExecutor:
+    """
+    Executes edits in worker threads, one at a time, in the order they were sent.
+
+    If the edit finishes within wait_seconds, it is as if it was executed in
+    the calling thread. Otherwise, the calling thread returns, and the edit
+    keeps executing in the background, where it can be cancelled.
+    """
+
+    def __init__(self, send: Callable, wait_seconds: Optional[float]=SECONDS_BEFORE_BACKGROUND_EXECUTION):
+        self.send = send
+        self.wait_seconds = wait_seconds
+
+        # The edits that have not finished executing, by their id
+        self.edit_executions: Dict[str, EditExecution] = dict()
+        # The worker thread of the last event that was executed, which waits
+        # for the worker threads of all the events before it to finish
+        self.thread: Optional[Thread] = None
+        # The result of the last edit that finished executing
+        self.result: Optional[bool] = None
+
+    def execute(self, event: Dict[str, Any], process_event: Callable[[Dict[str, Any]], bool]) -> Optional[bool]:
+        """
+        Executes process_event on the event in a worker thread, once the edit in flight
+        has finished. Returns the result of process_event if it finished in wait_seconds, 
+        and otherwise returns None.
+        """
+        edit_execution = EditExecution(event['id'], self.send)
+        previous_thread = self.thread
+
+        def run() -> None:
+            # Edits change the StepsManager, so we wait for any edit in flight to finish first
+            if previous_thread is not None:
+                previous_thread.join()
+
+            _current_edit_execution.edit_execution = edit_execution
+            try:
+                edit_execution.result = process_event(event)
+                self.result = edit_execution.result
+            finally:
+                _current_edit_execution.edit_execution = None
+                self.edit_executions.pop(edit_execution.edit_id, None)
+
+        self.edit_executions[edit_execution.edit_id] = edit_execution
+        thread = self.thread = Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(self.wait_seconds)
+
+        if thread.is_alive():
+            edit_execution.in_background = True
+            edit_execution.report_progress(0, 0)
+            return None
+
+        return edit_execution.result
+
+    def execute_after_edit_in_flight(self, event: Dict[str, Any], process_event: Callable[[Dict[str, Any]], bool]) -> Optional[bool]:
+        """
+        Executes process_event on an event that is not an edit, but still changes the 
+        StepsManager. If there is no edit in flight, this executes it in the calling thread 
+        and returns its result. Otherwise, it is executed in a worker thread once the edit 
+        in flight has finished, and this returns None.
+        """
+        if self.thread is None or not self.thread.is_alive():
+            return process_event(event)
+
+        previous_thread = self.thread
+        def run() -> None:
+            previous_thread.join()
+            process_event(event)
+
+        self.thread = Thread(target=run, daemon=True)
+        self.thread.start()
+        return None
+
+    def wait_for_edit_in_flight(self) -> None:
+        """
+        Waits for the edit in flight, and any events queued behind it, to finish. 
+        Even if the edit was cancelled, its worker thread uses the StepsManager until 
+        it reaches a cancellation check, so we wait for it to finish too.
+        """
+        if self.thread is not None:
+            self.thread.join()
+
+    def cancel(self, edit_id: str) -> bool:
+        """
+        Cancels the edit with the given id, if it is in flight or waiting to execute, 
+        and has not committed its result. Returns True if it was cancelled.
+        """
+        edit_execution = self.edit_executions.get(edit_id)
+        if edit_execution is None:
+            return False
+        return edit_execution.cancel()
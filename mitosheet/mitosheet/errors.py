@@ -245,6 +245,20 @@ def make_execution_error(error_modal: bool=True) -> MitoError:
         error_modal=error_modal
     )
 
+def make_edit_cancelled_error() -> MitoError:
+    """
+    Helper function for creating a edit_cancelled_error.
+
+    Occurs when:
+    -  the user cancels an edit that is still executing. The edit is not applied.
+    """
+    return MitoError(
+        'edit_cancelled_error',
+        'Edit Cancelled',
+        f'The edit was cancelled before it finished, and so it was not applied.',
+        error_modal=False
+    )
+
 def make_function_execution_error(function: str) -> MitoError:
     """
     Helper function for creating a function_execution_error.
@@ -21,7 +21,7 @@ import json
 import random
 from typing import Dict, Optional
 
-from mitosheet.user.db import USER_JSON_PATH, get_user_field
+from mitosheet.user.db import USER_JSON_PATH, get_user_field, set_user_json_object
 
 def get_random_variant() -> str:
     """Returns "A" or "B" with 50% probability"""
@@ -54,8 +54,7 @@ def set_experiment(experiment_id: str, variant: str) -> None:
 
     with open(USER_JSON_PATH, 'r') as user_file_old:
         old_user_json = json.load(user_file_old)
-        old_user_json[UJ_EXPERIMENT]['experiment_id'] = experiment_id
-        old_user_json[UJ_EXPERIMENT]['variant'] = variant
+    old_user_json[UJ_EXPERIMENT]['experiment_id'] = experiment_id
+    old_user_json[UJ_EXPERIMENT]['variant'] = variant
 
-        with open(USER_JSON_PATH, 'w+') as f:
-            f.write(json.dumps(old_user_json))
+    set_user_json_object(old_user_json)
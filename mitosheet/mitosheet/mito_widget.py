@@ -9,7 +9,8 @@ Main file containing the mito widget.
 """
 import json
 import time
-from typing import Any, Dict, List, Optional, Union
+from threading import RLock, Timer
+from typing import Any, Collection, Dict, List, Optional, Set, Union
 
 import pandas as pd
 import traitlets as t
@@ -18,19 +19,55 @@ from ipywidgets import DOMWidget
 from mitosheet._frontend import module_name, module_version
 from mitosheet.api import API
 from mitosheet.data_in_mito import DataTypeInMito
+from mitosheet.edit_executor import (SECONDS_BEFORE_BACKGROUND_EXECUTION,
+                                     EditExecutor)
 from mitosheet.errors import (MitoError, get_recent_traceback,
-                              make_execution_error)
+                              make_edit_cancelled_error, make_execution_error)
 from mitosheet.saved_analyses import write_analysis
 from mitosheet.steps_manager import StepsManager
 from mitosheet.telemetry.telemetry_utils import (log, log_event_processed,
                                                  telemetry_turned_on)
+from mitosheet.updates.append_user_field import APPEND_USER_FIELD_UPDATE
+from mitosheet.updates.go_pro import GO_PRO_UPDATE
+from mitosheet.updates.render_count import RENDER_COUNT_UPDATE
 from mitosheet.updates.replay_analysis import REPLAY_ANALYSIS_UPDATE
+from mitosheet.updates.save_analysis import SAVE_ANALYSIS_UPDATE
+from mitosheet.updates.set_user_field_update import SET_USER_FIELD_UPDATE
+from mitosheet.updates.update_feedback_v2_object import \
+    UPDATE_FEEDBACK_V2_OBJECT_UPDATE
 from mitosheet.user import is_local_deployment, should_upgrade_mitosheet
 from mitosheet.user.db import get_user_field
 from mitosheet.user.location import is_in_google_colab, is_in_vs_code
 from mitosheet.user.schemas import (UJ_MITOSHEET_LAST_FIFTY_USAGES,
                                     UJ_RECEIVED_TOURS, UJ_USER_EMAIL)
 from mitosheet.user.utils import is_excel_import_enabled, is_pro, is_running_test
+from mitosheet.utils import NpEncoder, compress_json, get_json_hash
+
+# The variables that are shared between the backend and the frontend
+SHARED_STATE_VARIABLES = {'sheet_data_json', 'step_summary_list_json', 'analysis_data_json', 'user_profile_json'}
+# The shared state variables that change when the steps change
+STEPS_SHARED_STATE_VARIABLES = {'sheet_data_json', 'step_summary_list_json', 'analysis_data_json'}
+
+# The shared state variables that each update event might change, so we only recompute 
+# these. Any update event not listed here might change all of them. NOTE: all update 
+# events change the analysis data, as it contains the number of update events
+UPDATE_EVENT_TYPE_TO_SHARED_STATE_VARIABLES = {
+    RENDER_COUNT_UPDATE['event_type']: {'analysis_data_json'},
+    SAVE_ANALYSIS_UPDATE['event_type']: {'analysis_data_json'},
+    SET_USER_FIELD_UPDATE['event_type']: {'analysis_data_json', 'user_profile_json'},
+    APPEND_USER_FIELD_UPDATE['event_type']: {'analysis_data_json', 'user_profile_json'},
+    UPDATE_FEEDBACK_V2_OBJECT_UPDATE['event_type']: {'analysis_data_json', 'user_profile_json'},
+    # Going pro changes if the code is optimized, as well as the user profile
+    GO_PRO_UPDATE['event_type']: {'analysis_data_json', 'user_profile_json'},
+}
+
+# Update events that are processed within this many seconds of each other are 
+# synced to the frontend at once, and then all responded to
+SHARED_STATE_COALESCING_SECONDS = 0.02
+
+# If compress_sheet_data is passed to the mitosheet.sheet call, sheet data and sheet data 
+# patches that are at least this large are compressed before they are sent to the frontend
+SHEET_DATA_COMPRESSION_THRESHOLD_BYTES = 10_000
 
 
 class MitoWidget(DOMWidget):
@@ -47,18 +84,22 @@ class MitoWidget(DOMWidget):
 
     sheet_data_json = t.Unicode('').tag(sync=True) # type: ignore
     analysis_data_json = t.Unicode('').tag(sync=True) # type: ignore
+    step_summary_list_json = t.Unicode('').tag(sync=True) # type: ignore
     user_profile_json = t.Unicode('').tag(sync=True) # type: ignore
     
-    def __init__(self, *args: List[Union[pd.DataFrame, str]], analysis_to_replay: str=None):
+    def __init__(self, *args: List[Union[pd.DataFrame, str]], analysis_to_replay: str=None, memory_budget_mb: float=None, num_replay_processes: int=None, step_result_cache_mb: float=None, binary_sheet_windows: bool=False, compress_sheet_data: bool=False, num_formula_processes: int=None):
         """
         Takes a list of dataframes and strings that are paths to CSV files
         passed through *args.
+
+        If compress_sheet_data is True, large sheet data is sent to the frontend
+        compressed, rather than as JSON.
         """
         # Call the DOMWidget constructor to set up the widget properly
         super(MitoWidget, self).__init__()
             
         # Set up the state container to hold private widget state
-        self.steps_manager = StepsManager(args, analysis_to_replay=analysis_to_replay)
+        self.steps_manager = StepsManager(args, analysis_to_replay=analysis_to_replay, memory_budget_mb=memory_budget_mb, num_replay_processes=num_replay_processes, step_result_cache_mb=step_result_cache_mb, binary_sheet_windows=binary_sheet_windows, num_formula_processes=num_formula_processes)
 
         # Set up message handler
         self.on_msg(self.receive_message)
@@ -66,6 +107,13 @@ class MitoWidget(DOMWidget):
         # And the api
         self.api = API(self.steps_manager, self.send)
 
+        # And the executor for edits, which runs long edits in the background. When
+        # testing, we wait for all edits to finish, so that they are synchronous
+        self.edit_executor = EditExecutor(
+            self.send, 
+            wait_seconds=None if is_running_test() else SECONDS_BEFORE_BACKGROUND_EXECUTION
+        )
+
         # We store static variables to make writing the shared
         # state variables quicker; we store them so we don't 
         # have to recompute them on each update
@@ -75,22 +123,162 @@ class MitoWidget(DOMWidget):
         self.should_upgrade_mitosheet = should_upgrade_mitosheet()
         self.received_tours = get_user_field(UJ_RECEIVED_TOURS)
 
+        # When we send a patch of the sheet data or step summaries to the frontend, we update
+        # these properties without sending them, as the frontend applies the patch instead
+        self.properties_sent_as_patches: Set[str] = set()
+
+        self.compress_sheet_data = compress_sheet_data
+        self.sheet_data_compression_threshold_bytes = SHEET_DATA_COMPRESSION_THRESHOLD_BYTES
+
+        # The shared state variables that might have changed since they were last updated
+        self.dirty_shared_state_variables: Set[str] = set(SHARED_STATE_VARIABLES)
+        # The responses to update events that are waiting for the shared state variables to be
+        # updated, and the timer that updates them. When testing, we don't wait, so tests are synchronous
+        self.coalesced_responses: List[Dict[str, Any]] = []
+        self.coalescing_timer: Optional[Timer] = None
+        self.shared_state_coalescing_seconds = 0 if is_running_test() else SHARED_STATE_COALESCING_SECONDS
+        # Edits run in the background, and coalesced updates run on a timer thread, so we hold this
+        # lock while changing the steps or updating the shared state, so only one thread does so at once
+        self.shared_state_lock = RLock()
+
         # Set up starting shared state variables
         self.update_shared_state_variables()
 
+    def _should_send_property(self, key: str, value: Any) -> bool:
+        # We don't send a property when we send a patch of it, but we still update it, 
+        # so that the frontend gets all of it if it requests the state of the widget
+        if key in self.properties_sent_as_patches:
+            return False
+        return super()._should_send_property(key, value)
+
+    def set_property_with_patch(self, key: str, value: str, patch: Optional[Dict[str, Any]], patch_event: str, send_patch: bool) -> None:
+        """
+        Sets the shared state variable key to value. If patch is not None, the 
+        frontend applies this patch instead, so we only send the patch if there
+        is anything in it.
+        """
+        if patch is None:
+            setattr(self, key, value)
+            return
+
+        self.properties_sent_as_patches.add(key)
+        try:
+            setattr(self, key, value)
+        finally:
+            self.properties_sent_as_patches.discard(key)
+
+        if send_patch:
+            self.send({
+                'event': patch_event,
+                'data': json.dumps(patch, cls=NpEncoder)
+            })
+
+    def set_compressed_sheet_data_json(self, sheet_data_json: str, sheet_data_patch: Optional[Dict[str, Any]]) -> bool:
+        """
+        If compress_sheet_data was passed to the mitosheet.sheet call, and the sheet data 
+        (or the patch of it) we would send to the frontend is large, sends it compressed 
+        in a binary buffer instead, and sets the sheet_data_json without sending it. 
+        
+        The message also has the hash of the new sheet_data_json, so the frontend does 
+        not decompress the sheet data if it already has it.
+
+        Returns True if the sheet data was sent compressed.
+        """
+        # We never compress the sheet data before the frontend has it, as the frontend
+        # needs the initial sheet data to render the sheet
+        if not self.compress_sheet_data or self.sheet_data_json == '':
+            return False
+        
+        if sheet_data_patch is not None and len(sheet_data_patch['sheetPatches']) == 0:
+            return False
+
+        is_patch = sheet_data_patch is not None
+        payload = json.dumps(sheet_data_patch, cls=NpEncoder) if is_patch else sheet_data_json
+        if len(payload) < self.sheet_data_compression_threshold_bytes:
+            return False
+
+        compressed_payload = compress_json(payload)
+
+        self.properties_sent_as_patches.add('sheet_data_json')
+        try:
+            self.sheet_data_json = sheet_data_json
+        finally:
+            self.properties_sent_as_patches.discard('sheet_data_json')
+
+        self.send({
+            'event': 'compressed_sheet_data',
+            'isPatch': is_patch,
+            'encoding': 'zlib',
+            'hash': get_json_hash(sheet_data_json),
+        }, buffers=[compressed_payload])
+        return True
+
     @property
     def analysis_name(self):
         return self.steps_manager.analysis_name
 
 
+    def mark_shared_state_variables_dirty(self, shared_state_variables: Collection[str]) -> None:
+        """
+        Marks the shared state variables as changed, so they are updated 
+        the next time the shared state variables are updated.
+        """
+        with self.shared_state_lock:
+            self.dirty_shared_state_variables.update(shared_state_variables)
+
     def update_shared_state_variables(self) -> None:
         """
-        Helper function for updating all the variables that are shared
-        between the backend and the frontend through trailets.
+        Helper function for updating the variables that are shared
+        between the backend and the frontend through trailets. Only the
+        variables that are marked as dirty are recomputed.
+
+        If only some columns of the sheet data changed, we send a patch with 
+        these columns to the frontend, rather than all of the sheet data. We 
+        do the same with the step summaries, and send nothing if they did not
+        change.
         """
-        self.sheet_data_json = self.steps_manager.sheet_data_json
-        self.analysis_data_json = self.steps_manager.analysis_data_json
-        self.user_profile_json = json.dumps({
+        with self.shared_state_lock:
+            # NOTE: we only mark a variable as clean once it is updated, so if updating 
+            # it fails, we try again the next time
+            if 'sheet_data_json' in self.dirty_shared_state_variables:
+                sheet_data_json = self.steps_manager.sheet_data_json
+                sheet_data_patch = self.steps_manager.sheet_data_patch
+                if not self.set_compressed_sheet_data_json(sheet_data_json, sheet_data_patch):
+                    self.set_property_with_patch(
+                        'sheet_data_json', 
+                        sheet_data_json, 
+                        sheet_data_patch, 
+                        'sheet_data_patch', 
+                        sheet_data_patch is not None and len(sheet_data_patch['sheetPatches']) > 0
+                    )
+                self.dirty_shared_state_variables.discard('sheet_data_json')
+
+            if 'step_summary_list_json' in self.dirty_shared_state_variables:
+                step_summary_list_json = self.steps_manager.step_summary_list_json
+                step_summary_list_patch = self.steps_manager.step_summary_list_patch
+                self.set_property_with_patch(
+                    'step_summary_list_json', 
+                    step_summary_list_json, 
+                    step_summary_list_patch, 
+                    'step_summary_list_patch',
+                    step_summary_list_patch is not None and (
+                        len(step_summary_list_patch['appendedStepSummaries']) > 0 
+                        or len(step_summary_list_patch['changedStepSummaries']) > 0 
+                        or len(step_summary_list_patch['removedStepIDs']) > 0
+                    )
+                )
+                self.dirty_shared_state_variables.discard('step_summary_list_json')
+
+            if 'analysis_data_json' in self.dirty_shared_state_variables:
+                self.analysis_data_json = self.steps_manager.analysis_data_json
+                self.dirty_shared_state_variables.discard('analysis_data_json')
+
+            if 'user_profile_json' in self.dirty_shared_state_variables:
+                self.user_profile_json = self.get_user_profile_json()
+                self.dirty_shared_state_variables.discard('user_profile_json')
+
+    def get_user_profile_json(self) -> str:
+        return json.dumps({
             # Dynamic, update each time
             'userEmail': get_user_field(UJ_USER_EMAIL),
             'receivedTours': get_user_field(UJ_RECEIVED_TOURS),
@@ -103,6 +291,61 @@ class MitoWidget(DOMWidget):
             'numUsages': self.num_usages,
         })
 
+    def send_response(self, response: Dict[str, Any], coalesce: bool=False) -> None:
+        """
+        Updates the shared state variables, and then sends the response, so that
+        the frontend has the new state when it gets the response. 
+        
+        If coalesce is True, waits for the coalescing window before doing so, so 
+        that a burst of events only updates the shared state variables once.
+        """
+        with self.shared_state_lock:
+            if coalesce and self.shared_state_coalescing_seconds > 0:
+                self.coalesced_responses.append(response)
+                if self.coalescing_timer is None:
+                    self.coalescing_timer = Timer(self.shared_state_coalescing_seconds, self.send_coalesced_responses)
+                    self.coalescing_timer.daemon = True
+                    self.coalescing_timer.start()
+                return
+
+            # We respond to any events waiting to be coalesced first, so responses are in order
+            self.send_coalesced_responses()
+            self.update_shared_state_variables()
+            self.send(response)
+
+    def send_coalesced_responses(self) -> None:
+        """
+        Updates the shared state variables for the update events that were coalesced,
+        and sends their responses. 
+        """
+        with self.shared_state_lock:
+            if self.coalescing_timer is not None:
+                self.coalescing_timer.cancel()
+                self.coalescing_timer = None
+
+            responses = self.coalesced_responses
+            self.coalesced_responses = []
+            if len(responses) == 0:
+                return
+
+            try:
+                self.update_shared_state_variables()
+            except:
+                # The update events were already processed, so we still respond to them
+                log('coalesced_shared_state_update_failed')
+
+            for response in responses:
+                self.send(response)
+
+    def send_error_response(self, response: Dict[str, Any]) -> None:
+        """
+        Sends the response for an event that failed. We respond to any events waiting 
+        to be coalesced first, so responses are in order.
+        """
+        with self.shared_state_lock:
+            self.send_coalesced_responses()
+            self.send(response)
+
 
     def handle_edit_event(self, event: Dict[str, Any]) -> None:
         """
@@ -115,11 +358,15 @@ class MitoWidget(DOMWidget):
         and the codeblock!
         """
 
-        # First, we send this new edit to the evaluator
-        self.steps_manager.handle_edit_event(event)
+        # We hold the shared state lock while changing the steps, so the shared state 
+        # variables are not updated from the steps while they change
+        with self.shared_state_lock:
+            # First, we send this new edit to the evaluator
+            self.steps_manager.handle_edit_event(event)
 
-        # We update the state variables 
-        self.update_shared_state_variables()
+            # We update the state variables 
+            self.mark_shared_state_variables_dirty(STEPS_SHARED_STATE_VARIABLES)
+            self.update_shared_state_variables()
 
         # Also, write the analysis to a file!
         write_analysis(self.steps_manager)
@@ -127,7 +374,30 @@ class MitoWidget(DOMWidget):
         # Tell the front-end to render the new sheet and new code with an empty
         # response. NOTE: in the future, we can actually send back some data
         # with the response (like an error), to get this response in-place!        
-        self.send({
+        self.send_response({
+            'event': 'response',
+            'id': event['id']
+        })
+
+
+    def handle_batch_edit_event(self, event: Dict[str, Any]) -> None:
+        """
+        Handles a batch_edit_event, which contains a list of edit_events
+        under params.edit_events. 
+        
+        All of these edits are executed at once, and then the sheet is
+        re-evaluated, the code is re-transpiled, and the analysis is written 
+        only once. If any of the edits fail, none of them are applied.
+        """
+        with self.shared_state_lock:
+            self.steps_manager.handle_edit_events(event['params']['edit_events'])
+
+            self.mark_shared_state_variables_dirty(STEPS_SHARED_STATE_VARIABLES)
+            self.update_shared_state_variables()
+
+        write_analysis(self.steps_manager)
+
+        self.send_response({
             'event': 'response',
             'id': event['id']
         })
@@ -142,19 +412,32 @@ class MitoWidget(DOMWidget):
         For example:
         - Names of the dataframes
         - Name of an existing analysis
+
+        Bursts of update events are coalesced, so that the shared state variables
+        are only updated once for all of them. 
         """
+        is_replay_analysis = event["type"] == REPLAY_ANALYSIS_UPDATE['event_type']
 
         try:
-            self.steps_manager.handle_update_event(event)
-
-            # Update all state variables
-            self.update_shared_state_variables()
+            # The coalesced updates of the shared state variables run on a timer thread, 
+            # so we hold the shared state lock while changing the steps
+            with self.shared_state_lock:
+                self.steps_manager.handle_update_event(event)
+
+                # Update the state variables this event might have changed
+                self.mark_shared_state_variables_dirty(
+                    UPDATE_EVENT_TYPE_TO_SHARED_STATE_VARIABLES.get(event['type'], SHARED_STATE_VARIABLES)
+                )
+                # Replaying an analysis can fail while updating the shared state variables, 
+                # so we update them now rather than coalescing them
+                if is_replay_analysis:
+                    self.update_shared_state_variables()
         except:
             # We handle the case of replaying the analysis specially, because we don't
             # want to display the error modal - we want to display something specific
             # in this case. Note that we include the updating of shared state variables
             # in the try catch, as this is sometimes where errors occur
-            if event["type"] == REPLAY_ANALYSIS_UPDATE['event_type']:
+            if is_replay_analysis:
                 raise make_execution_error(error_modal=False)
             raise
         # Also, write the analysis to a file!
@@ -163,9 +446,28 @@ class MitoWidget(DOMWidget):
         # Tell the front-end to render the new sheet and new code with an empty
         # response. NOTE: in the future, we can actually send back some data
         # with the response (like an error), to get this response in-place!
+        self.send_response({
+            'event': 'response',
+            'id': event['id'],
+        }, coalesce=not is_replay_analysis)
+
+    def handle_cancel_edit(self, event: Dict[str, Any]) -> None:
+        """
+        Cancels the edit with the id params.edit_id, if it is still executing. If it
+        is cancelled, the StepsManager is left unchanged, and we respond to the edit with
+        an edit_cancelled_error. 
+        
+        We then respond to the cancel_edit with whether the edit was cancelled.
+        """
+        edit_id = event['params']['edit_id']
+        cancelled = self.edit_executor.cancel(edit_id)
+        if cancelled:
+            self.send(get_edit_error_response(edit_id, make_edit_cancelled_error()))
+
         self.send({
             'event': 'response',
             'id': event['id'],
+            'data': cancelled
         })
 
     def receive_message(self, widget: Any, content: Dict[str, Any], buffers: Any=None) -> bool:
@@ -174,7 +476,8 @@ class MitoWidget(DOMWidget):
         types of events:
 
         1. edit_event: any event that updates the state of the sheet and the
-        code block at once. Leads to reevaluation, and a re-transpile.
+        code block at once. Leads to reevaluation, and a re-transpile. A 
+        batch_edit_event contains many edit_events, which are all applied at once.
 
         2. update_event: any event that isn't caused by an edit, but instead
         other types of new data coming from the frontend (e.g. the df names 
@@ -184,14 +487,44 @@ class MitoWidget(DOMWidget):
         updating the backend state.
 
         4. A log_event is just an event that should get logged on the backend.
+
+        Edit events are executed by the edit_executor. If they take too long, they
+        keep executing in the background, where they send their response when they 
+        finish, and can be cancelled with a cancel_edit event. Other events that change 
+        the steps are queued behind an edit in flight, rather than waiting for it here, 
+        so that a cancel_edit sent after them is still read right away.
         """
+        event = content
+
+        if event['event'] == 'cancel_edit':
+            self.handle_cancel_edit(event)
+            log_event_processed(event, self.steps_manager)
+            return True
+        
+        if event['event'] == 'edit_event' or event['event'] == 'batch_edit_event':
+            result = self.edit_executor.execute(event, self.process_event)
+            # If the edit is executing in the background, it has not failed yet
+            return result if result is not None else True
 
+        # Any other event that changes the steps must wait for edits that are executing
+        if event['event'] != 'api_call':
+            result = self.edit_executor.execute_after_edit_in_flight(event, self.process_event)
+            return result if result is not None else True
+
+        return self.process_event(event)
+
+    def process_event(self, event: Dict[str, Any]) -> bool:
+        """
+        Processes an incoming message, and sends the response to it. Returns
+        True if the processing was successful.
+        """
         start_time: Optional[float] = time.perf_counter()
-        event = content
 
         try:
             if event['event'] == 'edit_event':
                 self.handle_edit_event(event)
+            elif event['event'] == 'batch_edit_event':
+                self.handle_batch_edit_event(event)
             elif event['event'] == 'update_event':
                 self.handle_update_event(event)
             elif event['event'] == 'api_call':
@@ -216,35 +549,19 @@ class MitoWidget(DOMWidget):
             # Log processing this event failed
             log_event_processed(event, self.steps_manager, failed=True, mito_error=e, start_time=start_time)
 
-            # If the error says to ignore the error modal, then we
-            # send some data with the response so that the frontend
-            # knows to ignore the error moda 
-            response = {
-                'event': 'edit_error',
-                'id': event['id'],
-                'type': e.type_,
-                'header': e.header,
-                'to_fix': e.to_fix,
-                'traceback': e.traceback,
-            }
-            if not e.error_modal:
-                response['data'] = {
-                    'event': 'edit_error',
-                    'type': e.type_,
-                    'header': e.header,
-                    'to_fix': e.to_fix,
-                    'traceback': e.traceback,
-                }
+            # If the edit was cancelled, then we already responded when it was cancelled
+            if e.type_ == 'edit_cancelled_error':
+                return False
 
             # Report it to the user, and then return
-            self.send(response)
+            self.send_error_response(get_edit_error_response(event['id'], e))
         except:
             if is_running_test():
                 print(get_recent_traceback())
             # We log that processing failed, but have no edit error
             log_event_processed(event, self.steps_manager, failed=True, start_time=start_time)
             # Report it to the user, and then return
-            self.send({
+            self.send_error_response({
                 'event': 'edit_error',
                 'id': event['id'],
                 'type': 'execution_error',
@@ -255,12 +572,43 @@ class MitoWidget(DOMWidget):
 
         return False
 
+def get_edit_error_response(event_id: str, e: MitoError) -> Dict[str, Any]:
+    """
+    Returns the response for an event that failed with the given error.
+    """
+    response: Dict[str, Any] = {
+        'event': 'edit_error',
+        'id': event_id,
+        'type': e.type_,
+        'header': e.header,
+        'to_fix': e.to_fix,
+        'traceback': e.traceback,
+    }
+    # If the error says to ignore the error modal, then we
+    # send some data with the response so that the frontend
+    # knows to ignore the error moda 
+    if not e.error_modal:
+        response['data'] = {
+            'event': 'edit_error',
+            'type': e.type_,
+            'header': e.header,
+            'to_fix': e.to_fix,
+            'traceback': e.traceback,
+        }
+    return response
+
 def sheet(
         *args: Any,
         analysis_to_replay: str=None, # This is the parameter that tracks the analysis that you want to replay (NOTE: requires a frontend to be replayed!)
         view_df: bool=False, # We use this param to log if the mitosheet.sheet call is created from the df output button,
+        memory_budget_mb: float=None, # The approximate number of megabytes of data Mito keeps to make undoing and viewing previous steps fast. If None, there is no limit
+        num_replay_processes: int=None, # The number of processes Mito uses to replay independent parts of an analysis in parallel. If None, analyses are replayed in this process
+        step_result_cache_mb: float=None, # The maximum size in megabytes of the cache in ~/.mito that Mito uses to make replaying the same analysis on the same data fast. If None, there is no cache
+        binary_sheet_windows: bool=False, # If True, the rows of the sheet are sent to the frontend as binary data rather than as JSON, which is smaller and faster for numeric data
+        compress_sheet_data: bool=False, # If True, large sheet data is compressed before it is sent to the frontend, which is faster over slow connections
+        num_formula_processes: int=None, # The number of processes Mito uses to recalculate independent formulas that read string columns. If None, they are recalculated on threads in this process
         # NOTE: if you add named variables to this function, make sure argument parsing on the front-end still
-        # works by updating the getArgsFromCellContent function.
+        # works by adding them to MITOSHEET_CALL_NAMED_PARAMETERS in src/utils/code.tsx.
     ) -> MitoWidget:
     """
     Renders a Mito sheet. If no arguments are passed, renders an empty sheet. Otherwise, renders
@@ -288,7 +636,7 @@ def sheet(
 
     try:
         # We pass in the dataframes directly to the widget
-        widget = MitoWidget(*args, analysis_to_replay=analysis_to_replay) 
+        widget = MitoWidget(*args, analysis_to_replay=analysis_to_replay, memory_budget_mb=memory_budget_mb, num_replay_processes=num_replay_processes, step_result_cache_mb=step_result_cache_mb, binary_sheet_windows=binary_sheet_windows, compress_sheet_data=compress_sheet_data, num_formula_processes=num_formula_processes) 
 
         # Log they have personal data in the tool if they passed a dataframe
         # that is not tutorial data or sample data from import docs
@@ -309,7 +657,12 @@ def sheet(
             'num_str_args': len([arg for arg in args if isinstance(arg, str)]),
             'num_df_args': len([arg for arg in args if isinstance(arg, pd.DataFrame)]),
             'df_index_type': [str(type(arg.index)) for arg in args if isinstance(arg, pd.DataFrame)],
-            'view_df': view_df
+            'view_df': view_df,
+            'memory_budget_mb': memory_budget_mb,
+            'num_replay_processes': num_replay_processes,
+            'step_result_cache_mb': step_result_cache_mb,
+            'compress_sheet_data': compress_sheet_data,
+            'num_formula_processes': num_formula_processes,
         }
     )
 
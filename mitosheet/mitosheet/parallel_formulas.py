@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains helpers for evaluating formulas that do not depend on eachother
+in parallel.
+
+When a column is modified, the formula columns that depend on it are
+recalculated in levels, where each formula only depends on formulas in
+earlier levels. The formulas in a level can be evaluated at the same time,
+so we evaluate them on a thread pool, as most of the work in a formula is
+done in NumPy and pandas, which release the GIL for many operations.
+
+Formulas that read object columns, like most formulas that work with strings,
+hold the GIL, and so can optionally be evaluated on a pool of processes. As
+the kernel has other threads running, forking it could copy a lock that one
+of these threads holds into the child process, where it is never released, 
+so the processes are spawned rather than forked where Python supports it.
+
+The formulas only read from the sheet while they are evaluated, and then
+their results are written to the sheet in order, so that the sheet is the
+same as if the formulas were evaluated one at a time.
+"""
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock
+from types import CodeType
+from typing import Any, Dict, Mapping, Optional, Union
+
+import pandas as pd
+
+from mitosheet.sheet_functions import FUNCTIONS
+from mitosheet.types import ColumnHeader
+from mitosheet.utils import make_process_pool
+
+# The number of threads formulas are evaluated on. If this is 1, we evaluate
+# the formulas one at a time, without a thread pool
+NUM_FORMULA_THREADS = min(8, os.cpu_count() or 1)
+
+formula_thread_pool: Optional[ThreadPoolExecutor] = None
+num_formula_threads: Optional[int] = None
+formula_process_pool: Optional[ProcessPoolExecutor] = None
+num_formula_processes: Optional[int] = None
+formula_pools_lock = Lock()
+
+
+class FormulaResults():
+    """
+    Passed to a formula in place of the dataframe, so that the formula reads
+    the columns it references from the dataframe, but the column it sets is
+    saved here, rather than written to the dataframe.
+    """
+
+    def __init__(self, columns: Mapping[ColumnHeader, Any]):
+        self.columns = columns
+        self.results: Dict[ColumnHeader, Any] = {}
+
+    def __getitem__(self, column_header: ColumnHeader) -> Any:
+        return self.columns[column_header]
+
+    def __setitem__(self, column_header: ColumnHeader, value: Any) -> None:
+        self.results[column_header] = value
+
+
+def evaluate_formula(python_code: Union[str, CodeType], columns: Mapping[ColumnHeader, Any]) -> Dict[ColumnHeader, Any]:
+    """
+    Evaluates the python code of a formula, reading the columns it references
+    from columns, and returns the column it sets and its new value.
+    """
+    formula_results = FormulaResults(columns)
+    exec(
+        python_code,
+        {'df': formula_results, 'pd': pd},
+        FUNCTIONS
+    )
+    return formula_results.results
+
+
+def set_num_formula_processes(num_processes: Optional[int]) -> None:
+    """
+    Sets the number of processes that formulas that read object columns are
+    evaluated on. If None, they are evaluated on the thread pool like any other
+    formula.
+
+    NOTE: there is one pool of processes, which is shared by all the mitosheets
+    in this Python process.
+    """
+    global formula_process_pool, num_formula_processes
+
+    with formula_pools_lock:
+        if num_processes == num_formula_processes:
+            return
+
+        if formula_process_pool is not None:
+            formula_process_pool.shutdown()
+        formula_process_pool = None
+        num_formula_processes = num_processes
+
+
+def get_formula_executor(reads_object_columns: bool) -> Optional[Executor]:
+    """
+    Returns the pool to evaluate a formula on, which is the process pool if the
+    formula reads object columns and there is one, and otherwise is the thread
+    pool. Returns None if formulas should be evaluated one at a time.
+    """
+    global formula_process_pool, formula_thread_pool, num_formula_threads
+
+    with formula_pools_lock:
+        if reads_object_columns and num_formula_processes is not None:
+            if formula_process_pool is None:
+                formula_process_pool = make_process_pool(num_formula_processes)
+            return formula_process_pool
+
+        if NUM_FORMULA_THREADS <= 1:
+            return None
+
+        if formula_thread_pool is None or num_formula_threads != NUM_FORMULA_THREADS:
+            if formula_thread_pool is not None:
+                formula_thread_pool.shutdown(wait=False)
+            formula_thread_pool = ThreadPoolExecutor(max_workers=NUM_FORMULA_THREADS)
+            num_formula_threads = NUM_FORMULA_THREADS
+        return formula_thread_pool
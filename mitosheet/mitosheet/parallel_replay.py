@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains helpers for replaying a list of steps on a process pool.
+
+When replaying an analysis, the steps often form independent chains that
+each only touch their own sheets (e.g. import a file, clean it, and then
+pivot it). Each of these chains is executed in its own process, and then
+the results are merged back into one list of steps, in the original order.
+
+The merged steps must be identical to the steps we would get from executing
+the steps serially, so if we are ever unsure a result from a chain is the
+same as the serial result, we execute the rest of the steps serially.
+"""
+import pickle
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from mitosheet.state import DATAFRAME_SOURCE_PASSED, State
+from mitosheet.step import Step
+from mitosheet.step_performers.graph_steps.graph import GraphStepPerformer
+from mitosheet.step_performers.graph_steps.graph_delete import GraphDeleteStepPerformer
+from mitosheet.step_performers.graph_steps.graph_duplicate import GraphDuplicateStepPerformer
+from mitosheet.step_performers.graph_steps.graph_rename import GraphRenameStepPerformer
+from mitosheet.step_performers.import_steps.excel_import import ExcelImportStepPerformer
+from mitosheet.step_performers.import_steps.simple_import import SimpleImportStepPerformer
+from mitosheet.utils import make_process_pool
+
+# Steps that only change the graphs are executed in the main process, on the merged
+# states, as they do not change any sheets
+MAIN_PROCESS_STEP_TYPES = {
+    GraphStepPerformer.step_type(),
+    GraphDeleteStepPerformer.step_type(),
+    GraphDuplicateStepPerformer.step_type(),
+    GraphRenameStepPerformer.step_type(),
+}
+
+# Pickle protocol 5, which can pickle data in out-of-band buffers, needs Python 3.8+
+PICKLE_OUT_OF_BAND_BUFFERS_SUPPORTED = sys.version_info >= (3, 8)
+
+# Sheets that are created by other chains are replaced by empty sheets with
+# this name in the states that a chain is executed on
+PLACEHOLDER_DF_NAME_PREFIX = '__mito_placeholder_df_'
+
+# For each step in a chain: the saturated params, the execution data, the post state
+# with only the sheets the step modified (or None if the step did not change the state),
+# and the sheet indexes the step modified (or None if we cannot tell)
+ChainStepResult = Tuple[Dict[str, Any], Dict[str, Any], Optional[State], Optional[Set[int]]]
+
+
+def dumps_with_out_of_band_buffers(obj: Any) -> Tuple[bytes, List[bytearray]]:
+    """
+    Pickles the object. On Python 3.8+, we use pickle protocol 5, so that the 
+    data of the dataframes is returned in separate buffers rather than in the 
+    pickled bytes. On earlier versions, all the data is in the pickled bytes.
+
+    NOTE: this does not avoid copying the data. The buffers are copied into
+    bytearrays (so the dataframes that are loaded are writeable), and the 
+    ProcessPoolExecutor pickles them again when sending them to a worker.
+    """
+    if not PICKLE_OUT_OF_BAND_BUFFERS_SUPPORTED:
+        return pickle.dumps(obj, protocol=4), []
+
+    buffers: List[Any] = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    return data, [bytearray(buffer.raw()) for buffer in buffers]
+
+
+def loads_with_out_of_band_buffers(data: bytes, buffers: List[bytearray]) -> Any:
+    """
+    Unpickles an object pickled with dumps_with_out_of_band_buffers.
+    """
+    if not PICKLE_OUT_OF_BAND_BUFFERS_SUPPORTED:
+        return pickle.loads(data)
+
+    return pickle.loads(data, buffers=buffers)
+
+
+def get_num_sheets_added_by_step(step: Step) -> int:
+    """
+    Returns the number of sheets we expect a step to add, if it
+    says it adds new sheets.
+    """
+    if step.step_type == SimpleImportStepPerformer.step_type():
+        return len(step.params['file_names'])
+    elif step.step_type == ExcelImportStepPerformer.step_type():
+        return len(step.params['sheet_names'])
+    return 1
+
+
+def get_step_chains(
+        step_list: List[Step], start_index: int, step_indexes_to_skip: Set[int]
+    ) -> Optional[Tuple[List[List[int]], List[Set[int]], Dict[int, Tuple[int, int]]]]:
+    """
+    Splits the steps after start_index into chains of steps, where steps
+    in different chains never read or modify the same sheets.
+
+    Returns the step indexes in each chain, the sheet indexes each chain
+    reads or modifies, and the number of sheets we expect before and after
+    each step in a chain. Steps that are skipped, or that are executed in
+    the main process are not in any chain.
+
+    Returns None if some step might read or modify every sheet, or removes
+    sheets, as then the steps cannot be split into chains.
+    """
+    num_sheets = len(step_list[start_index].final_defined_state.dfs)
+    num_sheets_before_and_after: Dict[int, Tuple[int, int]] = {}
+
+    # We find the chains by joining the sheets that each step reads or
+    # modifies, and keep a sheet from each step to find its chain later
+    sheet_index_to_parent: Dict[int, int] = {}
+    step_index_to_sheet_index: Dict[int, int] = {}
+
+    def find(sheet_index: int) -> int:
+        while sheet_index_to_parent.setdefault(sheet_index, sheet_index) != sheet_index:
+            sheet_index_to_parent[sheet_index] = sheet_index_to_parent[sheet_index_to_parent[sheet_index]]
+            sheet_index = sheet_index_to_parent[sheet_index]
+        return sheet_index
+
+    for step_index in range(start_index + 1, len(step_list)):
+        step = step_list[step_index]
+        if step_index in step_indexes_to_skip or step.step_type in MAIN_PROCESS_STEP_TYPES:
+            continue
+
+        input_sheet_indexes = step.step_performer.get_input_dataframe_indexes(step.params)
+        modified_sheet_indexes = step.step_performer.get_modified_dataframe_indexes(step.params)
+        if input_sheet_indexes is None or len(modified_sheet_indexes) == 0:
+            return None
+
+        num_sheets_added = get_num_sheets_added_by_step(step) if -1 in modified_sheet_indexes else 0
+        sheet_indexes = input_sheet_indexes | (modified_sheet_indexes - {-1}) | set(range(num_sheets, num_sheets + num_sheets_added))
+        if len(sheet_indexes) == 0 or any(sheet_index < 0 or sheet_index >= num_sheets + num_sheets_added for sheet_index in sheet_indexes):
+            return None
+
+        root_sheet_index = find(min(sheet_indexes))
+        for sheet_index in sheet_indexes:
+            sheet_index_to_parent[find(sheet_index)] = root_sheet_index
+
+        step_index_to_sheet_index[step_index] = root_sheet_index
+        num_sheets_before_and_after[step_index] = (num_sheets, num_sheets + num_sheets_added)
+        num_sheets += num_sheets_added
+
+    chains: Dict[int, List[int]] = {}
+    for step_index, sheet_index in step_index_to_sheet_index.items():
+        chains.setdefault(find(sheet_index), []).append(step_index)
+
+    chain_sheet_indexes: Dict[int, Set[int]] = {root_sheet_index: set() for root_sheet_index in chains}
+    for sheet_index in list(sheet_index_to_parent.keys()):
+        root_sheet_index = find(sheet_index)
+        if root_sheet_index in chain_sheet_indexes:
+            chain_sheet_indexes[root_sheet_index].add(sheet_index)
+
+    return list(chains.values()), list(chain_sheet_indexes.values()), num_sheets_before_and_after
+
+
+def get_state_for_chain(state: State, sheet_indexes: Set[int]) -> State:
+    """
+    Returns a copy of the state to send to the process that executes a chain,
+    that only has the data of the sheets that the chain uses.
+    """
+    chain_state = state.copy()
+    chain_state.dfs = [
+        df if sheet_index in sheet_indexes else df.iloc[:0]
+        for sheet_index, df in enumerate(chain_state.dfs)
+    ]
+    chain_state.graph_data_dict = OrderedDict()
+    return chain_state
+
+
+def execute_step_chain(data: bytes, buffers: List[bytearray]) -> Tuple[bytes, List[bytearray]]:
+    """
+    Executes a chain of steps in a worker process. Takes and returns pickled
+    data, see dumps_with_out_of_band_buffers.
+
+    The chain is a state, and a list of the step type, params and number of sheets
+    before each step. As the sheets added by the other chains are not in the state,
+    we add empty placeholder sheets for them, so every step sees the same sheet
+    indexes as it would when executing the steps serially.
+    """
+    # Import here, so that the worker process does not import the StepsManager at startup
+    from mitosheet.steps_manager import get_sheet_indexes_modified_by_step
+
+    state, chain = loads_with_out_of_band_buffers(data, buffers)
+
+    results: List[ChainStepResult] = []
+    for step_type, params, num_sheets_before in chain:
+        if len(state.dfs) < num_sheets_before:
+            # NOTE: we copy the state, as it is the post state of the previous step
+            state = state.copy()
+            while len(state.dfs) < num_sheets_before:
+                state.add_df_to_state(pd.DataFrame(), DATAFRAME_SOURCE_PASSED, df_name=f'{PLACEHOLDER_DF_NAME_PREFIX}{len(state.dfs)}')
+
+        step = Step(step_type, '', params)
+        step.set_prev_state_and_execute(state)
+
+        post_state = step.post_state
+        if post_state is None or post_state is state:
+            results.append((step.params, step.execution_data, None, set()))
+            continue
+
+        modified_sheet_indexes = get_sheet_indexes_modified_by_step(step, state, post_state)
+
+        # We only send back the data of the sheets that this step modified
+        result_state = post_state.copy()
+        result_state.dfs = [
+            df if modified_sheet_indexes is not None and sheet_index in modified_sheet_indexes else df.iloc[:0]
+            for sheet_index, df in enumerate(result_state.dfs)
+        ]
+        results.append((step.params, step.execution_data, result_state, modified_sheet_indexes))
+        state = post_state
+
+    return dumps_with_out_of_band_buffers(results)
+
+
+def is_chain_step_result_valid(prev_state: State, result: ChainStepResult, num_sheets_before_and_after: Tuple[int, int]) -> bool:
+    """
+    Returns True if the result of a step from a chain is the same as the result
+    we would get from executing the step on the prev_state.
+    """
+    _, _, result_state, modified_sheet_indexes = result
+    num_sheets_before, num_sheets_after = num_sheets_before_and_after
+
+    if len(prev_state.dfs) != num_sheets_before:
+        return False
+    if result_state is None:
+        return True
+    if modified_sheet_indexes is None or len(result_state.dfs) != num_sheets_after:
+        return False
+
+    # The chain did not know the names of the sheets created by other chains, so
+    # we check that any sheet names this step picked are not used by them
+    for sheet_index in modified_sheet_indexes:
+        df_name = result_state.df_names[sheet_index]
+        if sheet_index < len(prev_state.df_names) and prev_state.df_names[sheet_index] == df_name:
+            continue
+        other_df_names = prev_state.df_names[:sheet_index] + prev_state.df_names[sheet_index + 1:]
+        if df_name in other_df_names or df_name.startswith(PLACEHOLDER_DF_NAME_PREFIX):
+            return False
+
+    return True
+
+
+def execute_step_list_from_index_in_parallel(
+        step_list: List[Step], start_index: int, step_indexes_to_skip: Set[int], num_processes: int
+    ) -> Optional[List[Step]]:
+    """
+    Executes the steps after start_index like execute_step_list_from_index, but executes
+    the independent chains of steps in these steps on a pool of num_processes processes.
+
+    Returns None if the steps cannot be split into more than one chain, or if executing
+    any chain fails, in which case the steps should be executed serially.
+    """
+    step_chains = get_step_chains(step_list, start_index, step_indexes_to_skip)
+    if step_chains is None or len(step_chains[0]) < 2:
+        return None
+    chains, chain_sheet_indexes, num_sheets_before_and_after = step_chains
+
+    start_state = step_list[start_index].final_defined_state
+    try:
+        with make_process_pool(min(num_processes, len(chains))) as executor:
+            futures = [
+                executor.submit(
+                    execute_step_chain,
+                    *dumps_with_out_of_band_buffers((
+                        get_state_for_chain(start_state, sheet_indexes),
+                        [(step_list[step_index].step_type, step_list[step_index].params, num_sheets_before_and_after[step_index][0]) for step_index in chain]
+                    ))
+                )
+                for chain, sheet_indexes in zip(chains, chain_sheet_indexes)
+            ]
+            chain_results: List[List[ChainStepResult]] = [loads_with_out_of_band_buffers(*future.result()) for future in futures]
+    except Exception:
+        # If a step fails, we execute serially, so the error is the same as when executing serially
+        return None
+
+    step_index_to_result: Dict[int, ChainStepResult] = {}
+    for chain, results in zip(chains, chain_results):
+        step_index_to_result.update(zip(chain, results))
+
+    new_step_list = step_list[: start_index + 1]
+    prev_state = start_state
+    use_chain_results = True
+
+    for step_index in range(start_index + 1, len(step_list)):
+        step = step_list[step_index]
+        if step_index in step_indexes_to_skip:
+            new_step_list.append(step)
+            continue
+
+        new_step = Step(step.step_type, step.step_id, step.params)
+        result = step_index_to_result.get(step_index)
+
+        if use_chain_results and result is not None and is_chain_step_result_valid(prev_state, result, num_sheets_before_and_after[step_index]):
+            params, execution_data, result_state, modified_sheet_indexes = result
+            if result_state is None or modified_sheet_indexes is None:
+                post_state = prev_state
+            else:
+                post_state = prev_state.copy()
+                for sheet_index in sorted(modified_sheet_indexes):
+                    post_state.set_sheet_from_state(result_state, sheet_index)
+
+            new_step.prev_state = prev_state
+            new_step.post_state = post_state
+            new_step.execution_data = execution_data
+            new_step.params = params
+        else:
+            # If a result from a chain is not the same as the serial result, the results after
+            # it might not be either, and so we execute all the remaining steps serially
+            if result is not None:
+                use_chain_results = False
+            new_step.set_prev_state_and_execute(prev_state)
+
+        prev_state = new_step.final_defined_state
+        new_step_list.append(new_step)
+
+    return new_step_list
@@ -8,64 +8,96 @@ Exports the evaluate function, which takes a list of edit events
 as well as the original dataframe, and returns the current state 
 of the sheet as a dataframe
 """
+import ast
 import datetime
 import re
-from typing import Any, Collection, List, Optional, Set, Tuple, Union
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
+from types import CodeType
+from typing import (Any, Collection, Dict, Hashable, List, Optional, Set,
+                    Tuple, Union)
 
 from mitosheet.column_headers import get_column_header_display
 from mitosheet.errors import make_invalid_formula_error
 from mitosheet.transpiler.transpile_utils import column_header_to_transpiled_code
 from mitosheet.types import ColumnHeader
 
+# The types of the tokens that a formula is split into
+STRING_TOKEN = 'string'
+WORD_TOKEN = 'word'
+FUNCTION_TOKEN = 'function'
+OPERATOR_TOKEN = 'operator'
+
+# The number of tries of column headers that we cache, one for each set of column headers
+MAX_CACHED_COLUMN_HEADER_TRIES = 16
+
+# The key in a node of a trie that holds the indexes of the column headers that end there
+COLUMN_HEADER_INDEXES_KEY = None
+
+
 def is_quote(char: str) -> bool:
     """
     A helper to detect if a character is a quote
     """
     return char == '\'' or char == '"'
 
+# A single regex that matches one token at a time, which are either strings in single
+# or double quotes, where a quote preceded by a backslash does not end the string, words, 
+# or any other character. Matching these alternatives in order splits the formula in one pass
+TOKEN_REGEX = re.compile(
+    r'''(?P<string>'(?:[^'\n]|(?<=\\)')*(?<!\\)'|"(?:[^"\n]|(?<=\\)")*(?<!\\)")|(?P<word>\w+)|(?P<operator>.)''',
+    re.DOTALL
+)
+
+def tokenize_formula(formula: str) -> List[Tuple[str, int, int]]:
+    """
+    Splits the formula into tokens in a single pass, returning a list of 
+    (token type, start, end) tuples, ordered by start. The tokens are:
+    - string literals, which are in single or double quotes. A quote that is
+      preceded by a backslash does not end the string, and strings cannot
+      contain newlines. A quote that is not closed is an operator.
+    - words, which are the same as the \\w+ matches of a regex. 
+    - functions, which are words that are followed by a (.
+    - operators, which are any other single character, including whitespace.
+    """
+    tokens: List[Tuple[str, int, int]] = []
+    for match in TOKEN_REGEX.finditer(formula):
+        token_type = match.lastgroup
+        start, end = match.span()
+        if token_type == WORD_TOKEN and end < len(formula) and formula[end] == '(':
+            token_type = FUNCTION_TOKEN
+        tokens.append((token_type, start, end)) # type: ignore
+    
+    return tokens
+
 def get_string_matches(
         formula: str,
-    ) -> List:
+    ) -> List[Tuple[int, int]]:
     """
-    Returns a list of all the ranges that are strings within a formula,
-    which is useful for other functions that do not want to change
-    strings.
+    Returns a list of all the (start, end) ranges that are strings within a 
+    formula, ordered by start, which is useful for other functions that do not 
+    want to change strings.
 
     Although column headers may contain quotes, when we check the overlap
     between the string matches and the column headers, those column headers
     that contain quotes will not be contained within the string, and therefor
     can still be detected as a valid column header.
     """
-    if formula is None:
-        return None
-
-    # We find the ranges of the formula that are string constants;
-    # we do not edit these! Taken from: https://stackoverflow.com/a/63707053/13113837
-    string_matches_double_quotes = re.finditer(r'"(?:(?:(?!(?<!\\)").)*)"', formula)
-    string_matches_single_quotes = re.finditer(r'\'(?:(?:(?!(?<!\\)\').)*)\'', formula)
+    return [(start, end) for token_type, start, end in tokenize_formula(formula) if token_type == STRING_TOKEN]
 
-    return list(string_matches_double_quotes) + list(string_matches_single_quotes)
-
-def match_covered_by_matches( # type: ignore
-        matches: List,
-        match 
+def match_covered_by_matches(
+        matches: List[Tuple[int, int]],
+        start: int,
+        end: int
     ) -> bool:
     """
-    Returns True iff a given match is contained by one
-    of the matches in a string
+    Returns True iff the range from start to end is contained by one of 
+    the string matches, which do not overlap and are ordered by start. 
     """
-    start = match.start()
-    end = match.end() # this is +1 after the last char of the string
-
-    # We check if it's in any of the string ranges
-    for string_range in matches:
-        string_start = string_range.start()
-        string_end = string_range.end()
-
-        if (string_start <= start and string_end >= end):
-            return True
-
-    return False
+    # The only string that can contain this range is the last one that starts before it
+    match_index = bisect_right(matches, (start, float('inf'))) - 1
+    return match_index >= 0 and matches[match_index][1] >= end
 
 def safe_contains(
         formula: str, 
@@ -87,7 +119,7 @@ def safe_contains(
     string_matches = get_string_matches(formula)
 
     for match in re.finditer(substring, formula):
-        if not match_covered_by_matches(string_matches, match):
+        if not match_covered_by_matches(string_matches, match.start(), match.end()):
             return True
 
     return False
@@ -112,7 +144,7 @@ def safe_contains_function(
     string_matches = get_string_matches(formula)
 
     for match in re.finditer(function, formula):
-        if not match_covered_by_matches(string_matches, match):
+        if not match_covered_by_matches(string_matches, match.start(), match.end()):
             # Check if this is a function
             end = match.end() # this is +1 after the last char of the string
             if end < len(formula) and formula[end] == '(':
@@ -136,7 +168,7 @@ def safe_count_function(formula: str, substring: str) -> int:
 
     count = 0
     for match in re.finditer(function, formula):
-        if not match_covered_by_matches(string_matches, match):
+        if not match_covered_by_matches(string_matches, match.start(), match.end()):
             count += 1
     
     return count
@@ -167,10 +199,8 @@ def safe_replace(
     )
 
     # Then, go through from the end to the start, and actually replace all the column headers
-    for (column_header, match) in column_header_match_tuples:
+    for (column_header, (start, end)) in column_header_match_tuples:
         if column_header == old_column_header:
-            start = match.start()
-            end = match.end()
             formula = formula[:start] + str(new_column_header) + formula[end:]
 
     return formula
@@ -219,73 +249,143 @@ def check_common_errors(
             error_modal=False
         )
 
+
+class ColumnHeaderTrie():
+    """
+    A trie of how the column headers of a sheet are displayed, which finds all the 
+    column headers in a formula without searching the formula once per column header.
+    """
+
+    def __init__(self, column_headers: Collection[ColumnHeader]):
+        # We look for column headers from longest to shortest, to enable us
+        # to issues if one column header is a substring of another
+        # column header
+        self.column_headers_sorted = sorted(column_headers, key=lambda ch: len(str(ch)), reverse=True)
+
+        self.root: Dict[Any, Any] = {}
+        for column_header_index, column_header in enumerate(self.column_headers_sorted):
+            # NOTE: for booleans, and for multi-index headers, we need to make the same transformation 
+            # that we make on the frontend
+            column_header_display = get_column_header_display(column_header)
+            # A column header that is displayed as nothing cannot be written in a formula
+            if column_header_display == '':
+                continue
+
+            node = self.root
+            for char in column_header_display:
+                node = node.setdefault(char, {})
+            node.setdefault(COLUMN_HEADER_INDEXES_KEY, []).append(column_header_index)
+
+    def find_column_headers(self, formula: str) -> Dict[int, List[Tuple[int, int]]]:
+        """
+        Returns the (start, end) ranges where each column header is found in the formula, 
+        by the index of the column header in column_headers_sorted. For each column header, 
+        these are the non-overlapping ranges from the start to the end of the formula, like 
+        searching for the column header with a regex would find.
+        """
+        column_header_ranges: Dict[int, List[Tuple[int, int]]] = {}
+        for start in range(len(formula)):
+            node = self.root
+            for end in range(start, len(formula)):
+                next_node = node.get(formula[end])
+                if next_node is None:
+                    break
+                node = next_node
+
+                for column_header_index in node.get(COLUMN_HEADER_INDEXES_KEY, []):
+                    ranges = column_header_ranges.setdefault(column_header_index, [])
+                    if len(ranges) == 0 or ranges[-1][1] <= start:
+                        ranges.append((start, end + 1))
+
+        return column_header_ranges
+
+
+column_header_trie_cache: 'OrderedDict[Hashable, ColumnHeaderTrie]' = OrderedDict()
+column_header_trie_cache_lock = Lock()
+
+
+def get_column_header_trie(column_headers: Collection[ColumnHeader]) -> ColumnHeaderTrie:
+    """
+    Returns the trie of the column headers, which we cache for the most recently used sets
+    of column headers, as these rarely change while a user writes formulas.
+    """
+    column_headers = tuple(column_headers)
+    # NOTE: we include the types of the column headers, as 1 == 1.0 == True 
+    key = (column_headers, tuple(type(column_header) for column_header in column_headers))
+
+    with column_header_trie_cache_lock:
+        column_header_trie = column_header_trie_cache.get(key)
+        if column_header_trie is not None:
+            column_header_trie_cache.move_to_end(key)
+            return column_header_trie
+
+    column_header_trie = ColumnHeaderTrie(column_headers)
+
+    with column_header_trie_cache_lock:
+        column_header_trie_cache[key] = column_header_trie
+        while len(column_header_trie_cache) > MAX_CACHED_COLUMN_HEADER_TRIES:
+            column_header_trie_cache.popitem(last=False)
+
+    return column_header_trie
+
+
 def get_column_header_match_tuples(
         formula: str,
-        column_headers: List[ColumnHeader],
-        string_matches: List
-    ) -> List[Tuple[ColumnHeader, Any]]:
+        column_headers: Collection[ColumnHeader],
+        string_matches: List[Tuple[int, int]]
+    ) -> List[Tuple[ColumnHeader, Tuple[int, int]]]:
     """
     Returns a list of the column header that is matched, as well as the 
-    match object where it was found. Note that the returned matches are
+    (start, end) range where it was found. Note that the returned matches are
     sorted from the last match to the first, so you can easily iterate
     over them and replace.
     """
-    column_header_match_tuples: List[Tuple[ColumnHeader, Any]] = []
+    column_header_match_tuples: List[Tuple[ColumnHeader, Tuple[int, int]]] = []
 
-    # We look for column headers from longest to shortest, to enable us
-    # to issues if one column header is a substring of another
-    # column header
-    column_headers_sorted = sorted(column_headers, key=lambda ch: len(str(ch)), reverse=True)
+    column_header_trie = get_column_header_trie(column_headers)
+    column_header_ranges = column_header_trie.find_column_headers(formula)
 
-    # First, we go through and replace all the column headers
-    for column_header in column_headers_sorted:
-        def find_column_headers(match):
-            found_column_header: str = match.group()
-            start = match.start()
-            end = match.end()
+    # We go through the column headers from longest to shortest
+    for column_header_index in sorted(column_header_ranges.keys()):
+        column_header = column_header_trie.column_headers_sorted[column_header_index]
 
+        for start, end in column_header_ranges[column_header_index]:
             # Do not replace the column header if it is in a string
-            if match_covered_by_matches(string_matches, match):
+            if match_covered_by_matches(string_matches, start, end):
                 is_string = isinstance(column_header, str)
                 starts_with_quote = is_quote(str(column_header)[0])
                 ends_with_quote = is_quote(str(column_header)[-1])
 
                 if is_string and not (starts_with_quote and ends_with_quote):
-                    return found_column_header
+                    continue
 
             # If this column header was already covered by another column header
             # that has been found, then this column header is just a substring
             # of another column header, so we avoid matching it
-            if match_covered_by_matches([match for _, match in column_header_match_tuples], match):
-                return found_column_header
+            if any(match_start <= start and match_end >= end for _, (match_start, match_end) in column_header_match_tuples):
+                continue
 
             # Do not replace if it is part of a function, which means it has
             # another ascii character before or after it. Or if it is part of
             # a number. Or if it has a ( after it, then it's a function call
-            
             if (start - 1 >= 0 and formula[start - 1].isalnum()) or \
                 (end < len(formula) and (formula[end].isalnum() or formula[end] == '(')):
-                return found_column_header
+                continue
             
             # NOTE: we add the column_header, not the found column header
             # as the found column header is a string, and the column_header 
             # may not be
-            column_header_match_tuples.append((column_header, match))
-
-        # First, just find all of the matches, without changing the string, as this shifts indexes
-        # NOTE: for booleans, and for multi-index headers, we need to make the same transformation 
-        # that we make on the frontend
-        re.sub(re.escape(get_column_header_display(column_header)), find_column_headers, formula)
+            column_header_match_tuples.append((column_header, (start, end)))
 
     # Sort the matches from end to start, so that we don't need to shift the indexes
-    column_header_match_tuples = sorted(column_header_match_tuples, key=lambda x: x[1].start(), reverse=True)
+    column_header_match_tuples = sorted(column_header_match_tuples, key=lambda x: x[1][0], reverse=True)
 
     return column_header_match_tuples
                 
 def replace_column_headers(
         formula: str,
-        column_headers: List[ColumnHeader],
-        string_matches: List,
+        column_headers: Collection[ColumnHeader],
+        string_matches: List[Tuple[int, int]],
         df_name: str
     ) -> Tuple[str, Set[ColumnHeader]]:
     """
@@ -303,10 +403,7 @@ def replace_column_headers(
     )
     
     # Then, go through from the end to the start, and actually replace all the column headers
-    for column_header, match in column_header_match_tuples:
-        start = match.start()
-        end = match.end()
-
+    for column_header, (start, end) in column_header_match_tuples:
         if isinstance(column_header, str):
             replace_string = f'{df_name}[\'{column_header}\']'
         elif isinstance(column_header, datetime.datetime):
@@ -332,34 +429,22 @@ def replace_functions(
     # NOTE: as this function is called on the new formula with column headers replaced,
     # this detects string column headers, and in turn this means we don't replace inside
     # of column headers that could look like functions
-    string_matches = get_string_matches(formula)
-
-    def replace_functions_internal(match):
-
-        word: str = match.group()
-        end = match.end() # this is +1 after the last char of the string
+    formula_with_functions = []
+    for token_type, start, end in tokenize_formula(formula):
+        word = formula[start:end]
 
         # If this is to_datetime or to_timedelta we skip this, as this is us casting to a datetime or 
         # timedetla for a column header
-        if word == 'to_datetime' or word == 'to_timedelta':
-            return word
-
-        # Function
-        if not match_covered_by_matches(string_matches, match) and end < len(formula) and formula[end] == '(':
+        if token_type == FUNCTION_TOKEN and word != 'to_datetime' and word != 'to_timedelta':
             # We turn all used functions into upper case in the translated Python
             # NOTE: this does not effect the original spreadsheet formula, which
             # may remain lower case. 
-            function = word.upper()
-            functions.add(function)
-            return function
-        else:
-            return word
-    
-    # We match all words in formula, and send them through the replace function.
-    # See documentation here: https://docs.python.org/3/library/re.html#re.sub
-    formula_with_functions = re.sub('\w+', replace_functions_internal, formula)
+            word = word.upper()
+            functions.add(word)
 
-    return formula_with_functions, functions
+        formula_with_functions.append(word)
+
+    return ''.join(formula_with_functions), functions
 
 
 def parse_formula(
@@ -411,4 +496,89 @@ def parse_formula(
         final_code = f'{df_name}[{transpiled_column_header}] = {code_with_functions}'
     else:
         final_code = f'{code_with_functions}'
-    return final_code, functions, column_header_dependencies
\ No newline at end of file
+    return final_code, functions, column_header_dependencies
+
+# The number of parsed formulas that we cache
+MAX_CACHED_PARSED_FORMULAS = 1_000
+
+
+class ParsedFormula():
+    """
+    The result of parsing a formula into code that sets the column, which we cache
+    so we don't parse and compile the same formula each time a step is executed.
+    """
+
+    def __init__(self, python_code: str, functions: Set[str], column_header_dependencies: Set[ColumnHeader]):
+        self.python_code = python_code
+        self.functions = functions
+        self.column_header_dependencies = column_header_dependencies
+        self._compiled_code: Optional[CodeType] = None
+        self._unresolved_names: Optional[Set[str]] = None
+
+    @property
+    def compiled_code(self) -> CodeType:
+        """
+        The compiled python code, which is compiled the first time it is used, so 
+        that any errors compiling it are thrown when it is executed.
+        """
+        if self._compiled_code is None:
+            self._compiled_code = compile(self.python_code, '<string>', 'exec')
+        return self._compiled_code
+
+    @property
+    def unresolved_names(self) -> Set[str]:
+        """
+        The names in the python code that are not the dataframe or a function, which
+        are the words in the formula that are not column headers, e.g. columns that
+        were deleted. Throws a SyntaxError if the python code is invalid.
+        """
+        if self._unresolved_names is None:
+            self._unresolved_names = set(
+                node.id for node in ast.walk(ast.parse(self.python_code))
+                if isinstance(node, ast.Name) and node.id not in ('df', 'pd') and node.id not in self.functions
+            )
+        return self._unresolved_names
+
+
+parsed_formula_cache: 'OrderedDict[Hashable, ParsedFormula]' = OrderedDict()
+parsed_formula_cache_lock = Lock()
+# The number of formulas we did and did not find in the cache
+parsed_formula_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def get_parsed_formula(
+        formula: str, 
+        column_header: ColumnHeader, 
+        column_headers: Collection[ColumnHeader],
+    ) -> ParsedFormula:
+    """
+    Returns the same result as parse_formula with the default arguments, but caches 
+    the result for the most recently parsed formulas. Like parse_formula, throws an
+    error if the formula is invalid, which is not cached.
+    """
+    column_headers = tuple(column_headers)
+    # NOTE: we include the types of the column headers, as 1 == 1.0 == True 
+    key = (
+        formula, 
+        column_header, 
+        type(column_header), 
+        column_headers, 
+        tuple(type(other_column_header) for other_column_header in column_headers)
+    )
+
+    with parsed_formula_cache_lock:
+        parsed_formula = parsed_formula_cache.get(key)
+        if parsed_formula is not None:
+            parsed_formula_cache_stats['hits'] += 1
+            parsed_formula_cache.move_to_end(key)
+            return parsed_formula
+        parsed_formula_cache_stats['misses'] += 1
+
+    parsed_formula = ParsedFormula(*parse_formula(formula, column_header, list(column_headers)))
+
+    with parsed_formula_cache_lock:
+        parsed_formula_cache[key] = parsed_formula
+        while len(parsed_formula_cache) > MAX_CACHED_PARSED_FORMULAS:
+            parsed_formula_cache.popitem(last=False)
+
+    return parsed_formula
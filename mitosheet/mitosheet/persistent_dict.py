@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains the PersistentDict, which the State uses to store the metadata for
+each sheet (e.g. the column formulas, filters and formats), as well as the graphs.
+
+Every step copies the state, but most steps change only one or two entries in
+this metadata. So, rather than copying all of the metadata for every step, the
+PersistentDict shares all the entries that have not changed with its copies.
+"""
+from copy import deepcopy
+from typing import Any, Dict, Iterable, Iterator, MutableMapping, Optional, Set, Tuple, TypeVar
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+# When copying, we flatten the changes into a new base dict once there are more 
+# than MIN_CHANGES_BEFORE_FLATTEN changes, and they are more than an eighth of the
+# entries in the base dict, so copying stays fast but flattening happens rarely
+MIN_CHANGES_BEFORE_FLATTEN = 8
+BASE_DIVISOR_BEFORE_FLATTEN = 8
+
+
+def _is_mutable(value: Any) -> bool:
+    return isinstance(value, (dict, list, set))
+
+
+class PersistentDict(MutableMapping[K, V]):
+    """
+    A dict that can be copied in time proportional to the number of changes
+    made to it since it was created, rather than the number of entries in it.
+
+    It does this by storing a base dict that is shared with all of its copies
+    and never changed, as well as the changes made on top of this base dict. It
+    keeps the same order of keys as a dict would.
+
+    The values in the dict are shared with its copies too. So that editing a 
+    value in place (e.g. column_filters[sheet_index][column_id]['filters'].append(...))
+    cannot change the value in a copy, reading a mutable value that may be shared 
+    returns a copy of it, which this dict then holds instead of the shared value.
+    """
+
+    def __init__(self, items: Optional[Iterable[Tuple[K, V]]]=None):
+        self._base: Dict[K, V] = dict(items) if items is not None else dict()
+
+        # Keys that are still in their position in the base dict, with new values
+        self._updated: Dict[K, V] = dict()
+        # Keys that have been deleted from their position in the base dict
+        self._deleted: Set[K] = set()
+        # Keys that come after the base dict, as they were added (or deleted and
+        # then added back) after the base dict was created
+        self._appended: Dict[K, V] = dict()
+        # Keys with values that are not shared with any copy of this dict, as
+        # they were set since this dict was last copied
+        self._unshared: Set[K] = set()
+
+    def _get_shared(self, key: K) -> V:
+        if key in self._appended:
+            return self._appended[key]
+        if key in self._deleted:
+            raise KeyError(key)
+        if key in self._updated:
+            return self._updated[key]
+        return self._base[key]
+
+    def __getitem__(self, key: K) -> V:
+        value = self._get_shared(key)
+        if key in self._unshared or not _is_mutable(value):
+            return value
+
+        value = deepcopy(value)
+        self[key] = value
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self._unshared.add(key)
+        if key in self._appended:
+            self._appended[key] = value
+        elif key in self._base and key not in self._deleted:
+            self._updated[key] = value
+        else:
+            self._appended[key] = value
+
+    def __delitem__(self, key: K) -> None:
+        self._unshared.discard(key)
+        if key in self._appended:
+            del self._appended[key]
+        elif key in self._base and key not in self._deleted:
+            if key in self._updated:
+                del self._updated[key]
+            self._deleted.add(key)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._appended or (key in self._base and key not in self._deleted)
+
+    def __iter__(self) -> Iterator[K]:
+        for key in self._base:
+            if key not in self._deleted:
+                yield key
+        yield from self._appended
+
+    def __len__(self) -> int:
+        return len(self._base) - len(self._deleted) + len(self._appended)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({dict(self)})'
+
+    @property
+    def num_changes(self) -> int:
+        return len(self._updated) + len(self._deleted) + len(self._appended)
+
+    def copy(self) -> "PersistentDict[K, V]":
+        """
+        Returns a copy of this dict that shares the base dict with this dict,
+        which only takes time proportional to the number of changes to it.
+
+        If there are too many changes to the base dict, the copy instead gets
+        a new base dict, so that later copies are fast again.
+        """
+        # After copying, all the values are shared by this dict and the copy
+        self._unshared = set()
+
+        if self.num_changes > max(MIN_CHANGES_BEFORE_FLATTEN, len(self._base) // BASE_DIVISOR_BEFORE_FLATTEN):
+            return PersistentDict((key, self._get_shared(key)) for key in self)
+
+        new_dict: PersistentDict[K, V] = PersistentDict()
+        new_dict._base = self._base
+        new_dict._updated = dict(self._updated)
+        new_dict._deleted = set(self._deleted)
+        new_dict._appended = dict(self._appended)
+        return new_dict
+
+
+def copy_persistent_dict(d: MutableMapping[K, V]) -> PersistentDict[K, V]:
+    """
+    Returns a PersistentDict copy of d. If d is not already a PersistentDict,
+    this copies all of its entries, but this only happens once.
+    """
+    if isinstance(d, PersistentDict):
+        return d.copy()
+    return PersistentDict(d.items())
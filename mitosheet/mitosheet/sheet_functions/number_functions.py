@@ -14,12 +14,12 @@ in more detail in docs/README.md.
 NOTE: This file is alphabetical order!
 """
 import functools
-from typing import Tuple
+from typing import Any, Tuple
 import pandas as pd
 import numpy as np
 
 from mitosheet.sheet_functions.types.decorators import fill_nans, filter_nans, convert_args_to_series_type, convert_arg_to_series_type, handle_sheet_function_errors
-from mitosheet.sheet_functions.sheet_function_utils import try_extend_series_to_index, fill_series_with_one_index, fill_series_with_one_index
+from mitosheet.sheet_functions.sheet_function_utils import apply_to_constant_arguments, try_extend_series_to_index, fill_series_with_one_index, fill_series_with_one_index
 
 @handle_sheet_function_errors
 @convert_arg_to_series_type(
@@ -345,6 +345,24 @@ def POWER(series, power):
     return series.pow(power)
 
 
+def _round_to_constant_decimals(values: pd.Series, dec: Any) -> pd.Series:
+    """
+    Rounds each of the values with Python round. NumPy rounds some values differently
+    (e.g. 2.675 to 2 decimals is 2.68 rather than 2.67), as it scales the values by a 
+    power of ten first, and it overflows for large decimals. So, we only round with 
+    NumPy when no scaling is needed, as then it gives the same results as Python round.
+    """
+    if isinstance(dec, (int, np.integer)):
+        # Both round halves to even, so rounding floats to 0 decimals is the same
+        if values.dtype == np.float64 and dec == 0:
+            return pd.Series(np.rint(values.to_numpy()), index=values.index)
+        # And ints are not changed by rounding to 0 or more decimals
+        if values.dtype == np.int64 and dec >= 0:
+            return values.copy()
+
+    return pd.Series([round(num, dec) for num in values], index=values.index)
+
+
 @handle_sheet_function_errors
 @filter_nans
 @convert_arg_to_series_type(
@@ -387,6 +405,15 @@ def ROUND(series, decimals=None):
     if decimals is None:
         return series.round()
     
+    # If there is one number of decimals, we round without filling it to the end
+    result = apply_to_constant_arguments(
+        series,
+        (decimals,),
+        _round_to_constant_decimals
+    )
+    if result is not None:
+        return result
+
     # Otherwise, fill the decimals to length
     decimals = try_extend_series_to_index(decimals, series.index)
 
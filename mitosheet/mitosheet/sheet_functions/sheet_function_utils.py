@@ -6,7 +6,7 @@
 """
 Contains utilities used in multiple sheet functions.
 """
-from typing import List, Tuple, Union
+from typing import Callable, List, Optional, Tuple, Union
 import pandas as pd
 import numpy as np
 
@@ -60,4 +60,28 @@ def is_series_of_constant(series: pd.Series) -> bool:
     We need to make sure to extend these series, so that we can operate on
     them with sheet functions properly. 
     """
-    return series.size == 1 and series.index.tolist() == [0]
\ No newline at end of file
+    return series.size == 1 and series.index.tolist() == [0]
+
+def apply_to_constant_arguments(
+        series: pd.Series, 
+        arguments: Tuple[pd.Series, ...], 
+        vectorized_function: Callable[..., pd.Series]
+    ) -> Optional[pd.Series]:
+    """
+    Calls vectorized_function(series, *argument_values) once on the whole series, 
+    if each argument is a series of a constant, or has the same value for each row
+    of the series.
+
+    Returns None otherwise, in which case the caller should fall back to handling
+    each row on its own.
+    """
+    if series.size == 0:
+        return None
+
+    for argument in arguments:
+        if argument.size == 1:
+            continue
+        if argument.size != series.size or argument.nunique(dropna=False) != 1:
+            return None
+
+    return vectorized_function(series, *[argument.iloc[0] for argument in arguments])
@@ -14,8 +14,10 @@ NOTE: This file is alphabetical order!
 import functools
 
 import pandas as pd
+from pandas.api.types import is_integer_dtype
 from mitosheet.sheet_functions.sheet_function_utils import (
-    fill_series_with_one_index, try_extend_series_to_index)
+    apply_to_constant_arguments, fill_series_with_one_index,
+    try_extend_series_to_index)
 from mitosheet.sheet_functions.types.decorators import (
     cast_output, convert_arg_to_series_type, convert_args_to_series_type,
     filter_nans, handle_sheet_function_errors)
@@ -121,6 +123,15 @@ def FIND(series: pd.Series, substrings: pd.Series) -> pd.Series:
     }
     """
 
+    # If there is one substring, we find it without filling it to the end
+    result = apply_to_constant_arguments(
+        series, 
+        (substrings,), 
+        lambda strings, substring: pd.Series([string.find(substring) + 1 for string in strings], index=strings.index)
+    )
+    if result is not None:
+        return result
+
     # If there aren't enough substrings, we fill it to the end
     substrings = try_extend_series_to_index(substrings, series.index)
 
@@ -172,6 +183,15 @@ def LEFT(series: pd.Series, num_chars: pd.Series=None) -> pd.Series:
     if num_chars is None:
         num_chars = pd.Series(data=[1] * series.size)
 
+    # If there is one number of chars, we slice all the strings at once
+    result = apply_to_constant_arguments(
+        series, 
+        (num_chars,), 
+        lambda strings, num_char: strings.str.slice(stop=int(num_char))
+    )
+    if result is not None:
+        return result
+
     # If there aren't enough char splits, we fill it to the end
     num_chars = try_extend_series_to_index(num_chars, series.index)
     # And then slice the string on the left
@@ -288,6 +308,16 @@ def MID(series: pd.Series, start_loc: pd.Series, num_chars: pd.Series) -> pd.Ser
         ]
     }
     """
+    # If there is one start location and number of chars, we slice all the strings at once
+    if is_integer_dtype(start_loc.dtype) and is_integer_dtype(num_chars.dtype):
+        result = apply_to_constant_arguments(
+            series, 
+            (start_loc, num_chars), 
+            lambda strings, start, num_char: strings.str.slice(start - 1, start - 1 + int(num_char))
+        )
+        if result is not None:
+            return result
+
     # If there aren't enough char splits, we fill it to the end
     start_loc = try_extend_series_to_index(start_loc, series.index)
     num_chars = try_extend_series_to_index(num_chars, series.index)
@@ -372,6 +402,15 @@ def RIGHT(series: pd.Series, num_chars: pd.Series=None) -> pd.Series:
     if num_chars is None:
         num_chars = pd.Series(data=[1] * series.size)
 
+    # If there is one number of chars, we slice all the strings at once
+    result = apply_to_constant_arguments(
+        series, 
+        (num_chars,), 
+        lambda strings, num_char: strings.str.slice(start=-int(num_char)) if num_char > 0 else pd.Series('', index=strings.index)
+    )
+    if result is not None:
+        return result
+
     # If there aren't enough char splits, we fill it to the end
     num_chars = try_extend_series_to_index(num_chars, series.index)
     # And then slice the string on the left
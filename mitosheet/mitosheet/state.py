@@ -4,14 +4,20 @@
 # Copyright (c) Saga Inc.
 # Distributed under the terms of the GPL License.
 from collections import OrderedDict
-from copy import deepcopy
-from typing import Any, Collection, List, Dict, Optional, Set
+from typing import Any, Collection, List, Dict, MutableMapping, Optional, Set, Tuple
 import pandas as pd
 
+from mitosheet.column_dependency_graph import ColumnDependencyGraph
 from mitosheet.column_headers import ColumnIDMap
+from mitosheet.persistent_dict import copy_persistent_dict
 from mitosheet.types import ColumnHeader, ColumnID
 from mitosheet.utils import get_first_unused_dataframe_name
 
+try:
+    from pandas.core.internals import BlockManager, make_block
+except ImportError: # pragma: no cover
+    BlockManager, make_block = None, None
+
 # Constants for where the dataframe in the state came from
 DATAFRAME_SOURCE_PASSED = "passed"  # passed in mitosheet.sheet
 DATAFRAME_SOURCE_IMPORTED = "imported"  # imported through a simple import
@@ -50,10 +56,11 @@ class State:
         df_names: List[str] = None,
         df_sources: List[str] = None,
         column_ids: ColumnIDMap = None,
-        column_spreadsheet_code: List[Dict[ColumnID, str]] = None,
-        column_filters: List[Dict[ColumnID, Any]] = None,
-        column_format_types: List[Dict[ColumnID, Dict[str, Any]]] = None,
-        graph_data_dict: "OrderedDict[str, Dict[str, Any]]" = None
+        column_spreadsheet_code: List[MutableMapping[ColumnID, str]] = None,
+        column_filters: List[MutableMapping[ColumnID, Any]] = None,
+        column_format_types: List[MutableMapping[ColumnID, Dict[str, Any]]] = None,
+        graph_data_dict: MutableMapping[str, Dict[str, Any]] = None,
+        formula_dependency_graphs: Dict[int, Tuple[Any, ColumnDependencyGraph]] = None
     ):
 
         # The dataframes that are in the state
@@ -109,7 +116,7 @@ class State:
             ]
         )
 
-        self.column_format_types: List[Dict[str, Dict[str, Any]]] = (
+        self.column_format_types: List[MutableMapping[str, Dict[str, Any]]] = (
             column_format_types
             if column_format_types is not None
             else [
@@ -123,28 +130,98 @@ class State:
 
         # We put this in an ordered dict so we can easily figure out the last graph that was edited at each step. 
         # This is helpful for undoing, for example. 
-        self.graph_data_dict: OrderedDict[str, Dict[str, Any]] = graph_data_dict if graph_data_dict is not None else OrderedDict()
-
-    def copy(self, deep_sheet_indexes: Optional[List[int]]=None) -> "State":
+        self.graph_data_dict: MutableMapping[str, Dict[str, Any]] = graph_data_dict if graph_data_dict is not None else OrderedDict()
+
+        # If the StepsManager is over its memory budget, it drops the data in the dataframes 
+        # of some states, and then replays steps to rebuild them when they are needed
+        self.dfs_dropped = False
+
+        # The dependency graph of the formulas in each sheet, along with the formulas and column 
+        # headers it was built from. We build it when it is first needed, and states that are 
+        # copied from this state reuse it, as long as their formulas and column headers are the same
+        self.formula_dependency_graphs: Dict[int, Tuple[Any, ColumnDependencyGraph]] = formula_dependency_graphs if formula_dependency_graphs is not None else {}
+
+    def copy(
+            self,
+            deep_sheet_indexes: Optional[List[int]]=None,
+            deep_column_ids: Optional[Dict[int, Collection[ColumnID]]]=None
+        ) -> "State":
         """
         Returns a copy of the state, while only making deep copies of
-        those dataframes in the deep_sheet_indexes. Ideally, we'd copy
-        even less than that deeply.
+        those dataframes in the deep_sheet_indexes.
+
+        For the sheets in deep_column_ids, only the columns with the given
+        column ids are deep copied, and the rest of the columns share their
+        data with this state. Steps that use this must only write to the
+        columns they pass, as any other write would also change the dataframes
+        in this state.
         """
         if deep_sheet_indexes is None:
             deep_sheet_indexes = []
-        
+        if deep_column_ids is None:
+            deep_column_ids = {}
+
+        dfs = []
+        for sheet_index, df in enumerate(self.dfs):
+            if sheet_index in deep_column_ids:
+                column_headers = self.column_ids.get_column_headers_by_ids(sheet_index, list(deep_column_ids[sheet_index]))
+                dfs.append(copy_columns(df, column_headers))
+            else:
+                dfs.append(df.copy(deep=sheet_index in deep_sheet_indexes))
+
         return State(
-            [df.copy(deep=index in deep_sheet_indexes) for index, df in enumerate(self.dfs)],
-            df_names=deepcopy(self.df_names),
-            df_sources=deepcopy(self.df_sources),
-            column_ids=deepcopy(self.column_ids),
-            column_spreadsheet_code=deepcopy(self.column_spreadsheet_code),
-            column_filters=deepcopy(self.column_filters),
-            column_format_types=deepcopy(self.column_format_types),
-            graph_data_dict=deepcopy(self.graph_data_dict)
+            dfs,
+            df_names=list(self.df_names),
+            df_sources=list(self.df_sources),
+            # The metadata is stored in PersistentDicts, which share all of the
+            # entries that are not changed by this step with this state
+            column_ids=self.column_ids.copy(),
+            column_spreadsheet_code=[copy_persistent_dict(d) for d in self.column_spreadsheet_code],
+            column_filters=[copy_persistent_dict(d) for d in self.column_filters],
+            column_format_types=[copy_persistent_dict(d) for d in self.column_format_types],
+            graph_data_dict=copy_persistent_dict(self.graph_data_dict),
+            formula_dependency_graphs=dict(self.formula_dependency_graphs)
         )
 
+    def get_column_dependency_graph(self, sheet_index: int) -> ColumnDependencyGraph:
+        """
+        Returns the graph of which formula columns in the sheet at sheet_index depend
+        on which other columns, which is built from the column_spreadsheet_code. 
+        """
+        column_headers = list(self.dfs[sheet_index].keys())
+        graph_key = (
+            list(self.column_spreadsheet_code[sheet_index].items()),
+            list(self.column_ids.get_column_ids_map(sheet_index).items()),
+            column_headers
+        )
+
+        if sheet_index in self.formula_dependency_graphs:
+            cached_graph_key, column_dependency_graph = self.formula_dependency_graphs[sheet_index]
+            if cached_graph_key == graph_key:
+                return column_dependency_graph
+
+        column_dependency_graph = ColumnDependencyGraph(
+            self.column_spreadsheet_code[sheet_index],
+            self.column_ids,
+            sheet_index,
+            column_headers
+        )
+        self.formula_dependency_graphs[sheet_index] = (graph_key, column_dependency_graph)
+        return column_dependency_graph
+
+    def drop_dfs(self) -> None:
+        """
+        Replaces the dataframes in this state with empty dataframes with the
+        same columns and dtypes, so that their data can be freed. 
+
+        Everything but the data of the dataframes is kept, so the state can
+        still be used for transpiling and describing steps.
+        """
+        # NOTE: we copy the empty dataframes, as otherwise they are views 
+        # on the original dataframes, and keep all of their data around
+        self.dfs = [df.iloc[:0].copy(deep=True) for df in self.dfs]
+        self.dfs_dropped = True
+
     def add_df_to_state(
         self,
         new_df: pd.DataFrame,
@@ -247,6 +324,32 @@ class State:
             self.column_filters[sheet_index][column_id] = {'operator': 'And', 'filters': []}
             self.column_format_types[sheet_index][column_id] = {'type': FORMAT_DEFAULT}
 
+    def set_sheet_from_state(self, state: "State", sheet_index: int) -> None:
+        """
+        Sets the sheet at sheet_index, and all of the metadata for it, to be the
+        same as the sheet at sheet_index in the other state. If sheet_index is 
+        one past the last sheet, then the sheet is appended.
+
+        The dataframe is shared with the other state, not copied, so this
+        should only be used with states that are not edited after they are
+        created, like the post_state of a step.
+        """
+        sheet_variables = [
+            (self.dfs, state.dfs[sheet_index]),
+            (self.df_names, state.df_names[sheet_index]),
+            (self.df_sources, state.df_sources[sheet_index]),
+            (self.column_spreadsheet_code, copy_persistent_dict(state.column_spreadsheet_code[sheet_index])),
+            (self.column_filters, copy_persistent_dict(state.column_filters[sheet_index])),
+            (self.column_format_types, copy_persistent_dict(state.column_format_types[sheet_index])),
+        ]
+        for sheet_variable, value in sheet_variables:
+            if sheet_index == len(sheet_variable):
+                sheet_variable.append(value)
+            else:
+                sheet_variable[sheet_index] = value
+
+        self.column_ids.set_sheet_from_column_ids(state.column_ids, sheet_index)
+
     def does_sheet_index_exist_within_state(self, sheet_index: int) -> bool:
         """
         Returns true iff a sheet_index exists within this state
@@ -280,3 +383,58 @@ class State:
 
         # Then, update the column ids mapping object itself
         self.column_ids.move_to_deprecated_id_format()
+
+
+def copy_columns(df: pd.DataFrame, column_headers: Collection[ColumnHeader]) -> pd.DataFrame:
+    """
+    Returns a copy of the dataframe where only the columns with the given
+    column headers are deep copied, and all other columns are views on the
+    data of the original dataframe.
+
+    Pandas stores columns of the same dtype together in 2D blocks, and there is
+    no public API to replace one column in a block without copying the rest of 
+    the block. So, we build the new dataframe from views on the blocks of the
+    original dataframe, and only copy the data of the columns that are written. 
+    On versions of pandas where we have not checked this, we deep copy instead.
+    """
+    from mitosheet.saved_analyses.schema_utils import is_prev_version
+
+    if len(column_headers) == 0:
+        return df.copy(deep=False)
+
+    # We only build dataframes from pandas blocks on the versions of pandas we know
+    # the internals of. Earlier and later versions just deep copy the dataframe.
+    if BlockManager is None or is_prev_version(pd.__version__, '0.24.0') or not is_prev_version(pd.__version__, '2.0.0'):
+        return df.copy(deep=True)
+
+    column_positions = set(df.columns.get_loc(column_header) for column_header in column_headers)
+    if any(not isinstance(column_position, int) for column_position in column_positions):
+        # If there are duplicated column headers, we just copy everything
+        return df.copy(deep=True)
+
+    try:
+        mgr = df._mgr if hasattr(df, '_mgr') else df._data
+        new_blocks = []
+        for block in mgr.blocks:
+            block_positions = list(block.mgr_locs.as_array)
+            if block.values.ndim == 1:
+                # Extension blocks only store a single column
+                new_blocks.append(block.copy(deep=block_positions[0] in column_positions))
+                continue
+
+            # Split the block into views on the runs of columns that are not written, 
+            # and copies of each of the columns that are written
+            start = 0
+            for end in range(len(block_positions) + 1):
+                if end < len(block_positions) and block_positions[end] not in column_positions:
+                    continue
+                if start < end:
+                    new_blocks.append(make_block(block.values[start:end], placement=block_positions[start:end], ndim=2))
+                if end < len(block_positions):
+                    new_blocks.append(make_block(block.values[end:end + 1].copy(), placement=block_positions[end:end + 1], ndim=2))
+                start = end + 1
+
+        return pd.DataFrame(BlockManager(new_blocks, list(mgr.axes)))
+    except (AttributeError, TypeError, ValueError):
+        # If the internals of this version of pandas are not what we expect, we fall back to a deep copy
+        return df.copy(deep=True)
@@ -4,8 +4,9 @@
 # Copyright (c) Saga Inc.
 # Distributed under the terms of the GPL License.
 
-from typing import Any, Dict, List, Optional, Set, Type
+from typing import Any, Dict, List, MutableMapping, Optional, Set, Tuple, Type
 
+from mitosheet.code_chunks.code_chunk import CodeChunk
 from mitosheet.step_performers.step_performer import StepPerformer
 from mitosheet.step_performers.column_steps.set_column_formula import SetColumnFormulaStepPerformer
 from mitosheet.step_performers.filter import FilterStepPerformer
@@ -62,6 +63,11 @@ class Step:
         # is useful for the transpiler - that means the transpiler can do way less
         # work if it has already been done. See simple_import for an example
         self.execution_data = execution_data if execution_data is not None else {}
+        # The code chunks this step transpiles to, which we create the first time they 
+        # are needed, and which are only invalid once the step is executed again
+        self._code_chunks: Optional[Tuple[CodeChunk, ...]] = None
+        # The display name and description of this step, which are created from its code chunks
+        self._display_metadata: Optional[Dict[str, str]] = None
 
     @property
     def dfs(self):
@@ -92,7 +98,7 @@ class Step:
         return self.post_state.column_format_types
 
     @property
-    def graph_data_dict(self) -> Dict[str, Dict[str, Any]]:
+    def graph_data_dict(self) -> MutableMapping[str, Dict[str, Any]]:
         """
         graph_data_dict contains all of the parameters used to construct the graph,
         the actual graph html & javascript, and the generated code for all of the existing graphs in Mito.
@@ -120,6 +126,44 @@ class Step:
         return self.post_state if self.post_state is not None else \
             (self.prev_state if self.prev_state is not None else State([]))
 
+    @property
+    def code_chunks(self) -> Tuple[CodeChunk, ...]:
+        """
+        Returns the code chunks that this step transpiles to. These are not
+        optimized, and are cached until the step is executed again.
+        """
+        if self._code_chunks is None:
+            self._code_chunks = tuple(self.step_performer.transpile(
+                self.prev_state, # type: ignore
+                self.post_state, # type: ignore
+                self.params,
+                self.execution_data,
+            ))
+        return self._code_chunks
+
+    @property
+    def display_metadata(self) -> Dict[str, str]:
+        """
+        Returns the display name and description of this step that are shown
+        in the step list. Like the code chunks, these are cached until the step 
+        is executed again.
+        """
+        if self._display_metadata is None:
+            if self.step_type == 'initialize':
+                self._display_metadata = {
+                    "step_display_name": "Created a mitosheet",
+                    "step_description": "Created a new mitosheet",
+                }
+            else:
+                # NOTE: we cannot and should not optimize the code chunks here, as
+                # rely on getting data out of them is to label the steps correctly
+                code_chunks = self.code_chunks
+                self._display_metadata = {
+                    "step_display_name": code_chunks[0].get_display_name(),
+                    "step_description": code_chunks[0].get_description_comment(),
+                }
+        return self._display_metadata
+
     def set_prev_state_and_execute(self, new_prev_state: State) -> None:
         """
         Changes the prev_state of this step, which in turns triggers
@@ -152,6 +196,15 @@ class Step:
         self.post_state = new_post_state
         self.execution_data = execution_data if execution_data is not None else {}
         self.params = params
+        self.clear_cached_code_chunks()
+
+    def clear_cached_code_chunks(self) -> None:
+        """
+        Clears the cached code chunks and display metadata of this step. Call this
+        if you change the state of this step in place, without executing it.
+        """
+        self._code_chunks = None
+        self._display_metadata = None
     
 
     def step_indexes_to_skip(self, all_steps_before_this_step: List['Step']) -> Set[int]:
@@ -163,6 +216,9 @@ class Step:
         1. This step is a filter step that is trying to replace an older filter step
         2. This step has the same id as any step before it (like for pivot tables)
         3. This step is a formula step overwriting the step that came just before it
+
+        NOTE: the StepSkipIndex implements these same rules incrementally, so if you 
+        change them here, you must change them there as well.
         """
 
         step_indexes_to_skip = set()
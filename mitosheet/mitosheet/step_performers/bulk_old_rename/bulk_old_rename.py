@@ -96,4 +96,8 @@ class BulkOldRenameStepPerformer(StepPerformer):
 
     @classmethod
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
-        return set() # changes all dataframes
\ No newline at end of file
+        return set() # changes all dataframes
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return None # reads all dataframes
\ No newline at end of file
@@ -8,6 +8,7 @@ from time import perf_counter
 from typing import Any, Dict, List, Optional, Set, Tuple
 import pandas as pd
 from mitosheet.code_chunks.code_chunk import CodeChunk
+from mitosheet.code_chunks.refresh_dependent_columns_code_chunk import get_refresh_dependent_columns_code_chunks
 from mitosheet.code_chunks.step_performers.column_steps.change_column_dtype_code_chunk import ChangeColumnDtypeCodeChunk
 
 from mitosheet.errors import get_recent_traceback, make_invalid_column_type_change_error
@@ -24,6 +25,7 @@ from mitosheet.sheet_functions.types.utils import (get_datetime_format,
                                                    is_string_dtype,
                                                    is_timedelta_dtype)
 from mitosheet.state import FORMAT_DEFAULT, State
+from mitosheet.step_performers.column_steps.set_column_formula import refresh_dependent_columns
 from mitosheet.step_performers.step_performer import StepPerformer
 from mitosheet.step_performers.utils import get_param
 from mitosheet.types import ColumnID
@@ -60,7 +62,8 @@ class ChangeColumnDtypeStepPerformer(StepPerformer):
         old_dtype: str = get_param(params, 'old_dtype')
         new_dtype: str = get_param(params, 'new_dtype')
 
-        post_state = prev_state.copy(deep_sheet_indexes=[sheet_index])
+        # Only the column we change the dtype of is written, so only it is copied
+        post_state = prev_state.copy(deep_column_ids={sheet_index: [column_id]})
 
         column_header = prev_state.column_ids.get_column_header_by_id(sheet_index, column_id)
         
@@ -196,10 +199,6 @@ class ChangeColumnDtypeStepPerformer(StepPerformer):
             # If we're changing between number columns, we keep the formatting on the column. Otherwise, we remove it
             if not ((is_int_dtype(old_dtype) or is_float_dtype(old_dtype)) and (is_int_dtype(new_dtype) or is_float_dtype(new_dtype))):
                 post_state.column_format_types[sheet_index][column_id] = {'type': FORMAT_DEFAULT}
-                
-            return post_state, {
-                'pandas_processing_time': pandas_processing_time
-            }
         except:
             print(get_recent_traceback())
             raise make_invalid_column_type_change_error(
@@ -207,6 +206,17 @@ class ChangeColumnDtypeStepPerformer(StepPerformer):
                 old_dtype,
                 new_dtype
             )
+
+        # Then, we recalculate the formulas that depend on this column. If they are invalid 
+        # with the new dtype, we report that error rather than an invalid type change
+        pandas_start_time = perf_counter()
+        refreshed_column_ids = refresh_dependent_columns(post_state, sheet_index, [column_id])
+        pandas_processing_time += perf_counter() - pandas_start_time
+
+        return post_state, {
+            'pandas_processing_time': pandas_processing_time,
+            'refreshed_column_ids': refreshed_column_ids
+        }
         
 
     @classmethod
@@ -218,9 +228,18 @@ class ChangeColumnDtypeStepPerformer(StepPerformer):
         execution_data: Optional[Dict[str, Any]],
     ) -> List[CodeChunk]:
         return [
-            ChangeColumnDtypeCodeChunk(prev_state, post_state, params, execution_data)
+            ChangeColumnDtypeCodeChunk(prev_state, post_state, params, execution_data),
+            *get_refresh_dependent_columns_code_chunks(prev_state, post_state, get_param(params, 'sheet_index'), execution_data)
         ]
 
     @classmethod
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
+        return {get_param(params, 'sheet_index')}
+
+    @classmethod
+    def get_modified_column_ids(cls, params: Dict[str, Any]) -> Optional[Set[ColumnID]]:
+        return {get_param(params, 'column_id')}
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
         return {get_param(params, 'sheet_index')}
\ No newline at end of file
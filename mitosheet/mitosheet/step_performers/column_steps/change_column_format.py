@@ -70,6 +70,14 @@ class ChangeColumnFormatStepPerformer(StepPerformer):
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
         return {get_param(params, 'sheet_index')}
 
+    @classmethod
+    def get_modified_column_ids(cls, params: Dict[str, Any]) -> Optional[Set[ColumnID]]:
+        return set()
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return {get_param(params, 'sheet_index')}
+
 def update_column_id_format(
     post_state: State,
     sheet_index: int,
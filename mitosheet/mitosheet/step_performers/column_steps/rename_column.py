@@ -50,8 +50,9 @@ class RenameColumnStepPerformer(StepPerformer):
         if new_column_header == '':
             return prev_state, None
 
-        # Create a new post state for this step
-        post_state = prev_state.copy(deep_sheet_indexes=[sheet_index])
+        # Create a new post state for this step. Renaming only changes the column headers,
+        # so none of the data in the dataframe is copied
+        post_state = prev_state.copy(deep_column_ids={sheet_index: []})
 
         old_level_value, pandas_processing_time = rename_column_headers_in_state(
             post_state,
@@ -100,6 +101,14 @@ class RenameColumnStepPerformer(StepPerformer):
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
         return {get_param(params, 'sheet_index')}
 
+    @classmethod
+    def get_modified_column_ids(cls, params: Dict[str, Any]) -> Optional[Set[ColumnID]]:
+        return set()
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return {get_param(params, 'sheet_index')}
+
 
 def rename_column_headers_in_state(
         post_state: State,
@@ -3,20 +3,24 @@
 
 # Copyright (c) Saga Inc.
 # Distributed under the terms of the GPL License.
-from copy import deepcopy
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
 from time import perf_counter
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Collection, Dict, Iterator, List, Optional, Set, Tuple
 
 import pandas as pd
 from mitosheet.code_chunks.code_chunk import CodeChunk
+from mitosheet.code_chunks.refresh_dependent_columns_code_chunk import get_refresh_dependent_columns_code_chunks
 from mitosheet.code_chunks.step_performers.column_steps.set_column_formula_code_chunk import SetColumnFormulaCodeChunk
 from mitosheet.errors import (MitoError, make_circular_reference_error,
                               make_execution_error, make_invalid_formula_after_update_error, make_no_column_error,
                               make_operator_type_error,
                               make_unsupported_function_error)
-from mitosheet.parser import parse_formula
+from mitosheet.parallel_formulas import evaluate_formula, get_formula_executor
+from mitosheet.parser import get_parsed_formula, parsed_formula_cache_stats
 from mitosheet.sheet_functions import FUNCTIONS
-from mitosheet.state import State
+from mitosheet.sheet_functions.types.utils import is_string_dtype
+from mitosheet.state import State, copy_columns
 from mitosheet.step_performers.step_performer import StepPerformer
 from mitosheet.step_performers.utils import get_param
 from mitosheet.types import ColumnHeader, ColumnID
@@ -51,7 +55,7 @@ class SetColumnFormulaStepPerformer(StepPerformer):
             try:
                 # Try and parse the formula, letting it throw errors if it
                 # is invalid
-                parse_formula(params['new_formula'], column_header, column_headers, throw_errors=True)
+                get_parsed_formula(params['new_formula'], column_header, column_headers)
             except:
                 params['new_formula'] = _get_fixed_invalid_formula(params['new_formula'], column_header, column_headers)
 
@@ -66,13 +70,17 @@ class SetColumnFormulaStepPerformer(StepPerformer):
         column_header = prev_state.column_ids.get_column_header_by_id(sheet_index, column_id)
         column_headers = prev_state.dfs[sheet_index].keys()
 
+        # The cache stats count all formulas parsed so far, so we report the change during this step
+        start_cache_hits, start_cache_misses = parsed_formula_cache_stats['hits'], parsed_formula_cache_stats['misses']
+
         # Then we try and parse the formula
-        _, new_functions, new_dependencies_column_headers = parse_formula(
+        parsed_formula = get_parsed_formula(
             new_formula, 
             column_header,
             column_headers
         )
-        new_dependencies = set(prev_state.column_ids.get_column_ids(sheet_index, new_dependencies_column_headers))
+        new_functions = parsed_formula.functions
+        new_dependencies = set(prev_state.column_ids.get_column_ids(sheet_index, parsed_formula.column_header_dependencies))
 
         # We check that the formula doesn't reference any columns that don't exist
         missing_columns = new_dependencies.difference(prev_state.column_ids.get_column_ids(sheet_index))
@@ -84,13 +92,14 @@ class SetColumnFormulaStepPerformer(StepPerformer):
         if any(missing_functions):
             raise make_unsupported_function_error(missing_functions, error_modal=False)
 
-        # We check out a new step
-        post_state = prev_state.copy(deep_sheet_indexes=[sheet_index])
+        # We check out a new step, only copying the column we write the formula to
+        post_state = prev_state.copy(deep_column_ids={sheet_index: [column_id]})
 
-        # Update the column formula, and then execute the new formula graph
+        # Update the column formula, and then recalculate the formulas that depend on it
         try:
             pandas_start_time = perf_counter()
             exec_column_formula(post_state, post_state.dfs[sheet_index], sheet_index, column_id, new_formula)
+            refreshed_column_ids = refresh_dependent_columns(post_state, sheet_index, [column_id])
             pandas_processing_time = perf_counter() - pandas_start_time
         except MitoError as e:
             # Catch the error and make sure that we don't set the error modal
@@ -100,7 +109,10 @@ class SetColumnFormulaStepPerformer(StepPerformer):
             raise make_execution_error(error_modal=False)
 
         return post_state, {
-            'pandas_processing_time': pandas_processing_time
+            'pandas_processing_time': pandas_processing_time,
+            'refreshed_column_ids': refreshed_column_ids,
+            'parsed_formula_cache_hits': parsed_formula_cache_stats['hits'] - start_cache_hits,
+            'parsed_formula_cache_misses': parsed_formula_cache_stats['misses'] - start_cache_misses,
         }
 
     @classmethod
@@ -115,13 +127,22 @@ class SetColumnFormulaStepPerformer(StepPerformer):
         Transpiles an set_column_formula step to python code!
         """
         return [
-            SetColumnFormulaCodeChunk(prev_state, post_state, params, execution_data)
+            SetColumnFormulaCodeChunk(prev_state, post_state, params, execution_data),
+            *get_refresh_dependent_columns_code_chunks(prev_state, post_state, get_param(params, 'sheet_index'), execution_data)
         ]
 
     @classmethod
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
         return {get_param(params, 'sheet_index')}
 
+    @classmethod
+    def get_modified_column_ids(cls, params: Dict[str, Any]) -> Optional[Set[ColumnID]]:
+        return {get_param(params, 'column_id')}
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return {get_param(params, 'sheet_index')}
+
 
 def _get_fixed_invalid_formula(
         new_formula: str, 
@@ -149,7 +170,7 @@ def _get_fixed_invalid_formula(
     for fixed_formula in POTENTIAL_VALID_FORMULAS:
         try:
             # Parse the formula, and return if it is valid
-            parse_formula(fixed_formula, column_header, column_headers, throw_errors=True)
+            get_parsed_formula(fixed_formula, column_header, column_headers)
             return fixed_formula
         except:
             pass
@@ -220,22 +241,32 @@ def exec_column_formula(post_state: State, df: pd.DataFrame, sheet_index: int, c
         return
 
     column_header = post_state.column_ids.get_column_header_by_id(sheet_index, column_id)
-    python_code, _, _ = parse_formula(
+    parsed_formula = get_parsed_formula(
         spreadsheet_code, 
         column_header,
         post_state.dfs[sheet_index].keys()
     )
 
-    try:
-        # Exec the code, where the df is the original dataframe
+    with formula_errors(post_state, sheet_index, column_id, spreadsheet_code):
+        # Exec the compiled code, where the df is the original dataframe
         # See explination here: https://www.tutorialspoint.com/exec-in-python
         exec(
-            python_code,
+            parsed_formula.compiled_code,
             {'df': df, 'pd': pd}, 
             FUNCTIONS
         )
         # Then, update the column spreadsheet code
         post_state.column_spreadsheet_code[sheet_index][column_id] = spreadsheet_code
+
+
+@contextmanager
+def formula_errors(post_state: State, sheet_index: int, column_id: ColumnID, spreadsheet_code: str) -> Iterator[None]:
+    """
+    Turns the errors thrown while executing the formula of a column into errors
+    that tell the user how to fix the formula.
+    """
+    try:
+        yield
     except TypeError as e:
         # We catch TypeErrors specificially, so that we can case on operator errors, to 
         # give better error messages
@@ -258,4 +289,81 @@ def exec_column_formula(post_state: State, df: pd.DataFrame, sheet_index: int, c
         # in invalid
         if spreadsheet_code == post_state.column_spreadsheet_code[sheet_index][column_id]:
             raise make_invalid_formula_after_update_error()
-        raise
\ No newline at end of file
+        raise
+
+
+def refresh_dependent_columns(post_state: State, sheet_index: int, column_ids: Collection[ColumnID]) -> List[ColumnID]:
+    """
+    Helper function for recalculating the formula columns that depend on the columns
+    with the given column_ids, after these columns are modified. Each formula is
+    recalculated over the whole column, after all of the columns it depends on.
+
+    Returns the ids of the recalculated columns, in the order they were recalculated.
+    
+    NOTE: the recalculated columns are copied before they are written, so the post_state
+    can share their data with the previous state.
+    """
+    column_id_levels_to_refresh = post_state.get_column_dependency_graph(sheet_index).get_column_id_levels_to_recalculate(column_ids)
+    if len(column_id_levels_to_refresh) == 0:
+        return []
+
+    column_ids_to_refresh = [column_id for column_id_level in column_id_levels_to_refresh for column_id in column_id_level]
+    column_headers = post_state.column_ids.get_column_headers_by_ids(sheet_index, column_ids_to_refresh)
+    post_state.dfs[sheet_index] = copy_columns(post_state.dfs[sheet_index], column_headers)
+
+    for column_id_level in column_id_levels_to_refresh:
+        if len(column_id_level) == 1:
+            exec_column_formula(
+                post_state, 
+                post_state.dfs[sheet_index], 
+                sheet_index, 
+                column_id_level[0], 
+                post_state.column_spreadsheet_code[sheet_index][column_id_level[0]]
+            )
+        else:
+            _refresh_column_level(post_state, sheet_index, column_id_level)
+
+    return column_ids_to_refresh
+
+
+def _refresh_column_level(post_state: State, sheet_index: int, column_ids: List[ColumnID]) -> None:
+    """
+    Recalculates formula columns that do not depend on eachother at the same time, 
+    and then writes them to the dataframe in the order of the column_ids, so the 
+    dataframe is the same as if they were recalculated one at a time.
+
+    See mitosheet/parallel_formulas.py for more details.
+    """
+    df = post_state.dfs[sheet_index]
+
+    futures: List[Tuple[ColumnID, 'Future[Dict[ColumnHeader, Any]]']] = []
+    for column_id in column_ids:
+        spreadsheet_code = post_state.column_spreadsheet_code[sheet_index][column_id]
+        column_header = post_state.column_ids.get_column_header_by_id(sheet_index, column_id)
+        parsed_formula = get_parsed_formula(spreadsheet_code, column_header, df.keys())
+
+        # The formula only gets the columns it reads, which are not written until all 
+        # the formulas in this level are evaluated
+        columns = {
+            dependency: df[dependency] for dependency in parsed_formula.column_header_dependencies
+            if dependency in df.columns
+        }
+        reads_object_columns = any(is_string_dtype(str(column.dtype)) for column in columns.values())
+        executor = get_formula_executor(reads_object_columns)
+
+        if executor is None:
+            exec_column_formula(post_state, df, sheet_index, column_id, spreadsheet_code)
+            continue
+
+        with formula_errors(post_state, sheet_index, column_id, spreadsheet_code):
+            if isinstance(executor, ProcessPoolExecutor):
+                # Compiled code cannot be sent to another process, so we send the python code
+                futures.append((column_id, executor.submit(evaluate_formula, parsed_formula.python_code, columns)))
+            else:
+                futures.append((column_id, executor.submit(evaluate_formula, parsed_formula.compiled_code, columns)))
+
+    for column_id, future in futures:
+        spreadsheet_code = post_state.column_spreadsheet_code[sheet_index][column_id]
+        with formula_errors(post_state, sheet_index, column_id, spreadsheet_code):
+            for column_header, value in future.result().items():
+                df[column_header] = value
@@ -77,3 +77,7 @@ class DataframeDeleteStepPerformer(StepPerformer):
     @classmethod
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
         return set() # Redo all of them, as order shifts
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return None # reads all dataframes, as order shifts
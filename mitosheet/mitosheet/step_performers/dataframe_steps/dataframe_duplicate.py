@@ -45,7 +45,7 @@ class DataframeDuplicateStepPerformer(StepPerformer):
         # the column ids that are created for the df_copy in the add_df_to_state function might be different
         # than the column_ids created initially (e.g. because of renames), we have to go through and updated
         # the mapping with the new column ids that the format types must rely on
-        format_types = post_state.column_format_types[sheet_index].copy()
+        format_types = dict(post_state.column_format_types[sheet_index])
         for column_id, column_header in post_state.column_ids.get_column_ids_map(sheet_index).items():
             new_column_id = get_column_header_id(column_header)
             format_types[new_column_id] = format_types[column_id]
@@ -73,3 +73,7 @@ class DataframeDuplicateStepPerformer(StepPerformer):
     @classmethod
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
         return {-1}
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return {get_param(params, 'sheet_index')}
@@ -68,4 +68,8 @@ class DataframeRenameStepPerformer(StepPerformer):
 
     @classmethod
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
-        return {get_param(params, 'sheet_index')} # This should be none, but we don't have a way to return that
\ No newline at end of file
+        return {get_param(params, 'sheet_index')} # This should be none, but we don't have a way to return that
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return {get_param(params, 'sheet_index')}
\ No newline at end of file
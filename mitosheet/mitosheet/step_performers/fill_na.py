@@ -10,8 +10,10 @@ from typing import Any, Dict, List, Optional, Set, Tuple
 
 import pandas as pd
 from mitosheet.code_chunks.code_chunk import CodeChunk
+from mitosheet.code_chunks.refresh_dependent_columns_code_chunk import get_refresh_dependent_columns_code_chunks
 from mitosheet.code_chunks.step_performers.fill_na_code_chunk import FillNaCodeChunk
 from mitosheet.state import State
+from mitosheet.step_performers.column_steps.set_column_formula import refresh_dependent_columns
 from mitosheet.step_performers.step_performer import StepPerformer
 from mitosheet.step_performers.utils import get_param
 from mitosheet.types import ColumnID
@@ -38,7 +40,8 @@ class FillNaStepPerformer(StepPerformer):
         fill_method = get_param(params, 'fill_method')
         fill_method_type = fill_method['type']
 
-        post_state = prev_state.copy(deep_sheet_indexes=[sheet_index])
+        # Only the columns we fill are written, so only they are copied
+        post_state = prev_state.copy(deep_column_ids={sheet_index: column_ids})
 
         df = post_state.dfs[sheet_index]
         column_headers = post_state.column_ids.get_column_headers_by_ids(sheet_index, column_ids)
@@ -59,10 +62,13 @@ class FillNaStepPerformer(StepPerformer):
         else:
             raise Exception(f"Invalid fill method {fill_method}")
 
+        refreshed_column_ids = refresh_dependent_columns(post_state, sheet_index, column_ids)
+
         pandas_processing_time = perf_counter() - pandas_start_time
 
         return post_state, {
-            'pandas_processing_time': pandas_processing_time
+            'pandas_processing_time': pandas_processing_time,
+            'refreshed_column_ids': refreshed_column_ids
         }
 
     @classmethod
@@ -74,9 +80,14 @@ class FillNaStepPerformer(StepPerformer):
         execution_data: Optional[Dict[str, Any]],
     ) -> List[CodeChunk]:
         return [
-            FillNaCodeChunk(prev_state, post_state, params, execution_data)
+            FillNaCodeChunk(prev_state, post_state, params, execution_data),
+            *get_refresh_dependent_columns_code_chunks(prev_state, post_state, get_param(params, 'sheet_index'), execution_data)
         ]
     
     @classmethod
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
         return {get_param(params, 'sheet_index')}
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return {get_param(params, 'sheet_index')}
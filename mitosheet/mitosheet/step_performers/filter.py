@@ -102,9 +102,9 @@ class FilterStepPerformer(StepPerformer):
         )
         post_state.dfs[sheet_index] = final_df
 
-        # Keep track of which columns are filtered
-        post_state.column_filters[sheet_index][column_id]["operator"] = operator
-        post_state.column_filters[sheet_index][column_id]["filters"] = filters
+        # Keep track of which columns are filtered. NOTE: we replace the filters object rather
+        # than editing it, as it is shared with the previous state
+        post_state.column_filters[sheet_index][column_id] = {"operator": operator, "filters": filters}
 
         return post_state, {
             'pandas_processing_time': pandas_processing_time
@@ -127,6 +127,10 @@ class FilterStepPerformer(StepPerformer):
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
         return {get_param(params, 'sheet_index')}
 
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return {get_param(params, 'sheet_index')}
+
 
 def get_applied_filter(
     df: pd.DataFrame, column_header: ColumnHeader, filter_: Dict[str, Any]
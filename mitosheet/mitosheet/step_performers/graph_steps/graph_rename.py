@@ -47,7 +47,8 @@ class GraphRenameStepPerformer(StepPerformer):
         # Create a new step and save the parameters
         post_state = prev_state.copy()
 
-        post_state.graph_data_dict[graph_id]["graphTabName"] = new_graph_tab_name
+        # NOTE: we replace the graph data rather than editing it, as it is shared with the previous state
+        post_state.graph_data_dict[graph_id] = {**post_state.graph_data_dict[graph_id], "graphTabName": new_graph_tab_name}
         
         return post_state, {
             'pandas_processing_time': 0 # No time spent on pandas, only metadata changes
@@ -77,4 +78,8 @@ class GraphRenameStepPerformer(StepPerformer):
     
     @classmethod
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
-        return {-1}
\ No newline at end of file
+        return {-1}
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return set()
\ No newline at end of file
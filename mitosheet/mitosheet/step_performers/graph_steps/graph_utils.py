@@ -4,7 +4,7 @@
 # Copyright (c) Saga Inc.
 # Distributed under the terms of the GPL License.
 
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Mapping, Optional, Any, Union
 import io
 from xmlrpc.client import boolean
 from mitosheet.transpiler.transpile_utils import column_header_to_transpiled_code
@@ -150,7 +150,7 @@ def get_graph_title(
     return " ".join(graph_title_components)
 
 
-def get_new_graph_tab_name(graph_data_dict: Dict[str, Dict[str, Any]]) -> str:
+def get_new_graph_tab_name(graph_data_dict: Mapping[str, Dict[str, Any]]) -> str:
     """
     Creates the name for the new graph tab sheet using the format
     graph0, graph1, etc.
@@ -92,6 +92,10 @@ class MergeStepPerformer(StepPerformer):
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
         return {-1}
 
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return {get_param(params, 'sheet_index_one'), get_param(params, 'sheet_index_two')}
+
 def _execute_merge(
         dfs: List[pd.DataFrame], 
         df_names: List[str],
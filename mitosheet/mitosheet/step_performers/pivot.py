@@ -152,9 +152,18 @@ class PivotStepPerformer(StepPerformer):
     @classmethod
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
         destination_sheet_index = get_param(params, 'destination_sheet_index')
-        if destination_sheet_index: # If editing an existing sheet, that is what is changed
+        if destination_sheet_index is not None: # If editing an existing sheet, that is what is changed
             return {destination_sheet_index}
         return {-1}
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        sheet_index = get_param(params, 'sheet_index')
+        destination_sheet_index = get_param(params, 'destination_sheet_index')
+        # If editing an existing sheet, we also read from that sheet
+        if destination_sheet_index is not None:
+            return {sheet_index, destination_sheet_index}
+        return {sheet_index}
     
 def values_to_functions(values: Dict[ColumnHeader, Collection[str]]) -> Dict[ColumnHeader, List[Callable]]:
     """
@@ -9,6 +9,8 @@ from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 import numpy as np
 from mitosheet.code_chunks.code_chunk import CodeChunk
+from mitosheet.code_chunks.refresh_dependent_columns_code_chunk import \
+    get_refresh_dependent_columns_code_chunks
 from mitosheet.code_chunks.step_performers.set_cell_value_code_chunk import \
     SetCellValueCodeChunk
 from mitosheet.errors import (make_cast_value_to_type_error,
@@ -18,6 +20,8 @@ from mitosheet.sheet_functions.types.utils import (is_int_dtype, is_none_type,
                                                    is_number_dtype,
                                                    is_string_dtype)
 from mitosheet.state import State
+from mitosheet.step_performers.column_steps.set_column_formula import \
+    refresh_dependent_columns
 from mitosheet.step_performers.step_performer import StepPerformer
 from mitosheet.step_performers.utils import get_param
 from mitosheet.types import ColumnID
@@ -69,7 +73,8 @@ class SetCellValueStepPerformer(StepPerformer):
         if old_value == new_value:
             return prev_state, None
 
-        post_state = prev_state.copy(deep_sheet_indexes=[sheet_index])
+        # Only the column with the cell in it is written, so only it is copied
+        post_state = prev_state.copy(deep_column_ids={sheet_index: [column_id]})
 
         column_header = post_state.column_ids.get_column_header_by_id(sheet_index, column_id)
 
@@ -82,14 +87,16 @@ class SetCellValueStepPerformer(StepPerformer):
         if new_value is not None and '.' in new_value and is_int_dtype(column_dtype):
             post_state.dfs[sheet_index][column_header] = post_state.dfs[sheet_index][column_header].astype('float')
         
-        # Actually update the cell's value
+        # Actually update the cell's value, and then the formulas that depend on it
         pandas_start_time = perf_counter()
         post_state.dfs[sheet_index].at[row_index, column_header] = type_corrected_new_value
+        refreshed_column_ids = refresh_dependent_columns(post_state, sheet_index, [column_id])
         pandas_processing_time = perf_counter() - pandas_start_time
 
         return post_state, {
             'type_corrected_new_value': type_corrected_new_value,
-            'pandas_processing_time': pandas_processing_time
+            'pandas_processing_time': pandas_processing_time,
+            'refreshed_column_ids': refreshed_column_ids
         }
 
     @classmethod
@@ -102,7 +109,8 @@ class SetCellValueStepPerformer(StepPerformer):
     ) -> List[CodeChunk]:
 
         return [
-            SetCellValueCodeChunk(prev_state, post_state, params, execution_data)
+            SetCellValueCodeChunk(prev_state, post_state, params, execution_data),
+            *get_refresh_dependent_columns_code_chunks(prev_state, post_state, get_param(params, 'sheet_index'), execution_data)
         ]
 
 
@@ -110,6 +118,14 @@ class SetCellValueStepPerformer(StepPerformer):
     def get_modified_dataframe_indexes(cls, params: Dict[str, Any]) -> Set[int]:
         return {get_param(params, 'sheet_index')}
 
+    @classmethod
+    def get_modified_column_ids(cls, params: Dict[str, Any]) -> Optional[Set[ColumnID]]:
+        return {get_param(params, 'column_id')}
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        return {get_param(params, 'sheet_index')}
+
 
 def cast_value_to_type(value: Union[str, None], column_dtype: str) -> Optional[Any]:
     """
@@ -6,6 +6,7 @@
 from abc import ABC, abstractmethod
 from mitosheet.code_chunks.code_chunk import CodeChunk
 from mitosheet.state import State
+from mitosheet.types import ColumnID
 from typing import Any, Dict, List, Optional, Set, Tuple
  
 class StepPerformer(ABC, object):
@@ -94,4 +95,30 @@ class StepPerformer(ABC, object):
         If it returned -1, then it modified all new dataframes (on
         the left side of the dfs array).
         """
-        pass
\ No newline at end of file
+        pass
+
+    @classmethod
+    def get_modified_column_ids(cls, params: Dict[str, Any]) -> Optional[Set[ColumnID]]:
+        """
+        Returns a set of the column ids of the columns whose data was modified
+        by this step, in the dataframe it modified. Columns that were added, 
+        deleted, renamed or reordered do not need to be included.
+
+        This is used to only convert the modified columns to send them to the 
+        frontend. If it returns None, then the data of any column might have 
+        been modified, which is the default.
+        """
+        return None
+
+    @classmethod
+    def get_input_dataframe_indexes(cls, params: Dict[str, Any]) -> Optional[Set[int]]:
+        """
+        Returns a set of all the sheet indexes that this step reads from, 
+        which is used to figure out which steps need to be reexecuted when
+        an earlier step changes.
+
+        If it returns an empty set, then this step reads no dataframes 
+        (e.g. an import). If it returns None, then this step might read
+        every dataframe, which is the default.
+        """
+        return None
@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains the StepResultCache, an on-disk cache of the results of executing
+steps, which makes replaying the same analysis on the same data fast.
+
+Each result is stored under a key that is a fingerprint of everything the
+result depends on: the step type, step version and saturated params, and
+the data and metadata of the sheets that the step reads and modifies.
+"""
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import shutil
+import sys
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from weakref import WeakKeyDictionary
+
+import pandas as pd
+
+from mitosheet._version import __version__
+from mitosheet.state import State
+from mitosheet.step import Step
+from mitosheet.step_performers.import_steps.excel_import import ExcelImportStepPerformer
+from mitosheet.step_performers.import_steps.simple_import import SimpleImportStepPerformer
+from mitosheet.user.db import MITO_FOLDER
+from mitosheet.utils import NpEncoder
+
+# Feather files are only used if pyarrow is installed, as it is not a dependency
+try:
+    import pyarrow # type: ignore
+    import pyarrow.feather # type: ignore
+except ImportError: # pragma: no cover
+    pyarrow = None
+
+# Where the results of steps are cached
+STEP_RESULT_CACHE_FOLDER = os.path.join(MITO_FOLDER, 'step_result_cache')
+
+# The files in each entry of the cache
+STATE_FILE_NAME = 'state.pickle'
+FEATHER_FILE_EXTENSION = '.feather'
+PICKLE_FILE_EXTENSION = '.pickle'
+PICKLE_BUFFERS_FILE_EXTENSION = '.buffers'
+
+# Storing the data of a pickle in a separate file needs pickle protocol 5, which needs Python 3.8+
+PICKLE_OUT_OF_BAND_BUFFERS_SUPPORTED = sys.version_info >= (3, 8)
+
+
+def get_sheet_fingerprint(state: State, sheet_index: int) -> Optional[str]:
+    """
+    Returns a fingerprint of the data and metadata of the sheet at sheet_index,
+    or None if the data cannot be hashed (e.g. it contains lists).
+    """
+    df = state.dfs[sheet_index]
+    try:
+        data_hash = pd.util.hash_pandas_object(df, index=True).values.tobytes()
+    except TypeError:
+        return None
+
+    sheet_hash = hashlib.sha256(data_hash)
+    sheet_hash.update(repr((
+        list(df.columns),
+        [str(dtype) for dtype in df.dtypes],
+        state.df_names[sheet_index],
+        state.df_sources[sheet_index],
+        dict(state.column_ids.get_column_ids_map(sheet_index)),
+        dict(state.column_spreadsheet_code[sheet_index]),
+        dict(state.column_filters[sheet_index]),
+        dict(state.column_format_types[sheet_index]),
+    )).encode())
+    return sheet_hash.hexdigest()
+
+
+def get_input_file_paths(step: Step, params: Dict[str, Any]) -> List[str]:
+    """
+    Returns the paths of the files that the step reads, as the result of
+    the step depends on the contents of these files.
+    """
+    if step.step_type == SimpleImportStepPerformer.step_type():
+        return params['file_names']
+    elif step.step_type == ExcelImportStepPerformer.step_type():
+        return [params['file_name']]
+    return []
+
+
+def write_df(df: pd.DataFrame, path: str) -> None:
+    """
+    Writes the dataframe to a Feather file if possible, and otherwise to a pickle
+    file. On Python 3.8+, the data of the pickle is stored in a separate file, so 
+    it can be memory-mapped.
+    """
+    if pyarrow is not None:
+        try:
+            pyarrow.feather.write_feather(pyarrow.Table.from_pandas(df, preserve_index=True), path + FEATHER_FILE_EXTENSION)
+            # Feather files cannot store every dataframe exactly (e.g. some column headers),
+            # so we only keep the file if it reads back as the same dataframe
+            read_df = read_df_from_feather(path + FEATHER_FILE_EXTENSION)
+            if read_df.equals(df) and read_df.columns.equals(df.columns) and read_df.index.equals(df.index) and read_df.dtypes.equals(df.dtypes):
+                return
+        except Exception:
+            pass
+        if os.path.exists(path + FEATHER_FILE_EXTENSION):
+            os.remove(path + FEATHER_FILE_EXTENSION)
+
+    if not PICKLE_OUT_OF_BAND_BUFFERS_SUPPORTED:
+        # Without pickle protocol 5, the data is stored in the pickle itself, and is not memory-mapped
+        with open(path + PICKLE_FILE_EXTENSION, 'wb') as f:
+            pickle.dump((pickle.dumps(df, protocol=4), None), f)
+        return
+
+    # We store the data of the dataframe in a separate file from the rest of the pickle
+    buffers: List[Any] = []
+    data = pickle.dumps(df, protocol=5, buffer_callback=buffers.append)
+    buffer_lengths = []
+    with open(path + PICKLE_BUFFERS_FILE_EXTENSION, 'wb') as f:
+        for buffer in buffers:
+            raw_buffer = buffer.raw()
+            f.write(raw_buffer)
+            buffer_lengths.append(raw_buffer.nbytes)
+
+    with open(path + PICKLE_FILE_EXTENSION, 'wb') as f:
+        pickle.dump((data, buffer_lengths), f)
+
+
+def read_df_from_feather(path: str) -> pd.DataFrame:
+    return pyarrow.feather.read_table(path, memory_map=True).to_pandas()
+
+
+def read_df(path: str) -> pd.DataFrame:
+    """
+    Reads a dataframe written with write_df, memory-mapping the file with its data.
+    """
+    if os.path.exists(path + FEATHER_FILE_EXTENSION):
+        return read_df_from_feather(path + FEATHER_FILE_EXTENSION)
+
+    with open(path + PICKLE_FILE_EXTENSION, 'rb') as f:
+        data, buffer_lengths = pickle.load(f)
+
+    if buffer_lengths is None:
+        return pickle.loads(data)
+
+    # NOTE: you cannot memory-map an empty file
+    if sum(buffer_lengths) == 0:
+        return pickle.loads(data, buffers=[bytearray() for _ in buffer_lengths])
+
+    with open(path + PICKLE_BUFFERS_FILE_EXTENSION, 'rb') as f:
+        # We use a copy on write mapping, so the dataframes that are read can be 
+        # edited without changing the file
+        buffers_mmap = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+
+    buffers = []
+    offset = 0
+    for buffer_length in buffer_lengths:
+        buffers.append(buffers_mmap[offset:offset + buffer_length])
+        offset += buffer_length
+
+    return pickle.loads(data, buffers=buffers)
+
+
+def get_folder_size(folder: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(dir_path, file_name))
+        for dir_path, _, file_names in os.walk(folder)
+        for file_name in file_names
+    )
+
+
+class StepResultCache():
+    """
+    An on-disk cache of the results of executing steps. Each entry in the cache 
+    is a folder, which stores the post state of the step without its dataframes,
+    and the dataframes of the sheets the step modified in separate files.
+
+    Rather than hashing the data of every sheet before every step, we give the
+    sheets created by a step a fingerprint made from the key of the step, and
+    store the fingerprints of the sheets in each state we have seen.
+
+    When the cache is larger than max_size_mb, the least recently used entries
+    are deleted.
+    """
+
+    def __init__(self, max_size_mb: float, cache_folder: str=STEP_RESULT_CACHE_FOLDER):
+        self.max_size_bytes = max_size_mb * 1_000_000
+        self.cache_folder = cache_folder
+
+        # The number of steps that we did and did not find in the cache
+        self.num_hits = 0
+        self.num_misses = 0
+
+        # The fingerprints of the sheets in the states we have seen, by sheet index
+        self.state_sheet_fingerprints: 'WeakKeyDictionary[State, Dict[int, Optional[str]]]' = WeakKeyDictionary()
+
+        # The size of each entry, ordered from least to most recently used
+        self.entry_sizes: 'OrderedDict[str, int]' = OrderedDict()
+        if os.path.exists(self.cache_folder):
+            entries = [
+                entry for entry in os.listdir(self.cache_folder)
+                if os.path.exists(os.path.join(self.cache_folder, entry, STATE_FILE_NAME))
+            ]
+            for entry in sorted(entries, key=lambda entry: os.path.getmtime(os.path.join(self.cache_folder, entry))):
+                self.entry_sizes[entry] = get_folder_size(os.path.join(self.cache_folder, entry))
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(self.entry_sizes.values())
+
+    def get_sheet_fingerprint(self, state: State, sheet_index: int) -> Optional[str]:
+        sheet_fingerprints = self.state_sheet_fingerprints.setdefault(state, dict())
+        if sheet_index not in sheet_fingerprints:
+            sheet_fingerprints[sheet_index] = get_sheet_fingerprint(state, sheet_index)
+        return sheet_fingerprints[sheet_index]
+
+    def get_step_key(self, step: Step, params: Dict[str, Any], prev_state: State) -> Optional[str]:
+        """
+        Returns the key that the result of executing the step with the given params on 
+        the prev_state is stored under, or None if this result should not be cached.
+        """
+        input_sheet_indexes = step.step_performer.get_input_dataframe_indexes(params)
+        modified_sheet_indexes = step.step_performer.get_modified_dataframe_indexes(params)
+        if input_sheet_indexes is None or len(modified_sheet_indexes) == 0:
+            input_sheet_indexes = set(range(len(prev_state.dfs)))
+        input_sheet_indexes = input_sheet_indexes | (modified_sheet_indexes - {-1})
+
+        if any(sheet_index < 0 or sheet_index >= len(prev_state.dfs) for sheet_index in input_sheet_indexes):
+            return None
+        sheet_fingerprints = [
+            (sheet_index, self.get_sheet_fingerprint(prev_state, sheet_index)) for sheet_index in sorted(input_sheet_indexes)
+        ]
+        if any(sheet_fingerprint is None for _, sheet_fingerprint in sheet_fingerprints):
+            return None
+
+        input_files = []
+        for file_path in get_input_file_paths(step, params):
+            if not os.path.exists(file_path):
+                return None
+            file_stat = os.stat(file_path)
+            input_files.append((os.path.abspath(file_path), file_stat.st_size, file_stat.st_mtime_ns))
+
+        try:
+            params_json = json.dumps(params, cls=NpEncoder, sort_keys=True)
+        except TypeError:
+            return None
+            
+        step_key = hashlib.sha256(repr((
+            __version__,
+            step.step_type,
+            step.step_performer.step_version(),
+            params_json,
+            # New sheets get names that depend on the names of all other sheets
+            list(prev_state.df_names),
+            len(prev_state.dfs),
+            sheet_fingerprints,
+            input_files
+        )).encode())
+        return step_key.hexdigest()
+
+    def read_entry(self, step_key: str) -> Optional[Tuple[State, Set[int], Dict[str, Any]]]:
+        """
+        Returns the post state, modified sheet indexes and execution data stored
+        under the key, or None if there is no such entry.
+        """
+        if step_key not in self.entry_sizes:
+            return None
+
+        entry_folder = os.path.join(self.cache_folder, step_key)
+        try:
+            with open(os.path.join(entry_folder, STATE_FILE_NAME), 'rb') as f:
+                post_state, modified_sheet_indexes, execution_data = pickle.load(f)
+            for sheet_index in modified_sheet_indexes:
+                post_state.dfs[sheet_index] = read_df(os.path.join(entry_folder, str(sheet_index)))
+        except Exception:
+            # If the entry cannot be read, e.g. as it was written by an older version, we remove it
+            self.remove_entry(step_key)
+            return None
+
+        # Mark the entry as the most recently used
+        self.entry_sizes.move_to_end(step_key)
+        os.utime(entry_folder)
+
+        return post_state, modified_sheet_indexes, execution_data
+
+    def write_entry(self, step_key: str, post_state: State, modified_sheet_indexes: Set[int], execution_data: Dict[str, Any]) -> None:
+        """
+        Writes the post state of a step to the cache, and then removes the least 
+        recently used entries until the cache is smaller than its max size.
+        """
+        # We write to a temporary folder and then rename it, so we never read a partially written entry
+        entry_folder = os.path.join(self.cache_folder, step_key)
+        temporary_entry_folder = os.path.join(self.cache_folder, f'tmp-{uuid.uuid4().hex}')
+        try:
+            os.makedirs(temporary_entry_folder)
+            for sheet_index in modified_sheet_indexes:
+                write_df(post_state.dfs[sheet_index], os.path.join(temporary_entry_folder, str(sheet_index)))
+
+            state_without_data = post_state.copy()
+            state_without_data.dfs = [df.iloc[:0] for df in state_without_data.dfs]
+            with open(os.path.join(temporary_entry_folder, STATE_FILE_NAME), 'wb') as f:
+                pickle.dump((state_without_data, modified_sheet_indexes, execution_data), f)
+
+            if os.path.exists(entry_folder):
+                shutil.rmtree(entry_folder, ignore_errors=True)
+            os.rename(temporary_entry_folder, entry_folder)
+        except Exception:
+            # Not being able to write to the cache is fine, the step is just not cached
+            shutil.rmtree(temporary_entry_folder, ignore_errors=True)
+            return
+
+        self.entry_sizes[step_key] = get_folder_size(entry_folder)
+        self.entry_sizes.move_to_end(step_key)
+
+        while self.size_bytes > self.max_size_bytes and len(self.entry_sizes) > 0:
+            self.remove_entry(next(iter(self.entry_sizes)))
+
+    def remove_entry(self, step_key: str) -> None:
+        self.entry_sizes.pop(step_key, None)
+        shutil.rmtree(os.path.join(self.cache_folder, step_key), ignore_errors=True)
+
+    def execute_step(self, step: Step, prev_state: State) -> None:
+        """
+        Executes the step on the prev_state, like step.set_prev_state_and_execute, but 
+        reads the post state from the cache if we have executed this step on the same
+        data before, and otherwise writes it to the cache.
+
+        The number of hits and misses of the cache are added to the execution data.
+        """
+        # Import here, as the steps manager uses the cache
+        from mitosheet.steps_manager import get_sheet_indexes_modified_by_step
+
+        params = step.step_performer.saturate(prev_state, step.params)
+        step_key = self.get_step_key(step, params, prev_state)
+        if step_key is None:
+            step.set_prev_state_and_execute(prev_state)
+            return
+
+        entry = self.read_entry(step_key)
+        if entry is not None:
+            self.num_hits += 1
+            entry_state, modified_sheet_indexes, execution_data = entry
+
+            post_state = prev_state.copy()
+            for sheet_index in sorted(modified_sheet_indexes):
+                post_state.set_sheet_from_state(entry_state, sheet_index)
+
+            step.prev_state = prev_state
+            step.post_state = post_state
+            step.execution_data = execution_data
+            step.params = params
+            self.set_post_state_sheet_fingerprints(step_key, prev_state, post_state, modified_sheet_indexes)
+        else:
+            self.num_misses += 1
+            step.set_prev_state_and_execute(prev_state)
+
+            post_state = step.final_defined_state
+            if post_state is not prev_state and isinstance(step.execution_data, dict):
+                cached_modified_sheet_indexes = get_sheet_indexes_modified_by_step(step, prev_state, post_state)
+                if cached_modified_sheet_indexes is not None:
+                    self.write_entry(step_key, post_state, cached_modified_sheet_indexes, step.execution_data)
+                    self.set_post_state_sheet_fingerprints(step_key, prev_state, post_state, cached_modified_sheet_indexes)
+
+        if isinstance(step.execution_data, dict):
+            step.execution_data = {
+                **step.execution_data,
+                'step_result_cache_hits': self.num_hits,
+                'step_result_cache_misses': self.num_misses,
+            }
+
+    def set_post_state_sheet_fingerprints(self, step_key: str, prev_state: State, post_state: State, modified_sheet_indexes: Set[int]) -> None:
+        """
+        The sheets created by a step get fingerprints from the key of the step, and 
+        the other sheets keep the fingerprints they had in the prev state.
+        """
+        prev_sheet_fingerprints = self.state_sheet_fingerprints.get(prev_state, dict())
+        post_sheet_fingerprints = {
+            sheet_index: sheet_fingerprint for sheet_index, sheet_fingerprint in prev_sheet_fingerprints.items()
+            if sheet_index not in modified_sheet_indexes
+        }
+        for sheet_index in modified_sheet_indexes:
+            post_sheet_fingerprints[sheet_index] = hashlib.sha256(f'{step_key}-{sheet_index}'.encode()).hexdigest()
+        self.state_sheet_fingerprints[post_state] = post_sheet_fingerprints
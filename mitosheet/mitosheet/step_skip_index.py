@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains the StepSkipIndex, which keeps track of which steps in a list of
+steps are skipped, as steps are added to and removed from the end of this list.
+
+The rules for which steps skip which other steps are defined in Step.step_indexes_to_skip.
+Calling that function for every step means comparing every step to every step before
+it, which is quadratic in the number of steps. Instead, we index the steps by the
+keys these rules match on: the (step_type, sheet_index, column_id) of filter steps, and
+the step_id of all steps.
+
+NOTE: if you change the rules in Step.step_indexes_to_skip, you must also change them
+here. The tests check that these two always give the same results.
+"""
+from typing import Dict, List, Optional, Set, Tuple
+
+from mitosheet.step import Step
+from mitosheet.step_performers.column_steps.set_column_formula import \
+    SetColumnFormulaStepPerformer
+from mitosheet.step_performers.filter import FilterStepPerformer
+from mitosheet.types import ColumnID
+
+StepKey = Tuple[str, int, ColumnID]
+
+
+class StepSkipIndex:
+    """
+    The StepSkipIndex stores, for each step, the indexes of the steps it skips.
+
+    Notably, each step only records the smallest set of skipped steps that keeps the
+    union of all skipped steps correct. For example, if there are three filters on the
+    same column, the third filter only records that it skips the second filter, as the
+    second filter already records that it skips the first.
+
+    As steps only ever skip steps before them, this makes appending or removing a
+    step from the end of the list O(1) for filter and formula steps, and amortized
+    O(1) for steps that share a step_id.
+    """
+
+    def __init__(self, steps: List[Step]=None):
+        self.steps: List[Step] = []
+        # The step id and filter key of each step, saved when they are indexed, so
+        # that we can remove them from the index even if their params change
+        self.step_ids_and_keys: List[Tuple[str, Optional[StepKey]]] = []
+
+        # For each step, the indexes of the steps that it skips
+        self.skipped_by_step: List[Set[int]] = []
+        # The number of steps that skip each skipped step index
+        self.skip_counts: Dict[int, int] = dict()
+
+        # The indexes of filter steps, keyed by the column they filter
+        self.filter_step_indexes_by_step_key: Dict[StepKey, List[int]] = dict()
+        # The indexes of all steps, and of all non-filter steps, keyed by the step id
+        self.step_indexes_by_step_id: Dict[str, List[int]] = dict()
+        self.non_filter_step_indexes_by_step_id: Dict[str, List[int]] = dict()
+
+        # While updating the steps, we record the original skipped status of any
+        # step whose skip count changes, so we can report which steps changed
+        self._original_skipped_status: Dict[int, bool] = dict()
+
+        if steps is not None:
+            for step in steps:
+                self.append(step)
+
+    @property
+    def step_indexes_to_skip(self) -> Set[int]:
+        """
+        Returns the indexes of all the steps that should be skipped, which
+        is the same as get_step_indexes_to_skip on the indexed steps.
+        """
+        return set(self.skip_counts.keys())
+
+    def is_skipped(self, step_index: int) -> bool:
+        return step_index in self.skip_counts
+
+    def append(self, step: Step) -> None:
+        """
+        Adds a new step to the end of the index, and records the
+        steps that it skips.
+        """
+        step_index = len(self.steps)
+        skipped_step_indexes: Set[int] = set()
+        step_key: Optional[StepKey] = None
+
+        if step.step_type == FilterStepPerformer.step_type():
+            # A filter skips any previous filter on the same column, but all filters
+            # before the most recent one are skipped by the most recent one
+            step_key = (step.step_type, step.params['sheet_index'], step.params['column_id'])
+            filter_step_indexes = self.filter_step_indexes_by_step_key.get(step_key)
+            if filter_step_indexes:
+                skipped_step_indexes.add(filter_step_indexes[-1])
+
+            # A filter also skips any non-filter with the same id, but all of these
+            # but the most recent one are skipped by the most recent one
+            non_filter_step_indexes = self.non_filter_step_indexes_by_step_id.get(step.step_id)
+            if non_filter_step_indexes:
+                skipped_step_indexes.add(non_filter_step_indexes[-1])
+
+            self.filter_step_indexes_by_step_key.setdefault(step_key, []).append(step_index)
+        else:
+            # Any other step skips all steps with the same id, but all steps before
+            # the most recent non-filter with the same id are already skipped by it
+            for previous_step_index in reversed(self.step_indexes_by_step_id.get(step.step_id, [])):
+                skipped_step_indexes.add(previous_step_index)
+                if self.step_ids_and_keys[previous_step_index][1] is None:
+                    break
+
+            self.non_filter_step_indexes_by_step_id.setdefault(step.step_id, []).append(step_index)
+
+        # A formula step skips a formula step just before it on the same column
+        if step.step_type == SetColumnFormulaStepPerformer.step_type() and step_index > 0:
+            previous_step = self.steps[-1]
+            if previous_step.step_type == step.step_type \
+                and previous_step.params['sheet_index'] == step.params['sheet_index'] \
+                and previous_step.params['column_id'] == step.params['column_id']:
+                skipped_step_indexes.add(step_index - 1)
+
+        self.step_indexes_by_step_id.setdefault(step.step_id, []).append(step_index)
+        self.steps.append(step)
+        self.step_ids_and_keys.append((step.step_id, step_key))
+        self.skipped_by_step.append(skipped_step_indexes)
+        for skipped_step_index in skipped_step_indexes:
+            self._increment_skip_count(skipped_step_index)
+
+    def pop(self) -> Step:
+        """
+        Removes the last step from the index, and removes the
+        steps it skips.
+        """
+        step = self.steps.pop()
+        (step_id, step_key) = self.step_ids_and_keys.pop()
+
+        for skipped_step_index in self.skipped_by_step.pop():
+            self._decrement_skip_count(skipped_step_index)
+
+        # As this is the last step, it is the last index in each list it is in
+        if step_key is not None:
+            _pop_step_index(self.filter_step_indexes_by_step_key, step_key)
+        else:
+            _pop_step_index(self.non_filter_step_indexes_by_step_id, step_id)
+        _pop_step_index(self.step_indexes_by_step_id, step_id)
+
+        return step
+
+    def update_steps(self, new_steps: List[Step]) -> Tuple[int, Set[int]]:
+        """
+        Updates the index to index the new_steps, keeping the longest prefix of
+        steps that are the same objects as the currently indexed steps, so that
+        adding or removing a step from the end only changes that step.
+
+        Returns the length of this shared prefix, as well as the indexes of the
+        steps within this prefix that were skipped and now are not, or vice versa.
+        """
+        shared_prefix_length = 0
+        max_shared_prefix_length = min(len(self.steps), len(new_steps))
+        while shared_prefix_length < max_shared_prefix_length \
+            and self.steps[shared_prefix_length] is new_steps[shared_prefix_length]:
+            shared_prefix_length += 1
+
+        self._original_skipped_status = dict()
+
+        while len(self.steps) > shared_prefix_length:
+            self.pop()
+        for step in new_steps[shared_prefix_length:]:
+            self.append(step)
+
+        changed_step_indexes = set(
+            step_index for step_index, was_skipped in self._original_skipped_status.items()
+            if step_index < shared_prefix_length and self.is_skipped(step_index) != was_skipped
+        )
+        self._original_skipped_status = dict()
+
+        return shared_prefix_length, changed_step_indexes
+
+    def _increment_skip_count(self, step_index: int) -> None:
+        if step_index not in self._original_skipped_status:
+            self._original_skipped_status[step_index] = self.is_skipped(step_index)
+        self.skip_counts[step_index] = self.skip_counts.get(step_index, 0) + 1
+
+    def _decrement_skip_count(self, step_index: int) -> None:
+        if step_index not in self._original_skipped_status:
+            self._original_skipped_status[step_index] = self.is_skipped(step_index)
+        self.skip_counts[step_index] -= 1
+        if self.skip_counts[step_index] == 0:
+            del self.skip_counts[step_index]
+
+
+def _pop_step_index(step_indexes_by_key: Dict, key: object) -> None:
+    step_indexes = step_indexes_by_key[key]
+    step_indexes.pop()
+    if len(step_indexes) == 0:
+        del step_indexes_by_key[key]
@@ -8,46 +8,97 @@ import json
 import random
 import string
 from copy import copy, deepcopy
-from typing import Any, Collection, Dict, List, Set, Tuple, Union
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple, Union
+from weakref import ReferenceType, WeakKeyDictionary, ref
 
 import pandas as pd
 
+from mitosheet.code_chunks.code_chunk_utils import OptimizedCodeChunksCache
 from mitosheet.data_in_mito import DataTypeInMito, get_data_type_in_mito
+from mitosheet.edit_executor import (check_edit_cancelled, commit_edit,
+                                     report_edit_progress)
 from mitosheet.experiments.experiment_utils import get_current_experiment
+from mitosheet.parallel_formulas import set_num_formula_processes
+from mitosheet.parallel_replay import execute_step_list_from_index_in_parallel
 from mitosheet.telemetry.telemetry_utils import log
 from mitosheet.preprocessing import PREPROCESS_STEP_PERFORMERS
 from mitosheet.saved_analyses.save_utils import get_analysis_exists
 from mitosheet.state import State
 from mitosheet.step import Step
+from mitosheet.step_result_cache import StepResultCache
+from mitosheet.step_skip_index import StepSkipIndex
 from mitosheet.step_performers import EVENT_TYPE_TO_STEP_PERFORMER
 from mitosheet.step_performers.import_steps.excel_import import \
     ExcelImportStepPerformer
 from mitosheet.step_performers.import_steps.simple_import import \
     SimpleImportStepPerformer
 from mitosheet.transpiler.transpile import transpile
+from mitosheet.types import ColumnID
 from mitosheet.updates import UPDATES
 from mitosheet.user.utils import is_pro, is_running_test
 from mitosheet.utils import (NpEncoder, dfs_to_array_for_json, get_new_id,
-                             is_default_df_names)
+                             get_sheet_data_patch, is_default_df_names)
+
+
+# If the StepsManager has a memory budget, then it always keeps the full state of the
+# most recent steps, as well as a checkpoint state every so often, so that rebuilding
+# a state that was dropped never needs to replay more than this many steps
+DEFAULT_NUM_RECENT_STEPS_TO_RETAIN = 5
+DEFAULT_STATE_CHECKPOINT_INTERVAL = 10
 
 
 def get_step_indexes_to_skip(step_list: List[Step]) -> Set[int]:
     """
     Given a list of steps, will collect all of the steps
     from this list that should be skipped.
+
+    NOTE: this builds a new StepSkipIndex for this step list. The StepsManager
+    keeps its own StepSkipIndex up to date, so prefer using that when you can.
     """
-    step_indexes_to_skip: Set[int] = set()
+    return StepSkipIndex(step_list).step_indexes_to_skip
 
-    for step_index, step in enumerate(step_list):
-        step_indexes_to_skip = step_indexes_to_skip.union(
-            step.step_indexes_to_skip(step_list[:step_index])
-        )
 
-    return step_indexes_to_skip
+def get_sheet_indexes_modified_by_step(step: Step, prev_state: State, post_state: State) -> Optional[Set[int]]:
+    """
+    Returns the sheet indexes that the step modified when going from the
+    prev_state to the post_state, including any sheets it added.
+
+    Returns None if we cannot tell which sheets it modified, in which case 
+    we must assume it modified all of them.
+    """
+    modified_sheet_indexes = step.step_performer.get_modified_dataframe_indexes(step.params)
+    if len(modified_sheet_indexes) == 0 or len(post_state.dfs) < len(prev_state.dfs):
+        return None
+
+    sheet_indexes = modified_sheet_indexes - {-1}
+    if -1 in modified_sheet_indexes:
+        # Steps that say they add sheets but don't (e.g. graphs) might still
+        # have changed something, so we cannot tell what they modified
+        if len(post_state.dfs) == len(prev_state.dfs):
+            return None
+        sheet_indexes |= set(range(len(prev_state.dfs), len(post_state.dfs)))
+    
+    if any(sheet_index < 0 or sheet_index >= len(post_state.dfs) for sheet_index in sheet_indexes):
+        return None
+    return sheet_indexes
+
+
+def execute_step(step: Step, prev_state: State, step_result_cache: Optional[StepResultCache]) -> None:
+    """
+    Executes the step on the prev_state, using the step_result_cache if there is one.
+    """
+    # If the edit being executed was cancelled, we stop before executing another step
+    check_edit_cancelled()
+
+    if step_result_cache is not None:
+        step_result_cache.execute_step(step, prev_state)
+    else:
+        step.set_prev_state_and_execute(prev_state)
 
 
 def execute_step_list_from_index(
-    step_list: List[Step], start_index: int = None
+    step_list: List[Step], start_index: int = None, step_indexes_to_skip: Set[int] = None,
+    step_result_cache: StepResultCache = None
 ) -> List[Step]:
     """
     Given a list of steps, and a specific index to start from, will assume that
@@ -58,7 +109,14 @@ def execute_step_list_from_index(
     means that the returned step list will only have valid prev_state/post_states
     for the steps that are not skipped.
 
-    If start_index is not given, will start from the initialize step.
+    Steps whose input sheets are the same as when they were last executed are 
+    not reexecuted. Instead, the sheets they modified are taken from their old 
+    post_state. To do this, we follow the chain of old states that the steps were
+    last executed on, and keep track of which sheets differ from this chain.
+
+    If start_index is not given, will start from the initialize step. If 
+    step_indexes_to_skip is not given, will compute them from the step_list.
+    If a step_result_cache is given, steps that are executed use this cache.
     """
 
     # Make sure start index is not None
@@ -66,33 +124,224 @@ def execute_step_list_from_index(
         start_index = 0
 
     # Get the steps to skip, so that we can skip them
-    step_indexes_to_skip = get_step_indexes_to_skip(step_list)
+    if step_indexes_to_skip is None:
+        step_indexes_to_skip = get_step_indexes_to_skip(step_list)
 
     # Get the steps that are valid, and the last valid step, so we can execute from there
     new_step_list = step_list[: start_index + 1]
     last_valid_step = step_list[start_index]
 
+    # The old state that the new states are being compared to, and the sheets in the new
+    # states that might be different from it. If old_state is None, we cannot compare 
+    # to the old states anymore, and so we have to reexecute all the remaining steps
+    old_state: Optional[State] = last_valid_step.final_defined_state
+    changed_sheet_indexes: Set[int] = set()
+
     for partial_index, step in enumerate(step_list[start_index + 1 :]):
         step_index = partial_index + start_index + 1
+
+        # If this step was last executed on the old state, then it is next in the
+        # chain of old states, and we can compare to the post_state it created
+        old_prev_state = old_state
+        old_post_state = step.post_state if old_state is not None and step.prev_state is old_state else None
+
         # If we're skipping a step, add it to the new step list (since we don't
         # want to lose it), but don't reexecute it
         if step_index in step_indexes_to_skip:
             new_step_list.append(step)
+
+            # If the skipped step is in the old chain, the sheets it modified are now different
+            if old_prev_state is not None and old_post_state is not None:
+                modified_sheet_indexes = get_sheet_indexes_modified_by_step(step, old_prev_state, old_post_state)
+                if modified_sheet_indexes is None or len(old_post_state.dfs) != len(old_prev_state.dfs):
+                    old_state = None
+                else:
+                    changed_sheet_indexes |= modified_sheet_indexes
+                    old_state = old_post_state
             continue
             
         # Create a new step with the same params
         new_step = Step(step.step_type, step.step_id, step.params)
+        new_prev_state = last_valid_step.final_defined_state
 
-        # Set the previous state of the new step, and then update
-        # what the last valid step is
-        new_step.set_prev_state_and_execute(last_valid_step.final_defined_state)
-        last_valid_step = new_step
+        if old_prev_state is not None and old_post_state is not None:
+            modified_sheet_indexes = get_sheet_indexes_modified_by_step(step, old_prev_state, old_post_state)
+            input_sheet_indexes = step.step_performer.get_input_dataframe_indexes(step.params)
+            if input_sheet_indexes is None:
+                inputs_changed = len(changed_sheet_indexes) > 0
+            else:
+                inputs_changed = len(changed_sheet_indexes & input_sheet_indexes) > 0
+            if modified_sheet_indexes is not None:
+                inputs_changed = inputs_changed or len(changed_sheet_indexes & modified_sheet_indexes) > 0
+
+            # Steps that add sheets pick names for them that depend on all the other sheet names
+            adds_sheets = len(old_post_state.dfs) > len(old_prev_state.dfs)
+
+            if not inputs_changed \
+                and modified_sheet_indexes is not None \
+                and len(modified_sheet_indexes) > 0 \
+                and not old_post_state.dfs_dropped \
+                and len(new_prev_state.dfs) == len(old_prev_state.dfs) \
+                and (not adds_sheets or new_prev_state.df_names == old_prev_state.df_names):
+
+                # The step would create the same sheets as it did before, so we take them from
+                # the old post_state, rather than executing the step again
+                if old_post_state is old_prev_state:
+                    new_post_state = new_prev_state
+                else:
+                    new_post_state = new_prev_state.copy()
+                    for sheet_index in sorted(modified_sheet_indexes):
+                        new_post_state.set_sheet_from_state(old_post_state, sheet_index)
+                
+                new_step.prev_state = new_prev_state
+                new_step.post_state = new_post_state
+                new_step.execution_data = step.execution_data
+                old_state = old_post_state
+            else:
+                execute_step(new_step, new_prev_state, step_result_cache)
+
+                if len(new_step.final_defined_state.dfs) != len(old_post_state.dfs) \
+                    or (inputs_changed and modified_sheet_indexes is None):
+                    old_state = None
+                else:
+                    if inputs_changed and modified_sheet_indexes is not None:
+                        changed_sheet_indexes |= modified_sheet_indexes
+                    old_state = old_post_state
+        else:
+            # Set the previous state of the new step, and then update
+            # what the last valid step is
+            execute_step(new_step, new_prev_state, step_result_cache)
+            old_state = None
 
+        last_valid_step = new_step
         new_step_list.append(new_step)
+        report_edit_progress(partial_index + 1, len(step_list) - start_index - 1)
 
     return new_step_list
 
 
+def restore_dropped_state(
+    step_list: List[Step], step_index: int, step_indexes_to_skip: Set[int]
+) -> None:
+    """
+    If the data in the final defined state of the step at step_index was dropped
+    to save memory, rebuilds this state by replaying the steps from the most recent
+    step before it that has its full state. 
+
+    The steps are updated in place, so any step that shares these states 
+    (e.g. the prev_state of the next step) also has its state rebuilt.
+    """
+    if not step_list[step_index].final_defined_state.dfs_dropped:
+        return
+
+    # Find the steps we need to replay, going backwards until we find a full state
+    steps_to_replay = [step_list[step_index]]
+    checkpoint_index = step_index - 1
+    while checkpoint_index > 0:
+        checkpoint_step = step_list[checkpoint_index]
+        if checkpoint_index not in step_indexes_to_skip:
+            if not checkpoint_step.final_defined_state.dfs_dropped:
+                break
+            steps_to_replay.append(checkpoint_step)
+        checkpoint_index -= 1
+
+    # The initialize step is never dropped, so we always find a full state to start from
+    prev_state = step_list[checkpoint_index].final_defined_state
+    for step in reversed(steps_to_replay):
+        post_state = step.final_defined_state
+        # If the step did not change the state, then this state is the previous state
+        if post_state is not prev_state:
+            post_state_and_execution_data = step.step_performer.execute(prev_state, step.params)
+            if post_state_and_execution_data is not None:
+                post_state.dfs = post_state_and_execution_data[0].dfs
+            else:
+                post_state.dfs = prev_state.dfs
+            post_state.dfs_dropped = False
+        prev_state = post_state
+
+
+def get_step_memory_usage(steps: List[Step], step_index: int) -> int:
+    """
+    Returns an estimate of how many bytes of dataframe data the post_state
+    of the step at step_index holds onto.
+    
+    As steps only make deep copies of the dataframes they modify, and share
+    the data of the other dataframes with the previous state, we only count 
+    the dataframes that this step modified. Steps that only copy some columns
+    of a dataframe (see copy_columns) share the other columns with the previous 
+    state, so we only count the columns that are not shared.
+    """
+    step = steps[step_index]
+    # If the step did not change the state, then it does not hold onto anything new
+    if step.post_state is None or step.post_state is step.prev_state or step.post_state.dfs_dropped:
+        return 0
+
+    if step_index == 0:
+        modified_sheet_indexes = set(range(len(step.dfs)))
+    else:
+        modified_sheet_indexes = get_modified_sheet_indexes(steps, step_index - 1, step_index)
+
+    prev_dfs = step.prev_state.dfs if step_index > 0 and step.prev_state is not None and not step.prev_state.dfs_dropped else []
+    return sum(
+        get_sheet_memory_usage(step.post_state, sheet_index, prev_dfs[sheet_index] if sheet_index < len(prev_dfs) else None)
+        for sheet_index in modified_sheet_indexes
+        if sheet_index < len(step.dfs)
+    )
+
+
+# The memory usage of the sheets of each state, with the dataframe and previous dataframe it is for,
+# as we calculate the memory usage of every step each time we check the memory budget
+sheet_memory_usage_cache: 'WeakKeyDictionary[State, Dict[int, Tuple[ReferenceType[pd.DataFrame], Optional[ReferenceType[pd.DataFrame]], int]]]' = WeakKeyDictionary()
+
+
+def get_sheet_memory_usage(state: State, sheet_index: int, prev_df: Optional[pd.DataFrame]) -> int:
+    """
+    Returns get_unshared_memory_usage for the dataframe at sheet_index in the state, 
+    reading it from the cache if it was calculated for the same dataframes.
+    """
+    df = state.dfs[sheet_index]
+    state_memory_usages = sheet_memory_usage_cache.setdefault(state, {})
+    cached = state_memory_usages.get(sheet_index)
+    if cached is not None:
+        df_ref, prev_df_ref, memory_usage = cached
+        if df_ref() is df and (prev_df_ref() if prev_df_ref is not None else None) is prev_df:
+            return memory_usage
+
+    memory_usage = get_unshared_memory_usage(df, prev_df)
+    state_memory_usages[sheet_index] = (ref(df), ref(prev_df) if prev_df is not None else None, memory_usage)
+    return memory_usage
+
+
+def _get_base_array(values: Any) -> Any:
+    """
+    Returns the array that owns the data of the given values, following
+    views back to the array they are a view on.
+    """
+    while getattr(values, 'base', None) is not None:
+        values = values.base
+    return values
+
+
+def get_unshared_memory_usage(df: pd.DataFrame, prev_df: Optional[pd.DataFrame]) -> int:
+    """
+    Returns how many bytes of data the dataframe holds onto that it does not share 
+    with prev_df, counting each column whose data is a view on data of prev_df as shared.
+    """
+    if prev_df is None:
+        return int(df.memory_usage(index=True).sum())
+
+    prev_base_array_ids = set(
+        id(_get_base_array(prev_df.iloc[:, column_index].values)) for column_index in range(prev_df.shape[1])
+    )
+
+    memory_usage = 0 if df.index is prev_df.index else int(df.index.memory_usage())
+    for column_index in range(df.shape[1]):
+        column = df.iloc[:, column_index]
+        if id(_get_base_array(column.values)) not in prev_base_array_ids:
+            memory_usage += int(column.memory_usage(index=False))
+    return memory_usage
+
+
 def get_modified_sheet_indexes(
     steps: List[Step], starting_step_index: int, ending_step_index: int
 ) -> Set[int]:
@@ -132,6 +381,76 @@ def get_modified_sheet_indexes(
     return modified_indexes
 
 
+def get_modified_column_ids(
+    steps: List[Step], starting_step_index: int, ending_step_index: int
+) -> Dict[int, Set[ColumnID]]:
+    """
+    Returns the ids of the columns whose data was modified starting at 
+    starting_step_index and ending at (and including) ending_step_index, 
+    for each sheet index where we know them.
+
+    Like get_modified_sheet_indexes, we only know this if one step has
+    been performed, and if a sheet index is not included, then the data 
+    of any of its columns might have been modified.
+    """
+    if starting_step_index != ending_step_index - 1:
+        return {}
+
+    step = steps[ending_step_index]
+    modified_column_ids = step.step_performer.get_modified_column_ids(step.params)
+    modified_indexes = step.step_performer.get_modified_dataframe_indexes(step.params)
+    if modified_column_ids is None or len(modified_indexes) != 1 or -1 in modified_indexes:
+        return {}
+
+    # The formulas that depend on the modified columns are recalculated as well
+    refreshed_column_ids = step.execution_data.get('refreshed_column_ids', []) if isinstance(step.execution_data, dict) else []
+
+    (sheet_index, ) = modified_indexes
+    return {sheet_index: modified_column_ids | set(refreshed_column_ids)}
+
+
+def get_step_summary_list_patch(
+    previous_step_summary_list: List[Dict[str, Any]], step_summary_list: List[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Returns a patch that turns the previous_step_summary_list into the step_summary_list,
+    where the step summaries are matched by their step_id. The frontend applies the patch
+    and then orders the step summaries by their step_idx.
+
+    Returns None if the frontend should get all of the step summaries instead, which is
+    the case when none were sent before.
+
+    Should follow the format:
+    {
+        numSteps: number,
+        appendedStepSummaries: StepSummary[],
+        changedStepSummaries: StepSummary[],
+        removedStepIDs: string[]
+    }
+    """
+    if len(previous_step_summary_list) == 0:
+        return None
+
+    previous_step_summaries = {step_summary['step_id']: step_summary for step_summary in previous_step_summary_list}
+    step_ids = set(step_summary['step_id'] for step_summary in step_summary_list)
+
+    appended_step_summaries = []
+    changed_step_summaries = []
+    for step_summary in step_summary_list:
+        previous_step_summary = previous_step_summaries.get(step_summary['step_id'])
+        if previous_step_summary is None:
+            appended_step_summaries.append(step_summary)
+        elif previous_step_summary != step_summary:
+            changed_step_summaries.append(step_summary)
+
+    return {
+        'numSteps': len(step_summary_list),
+        'appendedStepSummaries': appended_step_summaries,
+        'changedStepSummaries': changed_step_summaries,
+        'removedStepIDs': [step_id for step_id in previous_step_summaries if step_id not in step_ids]
+    }
+
+
 class StepsManager:
     """
     The StepsManager holds the list of the steps, and makes sure
@@ -163,13 +482,42 @@ class StepsManager:
     and parameters stay the same and are append-only.
     """
 
-    def __init__(self, args: Collection[Union[pd.DataFrame, str]], analysis_to_replay: str=None):
+    def __init__(
+            self, 
+            args: Collection[Union[pd.DataFrame, str]], 
+            analysis_to_replay: str=None,
+            memory_budget_mb: Optional[float]=None,
+            num_replay_processes: Optional[int]=None,
+            step_result_cache_mb: Optional[float]=None,
+            num_recent_steps_to_retain: int=DEFAULT_NUM_RECENT_STEPS_TO_RETAIN,
+            state_checkpoint_interval: int=DEFAULT_STATE_CHECKPOINT_INTERVAL,
+            binary_sheet_windows: bool=False,
+            num_formula_processes: Optional[int]=None,
+        ):
         """
         When initalizing the StepsManager, we also do preprocessing
         of the arguments that were passed to the mitosheet.
 
         All preprocessing can be found in mitosheet/preprocessing, and each of
         the transformations are applied before the data is considered imported.
+
+        If a memory_budget_mb is passed, then once the dataframes stored in the
+        states of the steps take up more than this, the StepsManager drops the
+        data of states other than the current step, the num_recent_steps_to_retain 
+        most recent steps, and every state_checkpoint_interval-th step. These 
+        states are rebuilt by replaying steps if they are needed again.
+
+        If num_replay_processes is passed, then when replaying an analysis, the
+        independent chains of steps in it are executed on this many processes.
+
+        If step_result_cache_mb is passed, then when replaying an analysis, the
+        results of the steps are cached on disk, in a cache of at most this size.
+
+        If binary_sheet_windows is True, then the frontend gets the windows of rows
+        in the sheets with get_binary_sheet_window rather than get_sheet_window.
+
+        If num_formula_processes is passed, then formulas that read string columns
+        and do not depend on eachother are recalculated on this many processes.
         """
         # We just randomly generate analysis names as a string of 10 letters
         self.analysis_name = 'id-' + ''.join(random.choice(string.ascii_lowercase) for _ in range(10))
@@ -200,6 +548,14 @@ class StepsManager:
             Step("initialize", "initialize", {}, None, State(args), {})
         ]
 
+        # We keep track of which of these steps are skipped, and update this
+        # as steps are added and removed, rather than recomputing it each time
+        self.step_skip_index = StepSkipIndex(self.steps_including_skipped)
+
+        # We keep the optimized code chunks of the steps we last transpiled, so
+        # that we only have to optimize the code chunks of new steps
+        self.optimized_code_chunks_cache = OptimizedCodeChunksCache()
+
         """
         To help with redo, we store a list of a list of the steps that 
         existed in the step manager before the user clicked undo or reset,
@@ -228,8 +584,19 @@ class StepsManager:
         # into json, so that we can package it and send it to the front-end
         # faster and with less work
         self.saved_sheet_data: List[Dict] = []
+        # The saved sheet data of each sheet, encoded as json, so we only encode modified sheets
+        self.saved_sheet_data_json: List[str] = []
+        # The patch from the sheet data that was saved before to the saved sheet data, or None
+        # if the frontend needs all of the saved sheet data. See get_sheet_data_patch
+        self.sheet_data_patch: Optional[Dict[str, Any]] = None
         self.last_step_index_we_wrote_sheet_json_on = 0
 
+        # Like the sheet data, we save the step summaries that were last sent to the frontend, 
+        # so we can just send the step summaries that changed. See get_step_summary_list_patch
+        self.saved_step_summary_list: List[Dict[str, Any]] = []
+        self.saved_step_summary_list_json: str = '[]'
+        self.step_summary_list_patch: Optional[Dict[str, Any]] = None
+
         # We store the number of update events that have been processed successfully,
         # which allows us to have some awareness about undos and redos in the front-end
         self.update_event_count = 0
@@ -243,6 +610,24 @@ class StepsManager:
         # We store the experiment that is currently being run for this user
         self.experiment = get_current_experiment()
 
+        # We save the policy for which states we keep in memory. See drop_states_over_memory_budget
+        self.memory_budget_mb = memory_budget_mb
+        self.num_recent_steps_to_retain = num_recent_steps_to_retain
+        self.state_checkpoint_interval = state_checkpoint_interval
+
+        # If this is set, we replay analyses on a pool of this many processes
+        self.num_replay_processes = num_replay_processes
+
+        # If this is set, we cache the results of the steps we replay on disk
+        self.step_result_cache = StepResultCache(step_result_cache_mb) if step_result_cache_mb is not None else None
+
+        # If this is set, the frontend gets the windows of rows in the sheets as binary data
+        self.binary_sheet_windows = binary_sheet_windows
+
+        # If this is set, we recalculate formulas that read string columns on a pool of this many processes
+        if num_formula_processes is not None:
+            set_num_formula_processes(num_formula_processes)
+
     @property
     def curr_step(self) -> Step:
         """
@@ -268,10 +653,16 @@ class StepsManager:
         NOTE: we only display the _first_ 1,500 rows of the dataframe
         for speed reasons. This results in way less data getting
         passed around
+
+        NOTE: this also updates the sheet_data_patch, so that the frontend
+        only has to get the sheet data that changed.
         """
         modified_sheet_indexes = get_modified_sheet_indexes(
             self.steps_including_skipped, self.last_step_index_we_wrote_sheet_json_on, self.curr_step_idx
         )
+        modified_column_ids = get_modified_column_ids(
+            self.steps_including_skipped, self.last_step_index_we_wrote_sheet_json_on, self.curr_step_idx
+        )
 
         array = dfs_to_array_for_json(
             modified_sheet_indexes,
@@ -283,12 +674,19 @@ class StepsManager:
             self.curr_step.column_filters,
             self.curr_step.column_ids,
             self.curr_step.column_format_types,
+            modified_column_ids=modified_column_ids
         )
 
+        self.sheet_data_patch = get_sheet_data_patch(modified_sheet_indexes, self.saved_sheet_data, array)
+        self.saved_sheet_data_json = [
+            json.dumps(sheet_data, cls=NpEncoder) if sheet_index in modified_sheet_indexes else self.saved_sheet_data_json[sheet_index]
+            for sheet_index, sheet_data in enumerate(array)
+        ]
         self.saved_sheet_data = array
         self.last_step_index_we_wrote_sheet_json_on = self.curr_step_idx
 
-        return json.dumps(array, cls=NpEncoder)
+        # NOTE: this is the same as json.dumps(array), which separates items with ', '
+        return '[' + ', '.join(self.saved_sheet_data_json) + ']'
 
     @property
     def analysis_data_json(self):
@@ -300,62 +698,60 @@ class StepsManager:
                     'existsOnDisk': self.analysis_to_replay_exists,
                 } if self.analysis_to_replay is not None else None,
                 "code": transpile(self, optimize=(is_pro() or is_running_test())),
-                "stepSummaryList": self.step_summary_list,
                 "currStepIdx": self.curr_step_idx,
                 "dataTypeInTool": self.data_type_in_mito.value,
-                "graphDataDict": self.curr_step.graph_data_dict,
+                "graphDataDict": dict(self.curr_step.graph_data_dict),
                 'updateEventCount': self.update_event_count,
                 'renderCount': self.render_count,
                 'lastResult': self.curr_step.execution_data['result'] if 'result' in self.curr_step.execution_data else None,
                 'experiment': self.experiment,
+                'binarySheetWindows': self.binary_sheet_windows,
             }
         )
 
     @property
-    def step_summary_list(self) -> List:
+    def step_summary_list(self) -> List[Dict[str, Any]]:
         """
         Returns a json list of step summaries, not including
-        the skipped steps
+        the skipped steps. 
+        
+        The display name and description of each step are cached 
+        on the step, so this does not transpile any steps again.
         """
         step_summary_list = []
-        step_indexes_to_skip = get_step_indexes_to_skip(self.steps_including_skipped)
+        step_indexes_to_skip = self.step_skip_index.step_indexes_to_skip
         for index, step in enumerate(self.steps_including_skipped):
-            if step.step_type == "initialize":
-                step_summary_list.append(
-                    {
-                        "step_id": step.step_id,
-                        "step_idx": 0,
-                        "step_type": step.step_type,
-                        "step_display_name": "Created a mitosheet",
-                        "step_description": "Created a new mitosheet",
-                    }
-                )
+            if step.step_type != "initialize" and index in step_indexes_to_skip:
                 continue
 
-            if index in step_indexes_to_skip:
-                continue
-            
-            # NOTE: we cannot and should not optimize the code chunks here, as
-            # rely on getting data out of them is to label the steps correctly
-            code_chunks = step.step_performer.transpile(
-                step.prev_state, # type: ignore
-                step.post_state, # type: ignore
-                step.params,
-                step.execution_data,
-            )
-
             step_summary_list.append(
                 {
                     "step_id": step.step_id,
                     "step_idx": index,
                     "step_type": step.step_type,
-                    "step_display_name": code_chunks[0].get_display_name(),
-                    "step_description": code_chunks[0].get_description_comment(),
+                    **step.display_metadata
                 }
             )
 
         return step_summary_list
 
+    @property
+    def step_summary_list_json(self) -> str:
+        """
+        Returns the step_summary_list as json. 
+
+        NOTE: this also updates the step_summary_list_patch, so that the 
+        frontend only has to get the step summaries that changed.
+        """
+        step_summary_list = self.step_summary_list
+        self.step_summary_list_patch = get_step_summary_list_patch(self.saved_step_summary_list, step_summary_list)
+
+        # If the step summaries did not change, we don't need to encode them again
+        if step_summary_list != self.saved_step_summary_list:
+            self.saved_step_summary_list_json = json.dumps(step_summary_list)
+        self.saved_step_summary_list = step_summary_list
+        return self.saved_step_summary_list_json
+
     def handle_edit_event(self, edit_event: Dict[str, Any]) -> None:
         """
         Updates the widget state with a new step that was created
@@ -364,20 +760,35 @@ class StepsManager:
         If there is an error in the creation of the new step, this
         function will not create the new invalid step.
         """
+        self.handle_edit_events([edit_event])
+
+    def handle_edit_events(self, edit_events: List[Dict[str, Any]]) -> None:
+        """
+        Updates the widget state with the new steps that were created by
+        the edit_events, in order, executing them all at once.
+
+        If there is an error in the creation of any of the new steps, this
+        function will not create any of the new steps, so a batch of edit
+        events is either applied entirely or not at all.
+        """
 
         # NOTE: We ignore any edit if we are in a historical state, for now. This is a result
         # of the fact that we don't allow previous editing currently
         if self.curr_step_idx != len(self.steps_including_skipped) - 1:
             return
 
-        step_performer = EVENT_TYPE_TO_STEP_PERFORMER[edit_event["type"]]
+        if len(edit_events) == 0:
+            return
 
-        # First, we make a new step
-        new_step = Step(
-            step_performer.step_type(), edit_event["step_id"], edit_event["params"]
-        )
+        # First, we make the new steps
+        new_steps = copy(self.steps_including_skipped)
+        for edit_event in edit_events:
+            step_performer = EVENT_TYPE_TO_STEP_PERFORMER[edit_event["type"]]
+            new_steps.append(Step(
+                step_performer.step_type(), edit_event["step_id"], edit_event["params"]
+            ))
 
-        new_steps = self.steps_including_skipped + [new_step]
+        is_first_edit = len(self.steps_including_skipped) == 1
 
         self.execute_and_update_steps(new_steps)
 
@@ -392,7 +803,7 @@ class StepsManager:
         # (e.g. when there are two steps) - if we still have default dataframe names, this
         # is an error. Note we make this a distinct log from when the args update itself
         # fails so that we can check if we really do get to this state
-        if len(self.steps_including_skipped) == 2 and is_default_df_names(self.curr_step.df_names): # NOTE: two means we have done at least one edit.
+        if is_first_edit and is_default_df_names(self.curr_step.df_names):
             log('args_update_remains_failed')
 
     def handle_update_event(self, update_event: Dict[str, Any]) -> None:
@@ -420,42 +831,18 @@ class StepsManager:
         Given the new_steps, this function performs some logic to figure
         out what the last valid index in the steps is (that execution can
         then start from).
-        """
-
-        # Currently, we only remove steps in an undo
-        if len(new_steps) < len(self.steps_including_skipped):
-            # If we are removing steps, then we figure out what skipped steps
-            # we are losing, and run from right before where we are no longer
-            # skipped steps
-            no_longer_skipped_indexes: Set[int] = set()
-            for step_index, removed_step in enumerate(self.steps_including_skipped[len(new_steps) :]):
-                previous_steps = self.steps_including_skipped[: len(new_steps) + step_index]
-                no_longer_skipped_indexes = no_longer_skipped_indexes.union(
-                    removed_step.step_indexes_to_skip(previous_steps)
-                )
-
-            last_valid_index = (
-                min(no_longer_skipped_indexes.union({len(new_steps)})) - 1
-            )
-        else:
-            # Otherwise, if we're adding steps, we figure out which skipped steps
-            # we're adding, and run from right before the oldest new skipped step
-
-            # Collect anything that is newly skipped
-            newly_skipped_indexes: Set[int] = set()
-            for step_index, new_step in enumerate(new_steps[len(self.steps_including_skipped) :]):
-                previous_steps = new_steps[: len(self.steps_including_skipped) + step_index]
-                newly_skipped_indexes = newly_skipped_indexes.union(
-                    new_step.step_indexes_to_skip(previous_steps)
-                )
 
-            # The last valid index is the minimum of the newly skipped things - 1
-            # or the last valid step (if nothing is skipped)
-            last_valid_index = min(newly_skipped_indexes.union({len(self.steps_including_skipped)})) - 1
+        NOTE: this updates the step_skip_index to index the new_steps.
+        """
+        # The step_skip_index tells us how many steps are shared between the old
+        # and new steps, and which of these shared steps have a different skipped
+        # status. We have to rerun from right before the first of these steps, as
+        # any step before it has the same state as before
+        shared_prefix_length, changed_skipped_indexes = self.step_skip_index.update_steps(new_steps)
+        last_valid_index = min(changed_skipped_indexes.union({shared_prefix_length})) - 1
 
         # Make sure that this step isn't itself skipped, and decrement until it is not
-        all_skipped_indexes = get_step_indexes_to_skip(new_steps)
-        while last_valid_index in all_skipped_indexes:
+        while self.step_skip_index.is_skipped(last_valid_index):
             last_valid_index -= 1
 
         # Make sure that this index is positive -- it always should be!
@@ -511,18 +898,70 @@ class StepsManager:
             # If it's an undo, just apply onto the end
             new_steps = copy(self.steps_including_skipped)
             new_steps.extend(step_list)
-            self.execute_and_update_steps(new_steps)
+            if not self.reattach_steps(new_steps):
+                self.execute_and_update_steps(new_steps)
 
         elif undo_or_clear == "clear":
             new_steps = step_list
             # Note: since we're breaking the invariant that the steps don't
             # move order, we have to execute from the very start
-            self.execute_and_update_steps(new_steps, last_valid_index=0)
+            if not self.reattach_steps(new_steps):
+                self.execute_and_update_steps(new_steps, last_valid_index=0)
 
         # Remove the item we just redid from the undone_step_list_store, so
         # that we don't redo it again
         self.undone_step_list_store.pop()
 
+    def reattach_steps(self, new_steps: List[Step]) -> bool:
+        """
+        Given new_steps that extend a prefix of the current steps with steps
+        that were previously executed (e.g. undone steps), sets these to be the 
+        steps without reexecuting them, if their saved states are still valid.
+
+        The saved states are valid if each step that is not skipped was last
+        executed on the final state of the step before it, which we check by 
+        identity. If this is not the case, the history has diverged, nothing is
+        changed, and this returns False, so the steps must be reexecuted.
+        """
+        # As in find_last_valid_index, the steps from the first changed step onwards
+        # must have been executed on the state of the last valid step before them
+        shared_prefix_length, changed_skipped_indexes = self.step_skip_index.update_steps(new_steps)
+        first_changed_index = min(changed_skipped_indexes.union({shared_prefix_length}))
+
+        last_valid_index = first_changed_index - 1
+        while self.step_skip_index.is_skipped(last_valid_index):
+            last_valid_index -= 1
+
+        can_reattach = last_valid_index >= 0
+        if can_reattach:
+            prev_state = new_steps[last_valid_index].final_defined_state
+            for step_index in range(first_changed_index, len(new_steps)):
+                if self.step_skip_index.is_skipped(step_index):
+                    continue
+                step = new_steps[step_index]
+                if step.prev_state is not prev_state or step.post_state is None:
+                    can_reattach = False
+                    break
+                prev_state = step.post_state
+
+        if not can_reattach:
+            self.step_skip_index.update_steps(self.steps_including_skipped)
+            return False
+
+        # If more than one step was reattached, then sheets other than the ones the last
+        # step modified may have changed, so we make sure to write all the sheet json again
+        if last_valid_index < len(new_steps) - 2:
+            self.last_step_index_we_wrote_sheet_json_on = -1
+
+        self.steps_including_skipped = new_steps
+        self.curr_step_idx = len(self.steps_including_skipped) - 1
+
+        # The data of the reattached states may have been dropped to save memory
+        restore_dropped_state(self.steps_including_skipped, self.curr_step_idx, self.step_skip_index.step_indexes_to_skip)
+        self.drop_states_over_memory_budget()
+
+        return True
+
     def execute_clear(self):
         """
         A clear update, which removes all steps in the analysis
@@ -551,7 +990,8 @@ class StepsManager:
         self.undone_step_list_store.append(("clear", old_steps))
 
     def execute_and_update_steps(
-        self, new_steps: List[Step], last_valid_index: int = None
+        self, new_steps: List[Step], last_valid_index: int = None, num_processes: int = None,
+        step_result_cache: StepResultCache = None
     ) -> None:
         """
         Given a list of new_steps, runs them from the last valid index,
@@ -566,15 +1006,98 @@ class StepsManager:
         So, pass a last_valid_index if you're changing the order of the steps
         in the new_steps array. Otherwise, the step manager can calculate
         the last valid index without help.
+
+        If num_processes is passed, then the steps are executed on this many 
+        processes, if they can be split into independent chains. If a step_result_cache
+        is passed, then the steps are executed in this process using the cache.
         """
-        if last_valid_index is None:
-            last_valid_index = self.find_last_valid_index(new_steps)
+        try:
+            if last_valid_index is None:
+                last_valid_index = self.find_last_valid_index(new_steps)
+            else:
+                self.step_skip_index.update_steps(new_steps)
+
+            # Make sure we have the full state to start executing from
+            restore_dropped_state(new_steps, last_valid_index, self.step_skip_index.step_indexes_to_skip)
+
+            final_steps = None
+            if num_processes is not None and num_processes > 1 and step_result_cache is None:
+                final_steps = execute_step_list_from_index_in_parallel(
+                    new_steps, 
+                    last_valid_index, 
+                    self.step_skip_index.step_indexes_to_skip,
+                    num_processes
+                )
 
-        final_steps = execute_step_list_from_index(
-            new_steps, start_index=last_valid_index
-        )
-        self.steps_including_skipped = final_steps
-        self.curr_step_idx = len(self.steps_including_skipped) - 1
+            if final_steps is None:
+                final_steps = execute_step_list_from_index(
+                    new_steps, 
+                    start_index=last_valid_index, 
+                    step_indexes_to_skip=self.step_skip_index.step_indexes_to_skip,
+                    step_result_cache=step_result_cache
+                )
+
+            # If the edit being executed was cancelled, we keep the old steps
+            with commit_edit():
+                # If steps before the last step were replayed, then sheets other than the ones the last
+                # step modified may have changed, so we make sure to write all the sheet json again
+                if last_valid_index < len(final_steps) - 2:
+                    self.last_step_index_we_wrote_sheet_json_on = -1
+
+                self.steps_including_skipped = final_steps
+                self.step_skip_index.update_steps(self.steps_including_skipped)
+                self.curr_step_idx = len(self.steps_including_skipped) - 1
+        except:
+            # If the execution fails, we are keeping the old steps, so
+            # we make sure the skip index goes back to them as well
+            self.step_skip_index.update_steps(self.steps_including_skipped)
+            raise
+
+        self.drop_states_over_memory_budget()
+
+    def checkout_step_by_idx(self, step_idx: int) -> None:
+        """
+        Checks out the step at step_idx, rebuilding its state if
+        it was dropped to save memory.
+        """
+        restore_dropped_state(self.steps_including_skipped, step_idx, self.step_skip_index.step_indexes_to_skip)
+        self.curr_step_idx = step_idx
+
+        self.drop_states_over_memory_budget()
+
+    def drop_states_over_memory_budget(self) -> None:
+        """
+        If the dataframes stored in the states of the steps take up more than the 
+        memory budget, then drops the data of the oldest states until they do not,
+        or until we only have the states we always keep. 
+        
+        We always keep the states of the initialize step, the current step, the
+        most recent steps, and a checkpoint every state_checkpoint_interval steps, 
+        so that rebuilding any dropped state is fast.
+        """
+        if self.memory_budget_mb is None:
+            return
+
+        num_steps = len(self.steps_including_skipped)
+        step_indexes_to_retain = set(range(0, num_steps, self.state_checkpoint_interval))
+        step_indexes_to_retain.update(range(max(num_steps - self.num_recent_steps_to_retain, 0), num_steps))
+        step_indexes_to_retain.add(self.curr_step_idx)
+
+        step_memory_usages = [
+            get_step_memory_usage(self.steps_including_skipped, step_index) for step_index in range(num_steps)
+        ]
+        memory_budget = self.memory_budget_mb * 1_000_000
+        memory_usage = sum(step_memory_usages)
+
+        for step_index, step in enumerate(self.steps_including_skipped):
+            if memory_usage <= memory_budget:
+                break
+            
+            if step_index in step_indexes_to_retain or step_memory_usages[step_index] == 0:
+                continue
+            
+            step.final_defined_state.drop_dfs()
+            memory_usage -= step_memory_usages[step_index]
 
     def execute_steps_data(self, new_steps_data: List[Dict[str, Any]] = None) -> None:
         """
@@ -591,4 +1114,8 @@ class StepsManager:
 
                 new_steps.append(new_step)
 
-        self.execute_and_update_steps(new_steps)
+        self.execute_and_update_steps(
+            new_steps, 
+            num_processes=self.num_replay_processes, 
+            step_result_cache=self.step_result_cache
+        )
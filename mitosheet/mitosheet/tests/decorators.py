@@ -40,6 +40,11 @@ pandas_pre_1_2_only = pytest.mark.skipif(
     reason='This test only runs on later versions of Pandas. API inconsistencies make it fail on earlier versions'
 )
 
+pandas_pre_2_only = pytest.mark.skipif(
+    not is_prev_version(pd.__version__, '2.0.0'), 
+    reason='This test only runs on earlier versions of Pandas. API inconsistencies make it fail on later versions'
+)
+
 python_post_3_6_only = pytest.mark.skipif(
     sys.version_info.minor <= 6, 
     reason="requires 3.7 or greater"
@@ -15,6 +15,7 @@ import pytest
 from mitosheet.saved_analyses import SAVED_ANALYSIS_FOLDER, write_analysis
 from mitosheet.saved_analyses.save_utils import read_and_upgrade_analysis
 from mitosheet.step_performers.filter import FC_NUMBER_EXACTLY
+from mitosheet.utils import NpEncoder
 from mitosheet.tests.test_utils import (create_mito_wrapper,
                                         create_mito_wrapper_dfs)
 
@@ -43,7 +44,7 @@ def test_recover_analysis(b_value, b_formula):
 
     assert curr_step.column_spreadsheet_code[0]['B'] == b_formula
     assert new_mito.dfs[0]['B'].tolist() == [b_value]
-    assert json.dumps(new_mito.curr_step.column_spreadsheet_code) == json.dumps(curr_step.column_spreadsheet_code)
+    assert json.dumps(new_mito.curr_step.column_spreadsheet_code, cls=NpEncoder) == json.dumps(curr_step.column_spreadsheet_code, cls=NpEncoder)
 
 
 # We assume only column A exists
@@ -78,7 +79,7 @@ def test_persist_analysis_multi_sheet(b_value, b_formula):
     assert curr_step.column_spreadsheet_code[1]['B'] == b_formula
     assert new_mito.dfs[1]['B'].tolist() == [b_value]
     
-    assert json.dumps(new_mito.curr_step.column_spreadsheet_code) == json.dumps(curr_step.column_spreadsheet_code)
+    assert json.dumps(new_mito.curr_step.column_spreadsheet_code, cls=NpEncoder) == json.dumps(curr_step.column_spreadsheet_code, cls=NpEncoder)
     assert json.loads(new_mito.mito_widget.analysis_data_json)['code'] == json.loads(mito.mito_widget.analysis_data_json)['code']
 
 
@@ -7,8 +7,11 @@
 Contains tests for the ROUND function.
 """
 
+import random
+
 import pytest
 import pandas as pd
+from pandas.testing import assert_series_equal
 
 from mitosheet.sheet_functions.number_functions import ROUND
 from mitosheet.tests.test_utils import create_mito_wrapper
@@ -50,6 +53,64 @@ def test_ROUND_valid_input_direct_series(data, decimals, rounded):
     assert ROUND(series, decimals).tolist() == rounded
 
 
+def test_ROUND_decimals_that_change_by_row():
+    series = pd.Series(data=[1.234, 5.678, 1.234, 5.678, 15.0], index=[4, 3, 2, 1, 0])
+    decimals = pd.Series(data=[0, 1, 2, 0, -1], index=[4, 3, 2, 1, 0])
+    rounded = ROUND(series, decimals)
+    assert rounded.tolist() == [1, 5.7, 1.23, 6, 20]
+    assert rounded.index.tolist() == [4, 3, 2, 1, 0]
+
+
+ROUND_SAME_AS_PYTHON_TESTS = [
+    ([2.675], 2, [2.67]),
+    ([0.125, 0.375], 2, [0.12, 0.38]),
+    ([123456.789], 20, [123456.789]),
+    ([1e300], 20, [1e300]),
+    ([1.5, 2.5], 400, [1.5, 2.5]),
+    ([1e300, 123.0], -400, [0.0, 0.0]),
+    ([0.5, 1.5, 2.5, -0.5, -2.5], 0, [0.0, 2.0, 2.0, -0.0, -2.0]),
+    ([4503599627370495.5, 1e300, -0.4], 0, [4503599627370496.0, 1e300, -0.0]),
+    ([15, 2 ** 62], 0, [15, 2 ** 62]),
+    ([15, 2 ** 62], 3, [15, 2 ** 62]),
+    ([15, 25], -1, [20, 20]),
+]
+@pytest.mark.parametrize("data,decimals,rounded", ROUND_SAME_AS_PYTHON_TESTS)
+def test_ROUND_same_as_python_round(data, decimals, rounded):
+    series = pd.Series(data=data)
+    assert ROUND(series, decimals).tolist() == rounded
+    assert ROUND(series, pd.Series([decimals] * len(data))).tolist() == rounded
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ROUND_same_as_python_round_random_values(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        if rng.random() < 0.5:
+            data = [rng.randint(-10 ** 12, 10 ** 12) for _ in range(10)]
+        else:
+            data = [
+                rng.choice([
+                    rng.uniform(-1000, 1000),
+                    rng.randint(-1000, 1000) + 0.5,
+                    rng.randint(-1000, 1000) / 1000 + 0.0005,
+                    rng.uniform(-1e300, 1e300),
+                    rng.uniform(-1e-300, 1e-300),
+                ])
+                for _ in range(10)
+            ]
+        decimals = rng.choice([0, 0, rng.randint(-20, 20), rng.randint(-400, 400)])
+
+        series = pd.Series(data=data)
+        expected = pd.Series([round(num, decimals) for num in data])
+        assert_series_equal(ROUND(series, decimals), expected)
+
+
+def test_ROUND_decimals_with_many_different_values():
+    series = pd.Series(data=[1.23456789] * 200)
+    decimals = pd.Series(data=list(range(200)))
+    assert ROUND(series, decimals).tolist() == [round(1.23456789, dec) for dec in range(200)]
+
+
 @pytest.mark.parametrize("data,decimals,rounded", ROUND_VALID_TESTS)
 def test_ROUND_valid_input_sheet_formula_defaults_to_one(data, decimals, rounded):
     mito = create_mito_wrapper(data)
@@ -39,6 +39,11 @@ def test_FIND_valid_input_direct(data, substring, indexes):
     assert FIND(series, substring).tolist() == indexes
 
 
+def test_FIND_substrings_that_change_by_row():
+    series = pd.Series(data=['ABC', 'ABC', 'ABC'], index=[2, 1, 0])
+    assert FIND(series, pd.Series(['A', 'C', 'D'], index=[2, 1, 0])).tolist() == [1, 3, 0]
+
+
 @pytest.mark.parametrize("data,substring,indexes", FIND_VALID_TESTS)
 def test_FIND_valid_input_sheet_function(data, substring, indexes):
     mito = create_mito_wrapper(data)
@@ -50,6 +50,10 @@ def test_LEFT_valid_input_direct_series(data, length, trimmed):
     series = pd.Series(data=data)
     assert LEFT(series, length).tolist() == trimmed
 
+def test_LEFT_lengths_that_change_by_row():
+    series = pd.Series(data=['ABC', 'DEF', 'GHI'], index=[2, 1, 0])
+    assert LEFT(series, pd.Series(['1', '2', '3'], index=[2, 1, 0])).tolist() == ['A', 'DE', 'GHI']
+
 LEFT_VALID_TESTS_ONE_DEFAULT = [
     (['ABC'], ['A']),
     (['  ABC   '], [' ']),
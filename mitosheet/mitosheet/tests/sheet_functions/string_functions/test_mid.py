@@ -60,6 +60,11 @@ def test_MID_works_for_series_and_series(data, start, num, result):
     assert MID(series, start, num).tolist() == result
 
 
+def test_MID_start_and_length_that_change_by_row():
+    series = pd.Series(data=['ABCDEF', 'ABCDEF', 'ABCDEF'], index=[2, 1, 0])
+    assert MID(series, pd.Series([1, 2, 3], index=[2, 1, 0]), pd.Series([1, 2, 2], index=[2, 1, 0])).tolist() == ['A', 'BC', 'CD']
+
+
 MID_INVALID_FORMULAS = [
     ('=MID(A'),
     ('=MID(A, 1'),
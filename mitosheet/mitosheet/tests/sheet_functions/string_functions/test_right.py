@@ -49,6 +49,11 @@ def test_RIGHT_valid_input_direct_series(data, length, trimmed):
     assert RIGHT(series, length).tolist() == trimmed
 
 
+def test_RIGHT_lengths_that_change_by_row():
+    series = pd.Series(data=['ABC', 'DEF', 'GHI'], index=[2, 1, 0])
+    assert RIGHT(series, pd.Series([0, 2, 3], index=[2, 1, 0])).tolist() == ['', 'EF', 'GHI']
+
+
 RIGHT_VALID_TESTS_ONE_DEFAULT = [
     (['ABC'], ['C']),
     (['  ABC   '], [' ']),
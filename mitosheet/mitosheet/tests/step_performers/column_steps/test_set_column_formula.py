@@ -137,6 +137,7 @@ def test_only_writes_single_code():
         "df1.insert(2, 'C', df1['B'])", 
         "df1.insert(3, 'D', df1['A'])", 
         "df1['B'] = 100", 
+        "df1['C'] = df1['B']", 
     ]
 
 def test_can_set_formula_referencing_datetime():
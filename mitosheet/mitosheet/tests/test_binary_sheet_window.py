@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for getting windows of the sheet data as binary buffers.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from mitosheet.api.api import handle_api_event
+from mitosheet.api.get_sheet_window import (get_binary_sheet_window,
+                                            get_sheet_window)
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+from mitosheet.utils import (NpEncoder, df_window_to_binary,
+                             df_window_to_json_dumpsable)
+
+NUM_ROWS = 1_000
+DF = pd.DataFrame({
+    'A': list(range(NUM_ROWS)),
+    'B': np.arange(NUM_ROWS) / 3,
+    'C': pd.date_range('2020-01-01', periods=NUM_ROWS),
+    'D': [str(i) if i % 7 else None for i in range(NUM_ROWS)],
+    'E': [i % 2 == 0 for i in range(NUM_ROWS)],
+    'F': ['é' * (i % 3) for i in range(NUM_ROWS)],
+})
+
+
+def read_binary_column(column, buffer):
+    """
+    Reads a column out of the buffer, like readBinarySheetWindow on the frontend.
+    """
+    if column['kind'] == 'json':
+        return column['values']
+    if column['kind'] == 'string':
+        offsets = np.frombuffer(buffer, dtype='<i4', count=column['length'] + 1, offset=column['offsetsByteOffset'])
+        data = buffer[column['byteOffset']:column['byteOffset'] + offsets[-1]]
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    dtype = {'int32': '<i4', 'float32': '<f4', 'float64': '<f8', 'uint8': 'u1'}[column['dtype']]
+    return np.frombuffer(buffer, dtype=dtype, count=column['length'], offset=column['byteOffset'])
+
+
+def get_binary_window(mito, sheet_index, row_start, row_end):
+    params = {'sheet_index': sheet_index, 'row_start': row_start, 'row_end': row_end}
+    schema, buffers = get_binary_sheet_window(params, mito.mito_widget.steps_manager)
+    return json.loads(schema), buffers[0]
+
+
+def test_binary_sheet_window_matches_sheet_window():
+    mito = create_mito_wrapper_dfs(DF)
+    steps_manager = mito.mito_widget.steps_manager
+
+    for row_start, row_end in [(0, 100), (100, 200), (950, 1050), (2000, 2100)]:
+        schema, buffer = get_binary_window(mito, 0, row_start, row_end)
+        window = json.loads(get_sheet_window({'sheet_index': 0, 'row_start': row_start, 'row_end': row_end}, steps_manager))
+
+        assert schema['rowStart'] == window['rowStart']
+        assert schema['rowEnd'] == window['rowEnd']
+        assert schema['numRows'] == NUM_ROWS
+        assert list(read_binary_column(schema['index'], buffer)) == window['index']
+
+        (a, b, c, d, e, f) = schema['data']
+        assert [column['columnID'] for column in schema['data']] == [column['columnID'] for column in window['data']]
+        assert (a['kind'], b['kind'], c['kind'], d['kind'], e['kind'], f['kind']) == ('int', 'float', 'datetime', 'string', 'bool', 'string')
+
+        df = DF.iloc[window['rowStart']:window['rowEnd']]
+        assert list(read_binary_column(a, buffer)) == window['data'][0]['columnData']
+        # Floats and dates are formatted on the frontend, so we check the raw values
+        assert np.array_equal(read_binary_column(b, buffer), df['B'].to_numpy())
+        assert np.array_equal(read_binary_column(c, buffer), (df['C'].astype(np.int64) // 10**9).to_numpy().astype(np.float64))
+        assert read_binary_column(d, buffer) == window['data'][3]['columnData']
+        assert list(read_binary_column(e, buffer).astype(bool)) == window['data'][4]['columnData']
+        assert read_binary_column(f, buffer) == window['data'][5]['columnData']
+
+
+def test_binary_sheet_window_handles_nat_large_ints_and_objects():
+    df = pd.DataFrame({
+        'A': [2**40, 1, -2**40],
+        'B': [pd.Timestamp('2020-01-01 12:30:15'), pd.NaT, pd.Timestamp('1960-01-01')],
+        'C': [1, 'a', 2.5],
+    })
+    schema, buffer = df_window_to_binary(df, {'A': 'A', 'B': 'B', 'C': 'C'}, 0, 3, ['A', 'B', 'C'])
+
+    a, b, c = schema['data']
+    assert a['dtype'] == 'float64'
+    assert list(read_binary_column(a, buffer)) == [2**40, 1, -2**40]
+    dates = read_binary_column(b, buffer)
+    assert dates[0] == pd.Timestamp('2020-01-01 12:30:15').timestamp()
+    assert np.isnan(dates[1])
+    assert dates[2] == pd.Timestamp('1960-01-01').timestamp()
+    assert c == {'columnID': 'C', 'kind': 'json', 'values': [1, 'a', 2.5]}
+
+
+def test_binary_sheet_window_empty_window():
+    df = pd.DataFrame({'A': [1, 2], 'B': ['a', 'b']})
+    schema, buffer = df_window_to_binary(df, {'A': 'A', 'B': 'B'}, 5, 10, ['A', 'B'])
+
+    assert schema['rowStart'] == 2
+    assert schema['rowEnd'] == 2
+    assert list(read_binary_column(schema['data'][0], buffer)) == []
+    assert read_binary_column(schema['data'][1], buffer) == []
+
+
+def test_binary_sheet_window_is_cached_per_step():
+    mito = create_mito_wrapper_dfs(DF)
+    steps_manager = mito.mito_widget.steps_manager
+    params = {'sheet_index': 0, 'row_start': 100, 'row_end': 200}
+
+    binary_sheet_window = get_binary_sheet_window(params, steps_manager)
+    assert get_binary_sheet_window(params, steps_manager) is binary_sheet_window
+
+    mito.set_formula('=A + 1', 0, 'A')
+    schema, buffer = get_binary_window(mito, 0, 100, 200)
+    assert list(read_binary_column(schema['data'][0], buffer)) == list(range(101, 201))
+
+
+def test_binary_sheet_window_api_call_sends_buffers():
+    mito = create_mito_wrapper_dfs(DF)
+    sent = []
+    def send(message, buffers=None):
+        sent.append((message, buffers))
+
+    handle_api_event(
+        send,
+        {'event': 'api_call', 'id': '1', 'type': 'get_binary_sheet_window', 'params': {'sheet_index': 0, 'row_start': 0, 'row_end': 100}},
+        mito.mito_widget.steps_manager
+    )
+    handle_api_event(
+        send,
+        {'event': 'api_call', 'id': '2', 'type': 'get_sheet_window', 'params': {'sheet_index': 0, 'row_start': 0, 'row_end': 100}},
+        mito.mito_widget.steps_manager
+    )
+
+    (binary_message, buffers), (message, no_buffers) = sent
+    assert binary_message['id'] == '1'
+    assert json.loads(binary_message['data'])['rowEnd'] == 100
+    assert len(buffers) == 1 and isinstance(buffers[0], bytes)
+    assert message['id'] == '2'
+    assert no_buffers is None
+
+
+def test_binary_sheet_window_is_smaller_for_numeric_data():
+    num_rows = 100_000
+    df = pd.DataFrame({
+        f'col{i}': np.random.rand(num_rows) * 1000 if i % 2 else np.random.randint(0, 1_000_000, num_rows)
+        for i in range(10)
+    })
+    column_headers = list(df.columns)
+    column_headers_to_column_ids = {column_header: column_header for column_header in column_headers}
+
+    json_window = json.dumps(df_window_to_json_dumpsable(df, column_headers_to_column_ids, 0, num_rows, column_headers), cls=NpEncoder)
+
+    schema, buffer = df_window_to_binary(df, column_headers_to_column_ids, 0, num_rows, column_headers)
+    binary_schema = json.dumps(schema, cls=NpEncoder)
+
+    assert len(binary_schema) + len(buffer) < len(json_window) / 2
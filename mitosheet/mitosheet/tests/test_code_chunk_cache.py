@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for caching the code chunks of steps, and the optimized code chunks.
+"""
+from unittest.mock import patch
+
+import pandas as pd
+
+from mitosheet.step_performers.column_steps.add_column import AddColumnStepPerformer
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+from mitosheet.transpiler.transpile import transpile
+
+
+def test_code_chunks_cached_on_step():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3]}))
+    mito.add_column(0, 'B')
+
+    step = mito.curr_step
+    assert step.code_chunks is step.code_chunks
+
+
+def test_adding_step_only_transpiles_new_step():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3]}))
+    for i in range(20):
+        mito.add_column(0, f'B{i}')
+
+    with patch.object(AddColumnStepPerformer, 'transpile', side_effect=AddColumnStepPerformer.transpile) as mock_transpile:
+        mito.add_column(0, 'C')
+        # The code and step summaries only need the code chunks of the new step
+        assert mock_transpile.call_count == 1
+        transpile(mito.mito_widget.steps_manager)
+        assert mock_transpile.call_count == 1
+
+    assert mito.transpiled_code[-1] == "df1.insert(21, 'C', 0)"
+
+
+def test_optimized_code_chunks_reused_if_steps_unchanged():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3]}))
+    mito.add_column(0, 'B')
+    mito.set_formula('=A + 1', 0, 'B')
+
+    steps_manager = mito.mito_widget.steps_manager
+    transpile(steps_manager)
+    optimized_code_chunks = steps_manager.optimized_code_chunks_cache.optimized_code_chunks
+    transpile(steps_manager)
+    assert steps_manager.optimized_code_chunks_cache.optimized_code_chunks is optimized_code_chunks
+
+    mito.add_column(0, 'C')
+    transpile(steps_manager)
+    assert steps_manager.optimized_code_chunks_cache.optimized_code_chunks is not optimized_code_chunks
+
+
+def test_cached_code_chunks_correct_after_undo_redo_and_edits():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3]}))
+    mito.add_column(0, 'B')
+    mito.set_formula('=A + 1', 0, 'B')
+    mito.delete_columns(0, ['B'])
+    assert mito.transpiled_code == []
+
+    mito.undo()
+    assert mito.transpiled_code == [
+        "df1.insert(1, 'B', df1['A'] + 1)",
+    ]
+
+    mito.redo()
+    assert mito.transpiled_code == []
+
+    mito.set_formula('=A + 2', 0, 'A')
+    assert mito.transpiled_code == [
+        "df1['A'] = df1['A'] + 2",
+    ]
+
+
+def test_optimizing_dataframe_deletes_does_not_change_cached_code_chunks():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1]}), pd.DataFrame({'A': [2]}), pd.DataFrame({'A': [3]}))
+    mito.delete_dataframe(0)
+    mito.delete_dataframe(0)
+
+    for _ in range(3):
+        assert mito.transpiled_code == ['del df1', 'del df2']
+        assert mito.curr_step.code_chunks[0].get_param('sheet_indexes') == [0]
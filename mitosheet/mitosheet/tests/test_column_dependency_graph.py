@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for the column dependency graph, and for recalculating
+the formulas that depend on columns when they are modified.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import mitosheet.parallel_formulas as parallel_formulas
+from mitosheet.errors import MitoError
+from mitosheet.state import State
+from mitosheet.step_performers.column_steps.set_column_formula import refresh_dependent_columns
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+
+
+def get_graph(column_spreadsheet_code):
+    df = pd.DataFrame({column_header: [1] for column_header in column_spreadsheet_code})
+    state = State([df], column_spreadsheet_code=[column_spreadsheet_code])
+    return state.get_column_dependency_graph(0)
+
+
+def test_graph_has_edges_from_dependencies_to_formula_columns():
+    graph = get_graph({'A': '', 'B': '=A + 1', 'C': '=A + B', 'D': '=100'})
+    assert graph.dependents == {'A': {'B', 'C'}, 'B': {'C'}}
+    assert graph.dependencies == {'B': {'A'}, 'C': {'A', 'B'}}
+
+
+def test_graph_does_not_include_formulas_that_reference_their_own_column():
+    graph = get_graph({'A': '=A + 1', 'B': '=A + B', 'C': '=A'})
+    assert graph.dependents == {'A': {'C'}}
+
+
+def test_graph_does_not_include_formulas_that_reference_deleted_columns():
+    graph = get_graph({'A': '', 'B': '=A + C', 'D': '=A + 1'})
+    assert graph.dependents == {'A': {'D'}}
+
+
+def test_recalculates_dependents_in_topological_order():
+    graph = get_graph({'D': '=B + C', 'A': '', 'C': '=B', 'B': '=A', 'E': '=A'})
+    assert graph.get_column_ids_to_recalculate(['A']) == ['B', 'E', 'C', 'D']
+    assert graph.get_column_ids_to_recalculate(['C']) == ['D']
+    assert graph.get_column_ids_to_recalculate(['D']) == []
+    assert graph.get_column_ids_to_recalculate(['E']) == []
+
+
+def test_recalculates_dependents_in_levels():
+    graph = get_graph({'D': '=B + C', 'A': '', 'C': '=B', 'B': '=A', 'E': '=A', 'F': '=A + D'})
+    assert graph.get_column_id_levels_to_recalculate(['A']) == [['B', 'E'], ['C'], ['D'], ['F']]
+    assert graph.get_column_id_levels_to_recalculate(['B']) == [['C'], ['D'], ['F']]
+    assert graph.get_column_id_levels_to_recalculate(['A', 'C']) == [['B', 'E'], ['D'], ['F']]
+    assert graph.get_column_id_levels_to_recalculate(['F']) == []
+
+
+def test_does_not_recalculate_modified_columns_that_depend_on_other_modified_columns():
+    graph = get_graph({'A': '', 'B': '=A', 'C': '=B'})
+    assert graph.get_column_ids_to_recalculate(['A', 'B']) == ['C']
+
+
+def test_circular_references_raise_circular_reference_error():
+    graph = get_graph({'A': '', 'B': '=A + C', 'C': '=B'})
+    with pytest.raises(MitoError) as e_info:
+        graph.get_column_ids_to_recalculate(['A'])
+    assert e_info.value.type_ == 'circular_reference_error'
+
+
+def test_graph_reused_when_formulas_do_not_change():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3]}))
+    mito.set_formula('=A + 1', 0, 'B', add_column=True)
+    graph = mito.curr_step.post_state.get_column_dependency_graph(0)
+
+    mito.set_cell_value(0, 'A', 0, '10')
+    assert mito.curr_step.post_state.get_column_dependency_graph(0) is graph
+
+    mito.set_formula('=A + 2', 0, 'C', add_column=True)
+    assert mito.curr_step.post_state.get_column_dependency_graph(0) is not graph
+
+
+def test_set_cell_value_recalculates_dependent_formulas():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3], 'D': [4, 5, 6]}))
+    mito.set_formula('=A + 1', 0, 'B', add_column=True)
+    mito.set_formula('=B * 2', 0, 'C', add_column=True)
+    mito.set_formula('=D', 0, 'E', add_column=True)
+
+    mito.set_cell_value(0, 'A', 0, '10')
+
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [10, 2, 3], 'D': [4, 5, 6], 'B': [11, 3, 4], 'C': [22, 6, 8], 'E': [4, 5, 6]}))
+    assert mito.curr_step.execution_data['refreshed_column_ids'] == ['B', 'C']
+    assert mito.transpiled_code[-3:] == [
+        "df1.at[0, 'A'] = 10",
+        "df1['B'] = df1['A'] + 1",
+        "df1['C'] = df1['B'] * 2",
+    ]
+
+
+def test_editing_input_of_formula_that_references_deleted_column():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2], 'C': [3, 4]}))
+    mito.add_column(0, 'B')
+    mito.set_formula('=A + C', 0, 'B')
+    mito.delete_columns(0, ['C'])
+
+    # The formula can no longer be recalculated, so it keeps its values
+    assert mito.set_cell_value(0, 'A', 0, '10')
+    assert mito.change_column_dtype(0, 'A', 'float')
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [10.0, 2.0], 'B': [4, 6]}))
+
+
+def test_set_cell_value_in_column_without_dependents_does_not_recalculate():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3], 'D': [4, 5, 6]}))
+    mito.set_formula('=A + 1', 0, 'B', add_column=True)
+
+    mito.set_cell_value(0, 'D', 0, '10')
+
+    assert mito.curr_step.execution_data['refreshed_column_ids'] == []
+    assert mito.transpiled_code[-1] == "df1.at[0, 'D'] = 10"
+
+
+def test_fill_na_recalculates_dependent_formulas():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1.0, None, 3.0]}))
+    mito.set_formula('=A * 2', 0, 'B', add_column=True)
+
+    mito.fill_na(0, ['A'], {'type': 'value', 'value': 0})
+
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1.0, 0.0, 3.0], 'B': [2.0, 0.0, 6.0]}))
+
+
+def test_change_column_dtype_recalculates_dependent_formulas():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1.5, 2.5, 3.5]}))
+    mito.set_formula('=A * 2', 0, 'B', add_column=True)
+
+    mito.change_column_dtype(0, 'A', 'int')
+
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'B': [2, 4, 6]}))
+
+
+def test_set_column_formula_recalculates_dependent_formulas():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3]}))
+    mito.set_formula('=A + 1', 0, 'B', add_column=True)
+    mito.set_formula('=B + 1', 0, 'C', add_column=True)
+
+    mito.set_formula('=A + 10', 0, 'B')
+
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'B': [11, 12, 13], 'C': [12, 13, 14]}))
+
+
+def test_set_column_formula_with_circular_reference_fails():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3]}))
+    mito.set_formula('=A + 1', 0, 'B', add_column=True)
+
+    assert not mito.set_formula('=B + 1', 0, 'A')
+
+    assert mito.curr_step.column_spreadsheet_code[0]['A'] == ''
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'B': [2, 3, 4]}))
+
+
+def test_recalculating_does_not_change_previous_steps():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3]}))
+    mito.set_formula('=A + 1', 0, 'B', add_column=True)
+    mito.set_cell_value(0, 'A', 0, '10')
+
+    mito.undo()
+
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'B': [2, 3, 4]}))
+
+
+@pytest.fixture
+def formula_threads(monkeypatch):
+    # There may only be one CPU where the tests run, so we set the number of threads
+    monkeypatch.setattr(parallel_formulas, 'NUM_FORMULA_THREADS', 4)
+
+
+def test_parallel_recalculation_matches_serial_recalculation(formula_threads):
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3], 'S': ['a', 'b', 'c']}))
+    mito.set_formula('=A + 1', 0, 'B', add_column=True)
+    mito.set_formula('=A * 2', 0, 'C', add_column=True)
+    mito.set_formula('=CONCAT(S, A)', 0, 'D', add_column=True)
+    mito.set_formula('=B + C', 0, 'E', add_column=True)
+
+    mito.set_cell_value(0, 'A', 0, '10')
+
+    assert mito.dfs[0].equals(pd.DataFrame({
+        'A': [10, 2, 3], 
+        'S': ['a', 'b', 'c'],
+        'B': [11, 3, 4],
+        'C': [20, 4, 6],
+        'D': ['a10', 'b2', 'c3'],
+        'E': [31, 7, 10],
+    }))
+    assert mito.curr_step.execution_data['refreshed_column_ids'] == ['B', 'C', 'D', 'E']
+
+
+def test_parallel_recalculation_of_string_formulas_on_processes(formula_threads):
+    parallel_formulas.set_num_formula_processes(1)
+    try:
+        mito = create_mito_wrapper_dfs(pd.DataFrame({'S': ['a', 'b', 'c']}))
+        mito.set_formula('=UPPER(S)', 0, 'B', add_column=True)
+        mito.set_formula('=CONCAT(S, "!")', 0, 'C', add_column=True)
+
+        mito.set_cell_value(0, 'S', 0, 'd')
+    finally:
+        parallel_formulas.set_num_formula_processes(None)
+
+    assert mito.dfs[0].equals(pd.DataFrame({'S': ['d', 'b', 'c'], 'B': ['D', 'B', 'C'], 'C': ['d!', 'b!', 'c!']}))
+
+
+def test_parallel_recalculation_errors_are_formula_errors(formula_threads):
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3]}))
+    mito.set_formula('=A + 1', 0, 'B', add_column=True)
+    mito.set_formula('=A + 2', 0, 'C', add_column=True)
+
+    assert not mito.change_column_dtype(0, 'A', 'string')
+
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'B': [2, 3, 4], 'C': [3, 4, 5]}))
+
+
+def test_parallel_recalculation_benchmark(monkeypatch):
+    # Recalculates 100 independent formulas serially and in parallel. To use this as a 
+    # benchmark, set MITO_FORMULA_BENCHMARK_ROWS (e.g. to 5000000) and run pytest --durations
+    num_rows = int(os.environ.get('MITO_FORMULA_BENCHMARK_ROWS', 10_000))
+    df = pd.DataFrame({'A': np.random.rand(num_rows)})
+    column_spreadsheet_code = {'A': ''}
+    for i in range(100):
+        df[f'F{i}'] = 0.0
+        column_spreadsheet_code[f'F{i}'] = f'=ROUND(A * {i} + A / {i + 1}, 2)'
+
+    dfs = {}
+    for num_threads in [1, 4]:
+        monkeypatch.setattr(parallel_formulas, 'NUM_FORMULA_THREADS', num_threads)
+        state = State([df], column_spreadsheet_code=[column_spreadsheet_code])
+        refresh_dependent_columns(state, 0, ['A'])
+        dfs[num_threads] = state.dfs[0]
+
+    assert dfs[1].equals(dfs[4])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for sending large sheet data to the frontend compressed.
+"""
+import hashlib
+import json
+import os
+import zlib
+
+import pandas as pd
+import pytest
+
+from mitosheet.tests.test_sheet_data_patch import apply_sheet_data_patch
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+from mitosheet.utils import compress_json
+
+DF = pd.DataFrame({'A': list(range(1_000)), 'B': [f'value {i}' for i in range(1_000)]})
+
+BINDER_FOLDER = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'binder')
+
+
+def create_compressed_mito_wrapper(*dfs, threshold_bytes=0):
+    mito = create_mito_wrapper_dfs(*dfs)
+    mito.mito_widget.compress_sheet_data = True
+    mito.mito_widget.sheet_data_compression_threshold_bytes = threshold_bytes
+    sent_messages = []
+    mito.mito_widget.send = lambda message, buffers=None: sent_messages.append((message, buffers))
+    return mito, sent_messages
+
+
+def get_messages(sent_messages, event):
+    return [(message, buffers) for message, buffers in sent_messages if message['event'] == event]
+
+
+def apply_compressed_sheet_data(sheet_data_array, message, buffers):
+    """
+    Applies the compressed sheet data in the same way that the frontend does.
+    """
+    payload = json.loads(zlib.decompress(buffers[0]).decode('utf-8'))
+    if message['isPatch']:
+        return apply_sheet_data_patch(sheet_data_array, payload)
+    return payload
+
+
+def test_sheet_data_not_compressed_by_default():
+    mito = create_mito_wrapper_dfs(DF)
+    sent_messages = []
+    mito.mito_widget.send = lambda message, buffers=None: sent_messages.append((message, buffers))
+    mito.mito_widget.sheet_data_compression_threshold_bytes = 0
+
+    mito.set_formula('=A + 1', 0, 'A')
+
+    assert get_messages(sent_messages, 'compressed_sheet_data') == []
+    assert len(get_messages(sent_messages, 'sheet_data_patch')) == 1
+
+
+@pytest.mark.parametrize("edit", [
+    lambda mito: mito.set_formula('=A + 1', 0, 'A'),
+    lambda mito: mito.add_column(0, 'C'),
+    lambda mito: mito.duplicate_dataframe(0),
+    lambda mito: mito.delete_columns(0, ['B']),
+])
+def test_compressed_sheet_data_matches_sheet_data(edit):
+    mito, sent_messages = create_compressed_mito_wrapper(DF)
+    sheet_data_array = json.loads(mito.mito_widget.sheet_data_json)
+
+    edit(mito)
+
+    assert get_messages(sent_messages, 'sheet_data_patch') == []
+    ((message, buffers), ) = get_messages(sent_messages, 'compressed_sheet_data')
+    assert message['encoding'] == 'zlib'
+    assert message['hash'] == hashlib.sha256(mito.mito_widget.sheet_data_json.encode('utf-8')).hexdigest()
+    assert apply_compressed_sheet_data(sheet_data_array, message, buffers) == json.loads(mito.mito_widget.sheet_data_json)
+
+
+def test_small_sheet_data_not_compressed():
+    mito, sent_messages = create_compressed_mito_wrapper(DF, threshold_bytes=1_000_000)
+
+    mito.set_formula('=A + 1', 0, 'A')
+
+    assert get_messages(sent_messages, 'compressed_sheet_data') == []
+    assert len(get_messages(sent_messages, 'sheet_data_patch')) == 1
+
+
+def test_compressed_sheet_data_has_same_hash_if_unchanged():
+    mito, sent_messages = create_compressed_mito_wrapper(DF)
+    mito.add_column(0, 'C')
+
+    # The frontend already has this sheet data, so it does not decompress it again
+    mito.mito_widget.receive_message(mito.mito_widget, {
+        'event': 'update_event',
+        'id': '1',
+        'type': 'args_update',
+        'params': {'args': ['df1']}
+    })
+
+    ((add_column_message, _), (args_update_message, _)) = get_messages(sent_messages, 'compressed_sheet_data')
+    assert add_column_message['hash'] == args_update_message['hash']
+
+
+@pytest.mark.parametrize("file_name", [
+    '2021-2022 NBA Player Stats.csv',
+    'Holidays in All Countries.csv',
+])
+def test_compressed_sheet_data_of_sample_data(file_name):
+    path = os.path.join(BINDER_FOLDER, file_name)
+    if not os.path.exists(path):
+        pytest.skip('The binder sample data is not in this tree')
+    
+    df = pd.read_csv(path, sep=None, engine='python', encoding='latin-1')
+    mito = create_mito_wrapper_dfs(df)
+    sheet_data_json = mito.mito_widget.sheet_data_json
+
+    compressed_sheet_data = compress_json(sheet_data_json)
+
+    assert zlib.decompress(compressed_sheet_data).decode('utf-8') == sheet_data_json
+    assert len(sheet_data_json) / len(compressed_sheet_data) > 2
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for converting dataframes to the json that is sent to the frontend.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mitosheet.sheet_functions.types.utils import get_float_dt_td_columns
+from mitosheet.utils import MAX_COLUMNS, MAX_ROWS, convert_df_to_parsed_json
+
+
+def convert_df_to_parsed_json_with_to_json(original_df, max_rows=MAX_ROWS, max_columns=MAX_COLUMNS):
+    """
+    The conversion we used to do, which the vectorized conversion must match exactly.
+    """
+    if max_rows is None:
+        df = original_df.copy(deep=True) 
+    else:
+        df = original_df.head(n=max_rows).copy(deep=True)
+
+    df = df.iloc[: , :max_columns]
+
+    float_columns, date_columns, timedelta_columns = get_float_dt_td_columns(df)
+    for column_header in date_columns:
+        df[column_header] = df[column_header].dt.strftime('%Y-%m-%d %X')
+    for column_header in timedelta_columns:
+        df[column_header] = df[column_header].apply(lambda x: str(x))
+    for column_header in float_columns:
+        df[column_header] = df[column_header].apply(lambda x: x if np.isnan(x) else str(x))
+
+    if isinstance(df.index, pd.DatetimeIndex):
+        df.index = df.index.strftime('%Y-%m-%d %X')
+    elif isinstance(df.index, pd.TimedeltaIndex):
+        df.index = df.index.to_series().apply(lambda x: str(x))
+
+    json_obj = json.loads(df.to_json(orient="split"))
+    for d in json_obj['data']:
+        for idx, e in enumerate(d):
+            if e is None:
+                d[idx] = 'NaN'
+
+    return json_obj
+
+
+DATETIMES = pd.to_datetime(['2020-01-01 12:30:45', None, '1969-12-31 23:59:59.500', '2262-04-11'])
+
+CONVERT_TESTS = [
+    pd.DataFrame({'A': [1, 2, 3], 'B': [True, False, True]}),
+    pd.DataFrame({'A': np.array([1, 2, 3], dtype=np.int8), 'B': np.array([1, 2, 2**32], dtype=np.uint64), 'C': np.array([1, 2, 2**64 - 1], dtype=np.uint64)}),
+    pd.DataFrame({'A': [1.0, np.nan, np.inf, -np.inf], 'B': [0.1, 1e16, 1e-7, 123456789.123456789]}),
+    pd.DataFrame({'A': np.array([0.1, np.nan, 2.5], dtype=np.float32), 'B': np.array([0.1, np.nan, 2.5], dtype=np.float16)}),
+    pd.DataFrame({'A': [np.nan, np.nan]}),
+    pd.DataFrame({'A': ['a', None, np.nan, 'ü"\\\n\t😀'], 'B': ['1', '2', '3', '4']}),
+    pd.DataFrame({'A': [None, None], 'B': [np.nan, None]}, dtype=object),
+    pd.DataFrame({'A': ['a', 1, 1.5, None], 'B': [True, 'b', pd.NA, pd.NaT], 'C': [pd.Timestamp('2020-01-01'), 1, 'c', [1, 2]]}),
+    pd.DataFrame({'A': DATETIMES, 'B': DATETIMES.tz_localize('US/Eastern'), 'C': pd.to_timedelta(['1 days 02:00:00', None, '-1 days', '00:00:00.000001'])}),
+    pd.DataFrame({'A': pd.Series(['a', 'b', None], dtype='category'), 'B': pd.Series([1, None, 3], dtype='Int64'), 'C': pd.Series(['a', None, 'c'], dtype='string')}),
+    pd.DataFrame({'A': pd.Series([1.5, None, 3], dtype='Float64'), 'B': pd.Series([True, None, False], dtype='boolean')}),
+    pd.DataFrame({'A': [1, 2, 3]}, index=['a', 'b', 'c']),
+    pd.DataFrame({'A': [1, 2, 3]}, index=['a', None, 'c']),
+    pd.DataFrame({'A': [1, 2, 3]}, index=[1.5, np.nan, 3]),
+    pd.DataFrame({'A': [1, 2, 3, 4]}, index=DATETIMES),
+    pd.DataFrame({'A': [1, 2, 3, 4]}, index=DATETIMES.tz_localize('UTC')),
+    pd.DataFrame({'A': [1, 2]}, index=pd.to_timedelta(['1 days', None])),
+    pd.DataFrame({'A': [1, 2]}, index=pd.MultiIndex.from_tuples([('a', 1), ('b', 2)])),
+    pd.DataFrame({'A': [1, 2]}, index=[10, -10]),
+    pd.DataFrame({('A', 'B'): [1, 2], 1: [1.5, 2.5], 1.5: ['a', 'b']}),
+    pd.DataFrame({'A': [], 'B': []}),
+    pd.DataFrame(index=[0, 1, 2]),
+    pd.DataFrame(),
+]
+
+@pytest.mark.parametrize("df", CONVERT_TESTS)
+def test_convert_df_to_parsed_json_matches_to_json(df):
+    expected = convert_df_to_parsed_json_with_to_json(df)
+    json_obj = convert_df_to_parsed_json(df)
+    assert json_obj['index'] == expected['index']
+    assert json_obj['data'] == expected['data']
+    assert json.dumps(json_obj['index']) == json.dumps(expected['index'])
+    assert json.dumps(json_obj['data']) == json.dumps(expected['data'])
+
+
+@pytest.mark.parametrize("max_rows, max_columns", [(None, MAX_COLUMNS), (2, MAX_COLUMNS), (5, 2), (0, 1), (None, 0)])
+def test_convert_df_to_parsed_json_max_rows_and_columns(max_rows, max_columns):
+    df = pd.DataFrame({
+        'A': [1, 2, 3, 4],
+        'B': [1.5, np.nan, 3.5, 4.5],
+        'C': ['a', 'b', None, 'd'],
+        'D': DATETIMES
+    }, index=['w', 'x', 'y', 'z'])
+    expected = convert_df_to_parsed_json_with_to_json(df, max_rows=max_rows, max_columns=max_columns)
+    json_obj = convert_df_to_parsed_json(df, max_rows=max_rows, max_columns=max_columns)
+    assert json_obj['index'] == expected['index']
+    assert json_obj['data'] == expected['data']
+
+
+def test_convert_df_to_parsed_json_wide_dataframe():
+    num_rows, num_columns = 100, 400
+    df = pd.DataFrame({
+        f'{column_index}': [
+            np.arange(num_rows),
+            np.arange(num_rows) / 7,
+            [str(row_index) if row_index % 10 else None for row_index in range(num_rows)],
+            pd.date_range('2020-01-01', periods=num_rows, freq='H'),
+        ][column_index % 4]
+        for column_index in range(num_columns)
+    })
+
+    assert convert_df_to_parsed_json(df)['data'] == convert_df_to_parsed_json_with_to_json(df)['data']
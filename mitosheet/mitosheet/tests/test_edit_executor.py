@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for executing edits in the background, and cancelling them.
+"""
+from threading import Event, Timer, current_thread
+
+import pandas as pd
+import pytest
+
+from mitosheet.step_performers.column_steps.add_column import AddColumnStepPerformer
+from mitosheet.tests.test_utils import create_mito_wrapper
+from mitosheet.utils import get_new_id
+
+
+@pytest.fixture
+def slow_add_column(monkeypatch):
+    """
+    Makes adding a column wait until the returned event is set.
+    """
+    continue_execution = Event()
+    execute = AddColumnStepPerformer.execute
+
+    def slow_execute(prev_state, params):
+        continue_execution.wait(10)
+        return execute(prev_state, params)
+
+    monkeypatch.setattr(AddColumnStepPerformer, 'execute', slow_execute)
+    return continue_execution
+
+
+def create_background_mito_wrapper():
+    mito = create_mito_wrapper([1, 2, 3])
+    sent_messages = []
+    mito.mito_widget.send = sent_messages.append
+    mito.mito_widget.edit_executor.send = sent_messages.append
+    mito.mito_widget.edit_executor.wait_seconds = 0.01
+    return mito, sent_messages
+
+
+def send_add_column(mito, column_header):
+    edit_id = get_new_id()
+    assert mito.mito_widget.receive_message(mito.mito_widget, {
+        'event': 'edit_event',
+        'id': edit_id,
+        'type': 'add_column_edit',
+        'step_id': get_new_id(),
+        'params': {
+            'sheet_index': 0,
+            'column_header': column_header,
+            'column_header_index': -1
+        }
+    })
+    return edit_id
+
+
+def send_cancel_edit(mito, edit_id):
+    cancel_id = get_new_id()
+    mito.mito_widget.receive_message(mito.mito_widget, {
+        'event': 'cancel_edit',
+        'id': cancel_id,
+        'type': 'cancel_edit',
+        'params': {
+            'edit_id': edit_id
+        }
+    })
+    return cancel_id
+
+
+def get_messages_with_id(sent_messages, message_id):
+    return [message for message in sent_messages if message.get('id') == message_id]
+
+
+def test_fast_edit_executes_synchronously():
+    mito, sent_messages = create_background_mito_wrapper()
+    mito.mito_widget.edit_executor.wait_seconds = 10
+
+    edit_id = send_add_column(mito, 'B')
+
+    assert get_messages_with_id(sent_messages, edit_id) == [{'event': 'response', 'id': edit_id}]
+    assert not any(message['event'] == 'edit_progress' for message in sent_messages)
+    assert 'pandas_processing_time' in mito.curr_step.execution_data
+
+
+def test_slow_edit_executes_in_background(slow_add_column):
+    mito, sent_messages = create_background_mito_wrapper()
+
+    edit_id = send_add_column(mito, 'B')
+    assert len(mito.steps_including_skipped) == 1
+    assert get_messages_with_id(sent_messages, edit_id) == []
+    assert sent_messages[0]['event'] == 'edit_progress'
+    assert sent_messages[0]['edit_id'] == edit_id
+
+    slow_add_column.set()
+    mito.mito_widget.edit_executor.wait_for_edit_in_flight()
+
+    assert get_messages_with_id(sent_messages, edit_id) == [{'event': 'response', 'id': edit_id}]
+    progress_messages = [message for message in sent_messages if message['event'] == 'edit_progress']
+    assert progress_messages[-1]['data']['num_steps_executed'] == 1
+    assert 'pandas_processing_time' in mito.curr_step.execution_data
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'B': [0, 0, 0]}))
+
+
+def test_cancel_edit_leaves_steps_unchanged(slow_add_column):
+    mito, sent_messages = create_background_mito_wrapper()
+    steps = mito.steps_including_skipped
+
+    edit_id = send_add_column(mito, 'B')
+    cancel_id = send_cancel_edit(mito, edit_id)
+
+    (edit_response, ) = get_messages_with_id(sent_messages, edit_id)
+    assert edit_response['event'] == 'edit_error'
+    assert edit_response['type'] == 'edit_cancelled_error'
+    assert get_messages_with_id(sent_messages, cancel_id) == [{'event': 'response', 'id': cancel_id, 'data': True}]
+
+    # The cancelled edit finishes executing, but does not change the steps
+    executor = mito.mito_widget.edit_executor
+    slow_add_column.set()
+    executor.thread.join()
+
+    assert executor.result is False
+    assert mito.steps_including_skipped is steps
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3]}))
+    assert len(get_messages_with_id(sent_messages, edit_id)) == 1
+
+    # And we can keep editing
+    executor.wait_seconds = None
+    send_add_column(mito, 'C')
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'C': [0, 0, 0]}))
+
+
+def test_edit_after_cancel_waits_for_the_cancelled_edit(slow_add_column, monkeypatch):
+    mito, sent_messages = create_background_mito_wrapper()
+    executor = mito.mito_widget.edit_executor
+
+    edit_id = send_add_column(mito, 'B')
+    send_cancel_edit(mito, edit_id)
+    cancelled_thread = executor.thread
+
+    # Record if the cancelled edit is still executing when another edit executes
+    cancelled_thread_alive = []
+    execute = AddColumnStepPerformer.execute
+    def recording_execute(prev_state, params):
+        if current_thread() is not cancelled_thread:
+            cancelled_thread_alive.append(cancelled_thread.is_alive())
+        return execute(prev_state, params)
+    monkeypatch.setattr(AddColumnStepPerformer, 'execute', recording_execute)
+
+    # We do not join the cancelled edit before sending the next one
+    timer = Timer(0.1, slow_add_column.set)
+    timer.start()
+    executor.wait_seconds = None
+    send_add_column(mito, 'C')
+    timer.join()
+
+    assert cancelled_thread_alive == [False]
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'C': [0, 0, 0]}))
+    assert len(mito.steps_including_skipped) == 2
+    assert mito.mito_widget.steps_manager.curr_step_idx == 1
+
+
+def test_cancel_edit_after_it_finished_does_nothing():
+    mito, sent_messages = create_background_mito_wrapper()
+    mito.mito_widget.edit_executor.wait_seconds = None
+
+    edit_id = send_add_column(mito, 'B')
+    cancel_id = send_cancel_edit(mito, edit_id)
+
+    assert get_messages_with_id(sent_messages, edit_id) == [{'event': 'response', 'id': edit_id}]
+    assert get_messages_with_id(sent_messages, cancel_id) == [{'event': 'response', 'id': cancel_id, 'data': False}]
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'B': [0, 0, 0]}))
+
+
+def test_edits_wait_for_the_edit_in_flight(slow_add_column):
+    mito, sent_messages = create_background_mito_wrapper()
+
+    send_add_column(mito, 'B')
+    slow_add_column.set()
+    send_add_column(mito, 'C')
+    mito.mito_widget.edit_executor.wait_for_edit_in_flight()
+
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'B': [0, 0, 0], 'C': [0, 0, 0]}))
+
+
+def test_cancel_edit_sent_after_update_event_is_handled_right_away(slow_add_column):
+    mito, sent_messages = create_background_mito_wrapper()
+    executor = mito.mito_widget.edit_executor
+    executor.wait_seconds = None
+    mito.rename_column(0, 'A', 'Z')
+    executor.wait_seconds = 0.01
+
+    edit_id = send_add_column(mito, 'B')
+    undo_id = get_new_id()
+    assert mito.mito_widget.receive_message(mito.mito_widget, {
+        'event': 'update_event',
+        'id': undo_id,
+        'type': 'undo',
+        'params': {}
+    })
+    cancel_id = send_cancel_edit(mito, edit_id)
+
+    # The cancel_edit is read while the edit is still executing, and the undo waits for it
+    assert get_messages_with_id(sent_messages, cancel_id) == [{'event': 'response', 'id': cancel_id, 'data': True}]
+    assert get_messages_with_id(sent_messages, undo_id) == []
+
+    slow_add_column.set()
+    executor.wait_for_edit_in_flight()
+
+    assert len(get_messages_with_id(sent_messages, undo_id)) == 1
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3]}))
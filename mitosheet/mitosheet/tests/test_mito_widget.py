@@ -12,7 +12,7 @@ from mitosheet.mito_widget import MitoWidget, sheet
 from mitosheet.tests.test_utils import create_mito_wrapper, create_mito_wrapper_dfs
 from mitosheet.transpiler.transpile import transpile
 from mitosheet.tests.decorators import pandas_post_1_only
-from mitosheet.utils import MAX_COLUMNS
+from mitosheet.utils import MAX_COLUMNS, get_new_id
 
 
 def test_example_creation_blank():
@@ -139,3 +139,53 @@ def test_sheet_json_holds_all_columns():
         assert sheet_data['columnIDsMap'][str(i)] is not None
         assert sheet_data['columnDtypeMap'][str(i)] is not None
         assert sheet_data['columnFormatTypeObjMap'][str(i)] is not None
+
+
+def get_add_column_edit_event(column_header):
+    return {
+        'type': 'add_column_edit',
+        'step_id': get_new_id(),
+        'params': {
+            'sheet_index': 0,
+            'column_header': column_header,
+            'column_header_index': -1
+        }
+    }
+
+
+def test_batch_edit_event_applies_all_edits_and_writes_analysis_once(monkeypatch):
+    mito = create_mito_wrapper([1, 2, 3])
+
+    written_analyses = []
+    monkeypatch.setattr('mitosheet.mito_widget.write_analysis', lambda steps_manager: written_analyses.append(len(steps_manager.steps_including_skipped)))
+
+    assert mito.mito_widget.receive_message(mito.mito_widget, {
+        'event': 'batch_edit_event',
+        'id': get_new_id(),
+        'type': 'batch_edit_event',
+        'params': {
+            'edit_events': [get_add_column_edit_event(column_header) for column_header in ['B', 'C', 'D']]
+        }
+    })
+
+    assert written_analyses == [4]
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'B': [0, 0, 0], 'C': [0, 0, 0], 'D': [0, 0, 0]}))
+    assert json.loads(mito.mito_widget.sheet_data_json)[0]['numColumns'] == 4
+    assert 'df1.insert(3, \'D\', 0)' in json.loads(mito.mito_widget.analysis_data_json)['code']
+
+
+def test_batch_edit_event_with_failing_edit_applies_no_edits():
+    mito = create_mito_wrapper([1, 2, 3])
+
+    assert not mito.mito_widget.receive_message(mito.mito_widget, {
+        'event': 'batch_edit_event',
+        'id': get_new_id(),
+        'type': 'batch_edit_event',
+        'params': {
+            # Adding a column that already exists fails
+            'edit_events': [get_add_column_edit_event(column_header) for column_header in ['B', 'C', 'B']]
+        }
+    })
+
+    assert len(mito.steps_including_skipped) == 1
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3]}))
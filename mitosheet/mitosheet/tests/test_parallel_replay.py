@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for replaying analyses on a process pool.
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+from mitosheet.parallel_replay import (dumps_with_out_of_band_buffers,
+                                       execute_step_list_from_index_in_parallel,
+                                       get_step_chains,
+                                       loads_with_out_of_band_buffers)
+from mitosheet.step import Step
+from mitosheet.step_performers.filter import FC_NUMBER_GREATER
+from mitosheet.steps_manager import StepsManager
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+from mitosheet.transpiler.transpile import transpile
+from mitosheet.utils import make_process_pool
+
+TEST_FILE_PATHS = ['test_parallel_replay_1.csv', 'test_parallel_replay_2.csv']
+
+
+def get_steps_data(mito):
+    return [
+        {'step_type': step.step_type, 'params': step.params}
+        for step in mito.mito_widget.steps_manager.steps_including_skipped[1:]
+    ]
+
+
+def assert_replays_are_identical(args, steps_data):
+    serial_steps_manager = StepsManager(args)
+    serial_steps_manager.execute_steps_data(steps_data)
+
+    parallel_steps_manager = StepsManager(args, num_replay_processes=2)
+    parallel_steps_manager.execute_steps_data(steps_data)
+
+    serial_steps = serial_steps_manager.steps_including_skipped
+    parallel_steps = parallel_steps_manager.steps_including_skipped
+    assert len(serial_steps) == len(parallel_steps)
+    for serial_step, parallel_step in zip(serial_steps, parallel_steps):
+        assert serial_step.params == parallel_step.params
+        assert serial_step.df_names == parallel_step.df_names
+        assert serial_step.df_sources == parallel_step.df_sources
+        assert len(serial_step.dfs) == len(parallel_step.dfs)
+        for serial_df, parallel_df in zip(serial_step.dfs, parallel_step.dfs):
+            assert serial_df.equals(parallel_df)
+            assert list(serial_df.columns) == list(parallel_df.columns)
+        for sheet_index in range(len(serial_step.dfs)):
+            assert dict(serial_step.column_ids.get_column_ids_map(sheet_index)) == dict(parallel_step.column_ids.get_column_ids_map(sheet_index))
+            assert dict(serial_step.column_spreadsheet_code[sheet_index]) == dict(parallel_step.column_spreadsheet_code[sheet_index])
+            assert dict(serial_step.column_filters[sheet_index]) == dict(parallel_step.column_filters[sheet_index])
+            assert dict(serial_step.column_format_types[sheet_index]) == dict(parallel_step.column_format_types[sheet_index])
+
+    assert transpile(serial_steps_manager) == transpile(parallel_steps_manager)
+
+
+def test_pickle_with_out_of_band_buffers():
+    df = pd.DataFrame({'A': list(range(1000)), 'B': ['a'] * 1000})
+    data, buffers = dumps_with_out_of_band_buffers([df, df])
+
+    loaded_df, loaded_df_again = loads_with_out_of_band_buffers(data, buffers)
+    assert loaded_df.equals(df)
+    assert loaded_df is loaded_df_again
+
+    # The loaded dataframes can be edited
+    loaded_df.loc[0, 'A'] = 10
+    assert loaded_df.loc[0, 'A'] == 10
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason="pickle protocol 5 requires Python 3.8+")
+def test_pickle_puts_dataframe_data_in_out_of_band_buffers():
+    df = pd.DataFrame({'A': list(range(1000)), 'B': ['a'] * 1000})
+    data, buffers = dumps_with_out_of_band_buffers(df)
+    assert len(buffers) > 0
+    assert loads_with_out_of_band_buffers(data, buffers).equals(df)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="a ProcessPoolExecutor can only fork on Python 3.6")
+def test_replay_process_pool_spawns_processes():
+    with make_process_pool(1) as executor:
+        assert executor._mp_context.get_start_method() == 'spawn'
+
+
+def test_split_into_chains_by_sheet():
+    df1 = pd.DataFrame({'A': [1, 2, 3]})
+    df2 = pd.DataFrame({'A': [4, 5, 6]})
+    mito = create_mito_wrapper_dfs(df1, df2)
+    mito.add_column(0, 'B')
+    mito.add_column(1, 'B')
+    mito.pivot_sheet(0, ['A'], [], {'A': ['sum']})
+    mito.set_formula('=A + 1', 1, 'B')
+    mito.filter(2, 'A', 'And', FC_NUMBER_GREATER, 1)
+    mito.merge_sheets('lookup', 0, 1, [('A', 'A')], ['A'], ['A'])
+
+    steps = mito.mito_widget.steps_manager.steps_including_skipped
+    chains, chain_sheet_indexes, num_sheets_before_and_after = get_step_chains(steps[:6], 0, set()) # type: ignore
+    assert chains == [[1, 3, 5], [2, 4]]
+    assert chain_sheet_indexes == [{0, 2}, {1}]
+    assert num_sheets_before_and_after[3] == (2, 3)
+
+    # The merge reads both sheets, so there is only one chain
+    chains, _, _ = get_step_chains(steps, 0, set()) # type: ignore
+    assert chains == [[1, 2, 3, 4, 5, 6]]
+    assert execute_step_list_from_index_in_parallel(steps, 0, set(), 2) is None
+
+
+def test_deleting_a_dataframe_cannot_be_split_into_chains():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1]}), pd.DataFrame({'A': [2]}))
+    mito.add_column(0, 'B')
+    mito.delete_dataframe(1)
+
+    assert get_step_chains(mito.mito_widget.steps_manager.steps_including_skipped, 0, set()) is None
+
+
+def test_parallel_replay_matches_serial_replay():
+    df1 = pd.DataFrame({'A': [1, 2, 3, 3], 'B': ['a', 'b', 'c', 'd']})
+    df2 = pd.DataFrame({'A': [4, 5, 6, 6], 'B': ['e', 'f', 'g', 'h']})
+    mito = create_mito_wrapper_dfs(df1, df2)
+    for sheet_index in [0, 1]:
+        mito.add_column(sheet_index, 'C')
+        mito.set_formula('=A * 2', sheet_index, 'C')
+        mito.filter(sheet_index, 'A', 'And', FC_NUMBER_GREATER, 1)
+    mito.pivot_sheet(0, ['A'], [], {'C': ['sum']})
+    mito.pivot_sheet(1, ['A'], [], {'C': ['sum']})
+    mito.rename_column(2, 'C sum', 'D')
+    mito.set_formula('=D + 1', 3, 'C sum')
+
+    steps_data = get_steps_data(mito)
+    assert_replays_are_identical([df1, df2], steps_data)
+
+    # Check the steps were in fact executed in parallel
+    steps = StepsManager([df1, df2]).steps_including_skipped + [
+        Step(step_data['step_type'], str(step_index), step_data['params']) for step_index, step_data in enumerate(steps_data)
+    ]
+    assert execute_step_list_from_index_in_parallel(steps, 0, set(), 2) is not None
+
+
+def test_parallel_replay_of_imports_matches_serial_replay():
+    pd.DataFrame({'A': [1, 2, 3], 'B': [1, 1, 2]}).to_csv(TEST_FILE_PATHS[0], index=False)
+    pd.DataFrame({'A': [4, 5, 6], 'B': [3, 3, 4]}).to_csv(TEST_FILE_PATHS[1], index=False)
+
+    mito = create_mito_wrapper_dfs()
+    mito.simple_import([TEST_FILE_PATHS[0]])
+    mito.simple_import([TEST_FILE_PATHS[1]])
+    mito.set_formula('=A + B', 0, 'B')
+    mito.pivot_sheet(1, ['B'], [], {'A': ['sum']})
+    mito.pivot_sheet(0, ['B'], [], {'A': ['count']})
+    mito.duplicate_dataframe(1)
+
+    steps_data = get_steps_data(mito)
+    assert_replays_are_identical([], steps_data)
+
+    # When imported sheets have the same name, the replay is still identical
+    mito = create_mito_wrapper_dfs()
+    mito.simple_import([TEST_FILE_PATHS[0]])
+    mito.simple_import([TEST_FILE_PATHS[0]])
+    mito.set_formula('=A + B', 1, 'B')
+    assert_replays_are_identical([], get_steps_data(mito))
+
+    for file_path in TEST_FILE_PATHS:
+        os.remove(file_path)
+
+
+def test_parallel_replay_with_graph_matches_serial_replay():
+    df1 = pd.DataFrame({'A': [1, 2, 3]})
+    df2 = pd.DataFrame({'A': [4, 5, 6]})
+    mito = create_mito_wrapper_dfs(df1, df2)
+    mito.add_column(0, 'B')
+    mito.generate_graph('graph_id', 'bar', 0, False, ['A'], [], 400, 400)
+    mito.add_column(1, 'B')
+
+    steps_data = get_steps_data(mito)
+    assert_replays_are_identical([df1, df2], steps_data)
+
+    steps_manager = StepsManager([df1, df2], num_replay_processes=2)
+    steps_manager.execute_steps_data(steps_data)
+    assert list(steps_manager.curr_step.graph_data_dict.keys()) == ['graph_id']
@@ -6,8 +6,15 @@
 from typing import Any
 import pytest
 
+import pandas as pd
+
 from mitosheet.errors import MitoError
-from mitosheet.parser import parse_formula, safe_replace, safe_contains
+from mitosheet.parser import (get_column_header_trie, get_parsed_formula,
+                              get_string_matches, parse_formula,
+                              parsed_formula_cache,
+                              parsed_formula_cache_stats, safe_contains,
+                              safe_replace, tokenize_formula)
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
 
 CONSTANT_TEST_CASES: Any = [
     (
@@ -355,6 +362,47 @@ def test_parse(formula, column_header, column_headers, python_code, functions, c
         )
 
 
+@pytest.mark.parametrize("formula,column_header,column_headers,python_code,functions,columns", PARSE_TESTS)
+def test_get_parsed_formula(formula, column_header, column_headers, python_code, functions, columns):
+    parsed_formula = get_parsed_formula(formula, column_header, column_headers)
+    assert (parsed_formula.python_code, parsed_formula.functions, parsed_formula.column_header_dependencies) == (python_code, functions, columns)
+    assert get_parsed_formula(formula, column_header, column_headers) is parsed_formula
+
+
+def test_get_parsed_formula_distinguishes_column_header_types():
+    assert get_parsed_formula('=A', 1, ['A', 1]).python_code == 'df[1] = df[\'A\']'
+    assert get_parsed_formula('=A', 1.0, ['A', 1.0]).python_code == 'df[1.0] = df[\'A\']'
+
+
+def test_get_parsed_formula_does_not_cache_errors():
+    num_cached_parsed_formulas = len(parsed_formula_cache)
+    for _ in range(2):
+        with pytest.raises(MitoError):
+            get_parsed_formula('=SUM(A', 'B', ['A', 'B'])
+    assert len(parsed_formula_cache) <= num_cached_parsed_formulas
+
+
+def test_set_formula_only_parses_formula_once():
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': [1, 2, 3]}))
+    mito.add_column(0, 'B')
+    hits, misses = parsed_formula_cache_stats['hits'], parsed_formula_cache_stats['misses']
+
+    mito.set_formula('=A + 12345', 0, 'B')
+
+    assert mito.get_value(0, 'B', 1) == 12346
+    # The formula is parsed when the step is saturated, and then is in the cache when 
+    # it is executed, and when it is added to the dependency graph of the sheet
+    assert parsed_formula_cache_stats['misses'] == misses + 1
+    assert parsed_formula_cache_stats['hits'] == hits + 3
+    # The execution data only counts the formulas parsed while the step is executed
+    assert mito.curr_step.execution_data['parsed_formula_cache_misses'] == 0
+    assert mito.curr_step.execution_data['parsed_formula_cache_hits'] == 3
+
+    mito.set_formula('=A + 54321', 0, 'B')
+    assert mito.curr_step.execution_data['parsed_formula_cache_misses'] == 0
+    assert mito.curr_step.execution_data['parsed_formula_cache_hits'] == 3
+
+
 PARSE_TEST_ERRORS = [
     ('=LOOKUP(100, A)', 'B', 'invalid_formula_error', 'LOOKUP'),
     ('=VLOOKUP(100, A)', 'B', 'invalid_formula_error', 'VLOOKUP'),
@@ -399,4 +447,36 @@ SAFE_CONTAINS_TESTS = [
 
 @pytest.mark.parametrize('formula,substring,contains', SAFE_CONTAINS_TESTS)
 def test_safe_contains(formula, substring, contains):
-    assert safe_contains(formula, substring, ['A', 'B']) == contains
\ No newline at end of file
+    assert safe_contains(formula, substring, ['A', 'B']) == contains
+
+
+TOKENIZE_TESTS = [
+    ('=A', [('operator', '='), ('word', 'A')]),
+    ('=SUM(A, 1)', [('operator', '='), ('function', 'SUM'), ('operator', '('), ('word', 'A'), ('operator', ','), ('operator', ' '), ('word', '1'), ('operator', ')')]),
+    ('="A" & \'B\'', [('operator', '='), ('string', '"A"'), ('operator', ' '), ('operator', '&'), ('operator', ' '), ('string', '\'B\'')]),
+    ('="A\\"B"', [('operator', '='), ('string', '"A\\"B"')]),
+    ('="A" + "B', [('operator', '='), ('string', '"A"'), ('operator', ' '), ('operator', '+'), ('operator', ' '), ('operator', '"'), ('word', 'B')]),
+    ('="A\nB"', [('operator', '='), ('operator', '"'), ('word', 'A'), ('operator', '\n'), ('word', 'B'), ('operator', '"')]),
+]
+
+@pytest.mark.parametrize('formula,tokens', TOKENIZE_TESTS)
+def test_tokenize_formula(formula, tokens):
+    assert [(token_type, formula[start:end]) for token_type, start, end in tokenize_formula(formula)] == tokens
+
+
+def test_get_string_matches_ordered_and_not_overlapping():
+    formula = '=CONCAT("A", \'B\', "C\'D", \'E"F\')'
+    assert [formula[start:end] for start, end in get_string_matches(formula)] == ['"A"', '\'B\'', '"C\'D"', '\'E"F\'']
+
+
+def test_column_header_trie_reused_for_same_column_headers():
+    assert get_column_header_trie(['A', 'B']) is get_column_header_trie(['A', 'B'])
+    assert get_column_header_trie(['A', 'B']) is not get_column_header_trie(['A', 'B', 'C'])
+    assert get_column_header_trie([1]) is not get_column_header_trie([1.0])
+
+
+def test_parse_formula_with_many_column_headers():
+    column_headers = [f'column_{i}' for i in range(10_000)]
+    python_code, _, dependencies = parse_formula('=column_1 + column_10 * SUM(column_9999, "column_2")', 'B', column_headers)
+    assert python_code == 'df[\'B\'] = df[\'column_1\'] + df[\'column_10\'] * SUM(df[\'column_9999\'], "column_2")'
+    assert dependencies == set(['column_1', 'column_10', 'column_9999'])
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for the PersistentDict
+"""
+import json
+import random
+
+import pytest
+
+from mitosheet.persistent_dict import PersistentDict, copy_persistent_dict
+from mitosheet.tests.test_utils import create_mito_wrapper
+from mitosheet.utils import NpEncoder
+
+
+def test_persistent_dict_acts_like_dict():
+    d = PersistentDict([('A', 1), ('B', 2)])
+    d['C'] = 3
+    d['A'] = 0
+    del d['B']
+
+    assert d == {'A': 0, 'C': 3}
+    assert list(d.keys()) == ['A', 'C']
+    assert len(d) == 2
+    assert 'B' not in d
+    assert d.get('B') is None
+    with pytest.raises(KeyError):
+        d['B']
+    with pytest.raises(KeyError):
+        del d['B']
+
+
+def test_persistent_dict_copy_is_not_changed_by_original():
+    d = PersistentDict([('A', 1), ('B', 2)])
+    d_copy = d.copy()
+    d['A'] = 0
+    d['C'] = 3
+    del d['B']
+
+    assert d == {'A': 0, 'C': 3}
+    assert d_copy == {'A': 1, 'B': 2}
+
+
+def test_persistent_dict_keeps_order_of_readded_keys():
+    d = PersistentDict([('A', 1), ('B', 2), ('C', 3)])
+    del d['A']
+    d['A'] = 4
+    assert list(d.items()) == [('B', 2), ('C', 3), ('A', 4)]
+
+
+def test_persistent_dict_json_dumps_with_np_encoder():
+    d = PersistentDict([('A', 1)])
+    d['B'] = {'type': 'default'}
+    assert json.dumps([d], cls=NpEncoder) == json.dumps([{'A': 1, 'B': {'type': 'default'}}])
+
+
+@pytest.mark.parametrize("make_copy", [
+    lambda d: d.copy(),
+    lambda d: copy_persistent_dict(d),
+])
+def test_persistent_dict_edit_in_place_does_not_change_copy(make_copy):
+    d = PersistentDict([('A', {'operator': 'And', 'filters': []})])
+    d['B'] = {'operator': 'And', 'filters': []}
+    d_copy = make_copy(d)
+
+    d_copy['A']['filters'].append('filter')
+    d['B']['filters'].append('filter')
+
+    assert d == {'A': {'operator': 'And', 'filters': []}, 'B': {'operator': 'And', 'filters': ['filter']}}
+    assert d_copy == {'A': {'operator': 'And', 'filters': ['filter']}, 'B': {'operator': 'And', 'filters': []}}
+
+
+def test_persistent_dict_edit_in_place_does_not_change_copied_state():
+    mito = create_mito_wrapper([1, 2, 3])
+    mito.filter(0, 'A', 'And', 'greater', 1)
+    prev_state = mito.mito_widget.steps_manager.curr_step.final_defined_state
+    column_id = prev_state.column_ids.get_column_id_by_header(0, 'A')
+
+    post_state = prev_state.copy()
+    post_state.column_filters[0][column_id]['filters'].append({'condition': 'less', 'value': 3})
+
+    assert len(prev_state.column_filters[0][column_id]['filters']) == 1
+    assert len(post_state.column_filters[0][column_id]['filters']) == 2
+
+
+def test_persistent_dict_copy_shares_base_dict():
+    d = copy_persistent_dict({str(i): i for i in range(100)})
+    d['1'] = 100
+    d_copy = d.copy()
+    assert d_copy._base is d._base
+    assert d_copy.num_changes == 1
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_persistent_dict_matches_dict_with_random_operations(seed):
+    random.seed(seed)
+
+    # Each version is a copy of a random earlier version, which is then changed
+    versions = [(PersistentDict(), dict())]
+    for _ in range(200):
+        persistent_dict, real_dict = random.choice(versions)
+        persistent_dict, real_dict = persistent_dict.copy(), dict(real_dict)
+
+        for _ in range(random.randint(1, 5)):
+            key = random.randint(0, 20)
+            if random.random() < 0.3 and key in real_dict:
+                del persistent_dict[key]
+                del real_dict[key]
+            else:
+                persistent_dict[key] = random.random()
+                real_dict[key] = persistent_dict[key]
+
+        versions.append((persistent_dict, real_dict))
+
+    for persistent_dict, real_dict in versions:
+        assert list(persistent_dict.items()) == list(real_dict.items())
+        assert len(persistent_dict) == len(real_dict)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for only updating the shared state variables that changed, and 
+coalescing the updates for bursts of update events.
+"""
+import json
+import time
+from threading import Thread
+from unittest.mock import patch
+
+import pandas as pd
+
+from mitosheet.errors import make_execution_error
+from mitosheet.steps_manager import StepsManager
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+from mitosheet.utils import get_new_id
+
+DF = pd.DataFrame({'A': [1, 2, 3]})
+
+
+def create_update_event(update_type, params=None):
+    return {
+        'event': 'update_event',
+        'id': get_new_id(),
+        'type': update_type,
+        'params': params if params is not None else {}
+    }
+
+
+def test_render_count_update_only_updates_analysis_data():
+    mito = create_mito_wrapper_dfs(DF)
+    mito.add_column(0, 'B')
+    sheet_data_json = mito.mito_widget.sheet_data_json
+    user_profile_json = mito.mito_widget.user_profile_json
+
+    with patch.object(StepsManager, 'sheet_data_json', new_callable=lambda: property(lambda self: 'changed')), \
+        patch.object(StepsManager, 'step_summary_list_json', new_callable=lambda: property(lambda self: 'changed')), \
+        patch.object(mito.mito_widget, 'get_user_profile_json', return_value='changed'):
+        mito.mito_widget.receive_message(mito.mito_widget, create_update_event('render_count_update'))
+
+    assert mito.mito_widget.sheet_data_json == sheet_data_json
+    assert mito.mito_widget.user_profile_json == user_profile_json
+    assert json.loads(mito.mito_widget.analysis_data_json)['renderCount'] == 1
+
+
+def test_undo_updates_sheet_data_and_step_summaries():
+    mito = create_mito_wrapper_dfs(DF)
+    mito.add_column(0, 'B')
+    mito.undo()
+
+    assert [sheet_data['columnIDsMap'] for sheet_data in json.loads(mito.mito_widget.sheet_data_json)] == [{'A': 'A'}]
+    assert len(json.loads(mito.mito_widget.step_summary_list_json)) == 1
+
+
+def test_failed_shared_state_update_is_retried():
+    mito = create_mito_wrapper_dfs(DF)
+    mito.add_column(0, 'B')
+
+    with patch.object(mito.mito_widget, 'get_user_profile_json', side_effect=Exception()):
+        mito.mito_widget.mark_shared_state_variables_dirty({'user_profile_json'})
+        try:
+            mito.mito_widget.update_shared_state_variables()
+        except:
+            pass
+    assert 'user_profile_json' in mito.mito_widget.dirty_shared_state_variables
+
+    mito.mito_widget.update_shared_state_variables()
+    assert mito.mito_widget.dirty_shared_state_variables == set()
+
+
+def test_burst_of_update_events_coalesced():
+    mito = create_mito_wrapper_dfs(DF)
+    sent_messages = []
+    mito.mito_widget.send = sent_messages.append
+    mito.mito_widget.shared_state_coalescing_seconds = 0.05
+
+    with patch.object(mito.mito_widget, 'update_shared_state_variables', wraps=mito.mito_widget.update_shared_state_variables) as mock_update:
+        events = [create_update_event('render_count_update') for _ in range(10)]
+        for event in events:
+            mito.mito_widget.receive_message(mito.mito_widget, event)
+
+        # The responses wait until the shared state is updated
+        assert sent_messages == []
+        time.sleep(0.5)
+
+        assert mock_update.call_count == 1
+        assert json.loads(mito.mito_widget.analysis_data_json)['renderCount'] == 10
+        assert [message['id'] for message in sent_messages] == [event['id'] for event in events]
+
+
+def test_edit_responds_to_coalesced_update_events_first():
+    mito = create_mito_wrapper_dfs(DF)
+    sent_messages = []
+    mito.mito_widget.send = sent_messages.append
+    mito.mito_widget.shared_state_coalescing_seconds = 10
+
+    update_event = create_update_event('render_count_update')
+    mito.mito_widget.receive_message(mito.mito_widget, update_event)
+    mito.add_column(0, 'B')
+
+    responses = [message for message in sent_messages if message['event'] == 'response']
+    assert responses[0]['id'] == update_event['id']
+    assert len(responses) == 2
+    assert mito.mito_widget.coalescing_timer is None
+
+
+def test_shared_state_lock_is_held_while_steps_change():
+    mito = create_mito_wrapper_dfs(DF)
+    mito.mito_widget.shared_state_coalescing_seconds = 10
+    steps_manager = mito.mito_widget.steps_manager
+
+    # Record if another thread, like the one updating the coalesced shared state, can acquire the lock
+    lock_acquired_by_other_thread = []
+    def acquire_lock_from_other_thread(*args, **kwargs):
+        def acquire():
+            acquired = mito.mito_widget.shared_state_lock.acquire(blocking=False)
+            if acquired:
+                mito.mito_widget.shared_state_lock.release()
+            lock_acquired_by_other_thread.append(acquired)
+        thread = Thread(target=acquire)
+        thread.start()
+        thread.join()
+
+    with patch.object(steps_manager, 'handle_update_event', side_effect=acquire_lock_from_other_thread):
+        mito.mito_widget.receive_message(mito.mito_widget, create_update_event('render_count_update'))
+    with patch.object(steps_manager, 'handle_edit_event', side_effect=acquire_lock_from_other_thread):
+        mito.add_column(0, 'B')
+
+    assert lock_acquired_by_other_thread == [False, False]
+    mito.mito_widget.send_coalesced_responses()
+
+
+def test_error_responses_are_sent_after_coalesced_responses():
+    mito = create_mito_wrapper_dfs(DF)
+    sent_messages = []
+    mito.mito_widget.send = sent_messages.append
+    mito.mito_widget.shared_state_coalescing_seconds = 10
+
+    update_event = create_update_event('render_count_update')
+    mito.mito_widget.receive_message(mito.mito_widget, update_event)
+    failing_update_event = create_update_event('render_count_update')
+    with patch.object(mito.mito_widget.steps_manager, 'handle_update_event', side_effect=make_execution_error()):
+        assert not mito.mito_widget.receive_message(mito.mito_widget, failing_update_event)
+
+    assert [message['id'] for message in sent_messages] == [update_event['id'], failing_update_event['id']]
+    assert [message['event'] for message in sent_messages] == ['response', 'edit_error']
+    assert mito.mito_widget.coalescing_timer is None
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for sending patches of the sheet data to the frontend.
+"""
+import json
+
+import pandas as pd
+
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+
+DF = pd.DataFrame({'A': [1, 2, 3], 'B': [1.5, 2.5, 3.5], 'C': ['a', 'b', 'c']})
+
+
+def apply_sheet_data_patch(sheet_data_array, sheet_data_patch):
+    """
+    Applies the patch in the same way that the frontend does.
+    """
+    assert len(sheet_data_array) == sheet_data_patch['numSheets']
+    sheet_data_array = list(sheet_data_array)
+    for sheet_patch in sheet_data_patch['sheetPatches']:
+        columns = {column_data['columnID']: column_data for column_data in sheet_data_array[sheet_patch['sheetIndex']]['data']}
+        for column_id in sheet_patch['removedColumnIDs']:
+            del columns[column_id]
+        for column_data in sheet_patch['addedColumns'] + sheet_patch['changedColumns']:
+            columns[column_data['columnID']] = column_data
+        
+        sheet_data_array[sheet_patch['sheetIndex']] = {
+            **sheet_patch['sheetData'],
+            'data': [columns[column_id] for column_id in sheet_patch['columnIDs']]
+        }
+    return sheet_data_array
+
+
+def create_patch_mito_wrapper(*dfs):
+    mito = create_mito_wrapper_dfs(*dfs)
+    sent_messages = []
+    mito.mito_widget.send = sent_messages.append
+    return mito, sent_messages
+
+
+def get_sheet_data_patches(sent_messages):
+    return [json.loads(message['data']) for message in sent_messages if message['event'] == 'sheet_data_patch']
+
+
+def check_edit_sends_patch(mito, sent_messages, edit):
+    """
+    Makes the edit, and checks that the patch it sent turns the sheet data
+    from before the edit into the sheet data after the edit. Returns the patch.
+    """
+    sheet_data_array = json.loads(mito.mito_widget.sheet_data_json)
+    sent_messages.clear()
+
+    edit()
+
+    (sheet_data_patch, ) = get_sheet_data_patches(sent_messages)
+    assert apply_sheet_data_patch(sheet_data_array, sheet_data_patch) == json.loads(mito.mito_widget.sheet_data_json)
+    return sheet_data_patch
+
+
+def test_set_formula_sends_changed_column():
+    mito, sent_messages = create_patch_mito_wrapper(DF)
+    column_id = mito.curr_step.column_ids.get_column_id_by_header(0, 'B')
+    
+    sheet_data_patch = check_edit_sends_patch(mito, sent_messages, lambda: mito.set_formula('=A * 10', 0, 'B'))
+
+    (sheet_patch, ) = sheet_data_patch['sheetPatches']
+    assert sheet_patch['addedColumns'] == []
+    assert sheet_patch['removedColumnIDs'] == []
+    assert [column_data['columnID'] for column_data in sheet_patch['changedColumns']] == [column_id]
+    assert sheet_patch['changedColumns'][0]['columnData'] == [10, 20, 30]
+    assert sheet_patch['sheetData']['columnSpreadsheetCodeMap'][column_id] == '=A * 10'
+
+
+def test_set_formula_reuses_data_of_other_columns():
+    mito, _ = create_patch_mito_wrapper(DF)
+    previous_sheet_data = mito.mito_widget.steps_manager.saved_sheet_data[0]
+
+    mito.set_formula('=A * 10', 0, 'B')
+
+    sheet_data = mito.mito_widget.steps_manager.saved_sheet_data[0]
+    assert sheet_data['data'][0]['columnData'] is previous_sheet_data['data'][0]['columnData']
+    assert sheet_data['data'][1]['columnData'] is not previous_sheet_data['data'][1]['columnData']
+    assert sheet_data['data'][2]['columnData'] is previous_sheet_data['data'][2]['columnData']
+
+
+def test_column_edits_send_patches():
+    mito, sent_messages = create_patch_mito_wrapper(DF)
+
+    sheet_data_patch = check_edit_sends_patch(mito, sent_messages, lambda: mito.add_column(0, 'D', 1))
+    (sheet_patch, ) = sheet_data_patch['sheetPatches']
+    assert [column_data['columnHeader'] for column_data in sheet_patch['addedColumns']] == ['D']
+    assert sheet_patch['changedColumns'] == []
+
+    sheet_data_patch = check_edit_sends_patch(mito, sent_messages, lambda: mito.rename_column(0, 'A', 'AA'))
+    (sheet_patch, ) = sheet_data_patch['sheetPatches']
+    assert [column_data['columnHeader'] for column_data in sheet_patch['changedColumns']] == ['AA']
+
+    sheet_data_patch = check_edit_sends_patch(mito, sent_messages, lambda: mito.reorder_column(0, 'C', 0))
+    (sheet_patch, ) = sheet_data_patch['sheetPatches']
+    assert sheet_patch['addedColumns'] == []
+    assert sheet_patch['changedColumns'] == []
+
+    sheet_data_patch = check_edit_sends_patch(mito, sent_messages, lambda: mito.delete_columns(0, ['B']))
+    (sheet_patch, ) = sheet_data_patch['sheetPatches']
+    assert len(sheet_patch['removedColumnIDs']) == 1
+
+    check_edit_sends_patch(mito, sent_messages, lambda: mito.set_cell_value(0, 'C', 1, 'new'))
+    check_edit_sends_patch(mito, sent_messages, lambda: mito.change_column_dtype(0, 'AA', 'float'))
+    check_edit_sends_patch(mito, sent_messages, lambda: mito.sort(0, 'AA', 'descending'))
+    check_edit_sends_patch(mito, sent_messages, lambda: mito.undo())
+
+
+def test_patch_only_contains_modified_sheets():
+    mito, sent_messages = create_patch_mito_wrapper(DF, DF.copy())
+
+    sheet_data_patch = check_edit_sends_patch(mito, sent_messages, lambda: mito.set_formula('=A * 10', 1, 'B'))
+
+    assert [sheet_patch['sheetIndex'] for sheet_patch in sheet_data_patch['sheetPatches']] == [1]
+
+
+def test_creating_dataframe_sends_all_sheet_data():
+    mito, sent_messages = create_patch_mito_wrapper(DF)
+    sent_messages.clear()
+
+    mito.duplicate_dataframe(0)
+
+    assert get_sheet_data_patches(sent_messages) == []
+    assert mito.mito_widget.steps_manager.sheet_data_patch is None
+    assert len(json.loads(mito.mito_widget.sheet_data_json)) == 2
+
+
+def test_sheet_data_json_is_not_sent_with_patch():
+    mito, _ = create_patch_mito_wrapper(DF)
+    mito_widget = mito.mito_widget
+
+    mito.set_formula('=A * 10', 0, 'B')
+    # The sheet data json is still updated, so the frontend gets it if it requests the state
+    assert json.loads(mito_widget.sheet_data_json)[0]['data'][1]['columnData'] == [10, 20, 30]
+    assert len(mito_widget.properties_sent_as_patches) == 0
+
+    mito_widget.properties_sent_as_patches.add('sheet_data_json')
+    assert not mito_widget._should_send_property('sheet_data_json', mito_widget.sheet_data_json)
+    assert mito_widget._should_send_property('analysis_data_json', mito_widget.analysis_data_json)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for getting windows of the sheet data.
+"""
+import json
+from threading import Event
+
+import numpy as np
+import pandas as pd
+
+import mitosheet.api.api as api_module
+from mitosheet.api.api import API, MAX_QUEUED_API_CALLS
+from mitosheet.api.get_sheet_window import (MAX_CACHED_SHEET_WINDOWS,
+                                            get_adjacent_sheet_window_params,
+                                            get_cached_sheet_window,
+                                            get_sheet_window,
+                                            sheet_window_cache)
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+from mitosheet.utils import SHEET_WINDOW_NUM_ROWS, df_to_json_dumpsable
+
+NUM_ROWS = 1_000
+DF = pd.DataFrame({
+    'A': list(range(NUM_ROWS)),
+    'B': np.arange(NUM_ROWS) / 3,
+    'C': pd.date_range('2020-01-01', periods=NUM_ROWS),
+    'D': [str(i) if i % 7 else None for i in range(NUM_ROWS)],
+})
+
+
+def get_window(mito, sheet_index, row_start, row_end, column_ids=None):
+    params = {'sheet_index': sheet_index, 'row_start': row_start, 'row_end': row_end}
+    if column_ids is not None:
+        params['column_ids'] = column_ids
+    return json.loads(get_sheet_window(params, mito.mito_widget.steps_manager))
+
+
+def get_full_sheet_data(mito, sheet_index):
+    state = mito.mito_widget.steps_manager.curr_step
+    return df_to_json_dumpsable(
+        state.dfs[sheet_index],
+        state.df_names[sheet_index],
+        state.df_sources[sheet_index],
+        state.column_spreadsheet_code[sheet_index],
+        state.column_filters[sheet_index],
+        state.column_ids.column_header_to_column_id[sheet_index],
+        state.column_format_types[sheet_index],
+        max_rows=None
+    )
+
+
+def test_sheet_data_has_only_the_first_window():
+    mito = create_mito_wrapper_dfs(DF)
+    sheet_data = json.loads(mito.mito_widget.sheet_data_json)[0]
+
+    assert sheet_data['numRows'] == NUM_ROWS
+    assert len(sheet_data['index']) == SHEET_WINDOW_NUM_ROWS
+    for column_data in sheet_data['data']:
+        assert len(column_data['columnData']) == SHEET_WINDOW_NUM_ROWS
+
+
+def test_sheet_window_matches_sheet_data():
+    mito = create_mito_wrapper_dfs(DF)
+    full_sheet_data = get_full_sheet_data(mito, 0)
+
+    for row_start, row_end in [(0, SHEET_WINDOW_NUM_ROWS), (SHEET_WINDOW_NUM_ROWS, 2 * SHEET_WINDOW_NUM_ROWS), (950, 1050), (2000, 2100)]:
+        window = get_window(mito, 0, row_start, row_end)
+        expected_row_end = min(row_end, NUM_ROWS)
+        expected_row_start = min(row_start, NUM_ROWS)
+        assert window['rowStart'] == expected_row_start
+        assert window['rowEnd'] == expected_row_end
+        assert window['numRows'] == NUM_ROWS
+        assert window['index'] == full_sheet_data['index'][expected_row_start:expected_row_end]
+        for column_data, full_column_data in zip(window['data'], full_sheet_data['data']):
+            assert column_data['columnID'] == full_column_data['columnID']
+            assert column_data['columnData'] == full_column_data['columnData'][expected_row_start:expected_row_end]
+
+
+def test_sheet_window_with_column_ids():
+    mito = create_mito_wrapper_dfs(DF)
+    column_ids = mito.mito_widget.steps_manager.curr_step.column_ids.get_column_ids(0)
+
+    window = get_window(mito, 0, 500, 510, column_ids=[column_ids[2], column_ids[0]])
+
+    assert [column_data['columnID'] for column_data in window['data']] == [column_ids[2], column_ids[0]]
+    assert window['data'][0]['columnData'][0] == '2021-05-15 00:00:00'
+    assert window['data'][1]['columnData'] == list(range(500, 510))
+
+
+def test_sheet_window_is_cached_per_step():
+    mito = create_mito_wrapper_dfs(DF)
+    steps_manager = mito.mito_widget.steps_manager
+    params = {'sheet_index': 0, 'row_start': 100, 'row_end': 200}
+
+    sheet_window = get_sheet_window(params, steps_manager)
+    assert get_sheet_window(params, steps_manager) is sheet_window
+
+    mito.set_formula('=A + 1', 0, 'A')
+    new_sheet_window = get_sheet_window(params, steps_manager)
+    assert new_sheet_window is not sheet_window
+    assert json.loads(new_sheet_window)['data'][0]['columnData'] == list(range(101, 201))
+
+    mito.undo()
+    assert json.loads(get_sheet_window(params, steps_manager))['data'][0]['columnData'] == list(range(100, 200))
+
+
+def test_only_windows_of_the_current_state_are_cached():
+    mito = create_mito_wrapper_dfs(DF)
+    other_mito = create_mito_wrapper_dfs(DF)
+    steps_manager = mito.mito_widget.steps_manager
+    get_window(mito, 0, 100, 200)
+    get_window(other_mito, 0, 100, 200)
+    state = steps_manager.curr_step.final_defined_state
+
+    mito.set_formula('=A + 1', 0, 'A')
+    get_window(mito, 0, 200, 300)
+
+    assert get_cached_sheet_window(steps_manager, state, 0, (100, 200, None)) is None
+    (_, sheet_windows) = sheet_window_cache[steps_manager]
+    assert list(sheet_windows[0].keys()) == [(200, 300, None)]
+    # The windows of other sheets are still cached
+    other_steps_manager = other_mito.mito_widget.steps_manager
+    assert get_cached_sheet_window(other_steps_manager, other_steps_manager.curr_step.final_defined_state, 0, (100, 200, None)) is not None
+
+
+
+def test_scrolling_one_sheet_does_not_evict_the_windows_of_another_sheet():
+    mito = create_mito_wrapper_dfs(DF, DF)
+    steps_manager = mito.mito_widget.steps_manager
+    get_window(mito, 1, 100, 200)
+    for row_start in range(0, (MAX_CACHED_SHEET_WINDOWS + 1) * 10, 10):
+        get_window(mito, 0, row_start, row_start + 10)
+    state = steps_manager.curr_step.final_defined_state
+
+    assert get_cached_sheet_window(steps_manager, state, 1, (100, 200, None)) is not None
+    assert get_cached_sheet_window(steps_manager, state, 0, (0, 10, None)) is None
+
+
+def test_adjacent_sheet_window_params():
+    params = {'sheet_index': 0, 'row_start': 100, 'row_end': 200, 'column_ids': ['A']}
+
+    assert get_adjacent_sheet_window_params(params, NUM_ROWS) == [
+        {'sheet_index': 0, 'row_start': 200, 'row_end': 300, 'column_ids': ['A']},
+        {'sheet_index': 0, 'row_start': 0, 'row_end': 100, 'column_ids': ['A']},
+    ]
+    assert get_adjacent_sheet_window_params({**params, 'row_start': 0, 'row_end': 100}, NUM_ROWS) == [
+        {'sheet_index': 0, 'row_start': 100, 'row_end': 200, 'column_ids': ['A']},
+    ]
+    assert get_adjacent_sheet_window_params({**params, 'row_start': 950, 'row_end': 1050}, NUM_ROWS) == [
+        {'sheet_index': 0, 'row_start': 850, 'row_end': 950, 'column_ids': ['A']},
+    ]
+
+
+def test_sheet_window_api_call_prefetches_adjacent_windows():
+    mito = create_mito_wrapper_dfs(DF)
+    api = mito.mito_widget.api
+    steps_manager = mito.mito_widget.steps_manager
+    state = steps_manager.curr_step.final_defined_state
+
+    api.process_new_api_call({
+        'event': 'api_call', 'id': '1', 'type': 'get_sheet_window', 'priority': True,
+        'params': {'sheet_index': 0, 'row_start': 100, 'row_end': 200}
+    })
+    api.prefetch_queue.join()
+
+    assert get_cached_sheet_window(steps_manager, state, 0, (0, 100, None)) is not None
+    assert get_cached_sheet_window(steps_manager, state, 0, (200, 300, None)) is not None
+    assert get_cached_sheet_window(steps_manager, state, 0, (300, 400, None)) is None
+
+
+def test_priority_sheet_window_api_calls_not_dropped():
+    mito = create_mito_wrapper_dfs(DF)
+    sent_messages = []
+    api = API(mito.mito_widget.steps_manager, lambda message, buffers=None: sent_messages.append(message))
+
+    for i in range(MAX_QUEUED_API_CALLS * 3):
+        api.process_new_api_call({
+            'event': 'api_call', 'id': str(i), 'type': 'get_sheet_window', 'priority': True,
+            'params': {'sheet_index': 0, 'row_start': i * 100, 'row_end': (i + 1) * 100}
+        })
+    api.priority_api_queue.join()
+
+    assert [message['id'] for message in sent_messages] == [str(i) for i in range(MAX_QUEUED_API_CALLS * 3)]
+    assert all(message['data'] is not None for message in sent_messages)
+
+
+def test_priority_sheet_window_api_call_does_not_block_main_thread(monkeypatch):
+    mito = create_mito_wrapper_dfs(DF)
+    sent_messages = []
+    api = API(mito.mito_widget.steps_manager, lambda message, buffers=None: sent_messages.append(message))
+
+    continue_execution = Event()
+    def slow_get_sheet_window(params, steps_manager):
+        continue_execution.wait(10)
+        return get_sheet_window(params, steps_manager)
+    monkeypatch.setattr(api_module, 'get_sheet_window', slow_get_sheet_window)
+
+    api.process_new_api_call({
+        'event': 'api_call', 'id': '1', 'type': 'get_sheet_window', 'priority': True,
+        'params': {'sheet_index': 0, 'row_start': 0, 'row_end': 100}
+    })
+    assert sent_messages == []
+
+    continue_execution.set()
+    api.priority_api_queue.join()
+    assert [message['id'] for message in sent_messages] == ['1']
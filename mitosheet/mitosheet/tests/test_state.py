@@ -6,9 +6,17 @@
 """
 Contains tests for the state class
 """
-from mitosheet.state import DATAFRAME_SOURCE_IMPORTED, DATAFRAME_SOURCE_PASSED, State
+import tracemalloc
+from typing import Any
+
+import numpy as np
 import pandas as pd
 
+from mitosheet.state import DATAFRAME_SOURCE_IMPORTED, DATAFRAME_SOURCE_PASSED, State
+from mitosheet.step_performers.filter import FC_NUMBER_EXACTLY
+from mitosheet.tests.decorators import pandas_pre_2_only
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+
 def test_state_can_add_df_to_end():
     df = pd.DataFrame({'A': [123]})
     state = State([df])
@@ -29,3 +37,114 @@ def test_state_can_add_df_to_middle():
     
     assert state.df_sources == [DATAFRAME_SOURCE_IMPORTED]
 
+
+
+@pandas_pre_2_only
+def test_state_copy_with_deep_column_ids_only_copies_those_columns():
+    df = pd.DataFrame({'A': [1.0, 2.0], 'B': [3.0, 4.0], 'C': [5.0, 6.0], 'D': ['a', 'b']})
+    state = State([df])
+
+    post_state = state.copy(deep_column_ids={0: ['B', 'D']})
+    new_df = post_state.dfs[0]
+    assert new_df.equals(df)
+    assert np.shares_memory(new_df['A'].values, df['A'].values)
+    assert np.shares_memory(new_df['C'].values, df['C'].values)
+    assert not np.shares_memory(new_df['B'].values, df['B'].values)
+    assert not np.shares_memory(new_df['D'].values, df['D'].values)
+
+    # Writing to the copied columns does not change the original dataframe
+    new_df['B'] = new_df['B'] + 1
+    new_df.at[0, 'D'] = 'c'
+    new_df.fillna({'B': 0}, inplace=True)
+    assert df.equals(pd.DataFrame({'A': [1.0, 2.0], 'B': [3.0, 4.0], 'C': [5.0, 6.0], 'D': ['a', 'b']}))
+    assert new_df['B'].tolist() == [4.0, 5.0]
+    assert new_df['D'].tolist() == ['c', 'b']
+
+
+def test_state_copy_with_no_deep_column_ids_shares_all_data():
+    df = pd.DataFrame({'A': [1.0, 2.0], 'B': [3.0, 4.0]})
+    state = State([df])
+
+    post_state = state.copy(deep_column_ids={0: []})
+    post_state.dfs[0].rename(columns={'A': 'C'}, inplace=True)
+    assert list(df.columns) == ['A', 'B']
+    assert list(post_state.dfs[0].columns) == ['C', 'B']
+    assert np.shares_memory(post_state.dfs[0]['C'].values, df['A'].values)
+
+
+def test_steps_with_deep_column_ids_do_not_change_previous_states():
+    df = pd.DataFrame({'A': [1, 2, 3], 'B': [4, 5, 6], 'C': [1.0, None, 3.0]})
+    mito = create_mito_wrapper_dfs(df)
+    mito.set_formula('=A + 1', 0, 'B')
+    mito.set_cell_value(0, 'A', 0, '10')
+    mito.fill_na(0, ['C'], {'type': 'value', 'value': 0})
+    mito.change_column_dtype(0, 'A', 'float')
+    mito.rename_column(0, 'A', 'D')
+
+    steps = mito.mito_widget.steps_manager.steps_including_skipped
+    assert steps[0].final_defined_state.dfs[0].equals(df)
+    assert steps[1].final_defined_state.dfs[0].equals(pd.DataFrame({'A': [1, 2, 3], 'B': [2, 3, 4], 'C': [1.0, None, 3.0]}))
+    assert steps[2].final_defined_state.dfs[0].equals(pd.DataFrame({'A': [10, 2, 3], 'B': [11, 3, 4], 'C': [1.0, None, 3.0]}))
+    assert steps[3].final_defined_state.dfs[0].equals(pd.DataFrame({'A': [10, 2, 3], 'B': [11, 3, 4], 'C': [1.0, 0.0, 3.0]}))
+    assert steps[4].final_defined_state.dfs[0].equals(pd.DataFrame({'A': [10.0, 2.0, 3.0], 'B': [11.0, 3.0, 4.0], 'C': [1.0, 0.0, 3.0]}))
+    assert steps[5].final_defined_state.dfs[0].equals(pd.DataFrame({'D': [10.0, 2.0, 3.0], 'B': [11.0, 3.0, 4.0], 'C': [1.0, 0.0, 3.0]}))
+
+
+def _get_bytes_allocated_by_copy(state: State, **kwargs: Any) -> int:
+    tracemalloc.start()
+    state.copy(**kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+@pandas_pre_2_only
+def test_state_copy_with_deep_column_ids_allocates_less_memory():
+    # A benchmark of the bytes allocated by the copy in a step that writes to one column 
+    # of a 100 column dataframe, before and after only copying the written column
+    df = pd.DataFrame(np.random.rand(10_000, 100), columns=[f'column_{i}' for i in range(100)])
+    state = State([df])
+
+    bytes_allocated_before = _get_bytes_allocated_by_copy(state, deep_sheet_indexes=[0])
+    bytes_allocated_after = _get_bytes_allocated_by_copy(state, deep_column_ids={0: ['column_50']})
+
+    assert bytes_allocated_before > df.memory_usage().sum()
+    assert bytes_allocated_after < df['column_50'].memory_usage() * 5
+
+
+def test_state_copy_with_deep_column_ids_deep_copies_on_unknown_pandas_versions(monkeypatch):
+    monkeypatch.setattr(pd, '__version__', '2.0.0')
+    df = pd.DataFrame({'A': [1.0, 2.0], 'B': [3.0, 4.0]})
+    state = State([df])
+
+    new_df = state.copy(deep_column_ids={0: ['B']}).dfs[0]
+    assert new_df.equals(df)
+    assert not np.shares_memory(new_df['A'].values, df['A'].values)
+    assert not np.shares_memory(new_df['B'].values, df['B'].values)
+
+
+def test_state_copy_shares_unchanged_metadata():
+    df = pd.DataFrame({'A': [1, 2, 3]})
+    graph_html = ''.join(['<div>', 'graph', '</div>'])
+    state = State([df], graph_data_dict={'graph_id': {'graphTabName': 'graph1', 'graphOutput': {'html': graph_html}}})
+
+    post_state = state.copy()
+    post_state.column_spreadsheet_code[0]['A'] = '=1'
+    post_state.graph_data_dict['graph_id'] = {**post_state.graph_data_dict['graph_id'], 'graphTabName': 'new'}
+
+    assert state.column_spreadsheet_code[0]['A'] == ''
+    assert state.graph_data_dict['graph_id']['graphTabName'] == 'graph1'
+    # The graph output is copied when it is read, so it can be edited in place, but its html is still shared
+    assert post_state.graph_data_dict['graph_id']['graphOutput'] is not state.graph_data_dict['graph_id']['graphOutput']
+    assert post_state.graph_data_dict['graph_id']['graphOutput']['html'] is graph_html
+    assert state.graph_data_dict['graph_id']['graphOutput']['html'] is graph_html
+
+
+def test_filter_does_not_change_previous_state_filters():
+    df = pd.DataFrame({'A': [1, 2, 3]})
+    mito = create_mito_wrapper_dfs(df)
+    mito.filter(0, 'A', 'And', FC_NUMBER_EXACTLY, 2)
+
+    steps = mito.mito_widget.steps_manager.steps_including_skipped
+    assert steps[0].column_filters[0]['A'] == {'operator': 'And', 'filters': []}
+    assert steps[1].column_filters[0]['A']['filters'] == [{'condition': FC_NUMBER_EXACTLY, 'value': 2}]
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for the StepResultCache
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from mitosheet import step_result_cache
+from mitosheet.step_performers.filter import FC_NUMBER_GREATER
+from mitosheet.step_result_cache import StepResultCache, read_df, write_df
+from mitosheet.steps_manager import StepsManager
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+
+TEST_FILE_PATH = 'test_step_result_cache.csv'
+
+
+def get_steps_data(mito):
+    return [
+        {'step_type': step.step_type, 'params': step.params}
+        for step in mito.mito_widget.steps_manager.steps_including_skipped[1:]
+    ]
+
+
+def replay_with_cache(args, steps_data, cache_folder, max_size_mb=10):
+    steps_manager = StepsManager(args)
+    steps_manager.step_result_cache = StepResultCache(max_size_mb, cache_folder=cache_folder)
+    steps_manager.execute_steps_data(steps_data)
+    return steps_manager
+
+
+def get_analysis(df):
+    mito = create_mito_wrapper_dfs(df)
+    mito.add_column(0, 'B')
+    mito.set_formula('=A * 2', 0, 'B')
+    mito.filter(0, 'A', 'And', FC_NUMBER_GREATER, 1)
+    mito.pivot_sheet(0, ['A'], [], {'B': ['sum']})
+    return get_steps_data(mito)
+
+
+@pytest.mark.parametrize("df", [
+    pd.DataFrame({'A': [1, 2, 3], 'B': ['a', 'b', 'c']}),
+    pd.DataFrame({'A': [1.5, None], 'B': pd.to_datetime(['2020-01-01', '2021-01-01'])}, index=['x', 'y']),
+    pd.DataFrame({0: [1, 2], ('A', 'B'): [True, False]}, index=[5, 3]),
+    pd.DataFrame({'A': []}),
+])
+def test_write_and_read_df(tmp_path, df):
+    path = os.path.join(tmp_path, 'df')
+    write_df(df, path)
+    read = read_df(path)
+
+    assert read.equals(df)
+    assert read.columns.equals(df.columns)
+    assert read.index.equals(df.index)
+
+    # The dataframe that is read can be edited, without changing the file
+    if len(read) > 0:
+        read.iloc[0, 0] = 100
+        assert read_df(path).iloc[0, 0] != 100
+
+
+def test_write_and_read_df_without_out_of_band_buffers(tmp_path, monkeypatch):
+    monkeypatch.setattr(step_result_cache, 'pyarrow', None)
+    monkeypatch.setattr(step_result_cache, 'PICKLE_OUT_OF_BAND_BUFFERS_SUPPORTED', False)
+    df = pd.DataFrame({'A': [1.5, None], 'B': pd.to_datetime(['2020-01-01', '2021-01-01'])}, index=['x', 'y'])
+
+    path = os.path.join(tmp_path, 'df')
+    write_df(df, path)
+    assert not os.path.exists(path + step_result_cache.PICKLE_BUFFERS_FILE_EXTENSION)
+
+    read = read_df(path)
+    assert read.equals(df)
+    read.iloc[0, 0] = 100
+    assert read_df(path).iloc[0, 0] != 100
+
+
+def test_replay_reads_steps_from_cache(tmp_path):
+    df = pd.DataFrame({'A': [1, 2, 3, 3]})
+    steps_data = get_analysis(df)
+
+    steps_manager = replay_with_cache([df], steps_data, str(tmp_path))
+    assert steps_manager.step_result_cache.num_hits == 0
+    assert steps_manager.step_result_cache.num_misses == 4
+
+    cached_steps_manager = replay_with_cache([df], steps_data, str(tmp_path))
+    assert cached_steps_manager.step_result_cache.num_hits == 4
+    assert cached_steps_manager.step_result_cache.num_misses == 0
+    assert cached_steps_manager.curr_step.execution_data['step_result_cache_hits'] == 4
+    assert cached_steps_manager.curr_step.execution_data['step_result_cache_misses'] == 0
+
+    for step, cached_step in zip(steps_manager.steps_including_skipped, cached_steps_manager.steps_including_skipped):
+        assert step.df_names == cached_step.df_names
+        for df, cached_df in zip(step.dfs, cached_step.dfs):
+            assert df.equals(cached_df)
+        for sheet_index in range(len(step.dfs)):
+            assert dict(step.column_ids.get_column_ids_map(sheet_index)) == dict(cached_step.column_ids.get_column_ids_map(sheet_index))
+            assert dict(step.column_spreadsheet_code[sheet_index]) == dict(cached_step.column_spreadsheet_code[sheet_index])
+            assert dict(step.column_filters[sheet_index]) == dict(cached_step.column_filters[sheet_index])
+
+
+def test_replay_on_different_data_does_not_read_from_cache(tmp_path):
+    df = pd.DataFrame({'A': [1, 2, 3, 3]})
+    steps_data = get_analysis(df)
+    replay_with_cache([df], steps_data, str(tmp_path))
+
+    other_df = pd.DataFrame({'A': [1, 2, 3, 4]})
+    steps_manager = replay_with_cache([other_df], steps_data, str(tmp_path))
+    assert steps_manager.step_result_cache.num_hits == 0
+    assert steps_manager.curr_step.dfs[1].equals(
+        replay_with_cache([other_df], steps_data, str(tmp_path)).curr_step.dfs[1]
+    )
+
+
+def test_replay_of_changed_file_does_not_read_from_cache(tmp_path):
+    pd.DataFrame({'A': [1, 2, 3], 'B': [1, 1, 1]}).to_csv(TEST_FILE_PATH, index=False)
+    mito = create_mito_wrapper_dfs()
+    mito.simple_import([TEST_FILE_PATH])
+    mito.add_column(0, 'C')
+    steps_data = get_steps_data(mito)
+
+    replay_with_cache([], steps_data, str(tmp_path))
+    steps_manager = replay_with_cache([], steps_data, str(tmp_path))
+    assert steps_manager.step_result_cache.num_hits == 2
+
+    pd.DataFrame({'A': [4, 5, 6, 7], 'B': [1, 1, 1, 1]}).to_csv(TEST_FILE_PATH, index=False)
+    os.utime(TEST_FILE_PATH, ns=(0, 0))
+    steps_manager = replay_with_cache([], steps_data, str(tmp_path))
+    assert steps_manager.step_result_cache.num_hits == 0
+    assert steps_manager.curr_step.dfs[0]['A'].tolist() == [4, 5, 6, 7]
+
+    os.remove(TEST_FILE_PATH)
+
+
+def test_cache_removes_least_recently_used_entries(tmp_path):
+    df = pd.DataFrame({'A': list(range(10_000))})
+    steps_data = get_analysis(df)
+    steps_manager = replay_with_cache([df], steps_data, str(tmp_path))
+    step_result_cache = steps_manager.step_result_cache
+
+    # Make the cache only fit the most recent entries
+    entry_sizes = list(step_result_cache.entry_sizes.values())
+    max_size_mb = (entry_sizes[-1] + entry_sizes[-2]) / 1_000_000
+    steps_manager = replay_with_cache([df], steps_data, str(tmp_path), max_size_mb=max_size_mb)
+    assert steps_manager.step_result_cache.num_hits == 4
+
+    steps_manager = replay_with_cache([pd.DataFrame({'A': [1]})], steps_data, str(tmp_path), max_size_mb=max_size_mb)
+    step_result_cache = steps_manager.step_result_cache
+    assert step_result_cache.size_bytes <= max_size_mb * 1_000_000
+    assert len(os.listdir(tmp_path)) == len(step_result_cache.entry_sizes)
+
+    # Some of the entries for the original dataframe were removed to make space
+    steps_manager = replay_with_cache([df], steps_data, str(tmp_path), max_size_mb=max_size_mb)
+    assert steps_manager.step_result_cache.num_hits < 4
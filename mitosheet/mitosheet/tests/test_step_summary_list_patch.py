@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for sending patches of the step summary list to the frontend.
+"""
+import json
+from unittest.mock import patch
+
+import pandas as pd
+
+from mitosheet.step_performers.column_steps.add_column import AddColumnStepPerformer
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+from mitosheet.utils import get_new_id
+
+DF = pd.DataFrame({'A': [1, 2, 3], 'B': [1.5, 2.5, 3.5]})
+
+
+def apply_step_summary_list_patch(step_summary_list, step_summary_list_patch):
+    """
+    Applies the patch in the same way that the frontend does.
+    """
+    removed_step_ids = set(step_summary_list_patch['removedStepIDs'])
+    changed_step_summaries = {step_summary['step_id']: step_summary for step_summary in step_summary_list_patch['changedStepSummaries']}
+
+    step_summary_list = [
+        changed_step_summaries.get(step_summary['step_id'], step_summary)
+        for step_summary in step_summary_list
+        if step_summary['step_id'] not in removed_step_ids
+    ] + step_summary_list_patch['appendedStepSummaries']
+
+    assert len(step_summary_list) == step_summary_list_patch['numSteps']
+    return sorted(step_summary_list, key=lambda step_summary: step_summary['step_idx'])
+
+
+def create_patch_mito_wrapper(*dfs):
+    mito = create_mito_wrapper_dfs(*dfs)
+    sent_messages = []
+    mito.mito_widget.send = sent_messages.append
+    return mito, sent_messages
+
+
+def get_step_summary_list_patches(sent_messages):
+    return [json.loads(message['data']) for message in sent_messages if message['event'] == 'step_summary_list_patch']
+
+
+def check_sends_patch(mito, sent_messages, change):
+    """
+    Makes the change, and checks that the patch it sent turns the step summaries
+    from before the change into the step summaries after the change. Returns the patch.
+    """
+    step_summary_list = json.loads(mito.mito_widget.step_summary_list_json)
+    sent_messages.clear()
+
+    change()
+
+    (step_summary_list_patch, ) = get_step_summary_list_patches(sent_messages)
+    assert apply_step_summary_list_patch(step_summary_list, step_summary_list_patch) == json.loads(mito.mito_widget.step_summary_list_json)
+    return step_summary_list_patch
+
+
+def test_step_summary_list_json_matches_steps():
+    mito = create_mito_wrapper_dfs(DF)
+    mito.add_column(0, 'C')
+    mito.set_formula('=A + 1', 0, 'C')
+
+    step_summary_list = json.loads(mito.mito_widget.step_summary_list_json)
+    assert [step_summary['step_type'] for step_summary in step_summary_list] == ['initialize', 'add_column', 'set_column_formula']
+    assert [step_summary['step_idx'] for step_summary in step_summary_list] == [0, 1, 2]
+    assert step_summary_list[0]['step_display_name'] == 'Created a mitosheet'
+    assert step_summary_list[1]['step_display_name'] == 'Added column'
+    assert 'stepSummaryList' not in json.loads(mito.mito_widget.analysis_data_json)
+
+
+def test_edit_sends_appended_step_summary():
+    mito, sent_messages = create_patch_mito_wrapper(DF)
+
+    step_summary_list_patch = check_sends_patch(mito, sent_messages, lambda: mito.add_column(0, 'C'))
+
+    assert [step_summary['step_type'] for step_summary in step_summary_list_patch['appendedStepSummaries']] == ['add_column']
+    assert step_summary_list_patch['changedStepSummaries'] == []
+    assert step_summary_list_patch['removedStepIDs'] == []
+
+
+def test_undo_sends_removed_step_id():
+    mito, sent_messages = create_patch_mito_wrapper(DF)
+    mito.add_column(0, 'C')
+    step_id = mito.curr_step.step_id
+
+    step_summary_list_patch = check_sends_patch(mito, sent_messages, mito.undo)
+
+    assert step_summary_list_patch['appendedStepSummaries'] == []
+    assert step_summary_list_patch['removedStepIDs'] == [step_id]
+
+
+def test_overwriting_step_with_same_step_id_sends_changed_step_summary():
+    mito, sent_messages = create_patch_mito_wrapper(DF)
+    step_id = get_new_id()
+    mito.pivot_sheet(0, ['A'], [], {'B': ['sum']}, step_id=step_id)
+    mito.add_column(0, 'C')
+
+    step_summary_list_patch = check_sends_patch(
+        mito, sent_messages, lambda: mito.pivot_sheet(0, ['A'], [], {'B': ['mean']}, step_id=step_id)
+    )
+
+    # The pivot is now the last step, so it's step_idx changed
+    (changed_step_summary, ) = step_summary_list_patch['changedStepSummaries']
+    assert changed_step_summary['step_id'] == step_id
+    assert changed_step_summary['step_idx'] == 3
+    assert step_summary_list_patch['appendedStepSummaries'] == []
+
+
+def test_update_events_that_do_not_change_steps_send_no_step_summaries():
+    mito, sent_messages = create_patch_mito_wrapper(DF)
+    mito.add_column(0, 'C')
+    sent_messages.clear()
+
+    mito.mito_widget.receive_message(mito.mito_widget, {
+        'event': 'update_event',
+        'id': get_new_id(),
+        'type': 'render_count_update',
+        'params': {}
+    })
+
+    assert get_step_summary_list_patches(sent_messages) == []
+
+
+def test_step_summaries_do_not_transpile_steps_again():
+    mito = create_mito_wrapper_dfs(DF)
+    for i in range(10):
+        mito.add_column(0, f'C{i}')
+
+    with patch.object(AddColumnStepPerformer, 'transpile', side_effect=AddColumnStepPerformer.transpile) as mock_transpile:
+        mito.mito_widget.steps_manager.step_summary_list_json
+        assert mock_transpile.call_count == 0
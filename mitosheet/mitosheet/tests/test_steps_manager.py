@@ -3,13 +3,20 @@
 
 # Copyright (c) Saga Inc.
 # Distributed under the terms of the GPL License.
+import random
+
+import numpy as np
 import pandas as pd
 import pytest
 
 from mitosheet.utils import get_new_id
 from mitosheet.errors import MitoError
-from mitosheet.steps_manager import StepsManager
-from mitosheet.tests.test_utils import create_mito_wrapper
+from mitosheet.mito_widget import sheet
+from mitosheet.step import Step
+from mitosheet.step_performers.filter import FC_NUMBER_EXACTLY
+from mitosheet.step_skip_index import StepSkipIndex
+from mitosheet.steps_manager import StepsManager, execute_step_list_from_index, get_step_indexes_to_skip, get_step_memory_usage
+from mitosheet.tests.test_utils import MitoWidgetTestWrapper, create_mito_wrapper, create_mito_wrapper_dfs
 from mitosheet.column_headers import get_column_header_id
 
 
@@ -97,3 +104,188 @@ def test_failed_overwrite_rolls_back_to_previous_state():
     assert mito.dfs[0].equals(pd.DataFrame(data={'A': [1, 2, 3], 'B': [0, 0, 0]}))
 
 
+
+
+def get_step_indexes_to_skip_quadratic(step_list):
+    """
+    The original implementation of get_step_indexes_to_skip, which checks
+    every step against every step before it. We use it to test that the
+    StepSkipIndex always gives the same result
+    """
+    step_indexes_to_skip = set()
+    for step_index, step in enumerate(step_list):
+        step_indexes_to_skip = step_indexes_to_skip.union(
+            step.step_indexes_to_skip(step_list[:step_index])
+        )
+    return step_indexes_to_skip
+
+
+def get_random_step(random_generator):
+    step_type = random_generator.choice(['filter_column', 'set_column_formula', 'add_column', 'pivot'])
+    return Step(
+        step_type, 
+        random_generator.choice(['id-1', 'id-2', 'id-3', get_new_id()]),
+        {
+            'sheet_index': random_generator.randint(0, 1),
+            'column_id': random_generator.choice(['A', 'B'])
+        }
+    )
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_step_skip_index_matches_quadratic_skipped_indexes(seed):
+    random_generator = random.Random(seed)
+    steps = [Step('initialize', 'initialize', {})]
+    step_skip_index = StepSkipIndex(steps)
+
+    for _ in range(100):
+        old_steps = steps
+        if random_generator.random() < 0.3 and len(steps) > 1:
+            steps = steps[:random_generator.randint(1, len(steps) - 1)]
+        else:
+            steps = steps + [get_random_step(random_generator) for _ in range(random_generator.randint(1, 3))]
+
+        shared_prefix_length, changed_skipped_indexes = step_skip_index.update_steps(steps)
+
+        assert shared_prefix_length == min(len(old_steps), len(steps))
+        assert step_skip_index.step_indexes_to_skip == get_step_indexes_to_skip_quadratic(steps)
+        assert get_step_indexes_to_skip(steps) == get_step_indexes_to_skip_quadratic(steps)
+
+        old_step_indexes_to_skip = get_step_indexes_to_skip_quadratic(old_steps)
+        assert changed_skipped_indexes == set(
+            step_index for step_index in range(shared_prefix_length)
+            if (step_index in old_step_indexes_to_skip) != step_skip_index.is_skipped(step_index)
+        )
+
+
+def test_step_skip_index_rolls_back_on_failed_edit():
+    mito = create_mito_wrapper([1, 2, 3])
+    mito.add_column(0, 'B')
+    mito.filter(0, 'A', 'And', FC_NUMBER_EXACTLY, 1)
+    mito.filter(0, 'A', 'And', FC_NUMBER_EXACTLY, 2)
+
+    steps_manager = mito.mito_widget.steps_manager
+    assert steps_manager.step_skip_index.step_indexes_to_skip == {2}
+
+    # An edit that errors should not change what is skipped
+    mito.add_column(1, 'C')
+    assert steps_manager.step_skip_index.steps == steps_manager.steps_including_skipped
+    assert steps_manager.step_skip_index.step_indexes_to_skip == {2}
+
+    mito.undo()
+    assert steps_manager.step_skip_index.steps == steps_manager.steps_including_skipped
+    assert steps_manager.step_skip_index.step_indexes_to_skip == set()
+    assert mito.get_value(0, 'A', 1) == 1
+
+
+def test_memory_budget_drops_and_rebuilds_states():
+    mito = MitoWidgetTestWrapper(sheet(pd.DataFrame({'A': [1, 2, 3]}), memory_budget_mb=0))
+    steps_manager = mito.mito_widget.steps_manager
+    steps_manager.num_recent_steps_to_retain = 2
+    steps_manager.state_checkpoint_interval = 4
+
+    for i in range(10):
+        mito.set_cell_value(0, 'A', 0, i)
+
+    # Only the initialize step, the checkpoints, and the most recent steps are kept
+    dropped_step_indexes = [
+        step_index for step_index, step in enumerate(steps_manager.steps_including_skipped) 
+        if step.final_defined_state.dfs_dropped
+    ]
+    assert dropped_step_indexes == [1, 2, 3, 5, 6, 7]
+
+    # Code is still generated for the steps with dropped states
+    assert len(mito.transpiled_code) == 10
+
+    mito.checkout_step_by_idx(3)
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [2, 2, 3]}))
+
+    mito.checkout_step_by_idx(-1)
+    for _ in range(6):
+        mito.undo()
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [3, 2, 3]}))
+
+
+def test_step_memory_usage_only_counts_copied_columns():
+    df = pd.DataFrame(np.random.rand(10_000, 100), columns=[f'column_{i}' for i in range(100)])
+    mito = create_mito_wrapper_dfs(df)
+    mito.set_cell_value(0, 'column_50', 0, '10')
+    mito.rename_column(0, 'column_0', 'renamed_column')
+
+    steps = mito.mito_widget.steps_manager.steps_including_skipped
+    assert get_step_memory_usage(steps, 0) == df.memory_usage(index=True).sum()
+    assert get_step_memory_usage(steps, 1) == df['column_50'].memory_usage(index=False)
+    assert get_step_memory_usage(steps, 2) == 0
+
+
+def test_no_memory_budget_keeps_all_states():
+    mito = create_mito_wrapper([1, 2, 3])
+    for i in range(10):
+        mito.set_cell_value(0, 'A', 0, i)
+
+    assert not any(
+        step.final_defined_state.dfs_dropped for step in mito.mito_widget.steps_manager.steps_including_skipped
+    )
+
+
+def test_replay_only_reexecutes_steps_on_changed_sheets():
+    mito = create_mito_wrapper([1, 2, 3], sheet_two_A_data=[4, 5, 6])
+    mito.filter(0, 'A', 'And', FC_NUMBER_EXACTLY, 1)
+    mito.add_column(1, 'B')
+    mito.set_formula('=A + 1', 1, 'B')
+    mito.merge_sheets('lookup', 0, 1, [('A', 'A')], ['A'], ['A', 'B'])
+    mito.set_formula('=A * 10', 1, 'B')
+
+    steps_manager = mito.mito_widget.steps_manager
+    old_steps = steps_manager.steps_including_skipped
+
+    # Overwriting the filter replays all the steps after the first filter
+    mito.filter(0, 'A', 'And', FC_NUMBER_EXACTLY, 4)
+    new_steps = steps_manager.steps_including_skipped
+
+    # The steps on the second sheet are not reexecuted, and so share their data
+    for step_index in [2, 3, 5]:
+        assert new_steps[step_index] is not old_steps[step_index]
+        assert new_steps[step_index].dfs[1] is old_steps[step_index].dfs[1]
+    
+    # But the merge reads the sheet that is no longer filtered, so it is reexecuted
+    assert new_steps[4].dfs[2] is not old_steps[4].dfs[2]
+    assert len(mito.dfs[0]) == 0
+    assert mito.dfs[1].equals(pd.DataFrame({'A': [4, 5, 6], 'B': [40, 50, 60]}))
+    assert mito.dfs[2].equals(pd.DataFrame({'A': [1, 2, 3], 'B': [None, None, None]}, dtype='float64').astype({'A': 'int64'}))
+
+    mito.undo()
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [1]}))
+    assert mito.dfs[1].equals(pd.DataFrame({'A': [4, 5, 6], 'B': [40, 50, 60]}))
+    assert mito.dfs[2].equals(pd.DataFrame({'A': [1], 'B': [None]}, dtype='float64').astype({'A': 'int64'}))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_replay_matches_replay_from_scratch(seed):
+    random_generator = random.Random(seed)
+    mito = create_mito_wrapper([1, 2, 3], sheet_two_A_data=[1, 2, 3])
+    mito.add_column(0, 'B')
+    mito.add_column(1, 'B')
+
+    for _ in range(15):
+        sheet_index = random_generator.randint(0, 1)
+        column_header = random_generator.choice(['A', 'B'])
+        edit = random_generator.choice(['filter', 'set_formula', 'set_cell_value', 'undo'])
+        if edit == 'filter':
+            mito.filter(sheet_index, column_header, 'And', FC_NUMBER_EXACTLY, random_generator.randint(0, 3))
+        elif edit == 'set_formula' and column_header == 'B':
+            mito.set_formula(f'=A + {random_generator.randint(0, 3)}', sheet_index, 'B')
+        elif edit == 'set_cell_value' and len(mito.dfs[sheet_index]) > 0:
+            mito.set_cell_value(sheet_index, 'A', mito.dfs[sheet_index].index[0], random_generator.randint(0, 3))
+        elif len(mito.steps_including_skipped) > 3:
+            # Don't undo the added columns
+            mito.undo()
+
+    steps = mito.mito_widget.steps_manager.steps_including_skipped
+    steps_from_scratch = execute_step_list_from_index(
+        [steps[0]] + [Step(step.step_type, step.step_id, step.params) for step in steps[1:]]
+    )
+    for step, step_from_scratch in zip(steps, steps_from_scratch):
+        for df, df_from_scratch in zip(step.final_defined_state.dfs, step_from_scratch.final_defined_state.dfs):
+            assert df.equals(df_from_scratch)
+
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Saga Inc.
+# Distributed under the terms of the GPL License.
+"""
+Contains tests for getting the unique value counts of a column.
+"""
+import json
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mitosheet.api.get_unique_value_counts import (VALUE_COUNTS_CHUNK_SIZE,
+                                                   get_unique_value_counts,
+                                                   get_value_counts)
+from mitosheet.tests.test_utils import create_mito_wrapper_dfs
+from mitosheet.utils import convert_df_to_parsed_json
+
+NUM_ROWS = 5_000_000
+
+
+@pytest.mark.parametrize("series", [
+    pd.Series(np.arange(VALUE_COUNTS_CHUNK_SIZE * 3 + 7) % 13),
+    pd.Series([1.5, np.nan, 2.5, None] * VALUE_COUNTS_CHUNK_SIZE),
+    pd.Series(['a', None, 1, np.nan, 'b', 'a'] * VALUE_COUNTS_CHUNK_SIZE),
+    pd.Series(pd.to_datetime(['2020-01-01', None, '2021-01-01']).repeat(VALUE_COUNTS_CHUNK_SIZE)),
+    pd.Series(np.arange(VALUE_COUNTS_CHUNK_SIZE * 5)),
+])
+def test_value_counts_of_large_series_match_pandas(series):
+    value_counts = get_value_counts(series)
+    expected_value_counts = series.value_counts(dropna=False)
+
+    # NOTE: we compare the string values, as NaN != NaN, and mixed types cannot be sorted
+    assert {str(value): count for value, count in value_counts.items()} == {str(value): count for value, count in expected_value_counts.items()}
+    assert list(value_counts) == list(expected_value_counts)
+
+
+def test_value_counts_of_large_series_keep_the_order_of_values_with_the_same_count():
+    series = pd.Series([f'value_{i}' for i in range(64)] * VALUE_COUNTS_CHUNK_SIZE)
+    value_counts = get_value_counts(series)
+    assert list(value_counts.index) == list(series.iloc[:VALUE_COUNTS_CHUNK_SIZE].value_counts(dropna=False).index)
+
+
+def test_unique_value_counts_percents_match_pandas():
+    df = pd.DataFrame({'A': [1, 2, 2, None, 3, 3, 3]})
+    mito = create_mito_wrapper_dfs(df)
+
+    unique_value_counts = json.loads(get_unique_value_counts(
+        {'sheet_index': 0, 'column_id': 'A', 'search_string': '', 'sort': 'Descending Occurence'},
+        mito.mito_widget.steps_manager
+    ))
+
+    percents = df['A'].value_counts(normalize=True, dropna=False)
+    assert [row[1] for row in unique_value_counts['uniqueValueRowDataArray']] == [str(percent) for percent in percents]
+    assert [row[2] for row in unique_value_counts['uniqueValueRowDataArray']] == [3, 2, 1, 1]
+
+
+@pytest.mark.parametrize("column", [
+    np.arange(NUM_ROWS) % 1_000,
+    (np.arange(NUM_ROWS) % 1_000) / 7,
+])
+def test_unique_value_counts_peak_memory_proportional_to_output(column):
+    mito = create_mito_wrapper_dfs(pd.DataFrame({'A': column}))
+    params = {'sheet_index': 0, 'column_id': 'A', 'search_string': '', 'sort': 'Descending Occurence'}
+
+    tracemalloc.start()
+    try:
+        unique_value_counts = get_unique_value_counts(params, mito.mito_widget.steps_manager)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(json.loads(unique_value_counts)['uniqueValueRowDataArray']) == 1_000
+    # Copying the column, or even a boolean mask of it, uses more than this
+    assert peak_memory < 100 * len(unique_value_counts)
+
+
+def test_convert_df_to_parsed_json_does_not_copy_dataframe():
+    df = pd.DataFrame({'A': np.arange(NUM_ROWS), 'B': np.arange(NUM_ROWS) / 3})
+
+    tracemalloc.start()
+    try:
+        parsed_json = convert_df_to_parsed_json(df)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(parsed_json['data']) == 1_500
+    assert peak_memory < df.memory_usage().sum() / 100
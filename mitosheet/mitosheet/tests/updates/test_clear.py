@@ -42,6 +42,21 @@ def test_clear_can_be_redone_with_single_redo():
 
 
 
+def test_clear_redo_reattaches_cleared_steps():
+    df1 = pd.DataFrame(data={'A': [1, 2, 3]})
+    mito = create_mito_wrapper_dfs(df1)
+
+    mito.add_column(0, 'B')
+    mito.add_column(0, 'C')
+    cleared_steps = mito.steps_including_skipped
+    mito.clear()
+    mito.redo()
+
+    assert mito.steps_including_skipped == cleared_steps
+    assert mito.steps_including_skipped[-1].post_state is cleared_steps[-1].post_state
+    assert set(mito.get_column(0, 'C', as_list=True)) == {0}
+
+
 def test_clear_then_undo_actually_redoes():
     df1 = pd.DataFrame(data={'A': [1, 2, 3]})
     mito = create_mito_wrapper_dfs(df1)
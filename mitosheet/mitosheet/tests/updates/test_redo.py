@@ -3,8 +3,11 @@
 
 # Copyright (c) Saga Inc.
 # Distributed under the terms of the GPL License.
+from copy import copy
+
 import pandas as pd
 
+from mitosheet.step_performers.filter import FC_NUMBER_GREATER
 from mitosheet.tests.test_utils import create_mito_wrapper
 
 
@@ -63,4 +66,61 @@ def test_redo_no_error_when_nothing_to_undo():
         'A': [1, 2, 3],
     }))
 
-    assert len(mito.mito_widget.steps_manager.undone_step_list_store) == 0
\ No newline at end of file
+    assert len(mito.mito_widget.steps_manager.undone_step_list_store) == 0
+
+def test_redo_reattaches_undone_steps_without_reexecuting_them():
+    mito = create_mito_wrapper([1, 2, 3])
+    mito.add_column(0, 'B')
+    mito.add_column(0, 'C')
+    steps_manager = mito.mito_widget.steps_manager
+    undone_steps = steps_manager.steps_including_skipped[1:]
+    post_states = [step.post_state for step in undone_steps]
+
+    mito.undo()
+    mito.undo()
+    mito.redo()
+    mito.redo()
+
+    assert steps_manager.steps_including_skipped[1:] == undone_steps
+    assert [step.post_state for step in steps_manager.steps_including_skipped[1:]] == post_states
+    assert steps_manager.curr_step_idx == 2
+    assert mito.dfs[0].equals(pd.DataFrame({
+        'A': [1, 2, 3],
+        'B': [0, 0, 0],
+        'C': [0, 0, 0]
+    }))
+
+def test_redo_reattaches_undone_filter_that_skips_a_filter():
+    mito = create_mito_wrapper([1, 2, 3])
+    mito.filter(0, 'A', 'And', FC_NUMBER_GREATER, 1)
+    mito.filter(0, 'A', 'And', FC_NUMBER_GREATER, 2)
+    steps_manager = mito.mito_widget.steps_manager
+    undone_step = steps_manager.steps_including_skipped[-1]
+
+    mito.undo()
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [2, 3]}, index=[1, 2]))
+    mito.redo()
+
+    assert steps_manager.steps_including_skipped[-1] is undone_step
+    assert steps_manager.step_skip_index.step_indexes_to_skip == {1}
+    assert mito.dfs[0].equals(pd.DataFrame({'A': [3]}, index=[2]))
+
+def test_redo_reexecutes_undone_steps_when_history_diverged():
+    mito = create_mito_wrapper([1, 2, 3])
+    mito.add_column(0, 'B')
+    mito.add_column(0, 'C')
+    steps_manager = mito.mito_widget.steps_manager
+    undone_step = steps_manager.steps_including_skipped[-1]
+    mito.undo()
+
+    # Reexecute all of the steps, so the undone step was executed on a different state
+    steps_manager.execute_and_update_steps(copy(steps_manager.steps_including_skipped), last_valid_index=0)
+    mito.redo()
+
+    assert steps_manager.steps_including_skipped[-1] is not undone_step
+    assert steps_manager.steps_including_skipped[-1].prev_state is steps_manager.steps_including_skipped[-2].post_state
+    assert mito.dfs[0].equals(pd.DataFrame({
+        'A': [1, 2, 3],
+        'B': [0, 0, 0],
+        'C': [0, 0, 0]
+    }))
@@ -10,12 +10,13 @@ and that it can handle the various undefined versions of user.json that exist.
 import os
 from copy import deepcopy
 import subprocess
+from threading import Thread
 from mitosheet.experiments.experiment_utils import get_new_experiment
 
 from mitosheet.utils import get_random_id
 from mitosheet._version import __version__
 from mitosheet.user.schemas import UJ_EXPERIMENT, UJ_MITOSHEET_PRO, UJ_MITOSHEET_TELEMETRY, USER_JSON_VERSION_1, USER_JSON_VERSION_2, USER_JSON_VERSION_3
-from mitosheet.user.db import USER_JSON_PATH, get_user_field
+from mitosheet.user.db import MITO_FOLDER, USER_JSON_PATH, get_user_field, get_user_json_object, set_user_field
 from mitosheet.user import initialize_user
 from mitosheet.tests.user.conftest import check_user_json, write_fake_user_json, today_str
 from mitosheet.user.schemas import (
@@ -299,4 +300,22 @@ def test_experiments_in_sync():
     import sys
     sys.path.insert(0, '../mitoinstaller')
     from mitoinstaller.experiments.experiment_utils import get_new_experiment as get_new_experiment_from_mitoinstaller
-    assert get_new_experiment_from_mitoinstaller()['experiment_id'] == get_new_experiment()['experiment_id']
\ No newline at end of file
+    assert get_new_experiment_from_mitoinstaller()['experiment_id'] == get_new_experiment()['experiment_id']
+def test_user_json_is_never_read_while_partially_written():
+    initialize_user()
+    user_json = get_user_json_object()
+
+    # Write user.json many times in another thread, while reading it in this one
+    def write_user_json():
+        for i in range(200):
+            set_user_field(UJ_USER_EMAIL, 'a' * (i % 50))
+    thread = Thread(target=write_user_json)
+    thread.start()
+    while thread.is_alive():
+        assert get_user_json_object() is not None
+    thread.join()
+
+    assert set(get_user_json_object().keys()) == set(user_json.keys())
+    assert os.listdir(MITO_FOLDER).count('user.json') == 1
+    assert not any(file_name.endswith('.json') and file_name != 'user.json' for file_name in os.listdir(MITO_FOLDER))
+    os.remove(USER_JSON_PATH)
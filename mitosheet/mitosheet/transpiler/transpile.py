@@ -42,8 +42,15 @@ def transpile(
         if len(preprocess_code) > 0:
             code.extend(preprocess_code)
 
-    # We only transpile up to the currently checked out step
-    all_code_chunks: List[CodeChunk] = get_code_chunks(steps_manager.steps_including_skipped[:steps_manager.curr_step_idx + 1], optimize=optimize)
+    # We only transpile up to the currently checked out step. If this is the final
+    # step, then we can use the skipped steps the steps manager already knows about
+    is_final_step_checked_out = steps_manager.curr_step_idx == len(steps_manager.steps_including_skipped) - 1
+    all_code_chunks: List[CodeChunk] = get_code_chunks(
+        steps_manager.steps_including_skipped[:steps_manager.curr_step_idx + 1], 
+        optimize=optimize,
+        step_indexes_to_skip=steps_manager.step_skip_index.step_indexes_to_skip if is_final_step_checked_out else None,
+        optimized_code_chunks_cache=steps_manager.optimized_code_chunks_cache
+    )
     
     for code_chunk in all_code_chunks:
         comment = '# ' + code_chunk.get_description_comment()
@@ -57,7 +64,7 @@ def transpile(
 
     # If we have a historical step checked out, then we add a comment letting
     # the user know this is the case
-    if steps_manager.curr_step_idx != len(steps_manager.steps_including_skipped) - 1:
+    if not is_final_step_checked_out:
         code.append(IN_PREVIOUS_STEP_COMMENT)
 
     return code
@@ -70,6 +70,8 @@ def execute_args_update(
         # nonsense), and thus this allows us to filter out Nones that are passed at the 
         # end of the arguments (not creating phantom tabs that cannot be clicked)
         steps_manager.curr_step.post_state.df_names = final_names[:len(steps_manager.curr_step.dfs)]
+        # The code of this step uses the df names, so we transpile it again
+        steps_manager.curr_step.clear_cached_code_chunks()
     
 
 ARGS_UPDATE = {
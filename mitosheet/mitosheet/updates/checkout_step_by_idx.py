@@ -26,7 +26,7 @@ def execute_checkout_step_by_idx_update(
     if step_idx == -1:
         step_idx = len(steps_manager.steps_including_skipped) - 1
 
-    steps_manager.curr_step_idx = step_idx
+    steps_manager.checkout_step_by_idx(step_idx)
 
 CHECKOUT_STEP_BY_IDX_UPDATE = {
     'event_type': CHECKOUT_STEP_BY_IDX_UPDATE_EVENT,
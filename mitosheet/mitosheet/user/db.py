@@ -9,6 +9,7 @@ Helpers for accessing the user.json file
 """
 import os
 import json
+import tempfile
 from typing import Any, Dict, Optional
 
 # Where all global .mito files are stored
@@ -40,10 +41,15 @@ def get_user_field(field: str) -> Optional[Any]:
 
 def set_user_json_object(user_json_object: Dict[str, Any]) -> None:
     """
-    Updates the value of a specific feild in user.json
+    Replaces the entire user json object. 
+    
+    Other processes (e.g. the processes that replay steps in parallel) may read 
+    user.json while it is written, so we write it to a temporary file first, 
+    and then replace user.json with it, so they never read a partial file.
     """
-    with open(USER_JSON_PATH, 'w+') as f:
+    with tempfile.NamedTemporaryFile('w', dir=MITO_FOLDER, suffix='.json', delete=False) as f:
         f.write(json.dumps(user_json_object))
+    os.replace(f.name, USER_JSON_PATH)
 
 def set_user_field(field: str, value: Any) -> None:
     """
@@ -51,6 +57,5 @@ def set_user_field(field: str, value: Any) -> None:
     """
     with open(USER_JSON_PATH, 'r') as user_file_old:
         old_user_json = json.load(user_file_old)
-        old_user_json[field] = value
-        with open(USER_JSON_PATH, 'w+') as f:
-            f.write(json.dumps(old_user_json))
+    old_user_json[field] = value
+    set_user_json_object(old_user_json)
@@ -6,22 +6,34 @@
 """
 Contains helpful utility functions
 """
+import datetime
+import hashlib
 import json
+import multiprocessing
 import re
+import sys
 import uuid
-from typing import Any, Dict, List, Optional, Set, Tuple
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple
 
 import numpy as np
 import pandas as pd
 
 from mitosheet.column_headers import ColumnIDMap, get_column_header_display
-from mitosheet.sheet_functions.types.utils import get_float_dt_td_columns
+from mitosheet.persistent_dict import PersistentDict
+from mitosheet.sheet_functions.types.utils import (is_datetime_dtype,
+                                                   is_float_dtype,
+                                                   is_timedelta_dtype)
 from mitosheet.types import ColumnHeader, ColumnID
 
-# We only send the first 1500 rows of a dataframe; note that this
-# must match this variable defined on the front-end
+# By default, we only convert the first 1500 rows of a dataframe to json
 MAX_ROWS = 1_500
 MAX_COLUMNS = 1_500
+# The number of rows in each window of the sheet data that the frontend requests 
+# as the user scrolls. The sheet data we send to the frontend has the first window;
+# note that this must match this variable defined on the front-end
+SHEET_WINDOW_NUM_ROWS = 100
 
 def get_first_unused_dataframe_name(existing_df_names: List[str], new_dataframe_name: str) -> str:
     """
@@ -91,8 +103,17 @@ def dfs_to_array_for_json(
         column_spreadsheet_code_array: List[Dict[ColumnID, str]],
         column_filters_array: List[Dict[ColumnID, Any]],
         column_ids: ColumnIDMap,
-        column_format_types: List[Dict[ColumnID, Dict[str, str]]]
+        column_format_types: List[Dict[ColumnID, Dict[str, str]]],
+        modified_column_ids: Optional[Dict[int, Set[ColumnID]]]=None
     ) -> List:
+    """
+    Returns the sheet data of each of the dfs, reusing the sheet data in the previous_array
+    for the sheets that were not modified. 
+    
+    If modified_column_ids contains a modified sheet, then only these columns of that sheet
+    are converted again, and the data of the other columns is reused.
+    """
+    modified_column_ids = modified_column_ids if modified_column_ids is not None else {}
 
     new_array = []
     for sheet_index, df in enumerate(dfs):
@@ -106,9 +127,12 @@ def dfs_to_array_for_json(
                     column_filters_array[sheet_index],
                     column_ids.column_header_to_column_id[sheet_index],
                     column_format_types[sheet_index],
-                    # We only send the first 1500 rows and 1500 columns
-                    max_rows=MAX_ROWS,
-                    max_columns=MAX_COLUMNS
+                    # We only send the first window of rows and 1500 columns, and the
+                    # frontend gets the other windows with get_sheet_window
+                    max_rows=SHEET_WINDOW_NUM_ROWS,
+                    max_columns=MAX_COLUMNS,
+                    previous_sheet_data=previous_array[sheet_index] if sheet_index < len(previous_array) else None,
+                    modified_column_ids=modified_column_ids.get(sheet_index)
                 ) 
             )
         else:
@@ -117,21 +141,91 @@ def dfs_to_array_for_json(
     return new_array
 
 
+def get_sheet_data_patch(
+        modified_sheet_indexes: Set[int],
+        previous_array: List[Dict[str, Any]],
+        new_array: List[Dict[str, Any]],
+    ) -> Optional[Dict[str, Any]]:
+    """
+    Returns a patch that turns the previous_array of sheet data into the new_array,
+    so that we only have to send the columns that were added or changed to the 
+    frontend, rather than all of the sheet data. 
+    
+    Returns None if the frontend should get all of the sheet data instead, which 
+    is the case when dataframes were created or deleted.
+
+    Should follow the format:
+    {
+        numSheets: number,
+        sheetPatches: {
+            sheetIndex: number,
+            sheetData: SheetData, without the data,
+            columnIDs: ColumnID[],
+            addedColumns: SheetData['data'],
+            changedColumns: SheetData['data'],
+            removedColumnIDs: ColumnID[]
+        }[]
+    }
+    """
+    if len(previous_array) == 0 or len(previous_array) != len(new_array):
+        return None
+
+    sheet_patches = []
+    for sheet_index in sorted(modified_sheet_indexes):
+        previous_sheet_data = previous_array[sheet_index]
+        sheet_data = new_array[sheet_index]
+
+        previous_columns = {column_data['columnID']: column_data for column_data in previous_sheet_data['data']}
+        column_ids = [column_data['columnID'] for column_data in sheet_data['data']]
+
+        added_columns = []
+        changed_columns = []
+        for column_data in sheet_data['data']:
+            previous_column_data = previous_columns.get(column_data['columnID'])
+            if previous_column_data is None:
+                added_columns.append(column_data)
+            # NOTE: the column data of columns that were not modified is reused, so this is quick
+            elif previous_column_data != column_data:
+                changed_columns.append(column_data)
+
+        new_column_ids = set(column_ids)
+        removed_column_ids = [column_id for column_id in previous_columns if column_id not in new_column_ids]
+
+        sheet_patches.append({
+            'sheetIndex': sheet_index,
+            'sheetData': {key: value for key, value in sheet_data.items() if key != 'data'},
+            'columnIDs': column_ids,
+            'addedColumns': added_columns,
+            'changedColumns': changed_columns,
+            'removedColumnIDs': removed_column_ids
+        })
+
+    return {
+        'numSheets': len(new_array),
+        'sheetPatches': sheet_patches
+    }
+
+
 def df_to_json_dumpsable(
         original_df: pd.DataFrame,
         df_name: str,
         df_source: str,
         column_spreadsheet_code: Dict[ColumnID, str],
         column_filters: Dict[ColumnID, Any],
-        column_headers_to_column_ids: Dict[ColumnHeader, ColumnID],
+        column_headers_to_column_ids: Mapping[ColumnHeader, ColumnID],
         column_format_types: Dict[ColumnID, Dict[ColumnID, str]],
         max_rows: Optional[int]=MAX_ROWS, # How many items you want to display. None when using this function to get unique value counts
-        max_columns: int=MAX_COLUMNS # How many columns you want to display. Unlike max_rows, this is always defined
+        max_columns: int=MAX_COLUMNS, # How many columns you want to display. Unlike max_rows, this is always defined
+        previous_sheet_data: Optional[Dict[str, Any]]=None,
+        modified_column_ids: Optional[Set[ColumnID]]=None
     ) -> Dict[str, Any]:
     """
     Returns a dataframe and other metadata represented in a way that can be turned into a 
     JSON object with json.dumps.
 
+    If the previous_sheet_data of this dataframe is passed along with the modified_column_ids
+    since then, the data of the columns that were not modified is reused from it.
+
     Should follow the format:
     {
         dfName: string;
@@ -156,7 +250,14 @@ def df_to_json_dumpsable(
 
     (num_rows, num_columns) = original_df.shape 
 
-    json_obj = convert_df_to_parsed_json(original_df, max_rows=max_rows, max_columns=max_columns)
+    head_df = original_df.head(n=max_rows) if max_rows is not None else original_df
+
+    previous_column_data: Dict[ColumnID, List[Any]] = {}
+    if previous_sheet_data is not None and modified_column_ids is not None and previous_sheet_data['numRows'] == num_rows:
+        previous_column_data = {
+            column_data['columnID']: column_data['columnData'] for column_data in previous_sheet_data['data']
+            if column_data['columnID'] not in modified_column_ids
+        }
 
     final_data = []
     column_dtype_map = {}
@@ -171,10 +272,13 @@ def df_to_json_dumpsable(
             'columnFormatTypeObj': column_format_types[column_id],
         }
         column_dtype_map[column_id] = str(original_df[column_header].dtype)
-        for row in json_obj['data']:
-            # If we're beyond the max columns, we might not have data, and we leave column data empty
-            # in this case and don't append anything
-            column_final_data['columnData'].append(row[column_index] if column_index < MAX_COLUMNS else None)
+        if column_index >= max_columns:
+            # If we're beyond the max columns, we don't have data, and so we fill in the column data with None
+            column_final_data['columnData'] = [None] * head_df.shape[0]
+        elif column_id in previous_column_data:
+            column_final_data['columnData'] = previous_column_data[column_id]
+        else:
+            column_final_data['columnData'] = get_column_json_data(head_df.iloc[:, column_index])
         
         final_data.append(column_final_data)     
     
@@ -193,11 +297,185 @@ def df_to_json_dumpsable(
         'columnSpreadsheetCodeMap': column_spreadsheet_code,
         'columnFiltersMap': column_filters,
         'columnDtypeMap': column_dtype_map,
-        'index': json_obj['index'],
+        'index': get_index_json_data(head_df.index),
         'columnFormatTypeObjMap': column_format_types
     }
 
 
+def df_window_to_json_dumpsable(
+        original_df: pd.DataFrame,
+        column_headers_to_column_ids: Mapping[ColumnHeader, ColumnID],
+        row_start: int,
+        row_end: int,
+        column_headers: List[ColumnHeader],
+    ) -> Dict[str, Any]:
+    """
+    Returns the rows from row_start up to row_end of the given columns of a dataframe,
+    represented in the same way as the data in df_to_json_dumpsable, so that the frontend
+    can fill in the rows of the sheet data that it does not have.
+
+    Should follow the format:
+    {
+        rowStart: number,
+        rowEnd: number,
+        numRows: number,
+        data: {
+            columnID: string;
+            columnData: (string | number)[];
+        }[];
+        index: (string | number)[];
+    }
+    """
+    num_rows = original_df.shape[0]
+    row_start = max(min(row_start, num_rows), 0)
+    row_end = max(min(row_end, num_rows), row_start)
+
+    column_indexes = [original_df.columns.get_loc(column_header) for column_header in column_headers]
+    window_df = original_df.iloc[row_start:row_end, column_indexes]
+
+    return {
+        'rowStart': row_start,
+        'rowEnd': row_end,
+        'numRows': num_rows,
+        'data': [
+            {
+                'columnID': column_headers_to_column_ids[column_header],
+                'columnData': get_column_json_data(window_df.iloc[:, column_index])
+            }
+            for column_index, column_header in enumerate(column_headers)
+        ],
+        'index': get_index_json_data(window_df.index)
+    }
+
+
+def df_window_to_binary(
+        original_df: pd.DataFrame,
+        column_headers_to_column_ids: Mapping[ColumnHeader, ColumnID],
+        row_start: int,
+        row_end: int,
+        column_headers: List[ColumnHeader],
+    ) -> Tuple[Dict[str, Any], bytes]:
+    """
+    Returns the same rows as df_window_to_json_dumpsable, but with the data of the
+    columns as little-endian arrays in a single buffer, rather than as json. Floats 
+    and dates are formatted for display on the frontend, rather than here.
+
+    Returns the buffer, along with a schema that follows the format:
+    {
+        rowStart: number,
+        rowEnd: number,
+        numRows: number,
+        data: ({
+            columnID: string;
+        } & BinaryColumn)[];
+        index: BinaryColumn;
+    }
+
+    Where a BinaryColumn is one of:
+    - {kind: 'int' | 'float' | 'bool' | 'datetime', dtype: 'int32' | 'float32' | 'float64' | 'uint8', byteOffset: number, length: number},
+      where datetimes are float64 seconds since the epoch, and NaT is NaN.
+    - {kind: 'string', byteOffset: number, length: number, offsetsByteOffset: number},
+      where the strings are encoded as utf-8, and the offsets of the strings are int32.
+    - {kind: 'json', values: (string | number | boolean)[]}, for any other column.
+    """
+    num_rows = original_df.shape[0]
+    row_start = max(min(row_start, num_rows), 0)
+    row_end = max(min(row_end, num_rows), row_start)
+
+    column_indexes = [original_df.columns.get_loc(column_header) for column_header in column_headers]
+    window_df = original_df.iloc[row_start:row_end, column_indexes]
+
+    buffer = bytearray()
+    def add_array(array: np.ndarray) -> int:
+        # We align each array to 8 bytes, so it can be read as a typed array
+        buffer.extend(b'\0' * (-len(buffer) % 8))
+        byte_offset = len(buffer)
+        buffer.extend(array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes())
+        return byte_offset
+
+    schema = {
+        'rowStart': row_start,
+        'rowEnd': row_end,
+        'numRows': num_rows,
+        'data': [
+            {
+                'columnID': column_headers_to_column_ids[column_header],
+                **get_binary_column(window_df.iloc[:, column_index], add_array)
+            }
+            for column_index, column_header in enumerate(column_headers)
+        ],
+        'index': get_binary_column(pd.Series(window_df.index), add_array) if window_df.index.dtype.kind in 'iu' 
+            else {'kind': 'json', 'values': get_index_json_data(window_df.index)}
+    }
+    return schema, bytes(buffer)
+
+
+# The range of the integers we send as int32. Other integers are sent as float64, 
+# which are converted to the same number on the frontend as when we send json 
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+
+def get_binary_column(series: pd.Series, add_array: Callable[[np.ndarray], int]) -> Dict[str, Any]:
+    """
+    Returns the schema of a column for df_window_to_binary, adding its data to the 
+    buffer with add_array.
+    """
+    dtype = series.dtype
+    length = len(series)
+
+    if isinstance(dtype, np.dtype):
+        if dtype.kind == 'b':
+            return {'kind': 'bool', 'dtype': 'uint8', 'byteOffset': add_array(series.to_numpy().astype(np.uint8)), 'length': length}
+
+        if dtype.kind in 'iu':
+            values = series.to_numpy()
+            if length == 0 or (values.min() >= INT32_MIN and values.max() <= INT32_MAX):
+                return {'kind': 'int', 'dtype': 'int32', 'byteOffset': add_array(values.astype(np.int32)), 'length': length}
+            return {'kind': 'int', 'dtype': 'float64', 'byteOffset': add_array(values.astype(np.float64)), 'length': length}
+
+        if dtype == np.float64 or dtype == np.float32:
+            return {'kind': 'float', 'dtype': dtype.name, 'byteOffset': add_array(series.to_numpy()), 'length': length}
+
+        if dtype.kind == 'M' and is_default_time_format():
+            datetimes = series.to_numpy()
+            seconds = datetimes.astype('datetime64[s]').astype(np.int64).astype(np.float64)
+            seconds[np.isnat(datetimes)] = np.nan
+            return {'kind': 'datetime', 'dtype': 'float64', 'byteOffset': add_array(seconds), 'length': length}
+    elif isinstance(dtype, pd.DatetimeTZDtype):
+        return get_binary_column(series.dt.tz_localize(None), add_array)
+
+    values = get_column_json_data(series)
+    if all(isinstance(value, str) for value in values):
+        try:
+            encoded_values = [value.encode('utf-8') for value in values]
+        except UnicodeEncodeError:
+            return {'kind': 'json', 'values': values}
+
+        offsets = np.zeros(length + 1, dtype=np.int32)
+        offsets[1:] = np.cumsum(np.array([len(encoded_value) for encoded_value in encoded_values], dtype=np.int64))
+        offsets_byte_offset = add_array(offsets)
+        return {
+            'kind': 'string', 
+            'byteOffset': add_array(np.frombuffer(b''.join(encoded_values), dtype=np.uint8)), # type: ignore
+            'length': length,
+            'offsetsByteOffset': offsets_byte_offset
+        }
+
+    return {'kind': 'json', 'values': values}
+
+
+def compress_json(json_string: str) -> bytes:
+    """
+    Returns the json string compressed in the zlib format, which the frontend 
+    can decompress with a DecompressionStream.
+    """
+    return zlib.compress(json_string.encode('utf-8'))
+
+
+def get_json_hash(json_string: str) -> str:
+    return hashlib.sha256(json_string.encode('utf-8')).hexdigest()
+
+
 def get_row_data_array(df: pd.DataFrame) -> List[Any]:
     """
     Returns just the data of a dataframe in the 2d array format of [row idx][col idx]
@@ -207,54 +485,146 @@ def get_row_data_array(df: pd.DataFrame) -> List[Any]:
 
 def convert_df_to_parsed_json(original_df: pd.DataFrame, max_rows: Optional[int]=MAX_ROWS, max_columns: int=MAX_COLUMNS) -> Dict[str, Any]:
     """
-    Returns a dataframe as a json object with the correct formatting
+    Returns a dataframe as a json object with the correct formatting, in the
+    format {'index': [...], 'data': [[...], ...]}, where data is a list of rows.
+
+    NOTE: we convert each column on its own, with vectorized operations for the
+    common dtypes. The values are exactly the ones that we got from converting the
+    dataframe with df.to_json(orient="split"), which is still used for any column 
+    or index that we cannot convert quickly.
     """
-    if max_rows is None:
-        df = original_df.copy(deep=True) 
-    else:
+    if max_rows is not None:
         # we only show the first max_rows rows!
-        df = original_df.head(n=max_rows).copy(deep=True)
+        original_df = original_df.head(n=max_rows)
 
     # we only show the first max_columns columns!
-    df = df.iloc[: , :max_columns]
+    df = original_df.iloc[: , :max_columns]
 
-    float_columns, date_columns, timedelta_columns = get_float_dt_td_columns(df)
-    # We figure out which of the columns contain dates, and we
-    # convert them to string columns (for formatting reasons).
-    # NOTE: we don't use date_format='iso' in df.to_json call as it appends seconds to the object, 
-    # see here: https://stackoverflow.com/questions/52730953/pandas-to-json-output-date-format-in-specific-form
-    for column_header in date_columns:
-        df[column_header] = df[column_header].dt.strftime('%Y-%m-%d %X')
+    columns_data = [get_column_json_data(df.iloc[:, column_index]) for column_index in range(df.shape[1])]
+    if len(columns_data) > 0:
+        data = [list(row) for row in zip(*columns_data)]
+    else:
+        data = [[] for _ in range(df.shape[0])]
+
+    return {
+        'index': get_index_json_data(df.index),
+        'data': data
+    }
 
-    # Third, we figure out which of the columns contain timedeltas, and 
-    # we format the timedeltas as strings to make them readable
-    for column_header in timedelta_columns:
-        df[column_header] = df[column_header].apply(lambda x: str(x))
 
-    # Then, we get all the float columns and actually make them 
-    # look like floating point values, by converting them to strings
-    for column_header in float_columns:
+def is_default_time_format() -> bool:
+    """
+    Returns True if %X formats times as %H:%M:%S, which it does unless 
+    the user changed the locale.
+    """
+    return datetime.time(13, 5, 9).strftime('%X') == '13:05:09'
+
+
+def datetimes_to_strings(datetimes: np.ndarray) -> List[Any]:
+    """
+    Formats an array of datetime64 as '%Y-%m-%d %H:%M:%S' strings, with None 
+    for any NaT values.
+    """
+    # NOTE: datetime64[ns] are all between 1677 and 2262, and so are 19 characters long
+    strings = np.datetime_as_string(datetimes, unit='s').astype('U19') # type: ignore
+    # Every formatted datetime has a T at the same position, which we replace in place
+    # by viewing each string as an array of characters
+    strings.view('U1').reshape(len(strings), 19)[:, 10] = ' '
+
+    data = strings.tolist()
+    for row_index in np.flatnonzero(np.isnat(datetimes)):
+        data[row_index] = None
+    return data
+
+
+def get_column_json_data(series: pd.Series) -> List[Any]:
+    """
+    Returns the values of a column that are sent to the frontend. Floats, dates and
+    timedeltas are formatted as strings, and missing values are 'NaN'.
+    """
+    dtype = series.dtype
+
+    if isinstance(dtype, np.dtype):
+        if dtype.kind == 'b' or (dtype.kind in 'iu' and dtype != np.uint64):
+            return series.to_numpy().tolist()
+
+        if dtype == np.float64 or dtype == np.float32:
+            values = series.to_numpy(dtype=np.float64)
+            data: List[Any] = list(map(str, values.tolist()))
+            for row_index in np.flatnonzero(np.isnan(values)):
+                data[row_index] = 'NaN'
+            return data
+
+        if dtype.kind == 'M' and is_default_time_format():
+            data = datetimes_to_strings(series.to_numpy())
+            return ['NaN' if value is None else value for value in data]
+
+        if dtype.kind == 'm':
+            return [str(value) for value in series.astype(object)]
+
+        if dtype == object:
+            values = series.to_numpy()
+            if pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty'):
+                data = values.tolist()
+                for row_index in np.flatnonzero(pd.isna(values)):
+                    # Other missing values, like pd.NA, might be converted differently
+                    if data[row_index] is not None and not isinstance(data[row_index], float):
+                        return get_column_json_data_with_to_json(series)
+                    data[row_index] = 'NaN'
+                return data
+
+    return get_column_json_data_with_to_json(series)
+
+
+def get_column_json_data_with_to_json(series: pd.Series) -> List[Any]:
+    """
+    Returns the values of a column that are sent to the frontend, by converting it
+    with to_json, which handles any dtype.
+    """
+    dtype = str(series.dtype)
+    # We figure out if the column contains dates, and we convert them to strings (for 
+    # formatting reasons).
+    # NOTE: we don't use date_format='iso' in to_json call as it appends seconds to the object, 
+    # see here: https://stackoverflow.com/questions/52730953/pandas-to-json-output-date-format-in-specific-form
+    if is_float_dtype(dtype):
         # Convert the value to a string if it is a number, but leave it alone if its a NaN 
         # as to preserve the formatting of NaN values. 
-        df[column_header] = df[column_header].apply(lambda x: x if np.isnan(x) else str(x))
+        series = series.apply(lambda x: x if np.isnan(x) else str(x))
+    elif is_datetime_dtype(dtype):
+        series = series.dt.strftime('%Y-%m-%d %X')
+    elif is_timedelta_dtype(dtype):
+        series = series.apply(lambda x: str(x))
+
+    # NOTE: we don't convert the series itself, as its name might not be convertable, and
+    # we don't convert the index, as we don't need it
+    json_obj = json.loads(series.to_frame(name=0).to_json(orient="split", index=False))
+    # Then, we find all the null values (which are infinities), and set them to 'NaN' for 
+    # display in the frontend.
+    return ['NaN' if row[0] is None else row[0] for row in json_obj['data']]
 
-    # Then, we check the index. If it is a datetime or a timedelta, we have to do
-    # the same conversions that we did above
-    # Then, if we have a datetime index, we update the index to be jsonified better
-    if isinstance(df.index, pd.DatetimeIndex):
-        df.index = df.index.strftime('%Y-%m-%d %X')
-    elif isinstance(df.index, pd.TimedeltaIndex):
-        df.index = df.index.to_series().apply(lambda x: str(x))
 
-    json_obj = json.loads(df.to_json(orient="split"))
-    # Then, we go through and find all the null values (which are infinities),
-    # and set them to 'NaN' for display in the frontend.
-    for d in json_obj['data']:
-        for idx, e in enumerate(d):
-            if e is None:
-                d[idx] = 'NaN'
+def get_index_json_data(index: pd.Index) -> List[Any]:
+    """
+    Returns the labels of an index that are sent to the frontend. Dates and timedeltas
+    are formatted as strings.
+    """
+    if isinstance(index, pd.RangeIndex) or (not isinstance(index, pd.MultiIndex) and index.dtype.kind in 'iu' and index.dtype != np.uint64):
+        return index.tolist()
+
+    if isinstance(index, pd.DatetimeIndex) and is_default_time_format():
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return datetimes_to_strings(index.to_numpy())
 
-    return json_obj
+    if not isinstance(index, pd.MultiIndex) and index.dtype == object and pd.api.types.infer_dtype(index, skipna=False) == 'string':
+        return index.tolist()
+
+    if isinstance(index, pd.DatetimeIndex):
+        index = pd.Index(index.strftime('%Y-%m-%d %X'))
+    elif isinstance(index, pd.TimedeltaIndex):
+        index = pd.Index(index.to_series().apply(lambda x: str(x)))
+
+    return json.loads(pd.DataFrame(index=index).to_json(orient="split"))['index']
 
 
 def get_random_id() -> str:
@@ -310,4 +680,18 @@ class NpEncoder(json.JSONEncoder):
             return obj.strftime('%Y-%m-%d %X')
         if isinstance(obj, pd.Timedelta):
             return str(obj)
-        return super(NpEncoder, self).default(obj)
\ No newline at end of file
+        if isinstance(obj, PersistentDict):
+            return dict(obj)
+        return super(NpEncoder, self).default(obj)
+
+
+def make_process_pool(num_processes: int) -> ProcessPoolExecutor:
+    """
+    Makes a pool of processes that are spawned rather than forked. As the kernel 
+    has other threads running, forking it could copy a lock that one of these threads
+    holds into the child process, where it is never released. On Python 3.6, a 
+    ProcessPoolExecutor can only fork, so the processes are forked there.
+    """
+    if sys.version_info >= (3, 7):
+        return ProcessPoolExecutor(max_workers=num_processes, mp_context=multiprocessing.get_context('spawn'))
+    return ProcessPoolExecutor(max_workers=num_processes)
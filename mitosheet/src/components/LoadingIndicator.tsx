@@ -4,7 +4,8 @@ import React, { useEffect, useState } from 'react';
 
 // import css
 import "../../css/loading-indicator.css";
-import { StepType, UpdateType } from '../types';
+import MitoAPI from '../jupyter/api';
+import { EditProgress, StepType, UpdateType } from '../types';
 import { classNames } from '../utils/classNames';
 import LoadingCircle from './icons/LoadingCircle';
 import NonLoadingCircle from './icons/NonLoadingCircle';
@@ -210,6 +211,13 @@ const getSlowLoadingMessage = (currentLoadingMessage: [number, string] | undefin
     return undefined;
 } 
 
+const getEditProgressMessage = (editProgress: EditProgress): string => {
+    if (editProgress.num_steps === 0) {
+        return `Executing for ${editProgress.elapsed_seconds} seconds`;
+    }
+    return `Executed ${editProgress.num_steps_executed} of ${editProgress.num_steps} steps`;
+}
+
 
 
 /*
@@ -218,8 +226,11 @@ const getSlowLoadingMessage = (currentLoadingMessage: [number, string] | undefin
 
     By default, does not displaying anything for the first .5 seconds it
     is rendered, so that only long running ops actually display anything.
+
+    Edits that execute in the background display their progress, and 
+    can be cancelled.
 */
-const LoadingIndicator = (props: {loading: [string, string | undefined, string][]}): JSX.Element => {
+const LoadingIndicator = (props: {loading: [string, string | undefined, string][], editProgress: Record<string, EditProgress>, mitoAPI: MitoAPI}): JSX.Element => {
     const [display, setDisplay] = useState(false);
 
     // We store the message at the top of the loading queue, so that we can 
@@ -280,6 +291,7 @@ const LoadingIndicator = (props: {loading: [string, string | undefined, string][
             <div className='loading-indicator-content'>
                 {messagesToDisplay.map((([messageType, message_id], index) => {
                     const slowLoadingMessage = getSlowLoadingMessage(currentLoadingMessage, message_id);
+                    const editProgress = props.editProgress[message_id];
 
                     return (messageType !== undefined && 
                         <div className={classNames('mb-5px', 'mt-5px', {'text-color-medium-gray-important': index !== 0})}>
@@ -294,11 +306,23 @@ const LoadingIndicator = (props: {loading: [string, string | undefined, string][
                                     <div className='text-body-1'>
                                         {getDisplayMessageForMessageType(messageType)}
                                     </div>
-                                    {slowLoadingMessage !== undefined &&
+                                    {editProgress === undefined && slowLoadingMessage !== undefined &&
                                         <div className='text-subtext-1'>
                                             {slowLoadingMessage}
                                         </div>
                                     }
+                                    {editProgress !== undefined &&
+                                        <div className='text-subtext-1'>
+                                            {getEditProgressMessage(editProgress)}
+                                            {' '}
+                                            <span 
+                                                className='loading-indicator-cancel text-underline'
+                                                onClick={() => {void props.mitoAPI.cancelEdit(message_id)}}
+                                            >
+                                                Cancel
+                                            </span>
+                                        </div>
+                                    }
                                 </div>
                                 
                                 <div className='loading-indicator-loader'>
@@ -1,6 +1,6 @@
 // Copyright (c) Mito
 
-import React, { Fragment, useCallback, useEffect, useRef, useState } from 'react';
+import React, { Fragment, useCallback, useEffect, useMemo, useRef, useState } from 'react';
 /*
     Import CSS that we use globally, list these in alphabetical order
     to make it easier to confirm we have imported all sitewide css.
@@ -23,6 +23,7 @@ import '../../css/sitewide/scroll.css';
 import '../../css/sitewide/text.css';
 import '../../css/sitewide/widths.css';
 import { useKeyboardShortcuts } from '../hooks/useKeyboardShortcuts';
+import { useSheetWindows } from '../hooks/useSheetWindows';
 import MitoAPI from '../jupyter/api';
 import { getArgs, writeAnalysisToReplayToMitosheetCall, writeGeneratedCodeToCell } from '../jupyter/jupyterUtils';
 import { AnalysisData, DataTypeInMito, DFSource, EditorState, GridState, SheetData, UIState, UserProfile } from '../types';
@@ -34,6 +35,7 @@ import CatchUpPopup from './CatchUpPopup';
 import ErrorBoundary from './elements/ErrorBoundary';
 import EndoGrid from './endo/EndoGrid';
 import { focusGrid } from './endo/focusUtils';
+import { calculateCurrentSheetView } from './endo/sheetViewUtils';
 import { getCellDataFromCellIndexes, getDefaultGridState } from './endo/utils';
 import Footer from './footer/Footer';
 import { selectPreviousGraphSheetTab } from './footer/SheetTab';
@@ -96,6 +98,7 @@ export const Mito = (props: MitoProps): JSX.Element => {
     // Set reasonable default values for the UI state
     const [uiState, setUIState] = useState<UIState>({
         loading: [],
+        editProgress: {},
         currOpenModal: props.userProfile.userEmail == '' && props.userProfile.telemetryEnabled // no signup if no logs
             ? {type: ModalEnum.SignUp} 
             : (props.userProfile.shouldUpgradeMitosheet 
@@ -433,6 +436,23 @@ export const Mito = (props: MitoProps): JSX.Element => {
     const dfSources = sheetDataArray.map(sheetData => sheetData.dfSource);
     const columnIDsMapArray = sheetDataArray.map(sheetData => sheetData.columnIDsMap);
 
+    // The sheet data only contains the first window of rows, so we get the windows of rows 
+    // in view from the backend, and use the sheet data with these rows wherever cell values
+    // or index labels are read
+    const currentSheetView = useMemo(() => {
+        return calculateCurrentSheetView(gridState)
+    }, [gridState])
+    const sheetDataWithRowsInView = useSheetWindows(
+        sheetDataArray[uiState.selectedSheetIndex],
+        uiState.selectedSheetIndex,
+        currentSheetView,
+        props.mitoAPI,
+        analysisData.binarySheetWindows === true
+    );
+    const sheetDataArrayWithRowsInView = sheetDataArray.map((sheetData, sheetIndex) => {
+        return sheetIndex === uiState.selectedSheetIndex && sheetDataWithRowsInView !== undefined ? sheetDataWithRowsInView : sheetData;
+    });
+
     const lastStepSummary = analysisData.stepSummaryList[analysisData.stepSummaryList.length - 1];
 
     // Get the column id of the currently selected column. We always default to the 
@@ -538,7 +558,7 @@ export const Mito = (props: MitoProps): JSX.Element => {
                         // TODO: figure out why we need this, if the other variables update?
                         key={'' + columnID + uiState.selectedSheetIndex + uiState.selectedColumnControlPanelTab} 
                         selectedSheetIndex={uiState.selectedSheetIndex}
-                        sheetData={sheetDataArray[uiState.selectedSheetIndex]}
+                        sheetData={sheetDataWithRowsInView}
                         columnIDsMapArray={columnIDsMapArray}
                         selection={gridState.selections[gridState.selections.length - 1]} 
                         gridState={gridState}
@@ -694,7 +714,7 @@ export const Mito = (props: MitoProps): JSX.Element => {
         across the codebase without replicating functionality. 
     */
     const actions = createActions(
-        sheetDataArray, 
+        sheetDataArrayWithRowsInView, 
         gridState, 
         dfSources, 
         closeOpenEditingPopups, 
@@ -804,6 +824,7 @@ export const Mito = (props: MitoProps): JSX.Element => {
                             setEditorState={setEditorState}
                             mitoContainerRef={mitoContainerRef}
                             closeOpenEditingPopups={closeOpenEditingPopups}
+                            sheetDataWithRowsInView={sheetDataWithRowsInView}
                         />
                     </div>
                     {uiState.currOpenTaskpane.type !== TaskpaneType.NONE && 
@@ -827,7 +848,7 @@ export const Mito = (props: MitoProps): JSX.Element => {
                     setEditorState={setEditorState}
                 />
                 {getCurrentModalComponent()}
-                <LoadingIndicator loading={uiState.loading}/>     
+                <LoadingIndicator loading={uiState.loading} editProgress={uiState.editProgress} mitoAPI={props.mitoAPI}/>     
                 {/* 
                     If the step index of the last step isn't the current step,
                     then we are out of date, and we tell the user this.
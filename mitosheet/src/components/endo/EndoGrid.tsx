@@ -23,8 +23,10 @@ export const DEFAULT_WIDTH = 123;
 export const DEFAULT_HEIGHT = 25;
 export const MIN_WIDTH = 50;
 
-// The maximum number of rows sent in the sheet data by the backend
-export const MAX_ROWS = 1500;
+// The maximum number of rows displayed in the grid. The backend only sends the first 
+// window of rows in the sheet data, and we get the other windows as the user scrolls. 
+// NOTE: browsers limit the height of an element, which limits the rows we can display
+export const MAX_ROWS = 500_000;
 
 
 export const KEYS_TO_IGNORE_IF_PRESSED_ALONE = [
@@ -87,6 +89,8 @@ function EndoGrid(props: {
     setEditorState: React.Dispatch<React.SetStateAction<EditorState | undefined>>
     mitoContainerRef: React.RefObject<HTMLDivElement>
     closeOpenEditingPopups: (taskpanesToKeepIfOpen?: TaskpaneType[]) => void;
+    // The sheet data with the windows of rows in view filled in, see useSheetWindows
+    sheetDataWithRowsInView: SheetData | undefined;
 }): JSX.Element {
 
     // The container for the entire EndoGrid
@@ -110,6 +114,9 @@ function EndoGrid(props: {
     } = props;
 
     const sheetData = sheetDataArray[sheetIndex];
+    // The sheet data only contains the first window of rows, so we read cell values and 
+    // index labels from the sheet data with the rows in view filled in
+    const sheetDataWithRowsInView = props.sheetDataWithRowsInView || sheetData;
 
     const totalSize: Dimension = {
         width: gridState.widthDataArray[gridState.sheetIndex]?.totalWidth || 0,
@@ -496,7 +503,7 @@ function EndoGrid(props: {
             return;
         }
 
-        const startingFormula = getStartingFormula(sheetData, rowIndex, columnIndex, 'set_column_formula');
+        const startingFormula = getStartingFormula(sheetDataWithRowsInView, rowIndex, columnIndex, 'set_column_formula');
 
         setEditorState({
             rowIndex: rowIndex,
@@ -555,7 +562,7 @@ function EndoGrid(props: {
                         return;
                     } else if (isSelectionsOnlyIndexHeaders(gridState.selections)) {
                         // Similarly, if the user has only index headers selected, we can delete them
-                        void props.mitoAPI.editDeleteRow(props.sheetIndex, getSelectedRowLabelsWithEntireSelectedRow(gridState.selections, sheetData));
+                        void props.mitoAPI.editDeleteRow(props.sheetIndex, getSelectedRowLabelsWithEntireSelectedRow(gridState.selections, sheetDataWithRowsInView));
                         return;
                     }
                     
@@ -565,7 +572,7 @@ function EndoGrid(props: {
                 setGridState((gridState) => {
                     const lastSelection = gridState.selections[gridState.selections.length - 1]
 
-                    const startingFormula = getStartingFormula(sheetData, lastSelection.startingRowIndex, lastSelection.startingColumnIndex, 'set_column_formula', e);
+                    const startingFormula = getStartingFormula(sheetDataWithRowsInView, lastSelection.startingRowIndex, lastSelection.startingColumnIndex, 'set_column_formula', e);
                     
                     setEditorState({
                         rowIndex: lastSelection.startingRowIndex,
@@ -619,13 +626,13 @@ function EndoGrid(props: {
         const containerDiv = containerRef.current; 
         containerDiv?.addEventListener('keydown', onKeyDown);
         return () => containerDiv?.removeEventListener('keydown', onKeyDown)
-    }, [editorState, setEditorState, sheetData, currentSheetView, mitoAPI, gridState.selections, sheetIndex, setGridState])
+    }, [editorState, setEditorState, sheetData, sheetDataWithRowsInView, currentSheetView, mitoAPI, gridState.selections, sheetIndex, setGridState])
 
 
     return (
         <>
             <FormulaBar
-                sheetData={sheetData}
+                sheetData={sheetDataWithRowsInView}
                 selection={gridState.selections[gridState.selections.length - 1]}
                 sheetIndex={props.sheetIndex}
                 editorState={editorState}
@@ -663,7 +670,7 @@ function EndoGrid(props: {
                             closeOpenEditingPopups={props.closeOpenEditingPopups}
                         />
                         <IndexHeaders
-                            sheetData={sheetData}
+                            sheetData={sheetDataWithRowsInView}
                             gridState={gridState}
                             mitoAPI={mitoAPI}
                             closeOpenEditingPopups={props.closeOpenEditingPopups}
@@ -710,7 +717,7 @@ function EndoGrid(props: {
                         }}
                     >
                         <GridData
-                            sheetData={sheetData}
+                            sheetData={sheetDataWithRowsInView}
                             gridState={gridState}
                             uiState={uiState}
                             editorState={editorState}
@@ -720,7 +727,7 @@ function EndoGrid(props: {
                 </div>
                 {sheetData !== undefined && editorState !== undefined && editorState.editorLocation === 'cell' && editorState.rowIndex > -1 &&
                     <FloatingCellEditor
-                        sheetData={sheetData}
+                        sheetData={sheetDataWithRowsInView}
                         sheetIndex={sheetIndex}
                         gridState={gridState}
                         editorState={editorState}
@@ -0,0 +1,123 @@
+import { useEffect, useMemo, useRef, useState } from "react";
+import MitoAPI from "../jupyter/api";
+import { ColumnID, SheetData, SheetView, SheetWindow } from "../types";
+
+// The number of rows in each window of the sheet data, which must match the backend
+export const SHEET_WINDOW_NUM_ROWS = 100;
+
+/*
+    The sheet data only contains the first window of rows in the dataframe. This hook
+    gets the windows of rows that are in the current sheet view from the backend, and
+    returns the sheet data with the rows in these windows filled in.
+
+    As the windows are only valid for the sheet data that they were retrieved for,
+    we drop them whenever the sheet data changes.
+
+    If binarySheetWindows is true, the windows are sent as binary buffers rather than
+    as JSON, which is smaller and faster to decode for large numeric windows.
+*/
+export const useSheetWindows = (
+    sheetData: SheetData | undefined,
+    sheetIndex: number,
+    currentSheetView: SheetView,
+    mitoAPI: MitoAPI,
+    binarySheetWindows?: boolean
+): SheetData | undefined => {
+
+    // The windows we have retrieved, by their starting row, along with the sheet data they are for
+    const [sheetWindows, setSheetWindows] = useState<{sheetData: SheetData | undefined, windows: Record<number, SheetWindow>}>({
+        sheetData: sheetData,
+        windows: {}
+    });
+
+    // The windows we have requested for the current sheet data, so we don't request them twice
+    const requestedRef = useRef<{sheetData: SheetData | undefined, rowStarts: Set<number>}>({
+        sheetData: sheetData,
+        rowStarts: new Set()
+    });
+    const sheetDataRef = useRef<SheetData | undefined>(sheetData);
+    sheetDataRef.current = sheetData;
+
+    useEffect(() => {
+        if (sheetData === undefined) {
+            return;
+        }
+
+        if (requestedRef.current.sheetData !== sheetData) {
+            requestedRef.current = {sheetData: sheetData, rowStarts: new Set()};
+        }
+        const requestedRowStarts = requestedRef.current.rowStarts;
+
+        const firstRowStart = Math.floor(currentSheetView.startingRowIndex / SHEET_WINDOW_NUM_ROWS) * SHEET_WINDOW_NUM_ROWS;
+        const lastRowIndex = Math.min(currentSheetView.startingRowIndex + currentSheetView.numRowsRendered, sheetData.numRows) - 1;
+
+        for (let rowStart = firstRowStart; rowStart <= lastRowIndex; rowStart += SHEET_WINDOW_NUM_ROWS) {
+            // The rows in the sheet data do not need to be requested
+            if (rowStart + SHEET_WINDOW_NUM_ROWS <= sheetData.index.length || requestedRowStarts.has(rowStart)) {
+                continue;
+            }
+            requestedRowStarts.add(rowStart);
+
+            const sheetWindowPromise = binarySheetWindows 
+                ? mitoAPI.getBinarySheetWindow(sheetIndex, rowStart, rowStart + SHEET_WINDOW_NUM_ROWS)
+                : mitoAPI.getSheetWindow(sheetIndex, rowStart, rowStart + SHEET_WINDOW_NUM_ROWS);
+
+            void sheetWindowPromise.then(sheetWindow => {
+                // If the sheet data changed while we were waiting, then this window is out of date
+                if (sheetDataRef.current !== sheetData) {
+                    return;
+                }
+                // If we did not get the window, we allow it to be requested again
+                if (sheetWindow === undefined) {
+                    requestedRowStarts.delete(rowStart);
+                    return;
+                }
+
+                setSheetWindows(prevSheetWindows => {
+                    const windows = prevSheetWindows.sheetData === sheetData ? prevSheetWindows.windows : {};
+                    return {
+                        sheetData: sheetData,
+                        windows: {...windows, [rowStart]: sheetWindow}
+                    }
+                })
+            })
+        }
+    }, [sheetData, sheetIndex, currentSheetView.startingRowIndex, currentSheetView.numRowsRendered, binarySheetWindows])
+
+    return useMemo(() => {
+        if (sheetData === undefined || sheetWindows.sheetData !== sheetData || Object.keys(sheetWindows.windows).length === 0) {
+            return sheetData;
+        }
+
+        const index = [...sheetData.index];
+        const data = sheetData.data.map(columnData => {
+            return {...columnData, columnData: [...columnData.columnData]}
+        });
+        const columnIndexes: Record<ColumnID, number> = {};
+        data.forEach((columnData, columnIndex) => {
+            columnIndexes[columnData.columnID] = columnIndex;
+        });
+
+        Object.values(sheetWindows.windows).forEach(sheetWindow => {
+            sheetWindow.index.forEach((indexLabel, windowRowIndex) => {
+                index[sheetWindow.rowStart + windowRowIndex] = indexLabel;
+            });
+            sheetWindow.data.forEach(windowColumnData => {
+                const columnIndex = columnIndexes[windowColumnData.columnID];
+                if (columnIndex === undefined) {
+                    return;
+                }
+                const columnData = data[columnIndex].columnData;
+                windowColumnData.columnData.forEach((value, windowRowIndex) => {
+                    columnData[sheetWindow.rowStart + windowRowIndex] = value;
+                });
+            });
+        });
+
+        return {
+            ...sheetData,
+            data: data,
+            index: index
+        }
+    }, [sheetData, sheetWindows])
+}
@@ -9,9 +9,10 @@ import { FileElement } from "../components/taskpanes/Import/ImportTaskpane";
 import { ExcelFileMetadata } from "../components/taskpanes/Import/XLSXImport";
 import { valuesArrayToRecord } from "../components/taskpanes/PivotTable/pivotUtils";
 import { SplitTextToColumnsParams } from "../components/taskpanes/SplitTextToColumns/SplitTextToColumnsTaskpane";
-import { BackendPivotParams, FrontendPivotParams } from "../types";
+import { BackendPivotParams, EditProgress, FrontendPivotParams, SheetWindow } from "../types";
 import { ColumnID, FeedbackID, FilterGroupType, FilterType, FormatTypeObj, GraphID, MitoError, GraphParams } from "../types";
 import { getDeduplicatedArray } from "../utils/arrays";
+import { readBinarySheetWindow } from "../utils/binarySheetWindow";
 
 
 /*
@@ -157,6 +158,21 @@ export default class MitoAPI {
         // Stop the loading from being updated if it hasn't already run
         clearTimeout(timeout);
 
+        // If this was an edit that executed in the background, we remove its progress
+        if (msg['event'] === 'edit_event' || msg['event'] === 'batch_edit_event') {
+            stateUpdaters?.setUIState((prevUIState) => {
+                if (prevUIState.editProgress[id] === undefined) {
+                    return prevUIState;
+                }
+                const newEditProgress = {...prevUIState.editProgress};
+                delete newEditProgress[id];
+                return {
+                    ...prevUIState,
+                    editProgress: newEditProgress
+                }
+            });
+        }
+
         // If loading has been updated, then we remove the loading with this value
         if (loadingUpdated) {
             stateUpdaters?.setUIState((prevUIState) => {
@@ -185,7 +201,43 @@ export default class MitoAPI {
         a real API in practice. If/when we do have a real API, we'll get rid of this function, 
         and allow the API to just make a call to a server, and wait on a response
     */
-    receiveResponse(response: Record<string, unknown>): void {
+    receiveResponse(response: Record<string, unknown>, buffers?: (ArrayBuffer | ArrayBufferView)[]): void {
+        // Progress events for edits executing in the background are displayed in the loading
+        // indicator, where the edit can be cancelled
+        if (response['event'] == 'edit_progress') {
+            const editID = response['edit_id'] as string;
+            const editProgress = response['data'] as EditProgress;
+            window.setMitoStateMap?.get(this.model_id)?.setUIState((prevUIState) => {
+                return {
+                    ...prevUIState,
+                    editProgress: {
+                        ...prevUIState.editProgress,
+                        [editID]: editProgress
+                    }
+                }
+            });
+            return;
+        }
+
+        // Patches of the sheet data and step summaries are not responses to any message, 
+        // so we do not store them
+        if (response['event'] == 'sheet_data_patch' || response['event'] == 'step_summary_list_patch' || response['event'] == 'compressed_sheet_data') {
+            return;
+        }
+
+        // If there is binary data sent along with the response, we return it along with the data
+        if (buffers !== undefined && buffers.length > 0) {
+            response = {
+                ...response,
+                data: {
+                    data: response['data'],
+                    buffers: buffers.map(buffer => {
+                        return ArrayBuffer.isView(buffer) ? new DataView(buffer.buffer, buffer.byteOffset, buffer.byteLength) : new DataView(buffer);
+                    })
+                }
+            }
+        }
+
         this.unconsumedResponses.push(response);
 
         // If the response is a "response", then we update the sheet and the code
@@ -370,6 +422,69 @@ export default class MitoAPI {
     }
 
 
+    /*
+        Gets the rows from rowStart up to rowEnd of the dataframe at sheetIndex, for 
+        the columns with columnIDs, or all columns if columnIDs is undefined
+    */
+    async getSheetWindow(sheetIndex: number, rowStart: number, rowEnd: number, columnIDs?: ColumnID[]): Promise<SheetWindow | undefined> {
+
+        const sheetWindowString = await this.send<string>({
+            'event': 'api_call',
+            'type': 'get_sheet_window',
+            // Windows have priority, so they are never dropped if there are many API calls
+            'priority': true,
+            'params': {
+                'sheet_index': sheetIndex,
+                'row_start': rowStart,
+                'row_end': rowEnd,
+                'column_ids': columnIDs
+            },
+        }, {})
+
+        if (sheetWindowString == undefined || sheetWindowString === '') {
+            return undefined;
+        }
+
+        try {
+            return JSON.parse(sheetWindowString);
+        } catch {
+            // We return nothing if we fail, and the window is requested again
+            return undefined;
+        }
+    }
+
+    /*
+        Gets the same rows as getSheetWindow, but the backend sends the data of the 
+        columns as binary data, which is smaller and faster for numeric data. This is
+        only used if binary_sheet_windows is passed to the mitosheet.sheet call.
+    */
+    async getBinarySheetWindow(sheetIndex: number, rowStart: number, rowEnd: number, columnIDs?: ColumnID[]): Promise<SheetWindow | undefined> {
+
+        const response = await this.send<{data: string, buffers: DataView[]}>({
+            'event': 'api_call',
+            'type': 'get_binary_sheet_window',
+            // Windows have priority, so they are never dropped if there are many API calls
+            'priority': true,
+            'params': {
+                'sheet_index': sheetIndex,
+                'row_start': rowStart,
+                'row_end': rowEnd,
+                'column_ids': columnIDs
+            },
+        }, {})
+
+        if (response == undefined || response.buffers === undefined || response.buffers.length === 0) {
+            return undefined;
+        }
+
+        try {
+            return readBinarySheetWindow(JSON.parse(response.data), response.buffers[0]);
+        } catch {
+            // We return nothing if we fail, and the window is requested again
+            return undefined;
+        }
+    }
+
     /*
         Returns a list of the key, values that is returned by .describing 
         this column
@@ -558,6 +673,46 @@ export default class MitoAPI {
         return result;
     }
 
+    /**
+     * Sends many edit events at once, which the backend applies with a single
+     * execution and a single update of the sheet. If any of the edit events
+     * fail, none of them are applied.
+     * 
+     * @param editEvents the type, params and step id of each of the edit events
+     */
+    async _batchEdit(
+        editEvents: {type: string, params: Record<string, unknown>, step_id: string}[],
+    ): Promise<MitoError | undefined> {
+        const result: MitoError | undefined = await this.send({
+            'event': 'batch_edit_event',
+            'type': 'batch_edit_event',
+            'params': {
+                'edit_events': editEvents
+            }
+        }, {});
+
+        return result;
+    }
+
+    /**
+     * Cancels an edit that is executing in the background. The edit
+     * gets an edit_cancelled_error as its response.
+     * 
+     * @param editID the id of the message that sent the edit
+     * @returns true if the edit was cancelled
+     */
+    async cancelEdit(
+        editID: string,
+    ): Promise<boolean | undefined> {
+        return await this.send<boolean>({
+            'event': 'cancel_edit',
+            'type': 'cancel_edit',
+            'params': {
+                'edit_id': editID
+            }
+        }, {});
+    }
+
     async editGraph(
         graphID: GraphID,
         graphParams: GraphParams,
@@ -17,6 +17,34 @@ import Mito from '../components/Mito';
 
 export class ExampleModel extends DOMWidgetModel {
 
+    // The sheet data array parsed from the sheet_data_json, with any sheet data patches 
+    // from the backend applied to it, and the sheet_data_json that it was parsed from
+    sheetDataArray: SheetData[] = [];
+    sheetDataArrayJSON: string | undefined = undefined;
+
+    // The hash of the sheet data array, if the backend sent it compressed, and a promise
+    // that resolves once all sheet data the backend sent is decompressed and applied 
+    sheetDataHash: string | undefined = undefined;
+    sheetDataUpdates: Promise<void> = Promise.resolve();
+
+    // The same for the step summary list, which is also patched by the backend
+    stepSummaryList: StepSummary[] = [];
+    stepSummaryListJSON: string | undefined = undefined;
+
+    // True if we requested the state of the widget, as we could not apply a patch
+    resyncingState = false;
+
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any, @typescript-eslint/explicit-module-boundary-types
+    initialize(attributes: any, options: any): void {
+        super.initialize(attributes, options);
+
+        this.on('msg:custom', this.handleSheetDataPatch, this);
+        this.on('msg:custom', this.handleCompressedSheetData, this);
+        this.on('msg:custom', this.handleStepSummaryListPatch, this);
+        this.on('change:sheet_data_json', this.handleResyncedStateChange, this);
+        this.on('change:step_summary_list_json', this.handleResyncedStateChange, this);
+    }
+
     // eslint-disable-next-line @typescript-eslint/explicit-module-boundary-types
     defaults() {
         return {
@@ -42,6 +70,135 @@ export class ExampleModel extends DOMWidgetModel {
     static view_name = 'ExampleView'; // Set to null if no view
     static view_module = MODULE_NAME; // Set to null if no view
     static view_module_version = MODULE_VERSION;
+
+    getSheetDataArray(): SheetData[] {
+        const unparsed = this.get('sheet_data_json');
+        if (unparsed !== this.sheetDataArrayJSON) {
+            this.sheetDataArray = JSON.parse(unparsed);
+            this.sheetDataArrayJSON = unparsed;
+            this.sheetDataHash = undefined;
+        }
+        return this.sheetDataArray;
+    }
+
+    getStepSummaryList(): StepSummary[] {
+        const unparsed = this.get('step_summary_list_json');
+        if (unparsed !== this.stepSummaryListJSON) {
+            this.stepSummaryList = JSON.parse(unparsed);
+            this.stepSummaryListJSON = unparsed;
+        }
+        return this.stepSummaryList;
+    }
+
+    requestState(): void {
+        this.resyncingState = true;
+        this.comm?.send({method: 'request_state'}, {});
+    }
+
+    /* 
+        When only some columns of the sheet data change, the backend sends a patch 
+        with these columns, rather than updating all of the sheet_data_json.
+    */
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any, @typescript-eslint/explicit-module-boundary-types
+    handleSheetDataPatch(message: any): void {
+        if (message['event'] !== 'sheet_data_patch') {
+            return;
+        }
+
+        // We apply the patch after any compressed sheet data sent before it
+        this.sheetDataUpdates = this.sheetDataUpdates.then(() => {
+            this.applySheetDataPatch(JSON.parse(message['data']), undefined);
+        });
+    }
+
+    applySheetDataPatch(sheetDataPatch: SheetDataPatch, sheetDataHash: string | undefined): void {
+        const sheetDataArray = applySheetDataPatch(this.getSheetDataArray(), sheetDataPatch);
+
+        if (sheetDataArray === undefined) {
+            // If we cannot apply the patch, we get the state of the widget, which contains
+            // all of the sheet data, from the backend
+            this.requestState();
+            return;
+        }
+
+        this.setSheetDataArray(sheetDataArray, sheetDataHash);
+    }
+
+    setSheetDataArray(sheetDataArray: SheetData[], sheetDataHash: string | undefined): void {
+        // We clear the sheet_data_json, so that it changes when the backend sends all 
+        // of the sheet data, even if it is the same as before this patch
+        this.set('sheet_data_json', '', {silent: true});
+        this.sheetDataArray = sheetDataArray;
+        this.sheetDataArrayJSON = '';
+        this.sheetDataHash = sheetDataHash;
+    }
+
+    /* 
+        If compress_sheet_data is passed to the mitosheet.sheet call, the backend sends
+        large sheet data, or large sheet data patches, compressed in a binary buffer.
+    */
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any, @typescript-eslint/explicit-module-boundary-types
+    handleCompressedSheetData(message: any, buffers?: (ArrayBuffer | ArrayBufferView)[]): void {
+        if (message['event'] !== 'compressed_sheet_data') {
+            return;
+        }
+
+        this.sheetDataUpdates = this.sheetDataUpdates.then(async () => {
+            // If we already have this sheet data, we don't need to decompress it
+            if (message['hash'] === this.sheetDataHash) {
+                return;
+            }
+
+            if (buffers === undefined || buffers.length === 0 || !canDecompressSheetData()) {
+                this.requestState();
+                return;
+            }
+
+            try {
+                const payload = JSON.parse(await decompressJSON(buffers[0]));
+                if (message['isPatch']) {
+                    this.applySheetDataPatch(payload, message['hash']);
+                } else {
+                    this.setSheetDataArray(payload, message['hash']);
+                }
+            } catch (e) {
+                console.error(e);
+                this.requestState();
+            }
+        });
+    }
+
+    /* 
+        When the steps change, the backend sends a patch with the step summaries that 
+        changed, rather than updating all of the step_summary_list_json.
+    */
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any, @typescript-eslint/explicit-module-boundary-types
+    handleStepSummaryListPatch(message: any): void {
+        if (message['event'] !== 'step_summary_list_patch') {
+            return;
+        }
+
+        const stepSummaryListPatch: StepSummaryListPatch = JSON.parse(message['data']);
+        const stepSummaryList = applyStepSummaryListPatch(this.getStepSummaryList(), stepSummaryListPatch);
+
+        if (stepSummaryList === undefined) {
+            this.requestState();
+            return;
+        }
+
+        // See handleSheetDataPatch
+        this.set('step_summary_list_json', '', {silent: true});
+        this.stepSummaryList = stepSummaryList;
+        this.stepSummaryListJSON = '';
+    }
+
+    handleResyncedStateChange(): void {
+        // All of the state is set before any change events, so we only trigger this once
+        if (this.resyncingState) {
+            this.resyncingState = false;
+            this.trigger('state_resynced');
+        }
+    }
 }
 
 // We save a Mito component in the global scope, so we
@@ -57,7 +214,10 @@ declare global {
 }
 
 import MitoAPI from './api';
-import { AnalysisData, MitoError, MitoStateUpdaters, SheetData, UserProfile } from '../types';
+import { AnalysisData, MitoError, MitoStateUpdaters, SheetData, SheetDataPatch, StepSummary, StepSummaryListPatch, UserProfile } from '../types';
+import { applySheetDataPatch } from '../utils/sheetDataPatch';
+import { canDecompressSheetData, decompressJSON } from '../utils/compressedSheetData';
+import { applyStepSummaryListPatch } from '../utils/stepSummaryListPatch';
 import { ModalEnum } from '../components/modals/modals';
 
 export class ExampleView extends DOMWidgetView {
@@ -111,6 +271,7 @@ export class ExampleView extends DOMWidgetView {
         )
 
         this.model.on('msg:custom', this.handleMessage, this);
+        this.model.on('state_resynced', this.updateMitoState, this);
     }
 
     /* 
@@ -118,7 +279,7 @@ export class ExampleView extends DOMWidgetView {
         with the new state, and is called by the MitoAPI when it receives a successful
         response from the backend! 
     */
-    updateMitoState(): void {
+    async updateMitoState(): Promise<void> {
         const model_id = this.model.model_id;
         const stateUpdaters = window.setMitoStateMap?.get(model_id);
 
@@ -126,6 +287,9 @@ export class ExampleView extends DOMWidgetView {
             return;
         }
 
+        // Wait until the sheet data the backend sent before this response is applied
+        await (this.model as ExampleModel).sheetDataUpdates;
+
         const sheetDataArray = this.getSheetDataArray();
         const analysisData = this.getAnalysisData();
         const userProfile = this.getUserProfile();
@@ -164,15 +328,14 @@ export class ExampleView extends DOMWidgetView {
         works and why it is designed the way it is.
     */
     // eslint-disable-next-line @typescript-eslint/no-explicit-any, @typescript-eslint/explicit-module-boundary-types
-    handleMessage(message: any): void {
+    handleMessage(message: any, buffers?: (ArrayBuffer | ArrayBufferView)[]): void {
         const model_id = this.model.model_id;
         const mitoAPI = window.mitoAPIMap?.get(model_id);
-        mitoAPI?.receiveResponse(message);
+        mitoAPI?.receiveResponse(message, buffers);
     }
 
     getSheetDataArray(): SheetData[] {
-        const unparsed = this.model.get('sheet_data_json')
-        return JSON.parse(unparsed);
+        return (this.model as ExampleModel).getSheetDataArray();
     }
 
     getUserProfile(): UserProfile {
@@ -186,6 +349,9 @@ export class ExampleView extends DOMWidgetView {
 
     getAnalysisData(): AnalysisData {
         const unparsed = this.model.get('analysis_data_json')
-        return JSON.parse(unparsed);
+        return {
+            ...JSON.parse(unparsed),
+            stepSummaryList: (this.model as ExampleModel).getStepSummaryList()
+        };
     }
 }
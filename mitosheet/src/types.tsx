@@ -222,6 +222,109 @@ export type SheetData = {
     columnFormatTypeObjMap: ColumnFormatTypeObjMap
 };
 
+/**
+ * The sheet data only contains the first window of rows in the dataframe. As the user
+ * scrolls, the other windows of rows are retrieved from the backend as a SheetWindow.
+ * 
+ * @param rowStart - the index of the first row in this window
+ * @param rowEnd - the index after the last row in this window
+ * @param numRows - the number of rows in the dataframe
+ * @param data - for each column in the window, the data in the rows of this window
+ * @param index - the indexes of the rows in this window
+ */
+export type SheetWindow = {
+    rowStart: number,
+    rowEnd: number,
+    numRows: number,
+    data: {
+        columnID: ColumnID;
+        columnData: (string | number | boolean)[];
+    }[];
+    index: (string | number)[];
+}
+
+
+/**
+ * A column in a BinarySheetWindow, which is either stored in the binary buffer sent 
+ * along with the window, or directly in the values. 
+ * 
+ * Datetimes are stored as seconds since the epoch, with NaN for NaT, and strings are 
+ * stored as utf-8, with the int32 offsets of each string at offsetsByteOffset.
+ */
+export type BinaryColumn = {
+    kind: 'int' | 'float' | 'bool' | 'datetime',
+    dtype: 'int32' | 'float32' | 'float64' | 'uint8',
+    byteOffset: number,
+    length: number
+} | {
+    kind: 'string',
+    byteOffset: number,
+    length: number,
+    offsetsByteOffset: number
+} | {
+    kind: 'json',
+    values: (string | number | boolean)[]
+}
+
+/**
+ * A SheetWindow that is sent as binary data, where this schema describes where the
+ * data of each column is in the binary buffer sent along with it.
+ */
+export type BinarySheetWindow = {
+    rowStart: number,
+    rowEnd: number,
+    numRows: number,
+    data: ({columnID: ColumnID} & BinaryColumn)[];
+    index: BinaryColumn;
+}
+
+/**
+ * When only some of the columns in the sheet data change, the backend sends a patch
+ * with these columns, instead of sending all of the sheet data.
+ * 
+ * @param numSheets - the number of sheets in the sheet data array
+ * @param sheetPatches - for each sheet that was modified, the patch to apply to it
+ */
+export type SheetDataPatch = {
+    numSheets: number,
+    sheetPatches: SheetPatch[]
+}
+
+/**
+ * The patch to apply to the sheet data of one sheet.
+ * 
+ * @param sheetIndex - the index of the sheet this patch is for
+ * @param sheetData - the new sheet data, other than the data of the columns
+ * @param columnIDs - the ids of all the columns in the sheet, in order
+ * @param addedColumns - the columns that were added to the sheet
+ * @param changedColumns - the columns that changed
+ * @param removedColumnIDs - the ids of the columns that were removed from the sheet
+ */
+export type SheetPatch = {
+    sheetIndex: number,
+    sheetData: Omit<SheetData, 'data'>,
+    columnIDs: ColumnID[],
+    addedColumns: SheetData['data'],
+    changedColumns: SheetData['data'],
+    removedColumnIDs: ColumnID[]
+}
+
+/**
+ * When the step summaries change, the backend sends a patch with the step summaries
+ * that changed, keyed by their step_id, instead of sending all of them.
+ * 
+ * @param numSteps - the number of step summaries after the patch is applied
+ * @param appendedStepSummaries - the step summaries for steps that are new
+ * @param changedStepSummaries - the step summaries that changed
+ * @param removedStepIDs - the step ids of the step summaries that were removed
+ */
+export type StepSummaryListPatch = {
+    numSteps: number,
+    appendedStepSummaries: StepSummary[],
+    changedStepSummaries: StepSummary[],
+    removedStepIDs: string[]
+}
+
 
 export type GraphPreprocessingParams = {
     safety_filter_turned_on_by_user: boolean
@@ -573,7 +676,8 @@ interface Experiment {
  * @param analysisName - the name of the analysis id that is for writing to the cell (after the analysis has been replayed)
  * @param analysisToReplay - the analysis that was passed through the analysis_to_replay parameter to the mitosheet.sheet call
  * @param code - the transpiled code of this analysis
- * @param stepSummaryList - a list of step summaries for the steps in this analysis
+ * @param stepSummaryList - a list of step summaries for the steps in this analysis, which is synced separately
+ *        from the rest of the analysis data, so that only the step summaries that change are sent
  * @param currStepIdx - the index of the currently checked out step, in the stepSummaryList
  * @param dataTypeInTool - the type of data in the tool in this analysis
  * @param graphDataDict - a mapping from graphID to all of the relevant graph information
@@ -584,6 +688,8 @@ interface Experiment {
  * @param lastResult - This is the result of the last step that was applied. This might be undefined if the 
  *        step does not return a result
  * @param experiment - The experiment that this user is currently running, which may not be defined
+ * @param binarySheetWindows - if the windows of rows in the sheet are retrieved as binary data, which
+ *        is set with the binary_sheet_windows parameter to the mitosheet.sheet call
  */
 export interface AnalysisData {
     analysisName: string,
@@ -600,6 +706,7 @@ export interface AnalysisData {
     renderCount: number;
     lastResult: any;
     experiment: Experiment | undefined;
+    binarySheetWindows: boolean | undefined;
 }
 
 /**
@@ -644,11 +751,22 @@ export interface ExcelExportState { exportType: 'excel', sheetIndexes: number[]
 
 export type ToolbarDropdowns = 'Edit' | 'Dataframes' | 'Columns' | 'Rows' | 'Graphs' | 'View' | 'Help'
 
+/**
+ * The progress of an edit that is executing in the background, which
+ * the backend sends in edit_progress events.
+ */
+export interface EditProgress {
+    num_steps_executed: number;
+    num_steps: number;
+    elapsed_seconds: number;
+}
+
 /**
  * State of the UI, all in one place for ease.
  */
 export interface UIState {
     loading: [string, string | undefined, string][]; // message id, step id (if it exists), message type
+    editProgress: Record<string, EditProgress>; // message id -> progress of the edit, if it executes in the background
     currOpenModal: ModalInfo;
     currOpenTaskpane: TaskpaneInfo;
     selectedColumnControlPanelTab: ControlPanelTab;
@@ -0,0 +1,120 @@
+/* 
+    Utility functions for reading the windows of rows that the backend sends as 
+    binary data, and formatting them in the same way as the backend formats the 
+    sheet data it sends as JSON.
+*/
+
+import { BinaryColumn, BinarySheetWindow, SheetWindow } from "../types";
+
+const BYTES_PER_ELEMENT = {
+    'int32': 4,
+    'float32': 4,
+    'float64': 8,
+    'uint8': 1,
+}
+
+/* 
+    Returns the number formatted in the same way that Python formats a float with str.
+*/
+export const formatPythonFloat = (value: number): string => {
+    if (isNaN(value)) {
+        return 'NaN';
+    } else if (value === Infinity) {
+        return 'inf';
+    } else if (value === -Infinity) {
+        return '-inf';
+    } else if (value === 0) {
+        return Object.is(value, -0) ? '-0.0' : '0.0';
+    }
+
+    // Like Python, toExponential gives the fewest digits that represent this number
+    const [mantissa, exponentString] = value.toExponential().split('e');
+    const exponent = parseInt(exponentString);
+    const sign = value < 0 ? '-' : '';
+    const digits = mantissa.replace('-', '').replace('.', '');
+
+    // Python uses scientific notation for small and large numbers, like 1e-05 and 1.5e+16
+    if (exponent < -4 || exponent >= 16) {
+        const exponentDigits = Math.abs(exponent) < 10 ? '0' + Math.abs(exponent) : '' + Math.abs(exponent);
+        const fractionDigits = digits.length > 1 ? '.' + digits.slice(1) : '';
+        return `${sign}${digits[0]}${fractionDigits}e${exponent < 0 ? '-' : '+'}${exponentDigits}`;
+    }
+
+    if (exponent < 0) {
+        return `${sign}0.${'0'.repeat(-exponent - 1)}${digits}`;
+    }
+
+    const integerDigits = digits.length > exponent + 1 ? digits.slice(0, exponent + 1) : digits + '0'.repeat(exponent + 1 - digits.length);
+    const fractionDigits = digits.slice(exponent + 1);
+    return `${sign}${integerDigits}.${fractionDigits === '' ? '0' : fractionDigits}`;
+}
+
+/* 
+    Returns the seconds since the epoch formatted as %Y-%m-%d %H:%M:%S
+*/
+export const formatDatetimeSeconds = (seconds: number): string => {
+    if (isNaN(seconds)) {
+        return 'NaN';
+    }
+    return new Date(seconds * 1000).toISOString().slice(0, 19).replace('T', ' ');
+}
+
+const readNumbers = (buffer: DataView, dtype: 'int32' | 'float32' | 'float64' | 'uint8', byteOffset: number, length: number): number[] => {
+    // NOTE: we read through the DataView, as the buffer may not be aligned for a typed array
+    const numbers: number[] = [];
+    for (let i = 0; i < length; i++) {
+        const elementByteOffset = byteOffset + i * BYTES_PER_ELEMENT[dtype];
+        if (dtype === 'int32') {
+            numbers.push(buffer.getInt32(elementByteOffset, true));
+        } else if (dtype === 'float32') {
+            numbers.push(buffer.getFloat32(elementByteOffset, true));
+        } else if (dtype === 'float64') {
+            numbers.push(buffer.getFloat64(elementByteOffset, true));
+        } else {
+            numbers.push(buffer.getUint8(elementByteOffset));
+        }
+    }
+    return numbers;
+}
+
+const readColumn = (buffer: DataView, column: BinaryColumn): (string | number | boolean)[] => {
+    if (column.kind === 'json') {
+        return column.values;
+    } else if (column.kind === 'string') {
+        const offsets = readNumbers(buffer, 'int32', column.offsetsByteOffset, column.length + 1);
+        const bytes = new Uint8Array(buffer.buffer, buffer.byteOffset + column.byteOffset, offsets[column.length]);
+        const decoder = new TextDecoder();
+        return offsets.slice(0, column.length).map((offset, index) => {
+            return decoder.decode(bytes.subarray(offset, offsets[index + 1]));
+        });
+    }
+
+    const numbers = readNumbers(buffer, column.dtype, column.byteOffset, column.length);
+    if (column.kind === 'float') {
+        return numbers.map(formatPythonFloat);
+    } else if (column.kind === 'datetime') {
+        return numbers.map(formatDatetimeSeconds);
+    } else if (column.kind === 'bool') {
+        return numbers.map(number => number !== 0);
+    }
+    return numbers;
+}
+
+/* 
+    Returns the SheetWindow that the binary sheet window and its buffer represent, 
+    which is the same as the SheetWindow that the backend sends as JSON.
+*/
+export const readBinarySheetWindow = (binarySheetWindow: BinarySheetWindow, buffer: DataView): SheetWindow => {
+    return {
+        rowStart: binarySheetWindow.rowStart,
+        rowEnd: binarySheetWindow.rowEnd,
+        numRows: binarySheetWindow.numRows,
+        data: binarySheetWindow.data.map(column => {
+            return {
+                columnID: column.columnID,
+                columnData: readColumn(buffer, column)
+            }
+        }),
+        index: readColumn(buffer, binarySheetWindow.index) as (string | number)[]
+    }
+}
@@ -122,18 +122,27 @@ export function getLastNonEmptyLine(codeText: string): string | undefined {
     return filteredActiveText.length > 0 ? filteredActiveText.pop() : undefined
 }
 
+// The named parameters of the mitosheet.sheet call, which are not dataframes to read in 
+const MITOSHEET_CALL_NAMED_PARAMETERS = [
+    'analysis_to_replay',
+    // TODO: remove view_df on Jan 1, 2023 (since we no longer need it)
+    'view_df',
+    'memory_budget_mb',
+    'num_replay_processes',
+    'step_result_cache_mb',
+    'binary_sheet_windows',
+    'compress_sheet_data',
+    'num_formula_processes',
+];
+
 export const getArgsFromMitosheetCallCode = (codeText: string): string[] => {
     let nameString = codeText.split('mitosheet.sheet(')[1].split(')')[0];
 
-    // If there is a (new) analysis name parameter passed, we ignore it
-    if (nameString.includes('analysis_to_replay')) {
-        nameString = nameString.split('analysis_to_replay')[0].trim();
-    }
-
-    // If there is a view_df name parameter, we ignore it
-    // TODO: remove this on Jan 1, 2023 (since we no longer need it)
-    if (nameString.includes('view_df')) {
-        nameString = nameString.split('view_df')[0].trim();
+    // We ignore any named parameters, which are always passed after the args
+    for (const parameterName of MITOSHEET_CALL_NAMED_PARAMETERS) {
+        if (nameString.includes(parameterName)) {
+            nameString = nameString.split(parameterName)[0].trim();
+        }
     }
 
     // Get the args and trim them up
@@ -0,0 +1,23 @@
+/* 
+    Utility functions for reading the compressed sheet data that the backend sends 
+    if compress_sheet_data is passed to the mitosheet.sheet call.
+*/
+
+/* 
+    Returns true if this browser can decompress the sheet data. If it cannot, all 
+    of the sheet data must be retrieved from the backend uncompressed.
+*/
+export const canDecompressSheetData = (): boolean => {
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    return (window as any).DecompressionStream !== undefined;
+}
+
+/* 
+    Decompresses the zlib compressed JSON in the buffer, and returns the JSON string.
+*/
+export const decompressJSON = async (buffer: ArrayBuffer | ArrayBufferView): Promise<string> => {
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    const decompressionStream = new (window as any).DecompressionStream('deflate');
+    const stream = new Response(buffer).body?.pipeThrough(decompressionStream);
+    return await new Response(stream).text();
+}
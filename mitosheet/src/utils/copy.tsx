@@ -81,9 +81,12 @@ const getCopyStringForSelections = (sheetData: SheetData, selections: MitoSelect
     let highRowIndex = Math.max(selections[0].startingRowIndex, selections[0].endingRowIndex);
     
     // If we only have column headers selected, then we actually want to take the entire column
-    // making sure to not take more rows than there are
+    // making sure to not take more rows than there are in the sheet data. As the sheet data 
+    // only has the windows of rows that have been in view, we stop at the first missing row
     if (lowRowIndex === -1 && highRowIndex === -1) {
-        highRowIndex = Math.min(sheetData.numRows - 1, MAX_ROWS - 1);
+        const firstMissingRowIndex = sheetData.index.findIndex(indexLabel => indexLabel === undefined);
+        const numRowsInSheetData = firstMissingRowIndex === -1 ? sheetData.index.length : firstMissingRowIndex;
+        highRowIndex = Math.min(sheetData.numRows - 1, numRowsInSheetData - 1, MAX_ROWS - 1);
     }
 
     let copyString = '';
@@ -0,0 +1,54 @@
+/* 
+    Utility functions for applying the sheet data patches that the backend sends
+    instead of all of the sheet data.
+*/
+
+import { ColumnID, SheetData, SheetDataPatch } from "../types";
+
+/* 
+    Returns the sheet data array with the patch applied to it. The sheets that were
+    not modified are the same objects, so they do not need to be rendered again.
+
+    Returns undefined if the patch cannot be applied to this sheet data array, in 
+    which case all of the sheet data must be retrieved from the backend.
+*/
+export const applySheetDataPatch = (sheetDataArray: SheetData[], sheetDataPatch: SheetDataPatch): SheetData[] | undefined => {
+    if (sheetDataArray.length !== sheetDataPatch.numSheets) {
+        return undefined;
+    }
+
+    const newSheetDataArray = [...sheetDataArray];
+    for (const sheetPatch of sheetDataPatch.sheetPatches) {
+        const sheetData: SheetData | undefined = sheetDataArray[sheetPatch.sheetIndex];
+        if (sheetData === undefined) {
+            return undefined;
+        }
+
+        const columns: Record<ColumnID, SheetData['data'][number]> = {};
+        sheetData.data.forEach(columnData => {
+            columns[columnData.columnID] = columnData;
+        });
+        sheetPatch.removedColumnIDs.forEach(columnID => {
+            delete columns[columnID];
+        });
+        sheetPatch.addedColumns.concat(sheetPatch.changedColumns).forEach(columnData => {
+            columns[columnData.columnID] = columnData;
+        });
+
+        const data: SheetData['data'] = [];
+        for (const columnID of sheetPatch.columnIDs) {
+            const columnData = columns[columnID];
+            if (columnData === undefined) {
+                return undefined;
+            }
+            data.push(columnData);
+        }
+
+        newSheetDataArray[sheetPatch.sheetIndex] = {
+            ...sheetPatch.sheetData,
+            data: data
+        };
+    }
+
+    return newSheetDataArray;
+}
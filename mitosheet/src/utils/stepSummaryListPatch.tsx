@@ -0,0 +1,35 @@
+/* 
+    Utility functions for applying the step summary list patches that the backend 
+    sends instead of all of the step summaries.
+*/
+
+import { StepSummary, StepSummaryListPatch } from "../types";
+
+/* 
+    Returns the step summary list with the patch applied to it, ordered by the 
+    step_idx of the step summaries.
+
+    Returns undefined if the patch cannot be applied to this step summary list, in 
+    which case all of the step summaries must be retrieved from the backend.
+*/
+export const applyStepSummaryListPatch = (stepSummaryList: StepSummary[], stepSummaryListPatch: StepSummaryListPatch): StepSummary[] | undefined => {
+    const removedStepIDs = new Set(stepSummaryListPatch.removedStepIDs);
+    const changedStepSummaries: Record<string, StepSummary> = {};
+    stepSummaryListPatch.changedStepSummaries.forEach(stepSummary => {
+        changedStepSummaries[stepSummary.step_id] = stepSummary;
+    });
+
+    const newStepSummaryList = stepSummaryList
+        .filter(stepSummary => !removedStepIDs.has(stepSummary.step_id))
+        .map(stepSummary => changedStepSummaries[stepSummary.step_id] || stepSummary)
+        .concat(stepSummaryListPatch.appendedStepSummaries);
+    
+    if (newStepSummaryList.length !== stepSummaryListPatch.numSteps) {
+        return undefined;
+    }
+
+    // A step with the same step_id as an older step replaces it at the end of the
+    // analysis, so the step summaries might not be in order
+    newStepSummaryList.sort((stepSummaryOne, stepSummaryTwo) => stepSummaryOne.step_idx - stepSummaryTwo.step_idx);
+    return newStepSummaryList;
+}